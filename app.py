@@ -3,12 +3,22 @@ import pandas as pd
 import tkinter as tk
 from tkinter import ttk, messagebox
 import threading
+import queue
 import time
 import datetime
 
+from modules.order_batch import BatchOrderEngine
+
 # Global variable for MT5 initialization status
 mt5_initialized = False
 
+# Open Trades panel refresh settings
+POSITIONS_FETCH_INTERVAL = 1.0  # seconds between positions_get() calls on the worker thread
+UI_APPLY_INTERVAL_MS = 200      # how often the Tk thread applies the latest fetched snapshot
+
+# Order batches: 1 = tight sequential loop, >1 = bounded number of concurrent order_send calls
+BATCH_MAX_WORKERS = 4
+
 def initialize_mt5():
     global mt5_initialized
     if not mt5.initialize():
@@ -35,9 +45,20 @@ class MT5TradingApp:
 
         self.symbols = ["OTHER", "GOLD#", "BTCUSD#", "ETHUSD#", "EURUSD#", "GBPJPY#", "USDJPY#", "USDGBP#"]
 
+        # Open Trades panel state: rows currently shown, keyed by ticket
+        self.trade_rows = {}
+        self.positions_queue = queue.Queue(maxsize=1)
+        self.refresh_event = threading.Event()
+
+        # Order batches (Order Count ladders and Close All)
+        self.order_engine = BatchOrderEngine(max_workers=BATCH_MAX_WORKERS)
+        self.batch_in_progress = False
+        self.batch_reports = queue.Queue()
+
         self.create_widgets()
         self.update_open_trades_thread = threading.Thread(target=self.update_open_trades_periodically, daemon=True)
         self.update_open_trades_thread.start()
+        self.apply_position_updates() # Start the single UI-side update loop
         self.update_countdown_timer() # Start the countdown timer
 
     def create_widgets(self):
@@ -96,11 +117,18 @@ class MT5TradingApp:
         ttk.Button(button_frame, text="SELL", command=lambda: self.place_order(mt5.ORDER_TYPE_SELL)).pack(side="left", padx=5)
         ttk.Button(button_frame, text="CLOSE ALL TRADES", command=self.close_all_trades).pack(side="left", padx=5)
 
+        # Result of the last order batch (aggregated, with per-order latency)
+        self.batch_status_label = ttk.Label(input_frame, text="")
+        self.batch_status_label.grid(row=7, column=0, columnspan=3, padx=5, pady=(0, 5), sticky="w")
+
         # Open Trades Table
         self.trades_frame = ttk.LabelFrame(self.master, text="Open Trades")
         self.trades_frame.pack(padx=10, pady=10, fill="both", expand=True)
 
-        self.trades_table = ttk.Treeview(self.trades_frame, columns=("close_action", "ticket", "symbol", "time", "type", "price", "sl", "tp", "volume"), show="headings")
+        self.total_profit_label = ttk.Label(self.trades_frame, text="Total P&L: 0.00", font=("Arial", 12, "bold"))
+        self.total_profit_label.pack(anchor="e", padx=5)
+
+        self.trades_table = ttk.Treeview(self.trades_frame, columns=("close_action", "ticket", "symbol", "time", "type", "price", "sl", "tp", "volume", "current", "profit"), show="headings")
         self.trades_table.heading("close_action", text="Close")
         self.trades_table.heading("ticket", text="Ticket")
         self.trades_table.heading("symbol", text="Symbol")
@@ -110,6 +138,8 @@ class MT5TradingApp:
         self.trades_table.heading("sl", text="S/L")
         self.trades_table.heading("tp", text="T/P")
         self.trades_table.heading("volume", text="Volume")
+        self.trades_table.heading("current", text="Current")
+        self.trades_table.heading("profit", text="Profit")
 
         self.trades_table.column("close_action", width=70, anchor="center")
         self.trades_table.column("ticket", width=80, anchor="center")
@@ -120,6 +150,11 @@ class MT5TradingApp:
         self.trades_table.column("sl", width=80, anchor="center")
         self.trades_table.column("tp", width=80, anchor="center")
         self.trades_table.column("volume", width=70, anchor="center")
+        self.trades_table.column("current", width=90, anchor="center")
+        self.trades_table.column("profit", width=80, anchor="center")
+
+        self.trades_table.tag_configure("profit", foreground="green")
+        self.trades_table.tag_configure("loss", foreground="red")
 
         self.trades_table.pack(fill="both", expand=True)
 
@@ -165,66 +200,26 @@ class MT5TradingApp:
             messagebox.showerror("Input Error", "Volume and Order Count must be positive numbers.")
             return
 
-        point = mt5.symbol_info(symbol).point
-        if point is None:
-            messagebox.showerror("MT5 Error", f"Failed to get symbol info for {symbol}. Error: {mt5.last_error()}")
-            return
+        sl_points = self._parse_points(self.sl_entry.get(), "SL")
+        tp_points = self._parse_points(self.tp_entry.get(), "TP")
 
-        symbol_info_tick = mt5.symbol_info_tick(symbol)
-        if symbol_info_tick is None:
-            messagebox.showerror("MT5 Error", f"Failed to get tick info for {symbol}. Error: {mt5.last_error()}")
+        # Build every request from one tick, then send them without UI work in between
+        requests = self.order_engine.prepare_open(symbol, order_type, volume, order_count, magic_number, sl_points, tp_points)
+        if requests is None:
+            messagebox.showerror("MT5 Error", f"Failed to get symbol/tick info for {symbol}. Error: {mt5.last_error()}")
             return
 
-        sl_points = self.sl_entry.get().strip()
-        tp_points = self.tp_entry.get().strip()
-
-        for i in range(order_count):
-            symbol_info_tick = mt5.symbol_info_tick(symbol)
-            if symbol_info_tick is None:
-                messagebox.showerror("MT5 Error", f"Failed to get tick info for {symbol}. Error: {mt5.last_error()}")
-                return
+        self.submit_batch(requests, f"{'BUY' if order_type == mt5.ORDER_TYPE_BUY else 'SELL'} {order_count} x {volume} {symbol}")
 
-            current_price = symbol_info_tick.ask if order_type == mt5.ORDER_TYPE_BUY else symbol_info_tick.bid
-
-            request = {
-                "action": mt5.TRADE_ACTION_DEAL,
-                "symbol": symbol,
-                "volume": volume,
-                "type": order_type,
-                "price": current_price,
-                "deviation": 10,
-                "magic": magic_number, # Use the dynamic magic number
-                "comment": "Python script order",
-                "type_time": mt5.ORDER_TIME_GTC,
-                "type_filling": mt5.ORDER_FILLING_IOC,
-            }
-
-            if sl_points:
-                try:
-                    sl_points_val = float(sl_points)
-                    if order_type == mt5.ORDER_TYPE_BUY:
-                        request["sl"] = current_price - sl_points_val * point
-                    else:
-                        request["sl"] = current_price + sl_points_val * point
-                except ValueError:
-                    messagebox.showwarning("Input Warning", "Invalid SL value. SL will not be set for this order.")
-
-            if tp_points:
-                try:
-                    tp_points_val = float(tp_points)
-                    if order_type == mt5.ORDER_TYPE_BUY:
-                        request["tp"] = current_price + tp_points_val * point
-                    else:
-                        request["tp"] = current_price - tp_points_val * point
-                except ValueError:
-                    messagebox.showwarning("Input Warning", "Invalid TP value. TP will not be set for this order.")
-
-            result = mt5.order_send(request)
-            if result is None:
-                messagebox.showerror("MT5 Error", f"Order send failed for {symbol}. No response from MT5 terminal. Error: {mt5.last_error()}")
-            elif result.retcode != mt5.TRADE_RETCODE_DONE:
-                messagebox.showerror("MT5 Error", f"Order send failed for {symbol}, retcode={result.retcode}. Error: {mt5.last_error()}")
-            self.update_open_trades()
+    def _parse_points(self, value, label):
+        value = value.strip()
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            messagebox.showwarning("Input Warning", f"Invalid {label} value. {label} will not be set for these orders.")
+            return None
 
     def close_all_trades(self):
         if not mt5_initialized:
@@ -239,8 +234,30 @@ class MT5TradingApp:
             # No messagebox.showinfo here as per requirement
             return
 
-        for position in open_positions:
-            self.close_single_trade(position.ticket, position.symbol, position.volume, "BUY" if position.type == mt5.ORDER_TYPE_BUY else "SELL")
+        self.submit_batch(self.order_engine.prepare_close(open_positions), f"CLOSE ALL ({len(open_positions)})")
+
+    def submit_batch(self, requests, label):
+        """
+        Sends a prepared batch on a worker thread and reports it back to the Tk
+        thread once, with a single refresh of the Open Trades panel.
+        """
+        if self.batch_in_progress:
+            messagebox.showwarning("Busy", "Previous batch is still being sent.")
+            return
+        self.batch_in_progress = True
+        self.batch_status_label.config(text=f"{label}: sending {len(requests)} order(s)...")
+
+        def worker():
+            self.batch_reports.put((label, self.order_engine.submit(requests)))
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def show_batch_report(self, label, report):
+        """Tk thread: shows the aggregated batch result and refreshes the table once."""
+        self.batch_in_progress = False
+        self.batch_status_label.config(text=f"{label}: {report.summary()}")
+        if report.failed:
+            messagebox.showerror("MT5 Error", f"{label}: {len(report.failed)} of {len(report.results)} order(s) failed.\n\n" + "\n".join(report.details()))
         self.update_open_trades()
 
     def close_single_trade(self, ticket, symbol, volume, trade_type):
@@ -270,23 +287,28 @@ class MT5TradingApp:
         self.update_open_trades()
 
     def update_open_trades(self):
-        for item in self.trades_table.get_children():
-            self.trades_table.delete(item)
-
-        if not mt5_initialized:
-            return
-
+        """
+        Requests an immediate refresh of the Open Trades panel. The fetch runs on
+        the worker thread and the table is updated by apply_position_updates().
+        """
+        self.refresh_event.set()
+
+    def fetch_open_trades(self):
+        """
+        Fetches the open positions once and turns them into row values keyed by ticket.
+        Runs on the worker thread; must not touch any Tk widget.
+        """
         positions = mt5.positions_get()
         if positions is None:
             # This can happen if MT5 is not connected or there's an issue fetching positions
             # Do not show an error messagebox repeatedly in a periodic update thread
-            # Instead, log it or handle it silently if it's expected to be transient
             print(f"Failed to get positions for update. Error: {mt5.last_error()}")
-            return
+            return None
 
+        rows = {}
         for pos in positions:
             trade_type = "BUY" if pos.type == mt5.ORDER_TYPE_BUY else "SELL"
-            self.trades_table.insert("", "end", values=(
+            rows[pos.ticket] = (
                 "Close", # Add "Close" text for the new column at the first index
                 pos.ticket,
                 pos.symbol,
@@ -295,14 +317,64 @@ class MT5TradingApp:
                 pos.price_open,
                 pos.sl,
                 pos.tp,
-                pos.volume
-            ), iid=pos.ticket) # Use ticket as iid for easy lookup
+                pos.volume,
+                pos.price_current,
+                f"{pos.profit:.2f}"
+            )
+        return rows
 
     def update_open_trades_periodically(self):
+        """
+        Worker thread: one positions_get() per interval (or right after an order),
+        handing only the latest snapshot to the Tk thread.
+        """
         while True:
-            # Use after() to schedule the update on the main Tkinter thread
-            self.master.after(1000, self.update_open_trades)
-            time.sleep(1)
+            if mt5_initialized:
+                rows = self.fetch_open_trades()
+                if rows is not None:
+                    # Keep only the newest snapshot so the UI never falls behind
+                    try:
+                        self.positions_queue.get_nowait()
+                    except queue.Empty:
+                        pass
+                    self.positions_queue.put(rows)
+            self.refresh_event.wait(POSITIONS_FETCH_INTERVAL)
+            self.refresh_event.clear()
+
+    def apply_position_updates(self):
+        """
+        Tk thread: applies the latest snapshot as a diff against the rows on screen
+        (insert new tickets, update changed rows, delete closed tickets).
+        """
+        try:
+            rows = self.positions_queue.get_nowait()
+        except queue.Empty:
+            rows = None
+
+        if rows is not None:
+            for ticket in list(self.trade_rows):
+                if ticket not in rows:
+                    self.trades_table.delete(ticket)
+                    del self.trade_rows[ticket]
+
+            for ticket, values in rows.items():
+                tag = "profit" if float(values[10]) >= 0 else "loss"
+                previous = self.trade_rows.get(ticket)
+                if previous is None:
+                    self.trades_table.insert("", "end", values=values, iid=ticket, tags=(tag,)) # Use ticket as iid for easy lookup
+                elif previous != values:
+                    self.trades_table.item(ticket, values=values, tags=(tag,))
+                self.trade_rows[ticket] = values
+
+            total_profit = sum(float(values[10]) for values in rows.values())
+            self.total_profit_label.config(text=f"Total P&L: {total_profit:.2f}", foreground="green" if total_profit >= 0 else "red")
+
+        try:
+            self.show_batch_report(*self.batch_reports.get_nowait())
+        except queue.Empty:
+            pass
+
+        self.master.after(UI_APPLY_INTERVAL_MS, self.apply_position_updates)
 
     def update_countdown_timer(self):
         now = datetime.datetime.now()
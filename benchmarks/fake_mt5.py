@@ -0,0 +1,223 @@
+#-----------------------------------------
+# filename: benchmarks/fake_mt5.py
+# description: In-memory stand-in for the MetaTrader5 package so the
+#              benchmarks run anywhere (and always on the same data).
+#              Serves a synthetic GOLD-like history: a seeded random walk
+#              around 3,700 with M1-sized steps, 0.01 point, 20-point spread,
+#              plus generated history orders / deals for the database sync.
+#
+#   from benchmarks import fake_mt5
+#   mt5 = fake_mt5.install()   # before importing anything that imports MetaTrader5
+#-----------------------------------------
+import sys
+import types
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+
+SYMBOL = "GOLD#"
+POINT = 0.01
+SPREAD_POINTS = 20
+HISTORY_BARS = 60000      # M1 bars; covers the 20,000-bar windows plus gaps
+HISTORY_ORDERS = 2000
+HISTORY_DEALS = 4000
+START_TIME = 1767225600   # 2026-01-01 00:00 UTC, a Thursday
+
+TIMEFRAME_SECONDS = {1: 60, 2: 120, 5: 300, 15: 900, 30: 1800, 16385: 3600, 16388: 14400, 16408: 86400}
+
+RATES_DTYPE = np.dtype([('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+                        ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8')])
+
+AccountInfo = namedtuple('AccountInfo', 'login trade_mode leverage balance credit profit equity margin margin_free server currency')
+SymbolInfo = namedtuple('SymbolInfo', 'name point digits spread trade_tick_size trade_tick_value volume_min volume_step')
+Tick = namedtuple('Tick', 'time bid ask last volume time_msc')
+OrderSendResult = namedtuple('OrderSendResult', 'retcode deal order volume price bid ask comment request_id')
+TradeOrder = namedtuple('TradeOrder', 'ticket time_setup time_setup_msc time_done time_done_msc time_expiration type '
+                                      'type_time type_filling state magic position_id position_by_id reason '
+                                      'volume_initial volume_current price_open sl tp price_current price_stoplimit '
+                                      'symbol comment external_id')
+TradeDeal = namedtuple('TradeDeal', 'ticket order time time_msc type entry magic position_id reason volume price '
+                                    'commission swap profit fee symbol comment external_id')
+
+
+def synthetic_gold_rates(bars=HISTORY_BARS, seconds=60, seed=7, start=START_TIME):
+    """M1-like OHLC bars as MT5 returns them (structured array, oldest first)."""
+    rng = np.random.default_rng(seed)
+    close = 3700.0 + np.cumsum(rng.normal(0.0, 0.35, bars))
+    rates = np.zeros(bars, dtype=RATES_DTYPE)
+    rates['time'] = start + np.arange(bars, dtype=np.int64) * seconds
+    rates['open'] = np.r_[close[0], close[:-1]]
+    rates['close'] = close
+    wick = np.abs(rng.normal(0.0, 0.25, (2, bars)))
+    rates['high'] = np.maximum(rates['open'], close) + wick[0]
+    rates['low'] = np.minimum(rates['open'], close) - wick[1]
+    rates['tick_volume'] = rng.integers(20, 400, bars)
+    rates['spread'] = SPREAD_POINTS
+    for field in ('open', 'high', 'low', 'close'):
+        rates[field] = np.round(rates[field], 2)  # 0.01 point, like the broker feed
+    return rates
+
+
+def synthetic_orders(count=HISTORY_ORDERS, seed=11, start=START_TIME):
+    rng = np.random.default_rng(seed)
+    times = start + np.sort(rng.integers(0, HISTORY_BARS * 60, count))
+    prices = np.round(3700.0 + rng.normal(0.0, 15.0, count), 2)
+    return tuple(
+        TradeOrder(100000 + i, int(t), int(t) * 1000, int(t) + 1, (int(t) + 1) * 1000, 0, i % 2,
+                   0, 1, 4, int(rng.integers(10, 99)), 100000 + i, 0, 3,
+                   0.01, 0.0, float(p), float(p) - 3.0, float(p) + 6.0, float(p), 0.0,
+                   SYMBOL, 'strategy.py', '')
+        for i, (t, p) in enumerate(zip(times, prices))
+    )
+
+
+def synthetic_deals(count=HISTORY_DEALS, seed=13, start=START_TIME):
+    rng = np.random.default_rng(seed)
+    times = start + np.sort(rng.integers(0, HISTORY_BARS * 60, count))
+    prices = np.round(3700.0 + rng.normal(0.0, 15.0, count), 2)
+    profits = np.round(rng.normal(0.5, 4.0, count), 2)
+    return tuple(
+        TradeDeal(200000 + i, 100000 + i // 2, int(t), int(t) * 1000, i % 2, i % 2, int(rng.integers(10, 99)),
+                  100000 + i // 2, 3, 0.01, float(p), 0.0, 0.0, float(profit) if i % 2 else 0.0, 0.0,
+                  SYMBOL, 'strategy.py', '')
+        for i, (t, p, profit) in enumerate(zip(times, prices, profits))
+    )
+
+
+class FakeTerminal:
+    """
+    The terminal state behind the module functions. `end` is the number of M1
+    bars that exist "now"; advance() moves the clock forward by whole bars.
+    """
+    def __init__(self, bars=HISTORY_BARS, start_bars=40000):
+        self.history = synthetic_gold_rates(bars)
+        self.end = start_bars
+        self.orders = synthetic_orders()
+        self.deals = synthetic_deals()
+        self.resampled = {}
+        self.next_ticket = 300000
+
+    def advance(self, bars=1):
+        self.end = min(len(self.history), self.end + bars)
+
+    def now(self):
+        return int(self.history['time'][self.end - 1])
+
+    def rates(self, timeframe):
+        seconds = TIMEFRAME_SECONDS.get(timeframe, 60)
+        if seconds == 60:
+            return self.history[:self.end]
+        if seconds not in self.resampled:
+            self.resampled[seconds] = self._resample(seconds)
+        bars = self.resampled[seconds]
+        return bars[:np.searchsorted(bars['time'], self.now(), side='right')]
+
+    def _resample(self, seconds):
+        history = self.history
+        buckets = history['time'] // seconds * seconds
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(history)]
+        bars = np.zeros(len(starts), dtype=RATES_DTYPE)
+        bars['time'] = buckets[starts]
+        bars['open'] = history['open'][starts]
+        bars['close'] = history['close'][ends - 1]
+        bars['high'] = np.maximum.reduceat(history['high'], starts)
+        bars['low'] = np.minimum.reduceat(history['low'], starts)
+        bars['tick_volume'] = np.add.reduceat(history['tick_volume'], starts)
+        bars['spread'] = SPREAD_POINTS
+        return bars
+
+
+def _timestamp(value):
+    return int(value.timestamp()) if isinstance(value, datetime) else int(value)
+
+
+def build(terminal=None):
+    """Returns a module object with the MetaTrader5 API surface the repo uses."""
+    terminal = terminal or FakeTerminal()
+    mt5 = types.ModuleType('MetaTrader5')
+    mt5.__author__ = 'benchmarks.fake_mt5'
+    mt5.__version__ = '5.0.0-fake'
+    mt5.terminal = terminal
+
+    for name, value in {
+        'TIMEFRAME_M1': 1, 'TIMEFRAME_M2': 2, 'TIMEFRAME_M5': 5, 'TIMEFRAME_M15': 15, 'TIMEFRAME_M30': 30,
+        'TIMEFRAME_H1': 16385, 'TIMEFRAME_H4': 16388, 'TIMEFRAME_D1': 16408,
+        'ORDER_TYPE_BUY': 0, 'ORDER_TYPE_SELL': 1, 'TRADE_ACTION_DEAL': 1, 'TRADE_ACTION_SLTP': 6,
+        'ORDER_TIME_GTC': 0, 'ORDER_FILLING_FOK': 0, 'ORDER_FILLING_IOC': 1, 'ORDER_FILLING_RETURN': 2,
+        'TRADE_RETCODE_DONE': 10009, 'POSITION_TYPE_BUY': 0, 'POSITION_TYPE_SELL': 1,
+        'DEAL_ENTRY_IN': 0, 'DEAL_ENTRY_OUT': 1,
+    }.items():
+        setattr(mt5, name, value)
+
+    def copy_rates_from_pos(symbol, timeframe, start_pos, count):
+        rates = terminal.rates(timeframe)
+        end = len(rates) - start_pos
+        return rates[max(0, end - count):max(0, end)].copy()
+
+    def copy_rates_range(symbol, timeframe, date_from, date_to):
+        rates = terminal.rates(timeframe)
+        left = np.searchsorted(rates['time'], _timestamp(date_from), side='left')
+        right = np.searchsorted(rates['time'], _timestamp(date_to), side='right')
+        return rates[left:right].copy()
+
+    def copy_rates_from(symbol, timeframe, date_from, count):
+        rates = terminal.rates(timeframe)
+        right = np.searchsorted(rates['time'], _timestamp(date_from), side='right')
+        return rates[max(0, right - count):right].copy()
+
+    def history_orders_get(date_from, date_to, **kwargs):
+        left, right = _timestamp(date_from), _timestamp(date_to)
+        return tuple(order for order in terminal.orders if left <= order.time_setup <= right)
+
+    def history_deals_get(date_from, date_to, **kwargs):
+        left, right = _timestamp(date_from), _timestamp(date_to)
+        return tuple(deal for deal in terminal.deals if left <= deal.time <= right)
+
+    def symbol_info_tick(symbol):
+        bar = terminal.history[terminal.end - 1]
+        bid = float(bar['close'])
+        return Tick(int(bar['time']), bid, round(bid + SPREAD_POINTS * POINT, 2), 0.0, 0, int(bar['time']) * 1000)
+
+    def order_send(request):
+        terminal.next_ticket += 1
+        price = request.get('price', 0.0)
+        return OrderSendResult(10009, terminal.next_ticket, terminal.next_ticket, request.get('volume', 0.0),
+                               price, price, price, 'Request executed', 1)
+
+    functions = {
+        'initialize': lambda *args, **kwargs: True,
+        'login': lambda *args, **kwargs: True,
+        'shutdown': lambda: None,
+        'last_error': lambda: (1, 'Success'),
+        'version': lambda: (500, 4620, '01 Jan 2026'),
+        'account_info': lambda: AccountInfo(12345678, 0, 500, 10000.0, 0.0, 0.0, 10000.0, 0.0, 10000.0,
+                                            'Fake-Demo', 'USD'),
+        'terminal_info': lambda: None,
+        'symbol_info': lambda symbol: SymbolInfo(symbol, POINT, 2, SPREAD_POINTS, POINT, 1.0, 0.01, 0.01),
+        'symbol_select': lambda symbol, enable=True: True,
+        'symbol_info_tick': symbol_info_tick,
+        'copy_rates_from_pos': copy_rates_from_pos,
+        'copy_rates_range': copy_rates_range,
+        'copy_rates_from': copy_rates_from,
+        'copy_ticks_range': lambda *args, **kwargs: None,
+        'copy_ticks_from': lambda *args, **kwargs: None,
+        'positions_get': lambda *args, **kwargs: (),
+        'positions_total': lambda: 0,
+        'orders_get': lambda *args, **kwargs: (),
+        'order_check': lambda request: None,
+        'order_send': order_send,
+        'history_orders_get': history_orders_get,
+        'history_deals_get': history_deals_get,
+    }
+    for name, function in functions.items():
+        setattr(mt5, name, function)
+    return mt5
+
+
+def install(terminal=None):
+    """Registers the fake as `MetaTrader5` for every later import in this process."""
+    mt5 = build(terminal)
+    sys.modules['MetaTrader5'] = mt5
+    return mt5
@@ -0,0 +1,414 @@
+#-----------------------------------------
+# filename: benchmarks/suite.py
+# description: Benchmarks of the per-cycle indicator path, chart rendering
+#              and the database writers, against benchmarks/fake_mt5.py
+#              (synthetic GOLD history, no terminal needed). Every run is
+#              appended to benchmarks/results/history.json; a case slower
+#              than the median of its last BASELINE_RUNS runs on this machine
+#              by more than the threshold is a regression and the suite exits 1.
+#
+#   python -m benchmarks.suite                     -> all cases, saved to history
+#   python -m benchmarks.suite ema candle          -> cases whose name contains ema / candle
+#   python -m benchmarks.suite --threshold=0.10    -> fail above +10%
+#   python -m benchmarks.suite --no-save           -> compare only, keep history unchanged
+#-----------------------------------------
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import logging
+import platform
+import tempfile
+import importlib
+import statistics
+import subprocess
+import contextlib
+from datetime import datetime
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+    sys.path.insert(0, REPO_DIR)  # the cases run from a scratch working directory
+
+from benchmarks import fake_mt5
+
+mt5 = fake_mt5.install() # Must precede every import of MetaTrader5
+
+import numpy as np
+import pandas as pd
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+#-----------------------------------
+# Utilities and Global Variables
+#-----------------------------------
+from modules.utilities import log_success, log_error, log_warning, log_info
+
+console = Console()
+
+HISTORY_PATH = os.path.join(REPO_DIR, "benchmarks", "results", "history.json")
+DEFAULT_THRESHOLD = 0.25  # +25% over the baseline fails the run
+BASELINE_RUNS = 5         # baseline = median of this many previous runs
+MIN_BASELINE_RUNS = 3     # fewer previous runs only report the change
+MIN_ROUND_SECONDS = 0.1   # fast cases are repeated until one round takes this long
+HISTORY_LIMIT = 200       # runs kept per machine
+REPEAT = 7
+BARS = 20000              # the window the strategies load
+
+
+class Skipped(Exception):
+    """A case whose dependencies (matplotlib, dotenv, ...) are not installed here."""
+
+
+def import_optional(name):
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return importlib.import_module(name)
+    except ImportError as e:
+        raise Skipped(str(e))
+
+
+def rates_frame(bars=BARS, timeframe=mt5.TIMEFRAME_M1):
+    rates = mt5.copy_rates_from_pos(fake_mt5.SYMBOL, timeframe, 0, bars)
+    frame = pd.DataFrame(rates)
+    frame['time'] = pd.to_datetime(frame['time'], unit='s')
+    return frame
+
+
+#-----------------------------------
+# Cases
+#-----------------------------------
+# Each case prepares its inputs and returns (run, setup, number): run() is
+# timed `number` times per repeat, setup() (optional) runs untimed before
+# every repeat and resets whatever run() consumes. Without a setup, number
+# is only the starting point and grows until a round takes MIN_ROUND_SECONDS.
+
+def case_get_last_ema_value():
+    from modules.indicators import Indicators
+    frame = rates_frame()
+    return (lambda: Indicators(frame).get_last_ema_value(21)), None, 20
+
+
+def case_calculate_candle_range():
+    from modules.indicators import Indicators
+    indicators = Indicators()
+    return (lambda: indicators.calculate_candle_range(fake_mt5.SYMBOL, mt5.TIMEFRAME_H1)), None, 2000
+
+
+def case_get_data_dataframe():
+    strategy_module = import_optional("m2_3LH_1021_t350")
+
+    class Config:
+        symbol = fake_mt5.SYMBOL
+
+    strategy = strategy_module.M2AverageZone.__new__(strategy_module.M2AverageZone)
+    strategy.config = Config()
+    return strategy.get_data, None, 10
+
+
+def case_bar_feed_new_bar():
+    from modules.bar_feed import BarFeed
+    feed = BarFeed(fake_mt5.SYMBOL, mt5.TIMEFRAME_M1, BARS)
+    feed.update()
+    for period in (7, 21, 200):
+        feed.ema(period)
+    return feed.update, (lambda: mt5.terminal.advance(1)), 1
+
+
+def case_strategy_26_calculate_emas():
+    strategy_26 = import_optional("strategy_26")
+    logging.getLogger().setLevel(logging.WARNING)  # its per-call INFO line goes to the console
+    data = rates_frame(timeframe=mt5.TIMEFRAME_M2).set_index('time')
+    return (lambda: strategy_26.calculate_emas(data)), None, 20
+
+
+def case_create_trade_chart():
+    chart_screenshot = import_optional("modules.chart_screenshot")
+    chart_screenshot.console.quiet = True
+    from modules.indicators import Indicators
+    frame = rates_frame()
+    emas = Indicators(frame).calculate_emas((7, 20, 21, 50, 200))
+    frame['entry'], frame['resistance'], frame['support'] = emas[7], emas[20], emas[21]
+    frame['consolidation_filter'], frame['long_term_trend'] = emas[50], emas[200]
+    tool = chart_screenshot.screenshot("screenshots/GOLD/")
+    entry = float(frame['close'].iloc[-1])
+
+    def run():
+        tool.create_trade_chart(frame, 'BUY', entry, entry - 3.0, entry + 6.0, 1, 2, 3, 'bench', 'bench.py',
+                                fake_mt5.SYMBOL, 300, 600, 99)
+
+    def setup():
+        shutil.rmtree("screenshots", ignore_errors=True)
+
+    run()
+    if not os.listdir("screenshots/GOLD/"):
+        raise RuntimeError("create_trade_chart did not write a chart")
+    return run, setup, 1
+
+
+def case_insert_entry():
+    entries = import_optional("entries")
+    for handler in list(logging.getLogger().handlers):
+        if type(handler) is logging.StreamHandler:
+            logging.getLogger().removeHandler(handler)  # entries.log still gets every line
+    logging.getLogger().setLevel(logging.INFO)
+    entries.create_entries_table()
+    data = {'file_name': 'bench.py', 'account_no': 12345678, 'account_type': 'Demo', 'server': 'Fake-Demo',
+            'strategy_id': 99, 'symbol': fake_mt5.SYMBOL, 'trend_timeframe': 'M2', 'entry_timeframe': 'M2',
+            'deviation': 20, 'SL_POINTS': 300, 'TP_POINTS': 600, 'EMA_DISTANCE_THRESHOLD': 130,
+            'MAX_OPEN_TRADES_PER_MAGIC': 1, 'EMA_PERIOD': 20, 'TRADING_HOURS_START': 0, 'TRADING_HOURS_END': 24,
+            'latest_ema': 3700.0, 'ema_distance_m2': 50, 'signal': 'buy', 'trade_type': 'BUY',
+            'current_price': 3701.0, 'sl_price': 3698.0, 'tp_price': 3707.0, 'deal_ticket': 1,
+            'trade_note': 'benchmark', 'order_ticket': 1}
+    return (lambda: entries.insert_entry(data)), None, 50
+
+
+def case_market_data_initial():
+    market_data = import_optional("market_data")
+    market_data.console.quiet = True
+    collector = market_data.MarketDataCollector()
+    collector.create_connection()
+    collector.create_table()
+    run = lambda: collector.populate_initial_data(fake_mt5.SYMBOL, mt5.TIMEFRAME_M1, BARS)
+    return run, None, 1
+
+
+def case_market_data_gap_fill():
+    market_data = import_optional("market_data")
+    market_data.console.quiet = True
+    collector = market_data.MarketDataCollector()
+    collector.create_connection()
+    collector.create_table()
+    collector.populate_initial_data(fake_mt5.SYMBOL, mt5.TIMEFRAME_M1, BARS)
+    last = collector.get_last_db_timestamp()
+    end = mt5.terminal.end
+
+    def setup():
+        # Drop what the previous repeat appended: the same 17 bars are missing again
+        collector.conn.execute(f"DELETE FROM {market_data.TABLE_NAME} WHERE time > ?", (last,))
+        collector.conn.commit()
+        mt5.terminal.end = end + 17
+
+    return (lambda: collector.check_and_fill_gaps(fake_mt5.SYMBOL, mt5.TIMEFRAME_M1, last)), setup, 1
+
+
+def case_database_live_sync():
+    database_live = import_optional("database_live")
+    connection = database_live.create_connection()
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            database_live.fetch_and_save_orders(connection)
+            database_live.fetch_and_save_deals(connection)
+
+    def setup():
+        # Full sync: every order / deal is new again
+        connection.execute("DROP TABLE IF EXISTS orders_live")
+        connection.execute("DROP TABLE IF EXISTS deals_live")
+        connection.commit()
+
+    return run, setup, 1
+
+
+def case_database_live_idle_sync():
+    database_live = import_optional("database_live")
+    connection = database_live.create_connection()
+    with contextlib.redirect_stdout(io.StringIO()):
+        database_live.fetch_and_save_orders(connection)
+        database_live.fetch_and_save_deals(connection)
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            database_live.fetch_and_save_orders(connection)
+            database_live.fetch_and_save_deals(connection)
+
+    return run, None, 5
+
+
+CASES = {
+    "indicators.get_last_ema_value (20k bars)": case_get_last_ema_value,
+    "indicators.calculate_candle_range": case_calculate_candle_range,
+    "get_data DataFrame (m2_3LH_1021_t350)": case_get_data_dataframe,
+    "bar_feed.update (new bar, 3 EMAs)": case_bar_feed_new_bar,
+    "strategy_26.calculate_emas (20k M2 bars)": case_strategy_26_calculate_emas,
+    "chart_screenshot.create_trade_chart": case_create_trade_chart,
+    "entries.insert_entry": case_insert_entry,
+    "market_data initial load (20k bars)": case_market_data_initial,
+    "market_data gap fill (17 bars)": case_market_data_gap_fill,
+    "database_live full sync": case_database_live_sync,
+    "database_live sync, nothing new": case_database_live_idle_sync,
+}
+
+
+#-----------------------------------
+# Runner
+#-----------------------------------
+def calibrate(run, number):
+    """Calls per round so that a round takes at least MIN_ROUND_SECONDS."""
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            run()
+        elapsed = time.perf_counter() - started
+        if elapsed >= MIN_ROUND_SECONDS:
+            return number
+        number = max(number * 2, int(number * MIN_ROUND_SECONDS / max(elapsed, 1e-6) * 1.2))
+
+
+def measure(run, setup=None, number=1, repeat=REPEAT):
+    """Best and median milliseconds per call over `repeat` rounds of `number` calls."""
+    if setup is None:
+        number = calibrate(run, number)
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        for _ in range(number):
+            run()
+        timings.append((time.perf_counter() - started) / number * 1000)
+    return min(timings), statistics.median(timings)
+
+
+def run_case(name, factory):
+    """Runs one case in its own scratch directory (databases, logs, charts)."""
+    cwd = os.getcwd()
+    scratch = tempfile.mkdtemp(prefix="mt5_bench_")
+    os.chdir(scratch)
+    try:
+        run, setup, number = factory()
+        if setup:
+            setup()
+        run()  # warm-up: imports, numba compilation, table creation
+        best, median = measure(run, setup, number)
+        return {'best_ms': round(best, 4), 'median_ms': round(median, 4)}
+    except Skipped as e:
+        return {'skipped': str(e)}
+    except Exception as e:
+        return {'error': f"{type(e).__name__}: {e}"}
+    finally:
+        os.chdir(cwd)
+        logging.shutdown()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def machine_id():
+    return f"{platform.node()} | {platform.machine()} | Python {platform.python_version()}"
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def load_history(path=HISTORY_PATH):
+    if not os.path.exists(path):
+        return []
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        log_warning(f"Benchmark history {path} unreadable ({e}); starting a new one.")
+        return []
+
+
+def save_history(history, path=HISTORY_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(history, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def baseline(history, machine, name, runs=BASELINE_RUNS):
+    """(median best_ms over the last `runs` runs of the case on this machine, runs found)."""
+    values = [run['results'][name]['best_ms'] for run in history
+              if run.get('machine') == machine and 'best_ms' in run.get('results', {}).get(name, {})]
+    return (statistics.median(values[-runs:]) if values else None), len(values)
+
+
+def main(argv):
+    threshold = DEFAULT_THRESHOLD
+    save = True
+    filters = []
+    for arg in argv:
+        if arg.startswith("--threshold="):
+            threshold = float(arg.split("=", 1)[1])
+        elif arg == "--no-save":
+            save = False
+        else:
+            filters.append(arg.lower())
+
+    selected = {name: factory for name, factory in CASES.items()
+                if not filters or any(f in name.lower() for f in filters)}
+    if not selected:
+        log_error(f"No benchmark matches {', '.join(filters)}. Cases: {', '.join(CASES)}")
+        return 1
+
+    history = load_history()
+    machine = machine_id()
+    results = {}
+    regressions = []
+
+    table = Table(title=f"Benchmarks ({machine})", box=box.ROUNDED)
+    table.add_column("Case", style="cyan")
+    table.add_column("Best (ms)", justify="right", style="green")
+    table.add_column("Median (ms)", justify="right")
+    table.add_column("Baseline (ms)", justify="right")
+    table.add_column("Change", justify="right")
+
+    for name, factory in selected.items():
+        console.print(f"[dim]{name}...[/dim]")
+        result = run_case(name, factory)
+        results[name] = result
+        if 'skipped' in result:
+            table.add_row(name, "-", "-", "-", f"[yellow]skipped: {result['skipped']}[/yellow]")
+            continue
+        if 'error' in result:
+            table.add_row(name, "-", "-", "-", f"[red]{result['error']}[/red]")
+            continue
+        reference, reference_runs = baseline(history, machine, name)
+        if reference is None:
+            change = "[dim]new[/dim]"
+        else:
+            ratio = result['best_ms'] / reference - 1
+            if reference_runs < MIN_BASELINE_RUNS:
+                change = f"[dim]{ratio:+.1%} ({reference_runs}/{MIN_BASELINE_RUNS} runs)[/dim]"
+            elif ratio > threshold:
+                regressions.append(name)
+                change = f"[bold red]{ratio:+.1%}[/bold red]"
+            else:
+                change = f"[green]{ratio:+.1%}[/green]" if ratio < 0 else f"{ratio:+.1%}"
+        table.add_row(name, f"{result['best_ms']:.3f}", f"{result['median_ms']:.3f}",
+                      "-" if reference is None else f"{reference:.3f}", change)
+
+    console.print(table)
+
+    if save:
+        history.append({'timestamp': datetime.now().isoformat(timespec='seconds'), 'machine': machine,
+                        'commit': git_commit(), 'threshold': threshold, 'results': results})
+        runs = [run for run in history if run.get('machine') == machine]
+        if len(runs) > HISTORY_LIMIT:
+            dropped = set(id(run) for run in runs[:len(runs) - HISTORY_LIMIT])
+            history = [run for run in history if id(run) not in dropped]
+        save_history(history)
+        log_info(f"Results appended to {os.path.relpath(HISTORY_PATH, REPO_DIR)}")
+
+    errors = [name for name, result in results.items() if 'error' in result]
+    if errors:
+        log_error(f"{len(errors)} benchmark(s) failed: {', '.join(errors)}")
+    if regressions:
+        log_error(f"{len(regressions)} regression(s) beyond +{threshold:.0%}: {', '.join(regressions)}")
+    if errors or regressions:
+        return 1
+    log_success("No regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
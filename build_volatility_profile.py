@@ -0,0 +1,54 @@
+#-----------------------------------------
+# filename: build_volatility_profile.py
+# description: Builds / refreshes the candle-range volatility profile from the
+#              M1 bars collected by market_data.py. Run once a day (e.g. after
+#              the close): only the complete days added since the last build
+#              are read and folded in, and a new profile version is published.
+#-----------------------------------------
+import sqlite3
+import numpy as np
+
+# Rich imports for beautiful logging
+from rich.console import Console
+
+#-----------------------------------
+# Utilities and Global Variables
+#-----------------------------------
+from modules.utilities import log_success, log_error, log_warning, log_info
+from modules.volatility_profile import VolatilityProfileBuilder, VolatilityProfile, DAY_SECONDS
+
+console = Console()
+
+DB_NAME = 'market_data.db'
+TABLE_NAME = 'gold'        # market_data.py
+SYMBOL = 'GOLDm#'
+POINT = 0.01
+
+
+def load_bars(since=None):
+    conn = sqlite3.connect(DB_NAME)
+    query = f"SELECT time, high, low FROM {TABLE_NAME}"
+    params = []
+    if since is not None:
+        query += " WHERE time >= ?"
+        params.append(int(since))
+    rows = np.array(conn.execute(query + " ORDER BY time", params).fetchall(), dtype=float)
+    conn.close()
+    return rows
+
+
+def main():
+    builder = VolatilityProfileBuilder(SYMBOL, POINT, DB_NAME)
+    last_day = builder.last_day()
+    rows = load_bars(None if last_day is None else last_day + DAY_SECONDS)
+    if len(rows) == 0:
+        log_warning(f"No new bars in {DB_NAME}/{TABLE_NAME}. Run market_data.py first.")
+    else:
+        builder.refresh(rows[:, 0].astype(np.int64), rows[:, 1], rows[:, 2])
+    builder.close()
+
+    VolatilityProfile(SYMBOL, DB_NAME).display()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#-----------------------------------------
+# filename: consolidation_index.py
+# description: Builds / refreshes the regime interval index from the M1 bars
+#              collected by market_data.py and runs the consolidation queries
+#              studied in CONSOLIDATION_PERIOD_ANALYSIS.xlsm.
+#-----------------------------------------
+import sqlite3
+import os
+import time
+import numpy as np
+
+# Rich imports for beautiful logging
+from rich.console import Console
+
+#-----------------------------------
+# Utilities and Global Variables
+#-----------------------------------
+from modules.utilities import log_success, log_error, log_warning, log_info
+from modules.mt5_config import TradingConfig
+from modules.regime import RegimeIndex
+
+console = Console()
+
+DB_NAME = 'market_data.db'
+TABLE_NAME = 'gold'        # market_data.py
+SYMBOL = 'GOLDm#'
+TIMEFRAME = 'M1'
+POINT = 0.01
+WARMUP_BARS = 2000         # bars before the last stored interval used to warm the EMAs up
+
+# London session (08:00-16:59 UK) in broker server time (GMT+2 / GMT+3)
+LONDON_HOURS_SERVER = (10, 18)
+
+
+def build_config():
+    # Same EMA stack as strategy_20_demo.py
+    return TradingConfig(
+        symbol=SYMBOL,
+        filename=os.path.basename(__file__),
+        strategy_id=0,
+        volume=0.01,
+        deviation=20,
+        sl_points=300,
+        tp_points=350,
+        trailing_activation_points=150,
+        trailing_stop_distance=40,
+        trailing_period=3,
+        ema_resistance=3,
+        ema_support=3,
+        support_resistance_distance_threshold=20,
+        consolidation_filter=12,
+        long_term_trend=50,
+        max_candle_range_1h_allowed=1100,
+        max_candle_range_4h_allowed=1800
+    )
+
+
+def load_bars(since=None):
+    conn = sqlite3.connect(DB_NAME)
+    query = f"SELECT time, high, low, close FROM {TABLE_NAME}"
+    params = []
+    if since is not None:
+        query += " WHERE time >= ?"
+        params.append(int(since))
+    rows = np.array(conn.execute(query + " ORDER BY time", params).fetchall(), dtype=float)
+    conn.close()
+    return rows
+
+
+def refresh_index(index):
+    """Rebuilds the index from scratch the first time, then only from the last stored interval."""
+    resume_from = index.last_start(SYMBOL, TIMEFRAME)
+    since = None if resume_from is None else resume_from - WARMUP_BARS * 60
+    rows = load_bars(since)
+    if len(rows) == 0:
+        log_warning(f"No bars in {DB_NAME}/{TABLE_NAME}. Run market_data.py first.")
+        return
+    index.build(SYMBOL, TIMEFRAME, rows[:, 0].astype(np.int64), rows[:, 1], rows[:, 2], rows[:, 3],
+                build_config(), POINT, bar_seconds=60, resume_from=resume_from)
+
+
+def main():
+    index = RegimeIndex(DB_NAME)
+    refresh_index(index)
+
+    started = time.perf_counter()
+    london = index.query(SYMBOL, TIMEFRAME, regime='consolidation', min_duration_seconds=30 * 60, hours=LONDON_HOURS_SERVER)
+    log_info(f"Query answered in {(time.perf_counter() - started) * 1000:.1f} ms.")
+    index.display(london, title="Consolidations > 30 min in London Hours")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,8 @@ from datetime import datetime
 import pandas as pd
 import sqlite3
 import time
+from modules import heartbeat # Liveness for supervisor.py
+from modules import metrics # /metrics endpoint (DB writes, MT5 calls, equity)
 
 # --- Database Setup and Connection ---
 DB_NAME = 'mt5_trades_baseline.db'
@@ -25,6 +27,8 @@ print("MetaTrader5 package author: ", mt5.__author__)
 print("MetaTrader5 package version: ", mt5.__version__)
 print()
 
+metrics.instrument_mt5(mt5) # Count and time every mt5.* call
+
 # --- Data Fetching and Saving Functions ---
 def fetch_and_save_orders(conn):
     """
@@ -73,7 +77,9 @@ def fetch_and_save_orders(conn):
             df_orders = df_orders[df_orders['time_done'] > latest_timestamp]
 
         if not df_orders.empty:
-            df_orders.to_sql('orders_live', conn, if_exists='append', index=False)
+            with metrics.db_write_seconds.time(table='orders_live'):
+                df_orders.to_sql('orders_live', conn, if_exists='append', index=False)
+            metrics.db_rows_written.inc(len(df_orders), table='orders_live')
             print(f"Saved {len(df_orders)} new orders to mt5_trades.db -> 'orders_live' table.")
         else:
             print("No new orders to save.")
@@ -121,7 +127,9 @@ def fetch_and_save_deals(conn):
             df_deals = df_deals[df_deals['time'] > latest_timestamp]
 
         if not df_deals.empty:
-            df_deals.to_sql('deals_live', conn, if_exists='append', index=False)
+            with metrics.db_write_seconds.time(table='deals_live'):
+                df_deals.to_sql('deals_live', conn, if_exists='append', index=False)
+            metrics.db_rows_written.inc(len(df_deals), table='deals_live')
             print(f"Saved {len(df_deals)} new deals to mt5_trades.db -> 'deals_live' table.")
         else:
             print("No new deals to save.")
@@ -147,6 +155,7 @@ if __name__ == "__main__":
             print("-" * 30)
             print(f"Execution started at: {datetime.now()}")
             
+            mt5.account_info() # Refreshes the balance / equity gauges on /metrics
             fetch_and_save_orders(conn)
             fetch_and_save_deals(conn)
             
@@ -154,7 +163,7 @@ if __name__ == "__main__":
             sleep_duration = 125
             print(f"Completed. Sleeping for {sleep_duration} seconds until next run.")
             print("-" * 30)
-            time.sleep(sleep_duration)
+            heartbeat.sleep(sleep_duration)
 
     except KeyboardInterrupt:
         print("\nScript terminated by user.")
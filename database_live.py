@@ -3,9 +3,13 @@ from datetime import datetime
 import pandas as pd
 import sqlite3
 import time
+from modules import heartbeat # Liveness for supervisor.py
+from modules import metrics # /metrics endpoint (DB writes, MT5 calls, equity)
+from modules.monte_carlo import MonteCarloReport
 
 # --- Database Setup and Connection ---
 DB_NAME = 'mt5_trades.db'
+RUN_MONTE_CARLO_AFTER_SYNC = True  # Refresh the drawdown / recovery distributions when new deals arrive
 
 def create_connection():
     """Create a SQLite database connection and return the connection object."""
@@ -25,6 +29,8 @@ print("MetaTrader5 package author: ", mt5.__author__)
 print("MetaTrader5 package version: ", mt5.__version__)
 print()
 
+metrics.instrument_mt5(mt5) # Count and time every mt5.* call
+
 # --- Data Fetching and Saving Functions ---
 def fetch_and_save_orders(conn):
     """
@@ -73,7 +79,9 @@ def fetch_and_save_orders(conn):
             df_orders = df_orders[df_orders['time_done'] > latest_timestamp]
 
         if not df_orders.empty:
-            df_orders.to_sql('orders_live', conn, if_exists='append', index=False)
+            with metrics.db_write_seconds.time(table='orders_live'):
+                df_orders.to_sql('orders_live', conn, if_exists='append', index=False)
+            metrics.db_rows_written.inc(len(df_orders), table='orders_live')
             print(f"Saved {len(df_orders)} new orders to mt5_trades.db -> 'orders_live' table.")
         else:
             print("No new orders to save.")
@@ -107,7 +115,7 @@ def fetch_and_save_deals(conn):
     
     if deals is None or len(deals) == 0:
         print("No new history deals found.")
-        return
+        return 0
 
     # Convert to DataFrame
     try:
@@ -121,13 +129,17 @@ def fetch_and_save_deals(conn):
             df_deals = df_deals[df_deals['time'] > latest_timestamp]
 
         if not df_deals.empty:
-            df_deals.to_sql('deals_live', conn, if_exists='append', index=False)
+            with metrics.db_write_seconds.time(table='deals_live'):
+                df_deals.to_sql('deals_live', conn, if_exists='append', index=False)
+            metrics.db_rows_written.inc(len(df_deals), table='deals_live')
             print(f"Saved {len(df_deals)} new deals to mt5_trades.db -> 'deals_live' table.")
+            return len(df_deals)
         else:
             print("No new deals to save.")
         
     except Exception as e:
         print(f"An error occurred while processing and saving new deals: {e}")
+    return 0
 
 # --- Main Loop ---
 if __name__ == "__main__":
@@ -147,14 +159,19 @@ if __name__ == "__main__":
             print("-" * 30)
             print(f"Execution started at: {datetime.now()}")
             
+            mt5.account_info() # Refreshes the balance / equity gauges on /metrics
             fetch_and_save_orders(conn)
-            fetch_and_save_deals(conn)
+            new_deals = fetch_and_save_deals(conn)
+            if new_deals and RUN_MONTE_CARLO_AFTER_SYNC:
+                monte_carlo = MonteCarloReport(DB_NAME)
+                if monte_carlo.run():
+                    monte_carlo.display()
             
             # The sleep time is set to 2 minutes and 5 seconds (125 seconds)
             sleep_duration = 125
             print(f"Completed. Sleeping for {sleep_duration} seconds until next run.")
             print("-" * 30)
-            time.sleep(sleep_duration)
+            heartbeat.sleep(sleep_duration)
 
     except KeyboardInterrupt:
         print("\nScript terminated by user.")
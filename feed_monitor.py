@@ -0,0 +1,110 @@
+#-----------------------------------------
+# filename: feed_monitor.py
+# description: Compares the LIVE and DEMO feeds of the same strategy bar by bar
+#              (live-vs-demo.txt) and flags the bars where a demo signal would
+#              not have fired on the live feed.
+#
+#   python feed_monitor.py           -> live, one terminal per account
+#   python feed_monitor.py replay    -> offline, from the bars recorded in feed_bar
+#-----------------------------------------
+import MetaTrader5 as mt5
+from dotenv import load_dotenv
+import os
+import sys
+
+# Rich imports for beautiful logging
+from rich.console import Console
+
+#-----------------------------------
+# Utilities and Global Variables
+#-----------------------------------
+from modules.utilities import log_success, log_error, log_warning, log_info
+from modules.mt5_config import TradingConfig
+from modules.execution_fanout import AccountSession
+from modules.feed_compare import FeedMonitor, FeedComparator, FeedState, load_recorded_bars, replay, session_for_symbol
+
+#-------------------------------------
+# Library Initialization
+#-------------------------------------
+console = Console()
+load_dotenv()
+
+DEMO_SYMBOL = "GOLD#"
+LIVE_SYMBOL = "GOLDm#"
+SYMBOL_POINT = 0.01   # Used for offline replays, live feeds read it from the terminal
+
+
+def build_config():
+    # Same indicator settings as strategy_20_demo.py
+    return TradingConfig(
+        symbol=DEMO_SYMBOL,
+        filename=os.path.basename(__file__),
+        strategy_id=58,
+        volume=0.01,
+        deviation=20,
+        sl_points=300,
+        tp_points=350,
+        trailing_activation_points=150,
+        trailing_stop_distance=40,
+        trailing_period=3,
+        ema_resistance=3,
+        ema_support=3,
+        support_resistance_distance_threshold=20,
+        consolidation_filter=12,
+        long_term_trend=50,
+        max_candle_range_1h_allowed=1100,
+        max_candle_range_4h_allowed=1800
+    )
+
+
+def start_monitor():
+    """Compares the live terminals until interrupted."""
+    config = build_config()
+    demo = AccountSession.from_env("DEMO", config, manage_positions=False)
+    live = AccountSession.from_env("LIVE", config, manage_positions=False)
+    if demo is None or live is None:
+        log_error("MT5_LOGIN_DEMO and MT5_LOGIN_LIVE are required in .env. Exiting.")
+        return
+
+    monitor = FeedMonitor(
+        reference_session=session_for_symbol(demo, DEMO_SYMBOL),
+        sessions=[session_for_symbol(live, LIVE_SYMBOL)],
+        timeframe=mt5.TIMEFRAME_M1
+    )
+    if not monitor.start():
+        monitor.stop()
+        return
+
+    try:
+        monitor.run()
+    except KeyboardInterrupt:
+        log_warning("Feed monitor interrupted by user. Shutting down.")
+    finally:
+        monitor.stop()
+        log_success("Feed monitor stopped.")
+
+
+def start_replay():
+    """Runs the same comparison over the bars recorded by previous live runs."""
+    config = build_config()
+    feeds = {name: load_recorded_bars(feed=name) for name in ("DEMO", "LIVE")}
+    if not all(feeds.values()):
+        log_error("No recorded bars for DEMO and/or LIVE in feed_bar. Run the live monitor first.")
+        return
+    log_info(f"Replaying {len(feeds['DEMO'])} DEMO and {len(feeds['LIVE'])} LIVE bars.")
+
+    # Offline statistics stay in memory so they never mix with the live ones
+    comparator = FeedComparator(
+        reference=FeedState("DEMO", config, SYMBOL_POINT),
+        feeds=[FeedState("LIVE", config, SYMBOL_POINT)],
+        db_name=None
+    )
+    replay(comparator, feeds)
+    comparator.display()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "replay":
+        start_replay()
+    else:
+        start_monitor()
@@ -16,7 +16,12 @@ from rich import box
 # import modules.mt5_config as mt5_config
 from modules.mt5_config_v1_1_0 import TradingConfig
 from account_list import account_type
-from modules.trading_hours_24 import is_trading_hours
+from modules.trading_hours_24 import is_trading_hours, sleep_until_trading_hours
+from modules.heartbeat import beat # Liveness for supervisor.py
+from modules.metrics import cycle_started, cycle_finished # Loop latency on the /metrics endpoint
+from modules.profiler import enable_profiling # On-demand profiling, see profile_strategy.py
+from modules.memory_guard import enable_memory_guard # RSS per cycle, soft limit -> recycle
+from modules.config_reload import watch_config # Live tuning through config/strategy_<id>.json
 from modules.chart_screenshot import screenshot # Import the screenshot class
 
 #-----------------------------------
@@ -28,6 +33,8 @@ from modules.mt5_manager import MT5Manager
 from modules.indicators import Indicators
 from modules.position_manager_m2 import PositionManager # Import the new class
 from modules.profit_manager import TakeProfitMonitor # Import the new TakeProfitMonitor class
+from modules.virtual_exits import VirtualExitEngine # Tick-level hidden exits, broker SL kept as backstop
+from modules.position_book import PositionBook # Shared position state for the loop and its threads
 import mplfinance as mpf
 
 #-------------------------------------
@@ -47,6 +54,7 @@ def wait_until_next_interval(interval_seconds: int = 60):
     Args:
         interval_seconds (int): The desired interval in seconds (e.g., 60 for 1 minute).
     """
+    cycle_finished() # The work since the loop woke up, for /metrics
     now = datetime.now()
     
     # Get total seconds from the start of the current day
@@ -76,10 +84,11 @@ class M2AverageZone:
     """
     Encapsulates the full logic for the M2 Average Zone Strategy.
     """
-    def __init__(self, config, mt5_manager, position_open_event, screenshot_tool):
+    def __init__(self, config, mt5_manager, position_open_event, screenshot_tool, position_book):
         self.config = config
         self.mt5_manager = mt5_manager
         self.position_open_event = position_open_event # Add the event here
+        self.position_book = position_book # Updated from order_send results, reconciled periodically
         self.screenshot_tool = screenshot_tool # Add the screenshot tool
         
     def get_data(self):
@@ -133,6 +142,7 @@ class M2AverageZone:
         }
 
         result = mt5.order_send(request)
+        self.position_book.apply_open(request, result)
         if result.retcode != mt5.TRADE_RETCODE_DONE:
             log_error(f"Failed to send order, error code: {result.retcode}")
             return False
@@ -201,16 +211,25 @@ class M2AverageZone:
         while True:
             # Use the new precise timing function
             wait_until_next_interval()
+            beat() # Supervisor liveness
 
-            # Check for existing positions
-            positions = mt5.positions_get(symbol=self.config.symbol)
+            # Check Trading Hours before touching the terminal; sleep through the closed session
+            if not is_trading_hours():
+                log_warning(f"Outside Trading Hours. Sleeping until the next session...")
+                sleep_until_trading_hours()
+                continue # conutine means ignore succeeding codes and will go back to the main loop.
+            cycle_started() # Loop latency metric, closed-session cycles are not counted
+
+            # Check for existing positions (served from the position book)
+            self.position_book.reconcile() # Once per cycle: broker-side SL/TP fills show up before the entry check
+            positions = self.position_book.get(self.config.strategy_id)
             symbol_info = mt5.symbol_info(self.config.symbol)
             # Retrieve the point size dynamically
             point = symbol_info.point
             # print(f"Point Multiplier:  {point}")
             print("\n\n")
 
-            if positions and any(p.magic == self.config.strategy_id for p in positions):
+            if positions:
                 log_info(f"Position already exists. Skipping entry signal check.")
                 continue
 
@@ -240,11 +259,6 @@ class M2AverageZone:
             # ------------------------------------------------------------------            
 
 
-            # Check Trading Hours
-
-            if not is_trading_hours():
-                log_warning(f"Outside Trading Hours. Waiting...")
-                continue # conutine means ignore succeeding codes and will go back to the main loop.
 
 
 
@@ -269,27 +283,11 @@ class M2AverageZone:
                 price_type='low'
             )     
 
-            ema_trailing_period = indicator_tools.get_last_ema_value(
-                period=self.config.trailing_period,
-                price_type='close'
-            )                                  
-            
-
-            ema_momentum_consolidation_filter = indicator_tools.get_last_ema_value(
-                period=self.config.momentum_consolidation_filter,
+            # Close EMAs together: one kernel pass over the column
+            ema_trailing_period, ema_momentum_consolidation_filter, ema_consolidation_filter, ema_long_term_trend = indicator_tools.get_last_ema_value(
+                period=[self.config.trailing_period, self.config.momentum_consolidation_filter, self.config.consolidation_filter, self.config.long_term_trend],
                 price_type='close'
-            )   
-
-
-            ema_consolidation_filter = indicator_tools.get_last_ema_value(
-                period=self.config.consolidation_filter,
-                price_type='close'
-            )   
-
-            ema_long_term_trend = indicator_tools.get_last_ema_value(
-                period=self.config.long_term_trend,
-                price_type='close'
-            )               
+            )
 
 
             # Calculate all distances in points
@@ -545,6 +543,10 @@ def start_strategy():
     screenshot_tool = screenshot(SCREENSHOT_DIR=screenshot_dir)
     # ----------------------------------------------------    
 
+    enable_profiling(config_settings.strategy_id) # profile_strategy.py <strategy_id> starts a profile
+    enable_memory_guard(config_settings.strategy_id) # logs/memory_strategy_<id>.log
+    watch_config(config_settings) # Applied between cycles; edit the JSON instead of this file to retune
+
     # 2. Instantiate and connect the MT5 manager
 
      # Change to "LIVE" for live trading
@@ -585,17 +587,21 @@ def start_strategy():
 
     # 3. Instantiate and start the position manager and take profit monitor threads
     position_open_event = threading.Event()
+    position_book = PositionBook(symbol=config_settings.symbol)
     
-    position_manager = PositionManager(config=config_settings, mt5_manager=mt5_manager, position_open_event=position_open_event)
+    virtual_exits = VirtualExitEngine(config=config_settings, position_open_event=position_open_event, position_book=position_book, timeframe=mt5.TIMEFRAME_M2) # No TP: trailing only, trailed and checked on every tick
+    virtual_exits.start()
+
+    position_manager = PositionManager(config=config_settings, mt5_manager=mt5_manager, position_open_event=position_open_event, position_book=position_book)
     position_manager.daemon = True # Allows the thread to exit when the main program exits
     position_manager.start()
 
-    # take_profit_monitor = TakeProfitMonitor(config=config_settings, mt5_manager=mt5_manager, position_open_event=position_open_event)
+    # take_profit_monitor = TakeProfitMonitor(config=config_settings, mt5_manager=mt5_manager, position_open_event=position_open_event, position_book=position_book)
     # take_profit_monitor.daemon = True
     # take_profit_monitor.start()
 
     # 4. Instantiate the strategy and run it
-    my_strategy = M2AverageZone(config=config_settings, mt5_manager=mt5_manager, position_open_event=position_open_event,screenshot_tool=screenshot_tool)
+    my_strategy = M2AverageZone(config=config_settings, mt5_manager=mt5_manager, position_open_event=position_open_event,screenshot_tool=screenshot_tool, position_book=position_book)
     try:
         my_strategy.run()
     except KeyboardInterrupt:
@@ -603,6 +609,7 @@ def start_strategy():
     finally:
         # 5. Shutdown MT5 connection and stop the threads
         position_manager.stop()
+        virtual_exits.stop()
         # take_profit_monitor.stop()
         mt5.shutdown()
         log_success("MetaTrader5 shutdown.")
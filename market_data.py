@@ -2,6 +2,8 @@ import MetaTrader5 as mt5
 import pandas as pd
 import sqlite3
 import time
+from modules import heartbeat # Liveness for supervisor.py
+from modules import metrics # /metrics endpoint (DB writes, MT5 calls)
 from datetime import datetime
 from rich.console import Console
 from rich.table import Table
@@ -17,6 +19,7 @@ TIMEFRAME = mt5.TIMEFRAME_M1
 UPDATE_INTERVAL_SECONDS = 17 * 60
 
 console = Console()
+metrics.instrument_mt5(mt5) # Count and time every mt5.* call
 
 class MarketDataCollector:
     def __init__(self):
@@ -88,7 +91,9 @@ class MarketDataCollector:
         rates_frame['time'] = pd.to_datetime(rates_frame['time'], unit='s').astype('int64') // 10**9
 
         try:
-            rates_frame[['time', 'open', 'high', 'low', 'close']].to_sql(TABLE_NAME, self.conn, if_exists='replace', index=False)
+            with metrics.db_write_seconds.time(table=TABLE_NAME):
+                rates_frame[['time', 'open', 'high', 'low', 'close']].to_sql(TABLE_NAME, self.conn, if_exists='replace', index=False)
+            metrics.db_rows_written.inc(len(rates_frame), table=TABLE_NAME)
             self.status_message = f"Successfully populated {len(rates_frame)} records"
             console.print(f"[green]✓ {self.status_message}[/green]")
             return True
@@ -170,7 +175,9 @@ class MarketDataCollector:
             num_new_records = len(rates_frame)
             self.status_message = f"Found and filling a gap of {num_new_records} missing records"
             console.print(f"[yellow]{self.status_message}[/yellow]")
-            rates_frame[['time', 'open', 'high', 'low', 'close']].to_sql(TABLE_NAME, self.conn, if_exists='append', index=False)
+            with metrics.db_write_seconds.time(table=TABLE_NAME):
+                rates_frame[['time', 'open', 'high', 'low', 'close']].to_sql(TABLE_NAME, self.conn, if_exists='append', index=False)
+            metrics.db_rows_written.inc(len(rates_frame), table=TABLE_NAME)
             self.status_message = f"Successfully filled the gap with {num_new_records} records"
             console.print(f"[green]✓ {self.status_message}[/green]")
             return num_new_records
@@ -212,7 +219,7 @@ class MarketDataCollector:
                 if now_timestamp - last_update_time < UPDATE_INTERVAL_SECONDS:
                     time_to_wait = UPDATE_INTERVAL_SECONDS - (now_timestamp - last_update_time)
                     console.print(f"[dim]Waiting {int(time_to_wait)} seconds until next update...[/dim]")
-                    time.sleep(time_to_wait)
+                    heartbeat.sleep(time_to_wait)
                     continue
 
                 last_db_timestamp = self.get_last_db_timestamp()
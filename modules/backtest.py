@@ -0,0 +1,458 @@
+# modules/backtest.py
+#---------------------------------------
+# Bar-level backtest of the M1 Average Zone strategies
+#---------------------------------------
+# Replays the strategy_20_demo.py rules over stored bars:
+#
+#   - entry: the average-zone signal (EMA stack + distance to the trailing
+#     guide) evaluated on a closed bar, filled at the next bar's open, one
+#     position at a time like the live loop
+#   - exits: broker SL, the TP at tp_points when the strategy has one
+#     (use_tp: a "tp" in the order or a running TakeProfitMonitor; strategies
+#     such as strategy_20_demo.py send neither and exit on SL / trailing only)
+#     and the PositionManager trailing stop (EMA(trailing_period) -/+
+#     trailing_stop_distance once the profit reaches
+#     trailing_activation_points), re-evaluated on bar closes
+#
+# Signals are computed vectorially from an IndicatorCache of EMA columns, so a
+# parameter sweep computes every EMA once and only re-runs the cheap signal
+# mask and the position loop per config. When SL and TP are both inside one
+# bar the bar model cannot tell which came first and assumes the SL; pass a
+# modules.intrabar.IntrabarFillModel to resolve touched bars from M1 sub-bars
+# or ticks instead (untouched bars are still skipped by the compiled scan).
+#
+# With a modules.volatility_profile.VolatilityProfile the entries are also
+# gated by the candle-range filter strategy_20_demo.py prints but does not
+# apply: the forming H1 and H4 candle ranges at the signal bar's close must be
+# within the profile's p90 for that weekday / hour (the config's
+# max_candle_range_*_allowed where the profile has no row).
+#
+# P&L is in points (price / point) minus spread_points per trade.
+
+import math
+import numpy as np
+import pandas as pd
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+#-----------------------------------
+# Utilities and Global Variables
+#-----------------------------------
+from modules.mt5_config import TradingConfig
+from modules.ema_kernel import ema_matrix
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+console = Console()
+
+# TradingConfig constructor arguments (reward_ratio is derived)
+CONFIG_FIELDS = (
+    'symbol', 'filename', 'strategy_id', 'volume', 'deviation', 'sl_points', 'tp_points',
+    'trailing_activation_points', 'trailing_stop_distance', 'trailing_period', 'ema_resistance',
+    'ema_support', 'support_resistance_distance_threshold', 'consolidation_filter', 'long_term_trend',
+    'max_candle_range_1h_allowed', 'max_candle_range_4h_allowed',
+)
+
+# Exit reasons
+EXIT_SL = 0         # initial stop loss
+EXIT_TP = 1
+EXIT_TRAIL = 2      # trailed stop loss
+EXIT_END = 3        # still open at the end of the range, closed at the last close
+EXIT_REASONS = {EXIT_SL: 'sl', EXIT_TP: 'tp', EXIT_TRAIL: 'trail', EXIT_END: 'end'}
+
+# Candle-range filter: (profile timeframe, candle seconds, config fallback)
+RANGE_TIMEFRAMES = (
+    ('H1', 3600, 'max_candle_range_1h_allowed'),
+    ('H4', 14400, 'max_candle_range_4h_allowed'),
+)
+RANGE_THRESHOLD_STAT = 'p90'  # VOLATILITY_THRESHOLD_STAT of strategy_20_demo.py
+
+SIGNAL_VERSION = 1  # bump when average_zone_signals() changes meaning
+ENGINE_VERSION = 1  # bump when the simulation (fills, trailing, exits) changes
+
+
+def config_variant(base, **overrides):
+    """A new TradingConfig equal to `base` except for `overrides`."""
+    values = {field: getattr(base, field) for field in CONFIG_FIELDS}
+    values.update(overrides)
+    return TradingConfig(**values)
+
+
+def config_key(config):
+    """Tuple of the config fields, usable as a dict key or hash input."""
+    return tuple(getattr(config, field) for field in CONFIG_FIELDS)
+
+
+#-----------------------------------
+# Indicators
+#-----------------------------------
+class IndicatorCache:
+    """
+    EMA columns over the whole history keyed by (period, price_type), computed
+    once with ema_matrix and shared by every config of a sweep.
+    """
+    def __init__(self, bars, columns=None):
+        """
+        Args:
+            bars (dict[str, np.ndarray]): 'time', 'open', 'high', 'low', 'close' arrays.
+            columns (dict): Optional precomputed {(period, price_type): array}.
+        """
+        self.bars = bars
+        self.columns = dict(columns or {})
+        self.ranges = {}  # candle seconds -> forming candle range per bar
+
+    def require(self, keys):
+        """Computes the missing (period, price_type) columns, one ema_matrix pass per price type."""
+        missing = {}
+        for period, price_type in keys:
+            if (period, price_type) not in self.columns:
+                missing.setdefault(price_type, set()).add(period)
+        for price_type, periods in missing.items():
+            periods = sorted(periods)
+            matrix = ema_matrix(self.bars[price_type], periods)
+            for j, period in enumerate(periods):
+                self.columns[(period, price_type)] = matrix[:, j]
+
+    def ema(self, period, price_type='close'):
+        if (period, price_type) not in self.columns:
+            self.require([(period, price_type)])
+        return self.columns[(period, price_type)]
+
+    def candle_range(self, seconds):
+        """
+        High - low of the `seconds` candle each bar belongs to, up to and
+        including that bar: the forming candle calculate_candle_range() reads.
+        """
+        if seconds not in self.ranges:
+            frame = pd.DataFrame({'bucket': np.asarray(self.bars['time'], dtype=np.int64) // seconds,
+                                  'high': self.bars['high'], 'low': self.bars['low']})
+            grouped = frame.groupby('bucket', sort=False)
+            self.ranges[seconds] = (grouped['high'].cummax() - grouped['low'].cummin()).to_numpy()
+        return self.ranges[seconds]
+
+    @staticmethod
+    def keys_for(config):
+        return [
+            (config.ema_support, 'low'),
+            (config.ema_resistance, 'high'),
+            (config.trailing_period, 'close'),
+            (config.consolidation_filter, 'close'),
+            (config.long_term_trend, 'close'),
+        ]
+
+
+def average_zone_signals(cache, config, point):
+    """
+    Vectorized modules.feed_compare.average_zone_signal over every bar close.
+
+    Returns:
+        np.ndarray: int8 per bar, 1 buy / -1 sell / 0 hold.
+    """
+    close = cache.bars['close']
+    support = cache.ema(config.ema_support, 'low')
+    resistance = cache.ema(config.ema_resistance, 'high')
+    trailing = cache.ema(config.trailing_period, 'close')
+    consolidation = cache.ema(config.consolidation_filter, 'close')
+    long_term = cache.ema(config.long_term_trend, 'close')
+
+    # NaN comparisons are False, so the warm-up holds
+    near = np.abs(close - trailing) / point <= config.support_resistance_distance_threshold
+    buy = near & (close > support) & (support > consolidation) & (consolidation > long_term)
+    sell = near & (close < resistance) & (resistance < consolidation) & (consolidation < long_term)
+    signals = np.zeros(len(close), dtype=np.int8)
+    signals[buy] = 1
+    signals[sell] = -1
+    return signals
+
+
+def candle_range_mask(cache, config, point, volatility_profile, stat=RANGE_THRESHOLD_STAT):
+    """
+    True on the bars where the forming H1 and H4 candles are within their
+    threshold from the profile (h1_within_range / h4_within_range live).
+    """
+    times = cache.bars['time']
+    within = np.ones(len(times), dtype=bool)
+    for timeframe, seconds, field in RANGE_TIMEFRAMES:
+        thresholds = volatility_profile.thresholds_at(timeframe, stat, times, getattr(config, field))
+        within &= np.round(cache.candle_range(seconds) / point) <= thresholds
+    return within
+
+
+#-----------------------------------
+# Position loop
+#-----------------------------------
+def _simulate_loop(open_, high, low, close, signals, trail_ema, start, end,
+                   sl_distance, tp_distance, activation, trail_distance):
+    """
+    One position at a time over bars [start, end). Prices are in price units.
+    Returns parallel arrays: entry index, exit index, direction, entry price,
+    exit price, exit reason.
+    """
+    capacity = max(end - start, 1)
+    entry_index = np.empty(capacity, dtype=np.int64)
+    exit_index = np.empty(capacity, dtype=np.int64)
+    direction = np.empty(capacity, dtype=np.int64)
+    entry_price = np.empty(capacity)
+    exit_price = np.empty(capacity)
+    reason = np.empty(capacity, dtype=np.int64)
+    count = 0
+
+    i = start
+    while i < end - 1:
+        d = signals[i]
+        if d == 0:
+            i += 1
+            continue
+
+        e = i + 1
+        entry = open_[e]
+        sl = entry - d * sl_distance
+        tp = entry + d * tp_distance
+        trailed = False
+        j = e
+        exit_at = np.nan
+        why = EXIT_END
+        while j < end:
+            if d > 0:
+                hit_sl = low[j] <= sl
+                hit_tp = high[j] >= tp
+            else:
+                hit_sl = high[j] >= sl
+                hit_tp = low[j] <= tp
+            if hit_sl:
+                # A gap through the level fills at the open
+                exit_at = min(sl, open_[j]) if d > 0 else max(sl, open_[j])
+                why = EXIT_TRAIL if trailed else EXIT_SL
+                break
+            if hit_tp:
+                exit_at = max(tp, open_[j]) if d > 0 else min(tp, open_[j])
+                why = EXIT_TP
+                break
+            # Trailing is evaluated on the close, like the PositionManager poll
+            if d * (close[j] - entry) >= activation and not math.isnan(trail_ema[j]):
+                candidate = trail_ema[j] - d * trail_distance
+                if (d > 0 and candidate > sl) or (d < 0 and candidate < sl):
+                    sl = candidate
+                    trailed = True
+            j += 1
+        if j >= end:
+            j = end - 1
+            exit_at = close[j]
+            why = EXIT_END
+
+        entry_index[count] = e
+        exit_index[count] = j
+        direction[count] = d
+        entry_price[count] = entry
+        exit_price[count] = exit_at
+        reason[count] = why
+        count += 1
+        i = j  # the exit bar's own close can signal the next entry
+
+    return (entry_index[:count], exit_index[:count], direction[:count],
+            entry_price[:count], exit_price[:count], reason[:count])
+
+
+def _trail_on_close(d, entry, close_price, ema_value, sl, activation, trail_distance, trailed):
+    """PositionManager rule on one close: tighten SL to EMA -/+ distance once in enough profit."""
+    if d * (close_price - entry) >= activation and not math.isnan(ema_value):
+        candidate = ema_value - d * trail_distance
+        if (d > 0 and candidate > sl) or (d < 0 and candidate < sl):
+            return candidate, True
+    return sl, trailed
+
+
+def _scan_untouched(high, low, close, trail_ema, j, end, d, entry, sl, tp, activation, trail_distance, trailed):
+    """
+    Skips the bars whose range touches neither SL nor TP, trailing on their closes.
+    Returns (j, sl, trailed) with j the first touched bar, or `end`.
+    """
+    while j < end:
+        if d > 0:
+            touched = low[j] <= sl or high[j] >= tp
+        else:
+            touched = high[j] >= sl or low[j] <= tp
+        if touched:
+            return j, sl, trailed
+        sl, trailed = _trail_on_close(d, entry, close[j], trail_ema[j], sl, activation, trail_distance, trailed)
+        j += 1
+    return j, sl, trailed
+
+
+if NUMBA_AVAILABLE:
+    _simulate_compiled = njit(cache=True)(_simulate_loop)
+    _trail_on_close = njit(cache=True)(_trail_on_close)
+    _scan_compiled = njit(cache=True)(_scan_untouched)
+
+
+def _simulate_intrabar(times, open_, high, low, close, signals, trail_ema, start, end,
+                       sl_distance, tp_distance, activation, trail_distance, fill_model, trailing_period):
+    """
+    Same position loop as _simulate_loop, but bars that touch a level are
+    handed to fill_model.resolve() instead of the SL-first bar rule.
+    """
+    scan = _scan_compiled if NUMBA_AVAILABLE else _scan_untouched
+    k = 2.0 / (trailing_period + 1)
+    candidates = np.flatnonzero(signals[start:end - 1]) + start
+    columns = ([], [], [], [], [], [])
+
+    i = start
+    while True:
+        position = np.searchsorted(candidates, i)
+        if position >= len(candidates):
+            break
+        i = int(candidates[position])
+        d = int(signals[i])
+        e = i + 1
+        entry = float(open_[e])
+        sl = entry - d * sl_distance
+        tp = entry + d * tp_distance
+        trailed = False
+        j = e
+        while True:
+            j, sl, trailed = scan(high, low, close, trail_ema, j, end, d, entry, sl, tp, activation, trail_distance, trailed)
+            if j >= end:
+                j = end - 1
+                exit_at, why = float(close[j]), EXIT_END
+                break
+            previous_ema = float(trail_ema[j - 1]) if j > 0 else math.nan
+            exited, exit_at, why, sl, trailed = fill_model.resolve(
+                int(times[j]), d, entry, sl, tp, trailed, activation, trail_distance, previous_ema, k,
+                (float(open_[j]), float(high[j]), float(low[j]), float(close[j])))
+            if exited:
+                break
+            sl, trailed = _trail_on_close(d, entry, close[j], trail_ema[j], sl, activation, trail_distance, trailed)
+            j += 1
+
+        for column, value in zip(columns, (e, j, d, entry, exit_at, why)):
+            column.append(value)
+        i = j
+
+    return (np.array(columns[0], dtype=np.int64), np.array(columns[1], dtype=np.int64), np.array(columns[2], dtype=np.int64),
+            np.array(columns[3], dtype=float), np.array(columns[4], dtype=float), np.array(columns[5], dtype=np.int64))
+
+
+class BacktestResult:
+    """
+    Trades of one config over one bar range plus summary metrics (points).
+    """
+    def __init__(self, config, times, entry_index, exit_index, direction, entry_price, exit_price, reason,
+                 point, spread_points=0.0):
+        self.config = config
+        self.entry_time = times[entry_index] if len(entry_index) else np.array([], dtype=np.int64)
+        self.exit_time = times[exit_index] if len(exit_index) else np.array([], dtype=np.int64)
+        self.entry_index = entry_index
+        self.exit_index = exit_index
+        self.direction = direction
+        self.entry_price = entry_price
+        self.exit_price = exit_price
+        self.reason = reason
+        self.points = direction * (exit_price - entry_price) / point - spread_points
+
+    @property
+    def trades(self):
+        return len(self.points)
+
+    @property
+    def net_points(self):
+        return float(self.points.sum())
+
+    @property
+    def win_rate(self):
+        return float((self.points > 0).mean() * 100) if self.trades else 0.0
+
+    @property
+    def profit_factor(self):
+        gross_loss = -self.points[self.points < 0].sum()
+        gross_profit = self.points[self.points > 0].sum()
+        return float(gross_profit / gross_loss) if gross_loss > 0 else math.inf if gross_profit > 0 else 0.0
+
+    @property
+    def equity(self):
+        return np.cumsum(self.points)
+
+    @property
+    def max_drawdown(self):
+        """Largest peak-to-trough drop of the closed-trade equity curve (points, >= 0)."""
+        if not self.trades:
+            return 0.0
+        equity = np.concatenate(([0.0], self.equity))
+        return float((np.maximum.accumulate(equity) - equity).max())
+
+    @property
+    def recovery_factor(self):
+        drawdown = self.max_drawdown
+        return self.net_points / drawdown if drawdown > 0 else math.inf if self.net_points > 0 else 0.0
+
+    def summary(self):
+        return {
+            'trades': self.trades,
+            'net_points': round(self.net_points, 1),
+            'win_rate': round(self.win_rate, 1),
+            'profit_factor': round(self.profit_factor, 2),
+            'max_drawdown': round(self.max_drawdown, 1),
+            'recovery_factor': round(self.recovery_factor, 2),
+        }
+
+
+def run_backtest(cache, config, point, start=0, end=None, spread_points=0.0, signals=None, fill_model=None, use_tp=True,
+                 volatility_profile=None):
+    """
+    Simulates one config over bars [start, end) of the cache.
+
+    Args:
+        cache (IndicatorCache): Bars and EMA columns over the full history, so
+            indicators at `start` are already warmed up.
+        config (TradingConfig): Strategy parameters (points).
+        point (float): Symbol point size.
+        spread_points (float): Round-trip cost deducted from every trade.
+        signals (np.ndarray): Optional precomputed average_zone_signals().
+        fill_model (IntrabarFillModel): Resolves bars that touch SL/TP from
+            sub-bars or ticks; None keeps the SL-first bar rule.
+        use_tp (bool): False when the live strategy has no TP (no "tp" in the
+            order, no TakeProfitMonitor); tp_points is then ignored.
+        volatility_profile (VolatilityProfile): Gate entries with the H1 / H4
+            candle-range filter at the profile's thresholds; None trades every signal.
+
+    Returns:
+        BacktestResult
+    """
+    bars = cache.bars
+    end = len(bars['close']) if end is None else end
+    if signals is None:
+        signals = average_zone_signals(cache, config, point)
+    if volatility_profile is not None:
+        signals = np.where(candle_range_mask(cache, config, point, volatility_profile), signals, 0)
+    trail_ema = cache.ema(config.trailing_period, 'close')
+    tp_distance = config.tp_points * point if use_tp else math.inf  # an infinite TP is never touched
+    if fill_model is not None:
+        arrays = _simulate_intrabar(
+            bars['time'], bars['open'], bars['high'], bars['low'], bars['close'], signals, trail_ema,
+            int(start), int(end), config.sl_points * point, tp_distance,
+            config.trailing_activation_points * point, config.trailing_stop_distance * point,
+            fill_model, config.trailing_period)
+        return BacktestResult(config, bars['time'], *arrays, point=point, spread_points=spread_points)
+
+    simulate = _simulate_compiled if NUMBA_AVAILABLE else _simulate_loop
+    arrays = simulate(
+        bars['open'], bars['high'], bars['low'], bars['close'], signals,
+        trail_ema, int(start), int(end),
+        config.sl_points * point, tp_distance,
+        config.trailing_activation_points * point, config.trailing_stop_distance * point)
+    return BacktestResult(config, bars['time'], *arrays, point=point, spread_points=spread_points)
+
+
+def display_results(results, title="Backtest Results"):
+    table = Table(title=title, box=box.ROUNDED)
+    for column in ("Config", "Trades", "Net (pts)", "Win %", "PF", "Max DD", "Recovery"):
+        table.add_column(column, justify="left" if column == "Config" else "right")
+    for label, result in results:
+        summary = result.summary()
+        table.add_row(str(label), str(summary['trades']), f"{summary['net_points']:.0f}", f"{summary['win_rate']:.1f}",
+                      f"{summary['profit_factor']:.2f}", f"{summary['max_drawdown']:.0f}", f"{summary['recovery_factor']:.2f}")
+    console.print(table)
@@ -0,0 +1,204 @@
+# modules/backtest_cache.py
+#---------------------------------------
+# Content-addressed cache of backtest results
+#---------------------------------------
+# A backtest is a pure function of:
+#   - the TradingConfig fields, point, spread and whether a TP is used
+#   - the signal rule and engine versions (SIGNAL_VERSION / ENGINE_VERSION)
+#   - the bars up to the end of the range (a fingerprint of their OHLC bytes;
+#     the EMAs are seeded from the first bar, so the warm-up counts too)
+#   - the intrabar fill model and its data, when one is used
+#   - the signal array, when the caller supplies one instead of the default rule
+#   - the volatility profile version, when entries are range-filtered
+# The SHA-256 of those is the key. Results are stored as .npz files under
+# the cache directory with an SQLite index of sizes and last-access times;
+# once the directory grows past max_bytes the least recently used entries
+# are evicted. A sweep that overlaps an earlier one only simulates the cells
+# it has not seen.
+#
+# Extending the history at the end keeps the keys of every earlier range,
+# so a re-run after a data refresh only simulates the new folds.
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import numpy as np
+
+#-----------------------------------
+# Utilities and Global Variables
+#-----------------------------------
+from modules.utilities import log_success, log_error, log_warning, log_info
+from modules.backtest import (BacktestResult, run_backtest, config_key, config_variant,
+                              SIGNAL_VERSION, ENGINE_VERSION, CONFIG_FIELDS, RANGE_THRESHOLD_STAT)
+
+CACHE_DIR = '.backtest_cache'
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+BAR_COLUMNS = ('time', 'open', 'high', 'low', 'close')
+
+
+def array_fingerprint(arrays):
+    digest = hashlib.sha256()
+    for values in arrays:
+        values = np.ascontiguousarray(values)
+        digest.update(str(values.dtype).encode())
+        digest.update(values.tobytes())
+    return digest.hexdigest()
+
+
+class BacktestCache:
+    """
+    On-disk LRU cache of BacktestResult trades keyed by content hash.
+    """
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.fingerprints = {}  # content summary of bars[:end] -> fingerprint
+        os.makedirs(cache_dir, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(cache_dir, 'index.db'), timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS backtest_cache (
+                key TEXT PRIMARY KEY,
+                bytes INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_backtest_cache_access ON backtest_cache (last_access);")
+        self.conn.commit()
+
+    #-----------------------------------
+    # Keys
+    #-----------------------------------
+    def data_fingerprint(self, bars, end):
+        """
+        Fingerprint of bars[:end]. The SHA-256 is memoized on a cheap summary of
+        those bars (length, first / last time, column sums), so a reloaded or
+        edited bar set gets a new fingerprint, not the one of an array that used
+        to live at the same address.
+        """
+        times = bars['time'][:end]
+        memo = (len(times), int(times[0]) if len(times) else None, int(times[-1]) if len(times) else None,
+                tuple(float(np.sum(bars[column][:end])) for column in BAR_COLUMNS))
+        if memo not in self.fingerprints:
+            self.fingerprints[memo] = array_fingerprint(bars[column][:end] for column in BAR_COLUMNS)
+        return self.fingerprints[memo]
+
+    def key(self, indicator_cache, config, point, start, end, spread_points, fill_model=None, use_tp=True, signals=None,
+            volatility_profile=None):
+        payload = {
+            'config': dict(zip(CONFIG_FIELDS, config_key(config))),
+            'point': point,
+            'spread_points': spread_points,
+            'use_tp': use_tp,
+            'signal_version': SIGNAL_VERSION,
+            'engine_version': ENGINE_VERSION,
+            'start': start,
+            'data': self.data_fingerprint(indicator_cache.bars, end),
+            'fill_model': fill_model.cache_key() if fill_model is not None else None,
+            'signals': array_fingerprint([signals[:end]]) if signals is not None else None,
+            'volatility_profile': ([volatility_profile.symbol, volatility_profile.version, RANGE_THRESHOLD_STAT]
+                                   if volatility_profile is not None else None),
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.npz")
+
+    #-----------------------------------
+    # Storage
+    #-----------------------------------
+    def get(self, key, config, times, point, spread_points):
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                arrays = {name: data[name] for name in data.files}
+        except (OSError, ValueError) as e:
+            log_warning(f"Dropping unreadable backtest cache entry {key[:12]}: {e}")
+            self._remove(key)
+            return None
+        self.conn.execute("UPDATE backtest_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+        self.conn.commit()
+        entry_index = np.searchsorted(times, arrays['entry_time'])
+        exit_index = np.searchsorted(times, arrays['exit_time'])
+        return BacktestResult(config, times, entry_index, exit_index, arrays['direction'], arrays['entry_price'],
+                              arrays['exit_price'], arrays['reason'], point=point, spread_points=spread_points)
+
+    def put(self, key, result):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(temporary, entry_time=result.entry_time, exit_time=result.exit_time, direction=result.direction,
+                 entry_price=result.entry_price, exit_price=result.exit_price, reason=result.reason)
+        os.replace(temporary, path)  # readers never see a half-written file
+        now = time.time()
+        self.conn.execute("INSERT OR REPLACE INTO backtest_cache VALUES (?, ?, ?, ?)", (key, os.path.getsize(path), now, now))
+        self.conn.commit()
+        self.evict()
+
+    def _remove(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+        self.conn.execute("DELETE FROM backtest_cache WHERE key = ?", (key,))
+
+    def evict(self):
+        """Deletes least recently used entries until the cache fits in max_bytes."""
+        total = self.conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM backtest_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        evicted = 0
+        for key, size in self.conn.execute("SELECT key, bytes FROM backtest_cache ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._remove(key)
+            total -= size
+            evicted += 1
+        self.conn.commit()
+        return evicted
+
+    def size(self):
+        return self.conn.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM backtest_cache").fetchone()
+
+    #-----------------------------------
+    # Memoized engine
+    #-----------------------------------
+    def run(self, indicator_cache, config, point, start=0, end=None, spread_points=0.0, signals=None, fill_model=None, use_tp=True,
+            volatility_profile=None):
+        """Same as modules.backtest.run_backtest, served from the cache when possible."""
+        end = len(indicator_cache.bars['close']) if end is None else end
+        key = self.key(indicator_cache, config, point, start, end, spread_points, fill_model, use_tp, signals, volatility_profile)
+        result = self.get(key, config, indicator_cache.bars['time'], point, spread_points)
+        if result is not None:
+            self.hits += 1
+            return result
+        self.misses += 1
+        result = run_backtest(indicator_cache, config, point, start, end, spread_points, signals, fill_model, use_tp,
+                              volatility_profile)
+        self.put(key, result)
+        return result
+
+    def sweep(self, indicator_cache, base_config, candidates, point, start=0, end=None, spread_points=0.0, fill_model=None, use_tp=True,
+              volatility_profile=None):
+        """
+        Runs every override dict in `candidates`; cells already in the cache are not simulated.
+
+        Returns:
+            list[tuple[dict, BacktestResult]]
+        """
+        results = [(overrides, self.run(indicator_cache, config_variant(base_config, **overrides), point, start, end,
+                                        spread_points, fill_model=fill_model, use_tp=use_tp,
+                                        volatility_profile=volatility_profile))
+                   for overrides in candidates]
+        log_info(f"Backtest cache: {self.hits} hits, {self.misses} simulated.")
+        return results
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,359 @@
+# modules/bar_feed.py
+#---------------------------------------
+# Rolling bar window with change detection
+#---------------------------------------
+# The first update() loads the full window (e.g. 20,000 M1 bars). After that
+# only the last few bars are fetched: the forming bar is replaced in place,
+# newly closed bars are appended (dropping the oldest ones) and the
+# registered incremental indicators are advanced by the closed bars only.
+# Indicator values for the forming bar are peek()ed on demand, so a 10-second
+# loop no longer recomputes every EMA over the whole history.
+#
+# The feed also remembers which bars the strategy last evaluated, so a loop
+# can skip a cycle whose closed bars and forming-bar OHLC are unchanged.
+#
+# With a snapshot_path the feed checkpoints itself after new bars (at most
+# every snapshot_interval seconds): the window as a memory-mappable .npy
+# file and the indicator state as a pickle next to it. After a restart the
+# first update() resumes from the snapshot with a delta fetch of the bars
+# that closed meanwhile, once the last SNAPSHOT_CHECK_BARS closed bars of the
+# snapshot match the terminal's; otherwise it falls back to a full reload.
+# Indicators keep their converged state instead of warming up again.
+# Such a feed also checkpoints when the memory guard recycles the process.
+
+import os
+import time
+import pickle
+import hashlib
+import MetaTrader5 as mt5
+import numpy as np
+import pandas as pd
+from rich.console import Console
+
+#-----------------------------------
+# Utilities and Global Variables
+#-----------------------------------
+from modules.utilities import log_success, log_error, log_warning, log_info
+from modules.incremental_indicators import IncrementalEMA, IncrementalSMA
+from modules.channel_indicators import IncrementalDonchian, IncrementalATR
+from modules.regime import IncrementalRegime
+from modules import memory_guard
+
+console = Console()
+
+# update() results
+FEED_UNCHANGED = "unchanged"    # same closed bars, same forming-bar OHLC
+FEED_FORMING = "forming"        # only the forming bar moved
+FEED_NEW_BAR = "new_bar"        # at least one bar closed
+FEED_RELOADED = "reloaded"      # full window (re)loaded
+
+FEED_RESUMED = "resumed"        # window restored from a snapshot plus a delta fetch
+
+REFRESH_BARS = 3  # bars fetched per update once the window is loaded
+
+SNAPSHOT_VERSION = 1        # bump when the snapshot layout or indicator classes change
+SNAPSHOT_CHECK_BARS = 50    # closed bars compared with the terminal before resuming
+SNAPSHOT_INTERVAL = 60      # seconds between checkpoints
+
+OHLC_FIELDS = ['open', 'high', 'low', 'close']
+
+
+def bars_checksum(bars):
+    """SHA-256 of the time and OHLC columns of a run of bars."""
+    digest = hashlib.sha256()
+    for field in ['time'] + OHLC_FIELDS:
+        digest.update(np.ascontiguousarray(bars[field]).tobytes())
+    return digest.hexdigest()
+
+
+class BarFeed:
+    """
+    Rolling window of MT5 bars for one symbol/timeframe with incremental indicators.
+    """
+    def __init__(self, symbol, timeframe, count=20000, refresh_bars=REFRESH_BARS,
+                 snapshot_path=None, snapshot_interval=SNAPSHOT_INTERVAL):
+        """
+        Args:
+            symbol (str): Symbol to fetch.
+            timeframe (int): mt5.TIMEFRAME_* constant.
+            count (int): Number of bars kept in the window.
+            refresh_bars (int): Bars fetched per update; a larger gap triggers a full reload.
+            snapshot_path (str): Path prefix of the warm-restart snapshot
+                (<path>.npy and <path>.pkl); None disables checkpoints.
+            snapshot_interval (float): Minimum seconds between checkpoints.
+        """
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.count = count
+        self.refresh_bars = max(2, refresh_bars)
+        self.bars = None
+        self.indicators = {}
+        self.evaluated_signature = None
+        self.dataframe = None
+        self.reload_count = 0
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_saved = 0.0
+        if snapshot_path:
+            memory_guard.add_checkpoint(lambda: self.checkpoint(force=True)) # Save before a memory recycle
+
+    def __len__(self):
+        return 0 if self.bars is None else len(self.bars)
+
+    #-----------------------------------
+    # Window maintenance
+    #-----------------------------------
+    def reload(self):
+        """
+        Fetches the full window and reseeds every registered indicator.
+        """
+        rates = mt5.copy_rates_from_pos(self.symbol, self.timeframe, 0, self.count)
+        if rates is None or len(rates) == 0:
+            log_error(f"Failed to get rates for {self.symbol}")
+            return None
+
+        self.bars = rates
+        self.evaluated_signature = None
+        self.dataframe = None
+        self.reload_count += 1
+        for indicator in self.indicators.values():
+            indicator.seed(self.bars[:-1])
+        return FEED_RELOADED
+
+    def update(self):
+        """
+        Brings the window up to date.
+
+        Returns:
+            str: One of FEED_UNCHANGED / FEED_FORMING / FEED_NEW_BAR / FEED_RELOADED,
+                 or None if the rates could not be fetched.
+        """
+        if self.bars is None:
+            if self.snapshot_path and self.resume() == FEED_RESUMED:
+                return FEED_RESUMED
+            return self.checkpoint(self.reload())
+
+        recent = mt5.copy_rates_from_pos(self.symbol, self.timeframe, 0, self.refresh_bars)
+        if recent is None or len(recent) == 0:
+            log_error(f"Failed to get rates for {self.symbol}")
+            return None
+
+        # Locate our forming bar in the fetched tail
+        forming_time = self.bars['time'][-1]
+        index = int(np.searchsorted(recent['time'], forming_time))
+        if index >= len(recent) or recent['time'][index] != forming_time:
+            # More bars closed than we fetched (or history changed): start over
+            log_warning(f"Bar feed for {self.symbol} lost continuity. Reloading {self.count} bars.")
+            return self.checkpoint(self.reload())
+
+        tail = recent[index:]
+        if len(tail) == 1:
+            if all(tail[0][field] == self.bars[-1][field] for field in OHLC_FIELDS):
+                return FEED_UNCHANGED
+            self.bars[-1] = tail[0]
+            self.dataframe = None
+            return FEED_FORMING
+
+        self.append(tail)
+        return self.checkpoint(FEED_NEW_BAR)
+
+    def append(self, tail):
+        """Appends fetched bars starting at our forming bar; all but the last one are closed."""
+        self.bars = np.concatenate((self.bars[:-1], tail))[-self.count:]
+        self.dataframe = None
+        for bar in tail[:-1]:
+            for indicator in self.indicators.values():
+                indicator.update(bar)
+
+    #-----------------------------------
+    # Warm-restart snapshots
+    #-----------------------------------
+    def checkpoint(self, status=None, force=False):
+        """
+        Saves the window and indicator state if snapshot_interval has passed.
+        Passes `status` through so update() can return checkpoint(...).
+        """
+        if not self.snapshot_path or self.bars is None or len(self.bars) < 2:
+            return status
+        if not force and time.time() - self.snapshot_saved < self.snapshot_interval:
+            return status
+        closed = self.bars[:-1]
+        state = {
+            'version': SNAPSHOT_VERSION,
+            'symbol': self.symbol,
+            'timeframe': self.timeframe,
+            'count': self.count,
+            'forming_time': int(self.bars['time'][-1]),
+            'check_bars': min(SNAPSHOT_CHECK_BARS, len(closed)),
+            'checksum': bars_checksum(closed[-SNAPSHOT_CHECK_BARS:]),
+            'indicators': self.indicators,
+        }
+        try:
+            directory = os.path.dirname(self.snapshot_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Write both files aside, then swap them in; the checksum ties them together
+            np.save(f"{self.snapshot_path}.tmp.npy", self.bars)
+            with open(f"{self.snapshot_path}.tmp.pkl", "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(f"{self.snapshot_path}.tmp.npy", f"{self.snapshot_path}.npy")
+            os.replace(f"{self.snapshot_path}.tmp.pkl", f"{self.snapshot_path}.pkl")
+            self.snapshot_saved = time.time()
+        except (OSError, pickle.PicklingError) as e:
+            log_warning(f"Could not save bar feed snapshot {self.snapshot_path}: {e}")
+        return status
+
+    def load_snapshot(self):
+        """
+        Returns:
+            tuple: (bars, state) from disk, or None when missing, stale or inconsistent.
+        """
+        try:
+            with open(f"{self.snapshot_path}.pkl", "rb") as f:
+                state = pickle.load(f)
+            # The .npy is memory-mapped; the window is copied so the next checkpoint can replace the file
+            bars = np.array(np.load(f"{self.snapshot_path}.npy", mmap_mode='r'))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, EOFError, pickle.UnpicklingError, AttributeError, ImportError) as e:
+            log_warning(f"Ignoring unreadable bar feed snapshot {self.snapshot_path}: {e}")
+            return None
+
+        if (state.get('version') != SNAPSHOT_VERSION or state['symbol'] != self.symbol
+                or state['timeframe'] != self.timeframe or state['count'] != self.count):
+            log_warning(f"Bar feed snapshot {self.snapshot_path} does not match this feed. Ignoring it.")
+            return None
+        if (len(bars) < 2 or int(bars['time'][-1]) != state['forming_time']
+                or bars_checksum(bars[:-1][-SNAPSHOT_CHECK_BARS:]) != state['checksum']):
+            log_warning(f"Bar feed snapshot {self.snapshot_path} is inconsistent. Ignoring it.")
+            return None
+        return bars, state
+
+    def resume(self):
+        """
+        Restores the window from the snapshot and fetches only the bars since it.
+
+        Returns:
+            str: FEED_RESUMED, or None when a full reload is needed.
+        """
+        snapshot = self.load_snapshot()
+        if snapshot is None:
+            return None
+        bars, state = snapshot
+
+        # Bars since the snapshot's forming bar, plus the check bars. "Now" is the terminal's
+        # newest bar: bar times are broker server time, which can run hours ahead of time.time()
+        latest = mt5.copy_rates_from_pos(self.symbol, self.timeframe, 0, 1)
+        if latest is None or len(latest) == 0:
+            return None
+        spacing = max(1, int(np.median(np.diff(bars['time'][-10:]))))
+        missed = int(max(0, int(latest['time'][-1]) - state['forming_time']) // spacing) + 1  # upper bound: gaps only shrink it
+        fetch = missed + state['check_bars'] + self.refresh_bars
+        if fetch > self.count:
+            log_info(f"Bar feed snapshot for {self.symbol} is too old ({missed} bars behind). Reloading.")
+            return None
+        recent = mt5.copy_rates_from_pos(self.symbol, self.timeframe, 0, fetch)
+        if recent is None or len(recent) == 0:
+            return None
+
+        index = int(np.searchsorted(recent['time'], state['forming_time']))
+        check = state['check_bars']
+        if (index >= len(recent) or recent['time'][index] != state['forming_time'] or index < check
+                or bars_checksum(recent[index - check:index]) != state['checksum']):
+            log_warning(f"Bar feed snapshot for {self.symbol} does not match the terminal's history. Reloading.")
+            return None
+
+        # Indicators registered since the snapshot was taken are seeded as usual
+        restored = state['indicators']
+        for key, indicator in self.indicators.items():
+            if key not in restored:
+                indicator.seed(bars[:-1])
+                restored[key] = indicator
+        self.bars = bars
+        self.indicators = restored
+        self.evaluated_signature = None
+        self.dataframe = None
+        self.append(recent[index:])
+        log_success(f"Bar feed for {self.symbol} resumed from snapshot, {len(recent) - index - 1} bars caught up.")
+        return self.checkpoint(FEED_RESUMED, force=True)
+
+    #-----------------------------------
+    # Change detection
+    #-----------------------------------
+    def signature(self):
+        if self.bars is None:
+            return None
+        forming = self.bars[-1]
+        return (int(forming['time']),) + tuple(float(forming[field]) for field in OHLC_FIELDS)
+
+    def changed_since_evaluation(self):
+        """True unless the strategy already evaluated exactly these bars."""
+        return self.evaluated_signature is None or self.signature() != self.evaluated_signature
+
+    def mark_evaluated(self):
+        """Records that the current bars produced a decision that holds until they change."""
+        self.evaluated_signature = self.signature()
+
+    def invalidate(self):
+        """Forces the next cycle to evaluate even if the bars did not change."""
+        self.evaluated_signature = None
+
+    #-----------------------------------
+    # Values
+    #-----------------------------------
+    def register(self, key, indicator):
+        """
+        Adds an incremental indicator and seeds it from the closed bars in the window.
+        """
+        if key not in self.indicators:
+            if self.bars is not None:
+                indicator.seed(self.bars[:-1])
+            self.indicators[key] = indicator
+        return self.indicators[key]
+
+    def value(self, key):
+        """Value of a registered indicator including the forming bar."""
+        return self.indicators[key].peek(self.bars[-1])
+
+    def ema(self, period, price_type='close'):
+        """Last EMA value (forming bar included), same as Indicators.get_last_ema_value."""
+        key = ('ema', period, price_type)
+        self.register(key, IncrementalEMA(period, price_type))
+        return self.value(key)
+
+    def sma(self, period, price_type='close'):
+        """Last SMA value (forming bar included), same as Indicators.get_last_sma_value."""
+        key = ('sma', period, price_type)
+        self.register(key, IncrementalSMA(period, price_type))
+        return self.value(key)
+
+    def donchian(self, period):
+        """Last Donchian channel (upper, middle, lower), forming bar included."""
+        key = ('donchian', period)
+        self.register(key, IncrementalDonchian(period))
+        return self.value(key)
+
+    def atr(self, period=14):
+        """Last ATR value (forming bar included), same as talib.ATR."""
+        key = ('atr', period)
+        self.register(key, IncrementalATR(period))
+        return self.value(key)
+
+    def regime(self, config, use_long_term=True, consolidation_average='ema'):
+        """RegimeTracker of the closed bars, seeded from the window and advanced bar by bar."""
+        key = ('regime', config.ema_support, config.ema_resistance, config.consolidation_filter,
+               config.long_term_trend if use_long_term else None, consolidation_average)
+        return self.register(key, IncrementalRegime(config, use_long_term, consolidation_average)).tracker
+
+    def current_price(self):
+        return self.bars['close'][-1]
+
+    def to_dataframe(self):
+        """
+        The window as the DataFrame get_data() used to return (built once per change).
+        """
+        if self.dataframe is None:
+            rates_df = pd.DataFrame(self.bars)
+            rates_df['time'] = pd.to_datetime(rates_df['time'], unit='s')
+            self.dataframe = rates_df
+        return self.dataframe
@@ -0,0 +1,186 @@
+# modules/channel_indicators.py
+#---------------------------------------
+# Rolling extrema, Donchian channel and ATR
+#---------------------------------------
+# Streaming versions follow the IncrementalIndicator interface
+# (seed / update / peek, see modules/incremental_indicators.py) and plug into
+# modules.bar_feed.BarFeed. Rolling max/min use a monotonic deque, so every
+# closed bar costs amortized O(1) whatever the period, and peek() on the
+# forming bar is O(1) as well.
+#
+# Batch versions (rolling_max, rolling_min, donchian, atr) work on whole
+# arrays for backtests and return the same values as the streaming ones:
+# NaN during warm-up, talib.MAX / talib.MIN / talib.ATR (Wilder) semantics.
+
+import math
+import numpy as np
+import talib as ta
+from collections import deque
+
+from modules.incremental_indicators import IncrementalIndicator
+
+
+#-----------------------------------
+# Streaming
+#-----------------------------------
+class RollingExtreme(IncrementalIndicator):
+    """
+    Highest (mode='max') or lowest (mode='min') value of a column over `period` bars.
+    """
+    def __init__(self, period, price_type='high', mode='max'):
+        self.period = period
+        self.price_type = price_type
+        self.sign = 1.0 if mode == 'max' else -1.0
+        self.window = deque() # (bar index, signed value), signed values strictly decreasing
+        self.count = 0
+
+    def seed(self, bars):
+        self.window = deque()
+        self.count = 0
+        for bar in bars[-self.period:]:
+            self.update(bar)
+
+    def update(self, bar):
+        x = self.sign * float(bar[self.price_type])
+        while self.window and self.window[-1][1] <= x:
+            self.window.pop()
+        self.window.append((self.count, x))
+        if self.window[0][0] <= self.count - self.period:
+            self.window.popleft()
+        self.count += 1
+
+    @property
+    def value(self):
+        """Extreme over the last `period` closed bars."""
+        if self.count < self.period:
+            return np.nan
+        return self.sign * self.window[0][1]
+
+    def peek(self, bar):
+        """Extreme over the last `period` - 1 closed bars and the forming bar."""
+        if self.count + 1 < self.period:
+            return np.nan
+        x = self.sign * float(bar[self.price_type])
+        # The oldest closed bar drops out of the window when the forming bar enters it;
+        # the next deque entry is then the extreme of everything after it
+        best = -math.inf
+        if self.window:
+            if self.window[0][0] > self.count - self.period:
+                best = self.window[0][1]
+            elif len(self.window) > 1:
+                best = self.window[1][1]
+        return self.sign * max(best, x)
+
+
+class RollingMax(RollingExtreme):
+    def __init__(self, period, price_type='high'):
+        super().__init__(period, price_type, mode='max')
+
+
+class RollingMin(RollingExtreme):
+    def __init__(self, period, price_type='low'):
+        super().__init__(period, price_type, mode='min')
+
+
+class IncrementalDonchian(IncrementalIndicator):
+    """
+    Donchian channel: highest high / lowest low over `period` bars.
+    Values are (upper, middle, lower) tuples.
+    """
+    def __init__(self, period):
+        self.period = period
+        self.upper = RollingMax(period, 'high')
+        self.lower = RollingMin(period, 'low')
+
+    def seed(self, bars):
+        self.upper.seed(bars)
+        self.lower.seed(bars)
+
+    def update(self, bar):
+        self.upper.update(bar)
+        self.lower.update(bar)
+
+    @property
+    def value(self):
+        upper, lower = self.upper.value, self.lower.value
+        return upper, (upper + lower) / 2, lower
+
+    def peek(self, bar):
+        upper, lower = self.upper.peek(bar), self.lower.peek(bar)
+        return upper, (upper + lower) / 2, lower
+
+
+class IncrementalATR(IncrementalIndicator):
+    """
+    Average True Range with Wilder smoothing, talib-compatible (the first value
+    is the mean of the first `period` true ranges, one bar after `period`).
+    """
+    def __init__(self, period=14):
+        self.period = period
+        self.prev_close = None
+        self.warmup = []
+        self.value = np.nan
+
+    def true_range(self, bar):
+        high, low = float(bar['high']), float(bar['low'])
+        return max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+
+    def seed(self, bars):
+        self.prev_close = None
+        self.warmup = []
+        self.value = np.nan
+        if len(bars) > self.period:
+            values = ta.ATR(np.asarray(bars['high'], dtype=float), np.asarray(bars['low'], dtype=float),
+                            np.asarray(bars['close'], dtype=float), timeperiod=self.period)
+            self.value = float(values[-1])
+            self.prev_close = float(bars['close'][-1])
+            return
+        for bar in bars:
+            self.update(bar)
+
+    def update(self, bar):
+        if self.prev_close is not None:
+            tr = self.true_range(bar)
+            if np.isnan(self.value):
+                self.warmup.append(tr)
+                if len(self.warmup) == self.period:
+                    self.value = sum(self.warmup) / self.period
+                    self.warmup = []
+            else:
+                self.value = (self.value * (self.period - 1) + tr) / self.period
+        self.prev_close = float(bar['close'])
+
+    def peek(self, bar):
+        if self.prev_close is None:
+            return np.nan
+        tr = self.true_range(bar)
+        if np.isnan(self.value):
+            if len(self.warmup) + 1 == self.period:
+                return (sum(self.warmup) + tr) / self.period
+            return np.nan
+        return (self.value * (self.period - 1) + tr) / self.period
+
+
+#-----------------------------------
+# Batch (backtests)
+#-----------------------------------
+def rolling_max(values, period):
+    return ta.MAX(np.asarray(values, dtype=float), timeperiod=period)
+
+
+def rolling_min(values, period):
+    return ta.MIN(np.asarray(values, dtype=float), timeperiod=period)
+
+
+def donchian(high, low, period):
+    """
+    Returns:
+        tuple[np.ndarray]: (upper, middle, lower) arrays.
+    """
+    upper = rolling_max(high, period)
+    lower = rolling_min(low, period)
+    return upper, (upper + lower) / 2, lower
+
+
+def atr(high, low, close, period=14):
+    return ta.ATR(np.asarray(high, dtype=float), np.asarray(low, dtype=float), np.asarray(close, dtype=float), timeperiod=period)
@@ -18,6 +18,8 @@ from functools import wraps
 from collections import deque
 import statistics
 from colorama import Fore, Back, Style, init
+import matplotlib
+matplotlib.use('Agg') # Charts are only saved to files; no GUI canvas per figure
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 from mplfinance import plot as mpf_plot
@@ -91,6 +93,7 @@ class screenshot:
         self.tp_points = tp_points
         self.strategy_id = strategy_id
         # self.SCREENSHOTS_DIR="screenshots/GOLD/" 
+        fig = None
         try:
             self.ensure_screenshots_directory()
             
@@ -144,8 +147,7 @@ class screenshot:
                 ylabel='Price',
                 ylabel_lower='',
                 figsize=(16, 10),
-                returnfig=True,
-                savefig=chart_path
+                returnfig=True
             )
             
             # Add custom legend and annotations
@@ -178,10 +180,13 @@ class screenshot:
                     verticalalignment='top', horizontalalignment='left',
                     bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
             
-            plt.tight_layout()
-            plt.close(fig)  # Close to free memory
+            # Save once the legend and the trade box are on the figure
+            fig.savefig(chart_path, bbox_inches='tight')
             
             log_info(f"📊 Trade chart saved: {chart_filename}")
             
         except Exception as e:
             log_error(f"Failed to create trade chart: {e}\n{traceback.format_exc()}")
+        finally:
+            if fig is not None:
+                plt.close(fig)  # Also on errors; an unclosed figure stays in pyplot's registry
@@ -0,0 +1,237 @@
+# modules/config_reload.py
+#---------------------------------------
+# Hot-reloadable TradingConfig
+#---------------------------------------
+# watch_config(config) ties a TradingConfig to config/strategy_<id>.json.
+# On the first start the file is written from the values in the script; from
+# then on the file wins: it is applied at start-up and re-read whenever its
+# mtime changes. The check runs at cycle_started() (modules.metrics), i.e. in
+# the strategy thread between two cycles, so a cycle never sees half a change.
+#
+# A changed file is validated as a whole (known fields only, same type as the
+# current value, positive numbers, symbol / filename / strategy_id fixed) and
+# either applied completely or rejected; a rejected file leaves the running
+# config untouched. The swap replaces the config's __dict__ in one
+# assignment: PositionManager / TakeProfitMonitor share the same object and
+# see the new values on their next check, and snapshot(config) gives a
+# thread a consistent copy for one check. Indicators, bar feeds and threads
+# are untouched, so tuning needs no restart and no re-warm.
+#
+# Every applied field change and every rejected file is written to the
+# config_changes table of mt5_trades.db.
+
+import os
+import copy
+import json
+import sqlite3
+from datetime import datetime
+
+#-----------------------------------
+# Utilities and Global Variables
+#-----------------------------------
+from modules.utilities import log_success, log_error, log_warning, log_info
+
+CONFIG_DIR = 'config'
+DB_NAME = 'mt5_trades.db'
+AUDIT_TABLE = 'config_changes'
+
+IMMUTABLE_FIELDS = ('symbol', 'filename', 'strategy_id')   # identify the strategy, never reloaded
+DERIVED_FIELDS = ('reward_ratio',)                          # recomputed, not read from the file
+NON_NEGATIVE_FIELDS = ('deviation', 'support_resistance_distance_threshold')
+
+STATUS_APPLIED = 'applied'
+STATUS_REJECTED = 'rejected'
+
+
+class ConfigError(ValueError):
+    """The config file cannot be applied; the running config is kept."""
+
+
+def config_path(strategy_id):
+    return os.path.join(CONFIG_DIR, f"strategy_{strategy_id}.json")
+
+
+def snapshot(config):
+    """
+    A private copy for one unit of work in another thread. copy.copy() reads
+    __dict__ once, so the copy is entirely before or entirely after a swap.
+    """
+    return copy.copy(config)
+
+
+def tunable_values(config):
+    return {name: value for name, value in vars(config).items()
+            if not name.startswith('_') and name not in DERIVED_FIELDS}
+
+
+class ConfigWatcher:
+    """
+    Keeps one TradingConfig in sync with its JSON file.
+    """
+    def __init__(self, config, path=None, db_name=DB_NAME):
+        self.config = config
+        self.path = path or config_path(config.strategy_id)
+        self.db_name = db_name
+        self.mtime = None
+        self.reloads = 0
+
+    #-----------------------------------
+    # File
+    #-----------------------------------
+    def start(self):
+        """Applies an existing file, or writes the script's values as the first one."""
+        if os.path.exists(self.path):
+            self.reload("start-up")
+        else:
+            self.write()
+            log_info(f"Config for strategy {self.config.strategy_id} written to {self.path}; edit it to retune live.")
+
+    def write(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(tunable_values(self.config), f, indent=4)
+        os.replace(tmp_path, self.path)
+        self.mtime = os.stat(self.path).st_mtime_ns
+
+    def poll(self):
+        """Reloads if the file changed since the last look. Cheap: one stat()."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self.mtime:
+            return False
+        return self.reload("file changed")
+
+    def reload(self, reason):
+        try:
+            self.mtime = os.stat(self.path).st_mtime_ns
+            with open(self.path, encoding='utf-8') as f:
+                values = json.load(f)
+            changes = self.validate(values)
+        except (OSError, ValueError) as e:  # ConfigError and JSONDecodeError are ValueErrors
+            log_error(f"Config {self.path} rejected ({reason}): {e}. Keeping the running values.")
+            self.audit({}, STATUS_REJECTED, str(e))
+            return False
+
+        if not changes:
+            return False
+        self.apply(changes)
+        self.reloads += 1
+        for name, (old, new) in changes.items():
+            log_success(f"Config strategy {self.config.strategy_id}: {name} {old} -> {new} ({reason})")
+        self.audit(changes, STATUS_APPLIED, reason)
+        return True
+
+    #-----------------------------------
+    # Validation and swap
+    #-----------------------------------
+    def validate(self, values):
+        """
+        Returns {field: (old, new)} for the fields that change.
+        Raises ConfigError if any value is unacceptable.
+        """
+        if not isinstance(values, dict):
+            raise ConfigError("the file must hold one JSON object")
+        current = tunable_values(self.config)
+        unknown = sorted(set(values) - set(current) - set(DERIVED_FIELDS))
+        if unknown:
+            raise ConfigError(f"unknown field(s) {', '.join(unknown)}")
+
+        changes = {}
+        for name, new in values.items():
+            if name in DERIVED_FIELDS:
+                continue
+            old = current[name]
+            if name in IMMUTABLE_FIELDS:
+                if new != old:
+                    raise ConfigError(f"{name} cannot change while running ({old!r} -> {new!r})")
+                continue
+            new = self.coerce(name, old, new)
+            if new != old:
+                changes[name] = (old, new)
+        return changes
+
+    def coerce(self, name, old, new):
+        if isinstance(new, bool) or not isinstance(new, (int, float)):
+            raise ConfigError(f"{name} must be a number, got {new!r}")
+        if isinstance(old, int) and not isinstance(old, bool):
+            if isinstance(new, float) and not new.is_integer():
+                raise ConfigError(f"{name} must be a whole number, got {new!r}")
+            new = int(new)
+        else:
+            new = float(new)
+        if name in NON_NEGATIVE_FIELDS:
+            if new < 0:
+                raise ConfigError(f"{name} must be 0 or more, got {new!r}")
+        elif new <= 0:
+            raise ConfigError(f"{name} must be positive, got {new!r}")
+        return new
+
+    def apply(self, changes):
+        state = dict(vars(self.config))
+        for name, (_, new) in changes.items():
+            state[name] = new
+        if 'reward_ratio' in state:
+            state['reward_ratio'] = round(state['tp_points'] / state['sl_points'], 2)
+        self.config.__dict__ = state  # one reference swap; other threads see old or new, never a mix
+
+    #-----------------------------------
+    # Audit
+    #-----------------------------------
+    def audit(self, changes, status, message):
+        rows = [(name, str(old), str(new)) for name, (old, new) in changes.items()] or [(None, None, None)]
+        try:
+            conn = sqlite3.connect(self.db_name)
+            try:
+                conn.execute(f'''
+                    CREATE TABLE IF NOT EXISTS {AUDIT_TABLE} (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        strategy_id INTEGER,
+                        file_name TEXT,
+                        config_path TEXT,
+                        field TEXT,
+                        old_value TEXT,
+                        new_value TEXT,
+                        status TEXT,
+                        message TEXT
+                    )
+                ''')
+                now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                conn.executemany(f'''
+                    INSERT INTO {AUDIT_TABLE} (timestamp, strategy_id, file_name, config_path, field, old_value, new_value, status, message)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', [(now, self.config.strategy_id, self.config.filename, self.path, field, old, new, status, message)
+                      for field, old, new in rows])
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            log_warning(f"Config change could not be audited in {self.db_name}: {e}")
+
+
+_watchers = []
+
+
+def watch_config(config, path=None, db_name=DB_NAME):
+    """
+    Loads config from its JSON file (creating it on the first run) and keeps
+    it in sync between cycles.
+    """
+    watcher = ConfigWatcher(config, path, db_name)
+    watcher.start()
+    _watchers.append(watcher)
+    return watcher
+
+
+def cycle_started():
+    """Called by metrics.cycle_started(), in the strategy thread before the cycle's work."""
+    for watcher in _watchers:
+        try:
+            watcher.poll()
+        except Exception as e:
+            log_error(f"Config reload failed, keeping the running values: {e}")
@@ -0,0 +1,80 @@
+# modules/ema_kernel.py
+#---------------------------------------
+# Multi-period EMA in one pass over the price array
+#---------------------------------------
+# ema_matrix(prices, periods) fills a preallocated (len(prices), len(periods))
+# array, walking the prices once and updating every period per price, so each
+# price is read from memory once instead of once per talib.EMA call.
+#
+# Seeding matches talib.EMA: NaN for the first period-1 values, the SMA of the
+# first `period` prices at index period-1, then prev + (x - prev) * 2/(period+1).
+#
+# The loop is compiled with numba when it is installed. Without numba the
+# matrix is filled column by column with talib.EMA (same values, same layout),
+# so callers never need to know which path ran.
+
+import numpy as np
+import talib as ta
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# EMA periods used across the strategies (support/resistance, trailing guides,
+# consolidation filters, long-term trends)
+DEFAULT_EMA_PERIODS = (3, 7, 10, 12, 20, 21, 50, 200)
+
+
+def _ema_matrix_loop(prices, periods, out):
+    n = prices.shape[0]
+    m = periods.shape[0]
+    k = np.empty(m)
+    for j in range(m):
+        p = periods[j]
+        k[j] = 2.0 / (p + 1)
+        for t in range(min(p - 1, n)):
+            out[t, j] = np.nan
+        if n >= p:
+            total = 0.0
+            for t in range(p):
+                total += prices[t]
+            out[p - 1, j] = total / p
+
+    for t in range(1, n):
+        x = prices[t]
+        for j in range(m):
+            if t >= periods[j]:
+                prev = out[t - 1, j]
+                out[t, j] = (x - prev) * k[j] + prev
+    return out
+
+
+if NUMBA_AVAILABLE:
+    _ema_matrix_compiled = njit(cache=True)(_ema_matrix_loop)
+
+
+def ema_matrix(prices, periods=DEFAULT_EMA_PERIODS, out=None):
+    """
+    Calculates the EMA of one price column for several periods.
+
+    Args:
+        prices (array-like): Price column (e.g. close).
+        periods (sequence[int]): EMA periods, one output column each.
+        out (np.ndarray): Optional preallocated float64 array of shape (len(prices), len(periods)).
+
+    Returns:
+        np.ndarray: Array of shape (len(prices), len(periods)).
+    """
+    prices = np.ascontiguousarray(prices, dtype=np.float64)
+    periods = np.asarray(periods, dtype=np.int64)
+    if out is None:
+        out = np.empty((prices.shape[0], periods.shape[0]), dtype=np.float64)
+
+    if NUMBA_AVAILABLE:
+        return _ema_matrix_compiled(prices, periods, out)
+
+    for j, period in enumerate(periods):
+        out[:, j] = ta.EMA(prices, timeperiod=int(period))
+    return out
@@ -0,0 +1,424 @@
+# modules/execution_fanout.py
+#---------------------------------------
+# One decision -> many accounts
+#---------------------------------------
+# The MetaTrader5 package talks to a single terminal per process, so every
+# account gets its own worker process (and its own terminal). The strategy is
+# computed once and the FanOutExecutor pushes the same decision to all workers
+# at the same time. Each worker scales the volume, calls order_send and
+# reports its fill back for the latency / divergence report.
+
+import multiprocessing
+import os
+import queue
+import statistics
+import threading
+import time
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+#-----------------------------------
+# Utilities and Global Variables
+#-----------------------------------
+from modules.utilities import log_success, log_error, log_warning, log_info
+
+console = Console()
+
+RESULT_TIMEOUT_SECONDS = 10
+
+
+class AccountSession:
+    """
+    Connection and sizing settings for one account in the fan-out.
+    """
+    def __init__(self, name, config, login, password, server, terminal_path=None,
+                 volume_multiplier=1.0, manage_positions=True):
+        """
+        Args:
+            name (str): Label used in logs and reports (e.g. 'LIVE', 'LIVE_2').
+            config (TradingConfig): Symbol, magic number and trade management for this account.
+            login, password, server: Account credentials.
+            terminal_path (str): terminal64.exe of the terminal dedicated to this account.
+            volume_multiplier (float): Account volume = dispatched base volume x multiplier.
+            manage_positions (bool): Run a PositionManager (trailing stop) inside the worker.
+        """
+        self.name = name
+        self.config = config
+        self.login = login
+        self.password = password
+        self.server = server
+        self.terminal_path = terminal_path
+        self.volume_multiplier = volume_multiplier
+        self.manage_positions = manage_positions
+
+    @classmethod
+    def from_env(cls, name, config, volume_multiplier=1.0, manage_positions=True):
+        """
+        Builds a session from MT5_LOGIN_<name>, MT5_PASSWORD_<name>, MT5_SERVER_<name>
+        and the optional MT5_TERMINAL_<name> environment variables.
+        """
+        login = os.getenv(f"MT5_LOGIN_{name}")
+        if not login:
+            return None
+        return cls(
+            name=name,
+            config=config,
+            login=int(login),
+            password=os.getenv(f"MT5_PASSWORD_{name}"),
+            server=os.getenv(f"MT5_SERVER_{name}"),
+            terminal_path=os.getenv(f"MT5_TERMINAL_{name}"),
+            volume_multiplier=volume_multiplier,
+            manage_positions=manage_positions
+        )
+
+
+def normalize_volume(volume, symbol_info):
+    """
+    Rounds a volume down to the symbol's step and clamps it to its limits.
+    """
+    step = symbol_info.volume_step
+    volume = int(volume / step + 1e-9) * step
+    volume = max(symbol_info.volume_min, min(symbol_info.volume_max, volume))
+    return round(volume, 8)
+
+
+def _account_worker(session, task_queue, result_queue):
+    """
+    Worker process entry point: owns one terminal connection for its lifetime.
+    """
+    # Imported here so the parent process never touches the terminal API
+    import MetaTrader5 as mt5
+    from modules.mt5_manager import MT5Manager
+
+    config = session.config
+    mt5_manager = MT5Manager(login=session.login, password=session.password, server=session.server, path=session.terminal_path)
+    while not mt5_manager.connect():
+        if mt5_manager.connection_attempts >= mt5_manager.max_attempts:
+            result_queue.put({'account': session.name, 'type': 'ready', 'ok': False})
+            return
+
+    symbol_info = mt5.symbol_info(config.symbol)
+    if symbol_info is None or not mt5.symbol_select(config.symbol, True):
+        log_error(f"[{session.name}] Symbol {config.symbol} is not available.")
+        result_queue.put({'account': session.name, 'type': 'ready', 'ok': False})
+        mt5.shutdown()
+        return
+
+    position_open_event = threading.Event()
+    position_manager = None
+    if session.manage_positions:
+        from modules.position_manager import PositionManager
+        position_manager = PositionManager(config=config, mt5_manager=mt5_manager, position_open_event=position_open_event)
+        position_manager.daemon = True
+        position_manager.start()
+
+    result_queue.put({'account': session.name, 'type': 'ready', 'ok': True})
+
+    while True:
+        task = task_queue.get()
+        if task['action'] == 'stop':
+            break
+
+        picked_up_at = time.time()
+        result = {
+            'account': session.name,
+            'type': 'result',
+            'task_id': task['task_id'],
+            'action': task['action'],
+            'ok': False,
+            'queue_ms': (picked_up_at - task['decided_at']) * 1000,
+        }
+
+        if task['action'] == 'open':
+            positions = mt5.positions_get(symbol=config.symbol)
+            if positions and any(p.magic == config.strategy_id for p in positions):
+                result['message'] = 'position already open'
+                result_queue.put(result)
+                continue
+
+            tick = mt5.symbol_info_tick(config.symbol)
+            if tick is None:
+                result['message'] = f'no tick ({mt5.last_error()})'
+                result_queue.put(result)
+                continue
+
+            point = symbol_info.point
+            order_type = task['order_type']
+            if order_type == mt5.ORDER_TYPE_BUY:
+                price = tick.ask
+                sl = price - config.sl_points * point
+                tp = price + config.tp_points * point
+            else:  # mt5.ORDER_TYPE_SELL
+                price = tick.bid
+                sl = price + config.sl_points * point
+                tp = price - config.tp_points * point
+
+            volume = normalize_volume(task['volume'] * session.volume_multiplier, symbol_info)
+            request = {
+                "action": mt5.TRADE_ACTION_DEAL,
+                "symbol": config.symbol,
+                "volume": volume,
+                "type": order_type,
+                "price": price,
+                "deviation": config.deviation,
+                "magic": config.strategy_id,
+                "comment": config.filename,
+                "type_time": mt5.ORDER_TIME_GTC,
+                "type_filling": mt5.ORDER_FILLING_IOC,
+                "sl": round(sl, symbol_info.digits),
+            }
+            if task.get('use_tp', True):
+                request["tp"] = round(tp, symbol_info.digits)
+
+            send_started = time.time()
+            order_result = mt5.order_send(request)
+            done_at = time.time()
+
+            result['volume'] = volume
+            result['requested_price'] = price
+            result['send_ms'] = (done_at - send_started) * 1000
+            result['latency_ms'] = (done_at - task['decided_at']) * 1000
+            if order_result is None or order_result.retcode != mt5.TRADE_RETCODE_DONE:
+                result['message'] = f"retcode {order_result.retcode if order_result else mt5.last_error()}"
+            else:
+                result['ok'] = True
+                result['ticket'] = order_result.order
+                result['fill_price'] = order_result.price or price
+                result['point'] = point
+                position_open_event.set()
+
+        elif task['action'] == 'close':
+            positions = mt5.positions_get(symbol=config.symbol)
+            if positions is None:
+                result['message'] = f'positions_get failed ({mt5.last_error()})'
+                result_queue.put(result)
+                continue
+
+            matching = [p for p in positions if p.magic == config.strategy_id]
+            closed = 0
+            failed = {}  # ticket -> retcode / error
+            for position in matching:
+                tick = mt5.symbol_info_tick(config.symbol)
+                if tick is None:
+                    failed[position.ticket] = f'no tick ({mt5.last_error()})'
+                    continue
+                close_type = mt5.ORDER_TYPE_SELL if position.type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_BUY
+                request = {
+                    "action": mt5.TRADE_ACTION_DEAL,
+                    "position": position.ticket,
+                    "symbol": position.symbol,
+                    "volume": position.volume,
+                    "type": close_type,
+                    "price": tick.bid if position.type == mt5.ORDER_TYPE_BUY else tick.ask,
+                    "deviation": config.deviation,
+                    "magic": config.strategy_id,
+                    "comment": "Fan-out Close",
+                    "type_time": mt5.ORDER_TIME_GTC,
+                    "type_filling": mt5.ORDER_FILLING_IOC,
+                }
+                order_result = mt5.order_send(request)
+                if order_result is not None and order_result.retcode == mt5.TRADE_RETCODE_DONE:
+                    closed += 1
+                else:
+                    failed[position.ticket] = f"retcode {order_result.retcode if order_result else mt5.last_error()}"
+
+            result['ok'] = not failed  # every matching position closed (nothing open counts as done)
+            result['closed'] = closed
+            result['failed'] = failed
+            if not matching:
+                result['message'] = 'no position open'
+            elif failed:
+                result['message'] = f"{closed}/{len(matching)} closed; failed: " + ", ".join(
+                    f"{ticket} {reason}" for ticket, reason in failed.items())
+            else:
+                result['message'] = f"{closed} closed"
+            result['latency_ms'] = (time.time() - task['decided_at']) * 1000
+
+        result_queue.put(result)
+
+    if position_manager:
+        position_manager.stop()
+    mt5.shutdown()
+
+
+class FanOutReport:
+    """
+    Results of one dispatched decision across all accounts.
+    """
+    def __init__(self, task_id, action, reference_price, results, expected_accounts):
+        self.task_id = task_id
+        self.action = action
+        self.reference_price = reference_price
+        self.results = results
+        self.missing = [name for name in expected_accounts if name not in results]
+
+    def fills(self):
+        return {name: r for name, r in self.results.items() if r.get('ok') and 'fill_price' in r}
+
+    def display(self):
+        """Displays per-account fill latency and price divergence."""
+        fills = self.fills()
+        median_fill = statistics.median(r['fill_price'] for r in fills.values()) if fills else None
+
+        table = Table(title=f"📤 Fan-out #{self.task_id} ({self.action})", box=box.ROUNDED, show_header=True)
+        table.add_column("Account", style="cyan")
+        table.add_column("Status", style="green")
+        table.add_column("Volume")
+        table.add_column("Fill")
+        table.add_column("Latency", justify="right")
+        table.add_column("order_send", justify="right")
+        table.add_column("vs Signal", justify="right")
+        table.add_column("vs Median", justify="right")
+
+        for name, r in self.results.items():
+            status = "✅" if r.get('ok') else f"❌ {r.get('message', '')}"
+            if r.get('ok') and r.get('message'):
+                status = f"✅ {r['message']}"
+            fill = r.get('fill_price')
+            point = r.get('point')
+            vs_signal = f"{(fill - self.reference_price) / point:+.0f} pts" if fill and point and self.reference_price else "-"
+            vs_median = f"{(fill - median_fill) / point:+.0f} pts" if fill and point and median_fill else "-"
+            table.add_row(
+                name,
+                status,
+                f"{r.get('volume', '-')}",
+                f"{fill}" if fill else "-",
+                f"{r['latency_ms']:.1f} ms" if 'latency_ms' in r else "-",
+                f"{r['send_ms']:.1f} ms" if 'send_ms' in r else "-",
+                vs_signal,
+                vs_median
+            )
+        for name in self.missing:
+            table.add_row(name, "⏱️ no response", "-", "-", "-", "-", "-", "-")
+
+        console.print(table)
+
+
+class FanOutExecutor:
+    """
+    Dispatches one strategy decision to every account session concurrently.
+    """
+    def __init__(self, sessions, result_timeout=RESULT_TIMEOUT_SECONDS):
+        """
+        Args:
+            sessions (list[AccountSession]): Accounts to mirror the decision to.
+            result_timeout (float): How long dispatch() waits for all accounts to answer.
+        """
+        self.sessions = sessions
+        self.result_timeout = result_timeout
+        self.context = multiprocessing.get_context("spawn")
+        self.result_queue = self.context.Queue()
+        self.task_queues = {}
+        self.processes = {}
+        self.ready_accounts = []
+        self.task_id = 0
+        self.lock = threading.Lock()
+        self.latency_history = {session.name: [] for session in sessions}
+
+    def start(self):
+        """
+        Starts one worker process per account and waits for their terminals to connect.
+        """
+        for session in self.sessions:
+            task_queue = self.context.Queue()
+            process = self.context.Process(target=_account_worker, args=(session, task_queue, self.result_queue),
+                                           name=f"fanout-{session.name}", daemon=True)
+            process.start()
+            self.task_queues[session.name] = task_queue
+            self.processes[session.name] = process
+
+        pending = set(self.task_queues)
+        deadline = time.time() + 120
+        while pending and time.time() < deadline:
+            try:
+                message = self.result_queue.get(timeout=1)
+            except queue.Empty:
+                for name in list(pending):
+                    if not self.processes[name].is_alive():
+                        log_error(f"Fan-out worker {name} exited during start-up (exit code {self.processes[name].exitcode}).")
+                        pending.discard(name)
+                continue
+            if message.get('type') != 'ready':
+                continue
+            pending.discard(message['account'])
+            if message['ok']:
+                self.ready_accounts.append(message['account'])
+                log_success(f"Fan-out account {message['account']} is ready.")
+            else:
+                log_error(f"Fan-out account {message['account']} failed to connect.")
+
+        for name in pending:
+            log_error(f"Fan-out account {name} did not connect in time.")
+            self.processes[name].terminate()
+        return len(self.ready_accounts) > 0
+
+    def dispatch(self, action, order_type=None, volume=None, reference_price=None, use_tp=True):
+        """
+        Sends the same decision to every ready account and collects the fills.
+
+        Args:
+            action (str): 'open' or 'close'.
+            order_type (int): mt5.ORDER_TYPE_BUY or mt5.ORDER_TYPE_SELL for 'open'.
+            volume (float): Base volume, scaled per account by its volume_multiplier.
+            reference_price (float): Price at decision time, used for the divergence report.
+            use_tp (bool): Send the broker-side TP with the order.
+
+        Returns:
+            FanOutReport: Per-account results.
+        """
+        with self.lock:
+            self.task_id += 1
+            task = {
+                'task_id': self.task_id,
+                'action': action,
+                'order_type': order_type,
+                'volume': volume,
+                'use_tp': use_tp,
+                'decided_at': time.time(),
+            }
+            for name in self.ready_accounts:
+                self.task_queues[name].put(task)
+
+            results = {}
+            deadline = time.time() + self.result_timeout
+            while len(results) < len(self.ready_accounts) and time.time() < deadline:
+                try:
+                    message = self.result_queue.get(timeout=max(0.01, deadline - time.time()))
+                except queue.Empty:
+                    break
+                if message.get('type') == 'result' and message.get('task_id') == self.task_id:
+                    results[message['account']] = message
+
+            for name, r in results.items():
+                if 'latency_ms' in r:
+                    self.latency_history[name].append(r['latency_ms'])
+
+            return FanOutReport(self.task_id, action, reference_price, results, self.ready_accounts)
+
+    def display_latency_summary(self):
+        """Displays the latency distribution of every account since start."""
+        table = Table(title="⏱️ Fan-out Latency", box=box.ROUNDED, show_header=True)
+        table.add_column("Account", style="cyan")
+        table.add_column("Orders", justify="right")
+        table.add_column("Median", justify="right")
+        table.add_column("Max", justify="right")
+        for name, history in self.latency_history.items():
+            if history:
+                table.add_row(name, str(len(history)), f"{statistics.median(history):.1f} ms", f"{max(history):.1f} ms")
+            else:
+                table.add_row(name, "0", "-", "-")
+        console.print(table)
+
+    def stop(self):
+        """
+        Stops all worker processes gracefully.
+        """
+        log_info("Stopping fan-out workers.")
+        for task_queue in self.task_queues.values():
+            task_queue.put({'action': 'stop'})
+        for process in self.processes.values():
+            process.join(timeout=10)
+            if process.is_alive():
+                log_warning(f"Worker {process.name} did not stop, terminating.")
+                process.terminate()
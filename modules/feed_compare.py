@@ -0,0 +1,544 @@
+# modules/feed_compare.py
+#---------------------------------------
+# Live-vs-demo feed divergence monitor
+#---------------------------------------
+# The same strategy reads different prices on different broker servers
+# (e.g. GOLD# on the DEMO server and GOLDm# on the LIVE server, see
+# live-vs-demo.txt). This module aligns closed bars from several feeds by bar
+# time and, bar by bar:
+#   - measures the OHLC and EMA deltas of every feed against a reference feed
+#   - evaluates the M1 Average Zone rule on each feed and flags the bars where
+#     the reference (demo-validated) signal would not have fired on the other feed
+#   - keeps running statistics (count, mean, std, max |delta|) and persists
+#     them, together with the mismatches, to SQLite
+#
+# Feeds come either from live terminals (one worker process per account, the
+# MT5 API is one terminal per process) or from bars recorded in the
+# `feed_bar` table, so the same comparison runs offline.
+
+import copy
+import math
+import multiprocessing
+import queue
+import sqlite3
+import time
+from datetime import datetime
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+#-----------------------------------
+# Utilities and Global Variables
+#-----------------------------------
+from modules.utilities import log_success, log_error, log_warning, log_info
+from modules.incremental_indicators import IncrementalEMA
+
+console = Console()
+
+DB_NAME = 'mt5_trades.db'
+POLL_INTERVAL_SECONDS = 2        # how often the terminal workers look for a newly closed bar
+STATS_FLUSH_SECONDS = 60         # how often running statistics are written to SQLite
+MAX_PENDING_BARS = 5000          # safety cap on bars waiting for a feed that stalled
+
+OHLC_FIELDS = ['open', 'high', 'low', 'close']
+
+
+def average_zone_indicators(config):
+    """
+    The EMAs the M1 Average Zone strategies use, keyed by role.
+    """
+    return {
+        'support': IncrementalEMA(config.ema_support, 'low'),
+        'resistance': IncrementalEMA(config.ema_resistance, 'high'),
+        'trailing': IncrementalEMA(config.trailing_period, 'close'),
+        'consolidation': IncrementalEMA(config.consolidation_filter, 'close'),
+        'long_term': IncrementalEMA(config.long_term_trend, 'close'),
+    }
+
+
+def average_zone_signal(price, values, config, point):
+    """
+    Same rule as strategy_20_demo.py (trend with long-term filter + distance to
+    the trailing guide), evaluated on one bar.
+
+    Returns:
+        str: 'buy', 'sell' or 'hold'.
+    """
+    if any(math.isnan(v) for v in values.values()):
+        return 'hold'
+    distance = abs(price - values['trailing']) / point
+    if distance > config.support_resistance_distance_threshold:
+        return 'hold'
+    if price > values['support'] > values['consolidation'] > values['long_term']:
+        return 'buy'
+    if price < values['resistance'] < values['consolidation'] < values['long_term']:
+        return 'sell'
+    return 'hold'
+
+
+class RunningStat:
+    """
+    Welford running mean/variance plus the largest absolute value seen.
+    """
+    def __init__(self, count=0, mean=0.0, m2=0.0, max_abs=0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.max_abs = max_abs
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.max_abs = max(self.max_abs, abs(x))
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+
+class FeedState:
+    """
+    Incremental indicator state of one feed.
+    """
+    def __init__(self, name, config, point):
+        self.name = name
+        self.config = config
+        self.point = point
+        self.indicators = average_zone_indicators(config)
+        self.last_time = None
+
+    def update(self, bar):
+        """
+        Advances the indicators by one closed bar and returns the bar's values.
+        """
+        for indicator in self.indicators.values():
+            indicator.update(bar)
+        self.last_time = bar['time']
+        values = {key: indicator.value for key, indicator in self.indicators.items()}
+        signal = average_zone_signal(bar['close'], values, self.config, self.point)
+        return {'bar': bar, 'values': values, 'signal': signal}
+
+
+class FeedComparator:
+    """
+    Aligns closed bars by time and accumulates divergence statistics.
+    """
+    def __init__(self, reference, feeds, db_name=DB_NAME):
+        """
+        Args:
+            reference (FeedState): The demo-validated feed the others are compared to.
+            feeds (list[FeedState]): The feeds compared against the reference.
+            db_name (str): SQLite database for statistics and mismatches (None = in memory only).
+        """
+        self.reference = reference
+        self.feeds = {feed.name: feed for feed in feeds}
+        self.states = {reference.name: reference, **self.feeds}
+        self.pending = {}
+        self.stats = {}
+        self.bars_compared = 0
+        self.bars_missing = {name: 0 for name in self.states}
+        self.mismatches = {name: 0 for name in self.feeds}
+        self.agreements = {name: 0 for name in self.feeds}
+        self.last_flush = time.time()
+        self.last_compared_time = None
+        self.resume_after = None
+        self.conn = None
+        if db_name:
+            self.conn = sqlite3.connect(db_name, check_same_thread=False)
+            self.create_tables()
+
+    def create_tables(self):
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS feed_divergence (
+                reference TEXT NOT NULL,
+                feed TEXT NOT NULL,
+                field TEXT NOT NULL,
+                count INTEGER,
+                mean REAL,
+                m2 REAL,
+                std REAL,
+                max_abs REAL,
+                last_bar_time INTEGER,
+                updated_at TEXT,
+                PRIMARY KEY (reference, feed, field)
+            );
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS feed_signal_mismatch (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                bar_time INTEGER,
+                reference TEXT,
+                feed TEXT,
+                reference_signal TEXT,
+                feed_signal TEXT,
+                reference_close REAL,
+                feed_close REAL,
+                detected_at TEXT
+            );
+        """)
+        self.conn.commit()
+
+    def load_stats(self):
+        """Continues the persisted statistics instead of starting from zero."""
+        if self.conn is None:
+            return
+        rows = self.conn.execute(
+            "SELECT feed, field, count, mean, m2, max_abs, last_bar_time FROM feed_divergence WHERE reference = ?",
+            (self.reference.name,)
+        ).fetchall()
+        for feed, field, count, mean, m2, max_abs, last_bar_time in rows:
+            if feed in self.feeds:
+                self.stats[(feed, field)] = RunningStat(count, mean, m2, max_abs)
+                # Warm-up bars sent again after a restart are already in these statistics
+                if last_bar_time is not None:
+                    self.resume_after = max(self.resume_after or 0, last_bar_time)
+
+    #-----------------------------------
+    # Alignment
+    #-----------------------------------
+    def add_bar(self, feed_name, bar):
+        """
+        Feeds one closed bar (dict or structured row with time/open/high/low/close).
+        Bars of one feed must arrive in time order.
+        """
+        state = self.states[feed_name]
+        if state.last_time is not None and bar['time'] <= state.last_time:
+            return
+        evaluated = state.update(bar)
+        slot = self.pending.setdefault(int(bar['time']), {})
+        slot[feed_name] = evaluated
+        if len(slot) == len(self.states):
+            self._compare(int(bar['time']), self.pending.pop(int(bar['time'])))
+
+        # Once every feed has moved past a bar time, the feeds missing it will never send it
+        last_times = [s.last_time for s in self.states.values()]
+        if None not in last_times:
+            self._drop_stale(int(min(last_times)))
+        if len(self.pending) > MAX_PENDING_BARS:
+            self._drop_stale(sorted(self.pending)[len(self.pending) - MAX_PENDING_BARS])
+
+    def _drop_stale(self, until_time):
+        """Counts the feeds missing from bars up to `until_time` and forgets those bars."""
+        for bar_time in [t for t in self.pending if t <= until_time]:
+            for name in self.states:
+                if name not in self.pending[bar_time]:
+                    self.bars_missing[name] += 1
+            del self.pending[bar_time]
+
+    def _stat(self, feed, field):
+        return self.stats.setdefault((feed, field), RunningStat())
+
+    def _compare(self, bar_time, slot):
+        if self.resume_after is not None and bar_time <= self.resume_after:
+            return
+        reference = slot[self.reference.name]
+        self.bars_compared += 1
+        self.last_compared_time = bar_time
+        for name, evaluated in slot.items():
+            if name == self.reference.name:
+                continue
+            for field in OHLC_FIELDS:
+                self._stat(name, field).add(float(evaluated['bar'][field]) - float(reference['bar'][field]))
+            for key, value in evaluated['values'].items():
+                if not (math.isnan(value) or math.isnan(reference['values'][key])):
+                    self._stat(name, f"ema_{key}").add(value - reference['values'][key])
+
+            if reference['signal'] in ('buy', 'sell'):
+                if evaluated['signal'] == reference['signal']:
+                    self.agreements[name] += 1
+                else:
+                    self.mismatches[name] += 1
+                    self._record_mismatch(bar_time, name, reference, evaluated)
+
+        if time.time() - self.last_flush >= STATS_FLUSH_SECONDS:
+            self.flush()
+
+    def _record_mismatch(self, bar_time, name, reference, evaluated):
+        log_warning(f"{datetime.fromtimestamp(bar_time)}: {self.reference.name} says {reference['signal'].upper()} "
+                    f"but {name} says {evaluated['signal'].upper()} "
+                    f"(close {reference['bar']['close']} vs {evaluated['bar']['close']}).")
+        if self.conn is None:
+            return
+        self.conn.execute(
+            "INSERT INTO feed_signal_mismatch (bar_time, reference, feed, reference_signal, feed_signal, "
+            "reference_close, feed_close, detected_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (bar_time, self.reference.name, name, reference['signal'], evaluated['signal'],
+             float(reference['bar']['close']), float(evaluated['bar']['close']), datetime.now().isoformat())
+        )
+        self.conn.commit()
+
+    #-----------------------------------
+    # Output
+    #-----------------------------------
+    def flush(self):
+        """Writes the running statistics to SQLite."""
+        self.last_flush = time.time()
+        if self.conn is None:
+            return
+        now = datetime.now().isoformat()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO feed_divergence (reference, feed, field, count, mean, m2, std, max_abs, last_bar_time, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(self.reference.name, feed, field, s.count, s.mean, s.m2, s.std, s.max_abs, self.last_compared_time or self.resume_after, now)
+             for (feed, field), s in self.stats.items()]
+        )
+        self.conn.commit()
+
+    def display(self):
+        point = self.reference.point
+        table = Table(title=f"Feed Divergence vs {self.reference.name} ({self.bars_compared} bars)", box=box.ROUNDED)
+        table.add_column("Feed", style="cyan")
+        table.add_column("Field", style="cyan")
+        table.add_column("Mean Δ (pts)", justify="right")
+        table.add_column("Std (pts)", justify="right")
+        table.add_column("Max |Δ| (pts)", justify="right")
+        for (feed, field), s in sorted(self.stats.items()):
+            table.add_row(feed, field, f"{s.mean / point:.1f}", f"{s.std / point:.1f}", f"{s.max_abs / point:.1f}")
+        console.print(table)
+
+        signal_table = Table(title="Reference Signals on Other Feeds", box=box.ROUNDED)
+        signal_table.add_column("Feed", style="cyan")
+        signal_table.add_column("Agreed", style="green", justify="right")
+        signal_table.add_column("Would Not Fire", style="red", justify="right")
+        signal_table.add_column("Missing Bars", justify="right")
+        for name in self.feeds:
+            signal_table.add_row(name, str(self.agreements[name]), str(self.mismatches[name]), str(self.bars_missing[name]))
+        console.print(signal_table)
+
+    def close(self):
+        self.flush()
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+#-----------------------------------
+# Recorded feeds
+#-----------------------------------
+class FeedRecorder:
+    """
+    Stores closed bars per feed in the `feed_bar` table for offline replays.
+    """
+    def __init__(self, db_name=DB_NAME):
+        self.conn = sqlite3.connect(db_name, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS feed_bar (
+                feed TEXT NOT NULL,
+                symbol TEXT,
+                time INTEGER NOT NULL,
+                open REAL,
+                high REAL,
+                low REAL,
+                close REAL,
+                PRIMARY KEY (feed, time)
+            );
+        """)
+        self.conn.commit()
+
+    def record(self, feed, symbol, bars):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO feed_bar (feed, symbol, time, open, high, low, close) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(feed, symbol, int(b['time']), float(b['open']), float(b['high']), float(b['low']), float(b['close'])) for b in bars]
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def load_recorded_bars(db_name=DB_NAME, feed=None, table='feed_bar', start_time=None, end_time=None):
+    """
+    Reads closed bars in time order, either a feed from `feed_bar` or a plain
+    OHLC table such as market_data.py's `gold` (feed=None).
+    """
+    conn = sqlite3.connect(db_name)
+    query = f"SELECT time, open, high, low, close FROM {table} WHERE 1 = 1"
+    params = []
+    if feed is not None:
+        query += " AND feed = ?"
+        params.append(feed)
+    if start_time is not None:
+        query += " AND time >= ?"
+        params.append(int(start_time))
+    if end_time is not None:
+        query += " AND time <= ?"
+        params.append(int(end_time))
+    rows = conn.execute(query + " ORDER BY time", params).fetchall()
+    conn.close()
+    return [dict(zip(['time'] + OHLC_FIELDS, row)) for row in rows]
+
+
+def replay(comparator, feeds):
+    """
+    Runs the comparison offline.
+
+    Args:
+        comparator (FeedComparator): Comparator whose feed names match `feeds`.
+        feeds (dict): feed name -> list of closed bars in time order.
+    """
+    # Merge by time so the pending window stays small, as with live feeds
+    merged = sorted(((bar['time'], name, bar) for name, bars in feeds.items() for bar in bars), key=lambda item: (item[0], item[1]))
+    for _, name, bar in merged:
+        comparator.add_bar(name, bar)
+    comparator.flush()
+    return comparator
+
+
+#-----------------------------------
+# Live feeds (one terminal per worker process)
+#-----------------------------------
+def _feed_worker(session, timeframe, warmup_bars, bar_queue):
+    """
+    Worker process entry point: streams the closed bars of one account's symbol.
+    """
+    # Imported here so the parent process never touches the terminal API
+    import MetaTrader5 as mt5
+    from modules.mt5_manager import MT5Manager
+    from modules.bar_feed import BarFeed
+
+    symbol = session.config.symbol
+    mt5_manager = MT5Manager(login=session.login, password=session.password, server=session.server, path=session.terminal_path)
+    while not mt5_manager.connect():
+        if mt5_manager.connection_attempts >= mt5_manager.max_attempts:
+            bar_queue.put({'feed': session.name, 'type': 'ready', 'ok': False})
+            return
+
+    symbol_info = mt5.symbol_info(symbol)
+    if symbol_info is None or not mt5.symbol_select(symbol, True):
+        log_error(f"[{session.name}] Symbol {symbol} is not available.")
+        bar_queue.put({'feed': session.name, 'type': 'ready', 'ok': False})
+        mt5.shutdown()
+        return
+
+    feed = BarFeed(symbol, timeframe, warmup_bars)
+    last_sent = None
+    bar_queue.put({'feed': session.name, 'type': 'ready', 'ok': True, 'symbol': symbol, 'point': symbol_info.point})
+    try:
+        while True:
+            status = feed.update()
+            if status is not None:
+                closed = feed.bars[:-1]
+                if last_sent is not None:
+                    closed = closed[closed['time'] > last_sent]
+                if len(closed):
+                    bars = [{'time': int(b['time']), 'open': float(b['open']), 'high': float(b['high']),
+                             'low': float(b['low']), 'close': float(b['close'])} for b in closed]
+                    bar_queue.put({'feed': session.name, 'type': 'bars', 'bars': bars})
+                    last_sent = bars[-1]['time']
+            time.sleep(POLL_INTERVAL_SECONDS)
+    finally:
+        mt5.shutdown()
+
+
+class FeedMonitor:
+    """
+    Streams the same strategy feed from several accounts and compares them live.
+    """
+    def __init__(self, reference_session, sessions, timeframe, warmup_bars=2000, db_name=DB_NAME, record=True):
+        """
+        Args:
+            reference_session (AccountSession): The demo account whose signals are validated.
+            sessions (list[AccountSession]): Accounts compared against the reference.
+            timeframe (int): mt5.TIMEFRAME_* constant.
+            warmup_bars (int): Closed bars used to warm the indicators up.
+            db_name (str): SQLite database for statistics, mismatches and recorded bars.
+            record (bool): Store every closed bar in `feed_bar` for offline replays.
+        """
+        self.sessions = [reference_session] + list(sessions)
+        self.reference_name = reference_session.name
+        self.timeframe = timeframe
+        self.warmup_bars = warmup_bars
+        self.db_name = db_name
+        self.recorder = FeedRecorder(db_name) if record else None
+        self.context = multiprocessing.get_context("spawn")
+        self.bar_queue = self.context.Queue()
+        self.processes = {}
+        self.symbols = {}
+        self.comparator = None
+
+    def start(self):
+        """
+        Starts one worker per account and builds the comparator from the feeds that connected.
+        """
+        for session in self.sessions:
+            process = self.context.Process(target=_feed_worker, args=(session, self.timeframe, self.warmup_bars, self.bar_queue),
+                                           name=f"feed-{session.name}", daemon=True)
+            process.start()
+            self.processes[session.name] = process
+
+        states = {}
+        pending = set(self.processes)
+        deadline = time.time() + 120
+        while pending and time.time() < deadline:
+            try:
+                message = self.bar_queue.get(timeout=1)
+            except queue.Empty:
+                for name in list(pending):
+                    if not self.processes[name].is_alive():
+                        log_error(f"Feed worker {name} exited during start-up (exit code {self.processes[name].exitcode}).")
+                        pending.discard(name)
+                continue
+            if message.get('type') != 'ready':
+                continue
+            pending.discard(message['feed'])
+            if not message['ok']:
+                log_error(f"Feed {message['feed']} failed to connect.")
+                continue
+            session = next(s for s in self.sessions if s.name == message['feed'])
+            self.symbols[session.name] = message['symbol']
+            states[session.name] = FeedState(session.name, session.config, message['point'])
+            log_success(f"Feed {session.name} ({message['symbol']}) is ready.")
+
+        for name in pending:
+            log_error(f"Feed {name} did not connect in time.")
+            self.processes[name].terminate()
+
+        if self.reference_name not in states or len(states) < 2:
+            log_error("The reference feed and at least one other feed are required.")
+            return False
+
+        reference = states.pop(self.reference_name)
+        self.comparator = FeedComparator(reference, list(states.values()), db_name=self.db_name)
+        self.comparator.load_stats()
+        return True
+
+    def run(self, display_every_bars=15):
+        """
+        Consumes closed bars until interrupted.
+        """
+        displayed_at = 0
+        while True:
+            try:
+                message = self.bar_queue.get(timeout=5)
+            except queue.Empty:
+                continue
+            if message.get('type') != 'bars' or message['feed'] not in self.comparator.states:
+                continue
+            if self.recorder:
+                self.recorder.record(message['feed'], self.symbols[message['feed']], message['bars'])
+            for bar in message['bars']:
+                self.comparator.add_bar(message['feed'], bar)
+            if self.comparator.bars_compared - displayed_at >= display_every_bars:
+                displayed_at = self.comparator.bars_compared
+                self.comparator.display()
+
+    def stop(self):
+        for process in self.processes.values():
+            if process.is_alive():
+                process.terminate()
+        if self.comparator:
+            self.comparator.display()
+            self.comparator.close()
+        if self.recorder:
+            self.recorder.close()
+
+
+def session_for_symbol(session, symbol):
+    """Copy of an AccountSession whose config trades another symbol name (e.g. GOLDm# on LIVE)."""
+    session = copy.copy(session)
+    session.config = copy.copy(session.config)
+    session.config.symbol = symbol
+    return session
@@ -0,0 +1,77 @@
+# modules/heartbeat.py
+#---------------------------------------
+# Liveness heartbeats for the process supervisor
+#---------------------------------------
+# supervisor.py starts every script with MT5_SUPERVISOR_HEARTBEAT pointing
+# at a file of its own. beat() touches that file; the supervisor restarts a
+# process whose file has not been touched within its heartbeat timeout, so
+# a loop stuck in an MT5 call is caught, not only a crashed one.
+#
+# Scripts call beat() once per loop cycle and use heartbeat.sleep() for long
+# waits (closed sessions, database sync intervals) so that sleeping is not
+# mistaken for hanging. Without the variable (a manual launch) both are
+# plain no-op / time.sleep.
+#
+# A process that wants a fresh start (memory_guard.py past its soft limit)
+# calls request_recycle(reason) and exits with RECYCLE_EXIT_CODE; the
+# supervisor restarts it at once, without backoff, and shows the reason.
+
+import os
+import time
+
+HEARTBEAT_ENV = 'MT5_SUPERVISOR_HEARTBEAT'
+BEAT_SECONDS = 30   # longest sleep between beats while waiting
+RECYCLE_EXIT_CODE = 75  # EX_TEMPFAIL: a planned exit, restart immediately
+
+_path = os.environ.get(HEARTBEAT_ENV)
+
+
+def beat():
+    """Marks this process alive (file mtime = now)."""
+    if not _path:
+        return
+    try:
+        os.utime(_path)
+    except FileNotFoundError:
+        try:
+            with open(_path, 'a'):
+                pass
+        except OSError:
+            pass
+    except OSError:
+        pass
+
+
+def sleep(seconds):
+    """time.sleep() that keeps beating every BEAT_SECONDS."""
+    deadline = time.monotonic() + seconds
+    while True:
+        beat()
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        time.sleep(min(remaining, BEAT_SECONDS) if _path else remaining)
+
+
+def supervised():
+    """True when started by supervisor.py (someone will restart us)."""
+    return bool(_path)
+
+
+def recycle_path(heartbeat_path):
+    return f"{heartbeat_path}.recycle"
+
+
+def request_recycle(reason):
+    """
+    Leaves the reason for the supervisor. The caller then exits with
+    RECYCLE_EXIT_CODE. Returns False when not supervised (nobody would restart us).
+    """
+    if not _path:
+        return False
+    try:
+        with open(recycle_path(_path), 'w', encoding='utf-8') as f:
+            f.write(reason)
+    except OSError:
+        pass  # the exit code alone still asks for the restart
+    return True
@@ -0,0 +1,103 @@
+# modules/incremental_indicators.py
+#---------------------------------------
+# Indicators maintained bar by bar instead of recomputed over the full window
+#---------------------------------------
+# Every indicator keeps its state over CLOSED bars only:
+#   seed(bars)   - (re)build the state from a window of closed bars
+#   update(bar)  - advance the state by one newly closed bar, O(1)
+#   peek(bar)    - value including the forming bar, without changing the state
+# `bars` / `bar` are rows of the structured array returned by
+# mt5.copy_rates_from_pos (fields time, open, high, low, close, ...).
+#
+# The arithmetic mirrors talib (SMA seed, NaN until warmed up,
+# prev + (x - prev) * k), so peek() on the forming bar equals the last value of
+# talib.EMA / talib.SMA over the same bars.
+
+import numpy as np
+import talib as ta
+from collections import deque
+
+
+class IncrementalIndicator:
+    """
+    Base class for indicators driven by modules.bar_feed.BarFeed.
+    """
+    def seed(self, bars):
+        raise NotImplementedError
+
+    def update(self, bar):
+        raise NotImplementedError
+
+    def peek(self, bar):
+        raise NotImplementedError
+
+
+class IncrementalEMA(IncrementalIndicator):
+    """
+    Exponential Moving Average of one price column, talib-compatible.
+    """
+    def __init__(self, period, price_type='close'):
+        self.period = period
+        self.price_type = price_type
+        self.k = 2.0 / (period + 1)
+        self.value = np.nan
+        self.warmup = []
+
+    def seed(self, bars):
+        values = np.asarray(bars[self.price_type], dtype=float)
+        self.warmup = []
+        if len(values) < self.period:
+            self.value = np.nan
+            self.warmup = list(values)
+            return
+        self.value = float(ta.EMA(values, timeperiod=self.period)[-1])
+
+    def update(self, bar):
+        x = float(bar[self.price_type])
+        if np.isnan(self.value):
+            # Still collecting the SMA seed
+            self.warmup.append(x)
+            if len(self.warmup) == self.period:
+                self.value = sum(self.warmup) / self.period
+                self.warmup = []
+            return
+        self.value = self.value + (x - self.value) * self.k
+
+    def peek(self, bar):
+        x = float(bar[self.price_type])
+        if np.isnan(self.value):
+            if len(self.warmup) + 1 == self.period:
+                return (sum(self.warmup) + x) / self.period
+            return np.nan
+        return self.value + (x - self.value) * self.k
+
+
+class IncrementalSMA(IncrementalIndicator):
+    """
+    Simple Moving Average of one price column over a fixed window of bars.
+    """
+    def __init__(self, period, price_type='close'):
+        self.period = period
+        self.price_type = price_type
+        self.window = deque(maxlen=period)
+        self.total = 0.0
+
+    def seed(self, bars):
+        values = np.asarray(bars[self.price_type], dtype=float)[-self.period:]
+        self.window = deque(values.tolist(), maxlen=self.period)
+        self.total = float(np.sum(values))
+
+    def update(self, bar):
+        x = float(bar[self.price_type])
+        if len(self.window) == self.period:
+            self.total -= self.window[0]
+        self.window.append(x)
+        self.total += x
+
+    def peek(self, bar):
+        x = float(bar[self.price_type])
+        if len(self.window) + 1 < self.period:
+            return np.nan
+        # The forming bar pushes out the oldest closed bar once the window is full
+        oldest = self.window[0] if len(self.window) == self.period else 0.0
+        return (self.total - oldest + x) / self.period
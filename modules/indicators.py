@@ -3,6 +3,8 @@ import pandas as pd
 import talib as ta
 import numpy as np
 from rich.console import Console
+from modules.ema_kernel import ema_matrix
+from modules.channel_indicators import donchian, atr
 
 
 #-----------------------------------
@@ -16,14 +18,16 @@ class Indicators:
     A utility class to calculate common technical indicators and
     provide analysis on price relationships.
     """
-    def __init__(self, rates_df):
+    def __init__(self, rates_df=None):
         """
         Initializes the Indicators class with a DataFrame of price rates.
         
         Args:
             rates_df (pd.DataFrame): DataFrame containing price data with 'close', 'high', etc.
+                May be None when only the terminal-backed helpers (calculate_candle_range) are used.
         """
         self.rates = rates_df
+        self.ema_cache = {} # price_type -> {period: EMA array}
 
     def calculate_ema(self, period, price_type='close'):
         """
@@ -36,10 +40,40 @@ class Indicators:
         Returns:
             pd.Series: A Series containing the EMA values.
         """
+        return pd.Series(self.ema_arrays([period], price_type)[0], index=self.rates.index, name=price_type)
+
+    def ema_arrays(self, periods, price_type='close'):
+        """
+        EMA arrays of one column for several periods, cached per price type.
+        The missing periods are computed together in one pass of the EMA
+        kernel; a single missing period goes to ta.EMA, which is faster alone.
+
+        Returns:
+            list[np.ndarray]: One array per period, in the order asked.
+        """
         if price_type not in self.rates.columns:
             raise ValueError(f"Price type '{price_type}' not found in DataFrame.")
-        
-        return ta.EMA(self.rates[price_type], timeperiod=period)
+
+        emas = self.ema_cache.setdefault(price_type, {})
+        missing = sorted(set(periods) - set(emas))
+        values = self.rates[price_type].values.astype(np.float64)
+        if len(missing) == 1:
+            emas[missing[0]] = ta.EMA(values, timeperiod=missing[0])
+        elif missing:
+            matrix = ema_matrix(values, missing)
+            for j, p in enumerate(missing):
+                emas[p] = matrix[:, j]
+        return [emas[period] for period in periods]
+
+    def calculate_emas(self, periods, price_type='close'):
+        """
+        Calculates several EMAs of one column in a single pass of the EMA kernel.
+
+        Returns:
+            pd.DataFrame: One column per period, named by the period.
+        """
+        arrays = self.ema_arrays(periods, price_type)
+        return pd.DataFrame(dict(zip(periods, arrays)), index=self.rates.index)
     
 
     def calculate_sma(self, period, price_type='close'):
@@ -59,6 +93,28 @@ class Indicators:
         return ta.SMA(self.rates[price_type], timeperiod=period)    
     
 
+    def calculate_donchian(self, period):
+        """
+        Calculates the Donchian channel (highest high / lowest low over `period` bars).
+
+        Returns:
+            pd.DataFrame: 'upper', 'middle' and 'lower' columns.
+        """
+        upper, middle, lower = donchian(self.rates['high'].values, self.rates['low'].values, period)
+        return pd.DataFrame({'upper': upper, 'middle': middle, 'lower': lower}, index=self.rates.index)
+
+
+    def calculate_atr(self, period=14):
+        """
+        Calculates the Average True Range (Wilder smoothing).
+
+        Returns:
+            pd.Series: A Series containing the ATR values.
+        """
+        return pd.Series(atr(self.rates['high'].values, self.rates['low'].values, self.rates['close'].values, period),
+                         index=self.rates.index, name='atr')
+
+
     def calculate_candle_range(self, symbol, timeframe):
         """
         Checks if the current open candle's range (High - Low) is within the specified limit.
@@ -101,10 +157,12 @@ class Indicators:
 
     def get_last_ema_value(self, period, price_type='close'):
         """
-        Gets the last calculated EMA value.
+        Gets the last calculated EMA value. With a list of periods, returns the
+        list of last values, computed together in one kernel pass.
         """
-        ema_series = self.calculate_ema(period, price_type)
-        return ema_series.iloc[-1]
+        if isinstance(period, (list, tuple)):
+            return [values[-1] for values in self.ema_arrays(period, price_type)]
+        return self.ema_arrays([period], price_type)[0][-1]
     
 
     def get_last_sma_value(self, period, price_type='close'):
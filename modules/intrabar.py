@@ -0,0 +1,190 @@
+# modules/intrabar.py
+#---------------------------------------
+# Intrabar execution model for backtests
+#---------------------------------------
+# The live exits are path dependent: the broker fires SL (and TP, when the
+# order carries one) on ticks, TakeProfitMonitor closes at the price it sees
+# every 5 seconds and PositionManager trails every 10 seconds. A bar only
+# says the range touched a level, not when or in which order.
+#
+# modules.backtest skips every bar whose range touches neither level with
+# its compiled scan; only touched bars reach IntrabarFillModel.resolve(),
+# which replays them from finer data:
+#
+#   - ticks: the bar's ticks are cut at the poll instants. Between polls the
+#     broker levels are checked vectorially on every tick; at each poll the
+#     virtual TP and the trailing stop are evaluated on the last tick, like
+#     the monitor threads do
+#   - M1 sub-bars (for M2 / M15 backtests): each sub-bar is walked as
+#     open -> nearer extreme -> other extreme -> close, trailing on its close
+#   - neither: the base bar itself is walked the same way
+#
+# Prices are bid prices, like the bars; the spread stays a per-trade cost.
+
+import math
+import hashlib
+import numpy as np
+
+#-----------------------------------
+# Utilities and Global Variables
+#-----------------------------------
+from modules.utilities import log_success, log_error, log_warning, log_info
+from modules.backtest import EXIT_SL, EXIT_TP, EXIT_TRAIL
+
+TP_POLL_SECONDS = 5         # TakeProfitMonitor
+TRAIL_POLL_SECONDS = 10     # PositionManager
+
+
+def bar_path(open_, high, low, close):
+    """Assumed price path through an OHLC bar: the extreme nearer the open comes first."""
+    if abs(open_ - high) <= abs(open_ - low):
+        return (open_, high, low, close)
+    return (open_, low, high, close)
+
+
+class IntrabarFillModel:
+    """
+    Resolves SL / TP / trailing inside the bars a position's levels touch.
+    """
+    def __init__(self, bar_seconds, sub_bars=None, ticks=None, broker_tp=True,
+                 tp_poll_seconds=TP_POLL_SECONDS, trail_poll_seconds=TRAIL_POLL_SECONDS):
+        """
+        Args:
+            bar_seconds (int): Timeframe of the backtested bars (60 for M1, 120 for M2 ...).
+            sub_bars (dict[str, np.ndarray]): Optional finer bars ('time', 'open', 'high', 'low', 'close'), e.g. M1.
+            ticks (dict[str, np.ndarray]): Optional ticks ('time_msc', 'bid'); preferred over sub_bars.
+            broker_tp (bool): True when the order carries a TP the broker fires on ticks,
+                False for TP handled only by TakeProfitMonitor polls.
+        """
+        self.bar_seconds = bar_seconds
+        self.sub_bars = sub_bars
+        self.ticks = ticks
+        self.broker_tp = broker_tp
+        self.tp_poll_seconds = tp_poll_seconds
+        self.trail_poll_seconds = trail_poll_seconds
+        self.resolved = {'ticks': 0, 'sub_bars': 0, 'bar': 0}
+        self._cache_key = None
+
+    @classmethod
+    def from_mt5_ticks(cls, symbol, start, end, bar_seconds, **kwargs):
+        """Loads the ticks of [start, end) (datetimes) from the terminal in one call."""
+        import MetaTrader5 as mt5
+        ticks = mt5.copy_ticks_range(symbol, start, end, mt5.COPY_TICKS_ALL)
+        if ticks is None or len(ticks) == 0:
+            log_warning(f"No ticks for {symbol} between {start} and {end}. Falling back to bar paths.")
+            return cls(bar_seconds, **kwargs)
+        log_info(f"Loaded {len(ticks):,} ticks for {symbol}.")
+        return cls(bar_seconds, ticks={'time_msc': ticks['time_msc'], 'bid': ticks['bid']}, **kwargs)
+
+    def cache_key(self):
+        """Hash of the settings and the finer data, part of the backtest cache key."""
+        if self._cache_key is not None:
+            return self._cache_key
+        digest = hashlib.sha256(repr((self.bar_seconds, self.broker_tp, self.tp_poll_seconds,
+                                      self.trail_poll_seconds)).encode())
+        for name, data in (('sub_bars', self.sub_bars), ('ticks', self.ticks)):
+            if data is None:
+                continue
+            for column in sorted(data):
+                values = np.ascontiguousarray(data[column])
+                digest.update(f"{name}.{column}.{values.dtype}".encode())
+                digest.update(values.tobytes())
+        self._cache_key = digest.hexdigest()
+        return self._cache_key
+
+    #-----------------------------------
+    # Entry point used by modules.backtest
+    #-----------------------------------
+    def resolve(self, bar_time, d, entry, sl, tp, trailed, activation, trail_distance, previous_ema, k, bar):
+        """
+        Args:
+            bar_time (int): Open time of the touched bar (epoch seconds).
+            d (int): 1 long / -1 short.
+            previous_ema (float): Trailing EMA at the previous close; the live
+                trail uses it advanced with the current price (forming bar).
+            k (float): EMA smoothing factor 2 / (period + 1).
+            bar (tuple): The bar's (open, high, low, close).
+
+        Returns:
+            tuple: (exited, exit_price, reason, sl, trailed)
+        """
+        state = [sl, trailed]
+        if self.ticks is not None:
+            start, stop = np.searchsorted(self.ticks['time_msc'], [bar_time * 1000, (bar_time + self.bar_seconds) * 1000])
+            if stop > start:
+                self.resolved['ticks'] += 1
+                return self._resolve_ticks(bar_time, start, stop, d, entry, tp, activation, trail_distance, previous_ema, k, state)
+
+        if self.sub_bars is not None:
+            start, stop = np.searchsorted(self.sub_bars['time'], [bar_time, bar_time + self.bar_seconds])
+            if stop > start:
+                self.resolved['sub_bars'] += 1
+                paths = [bar_path(*(float(self.sub_bars[column][n]) for column in ('open', 'high', 'low', 'close')))
+                         for n in range(start, stop)]
+                return self._resolve_paths(paths, d, entry, tp, activation, trail_distance, previous_ema, k, state)
+
+        self.resolved['bar'] += 1
+        return self._resolve_paths([bar_path(*bar)], d, entry, tp, activation, trail_distance, previous_ema, k, state)
+
+    #-----------------------------------
+    # Level checks
+    #-----------------------------------
+    @staticmethod
+    def _exit(price, level, is_sl, trailed, gap):
+        """Fill at the level, or at the price when it gapped through it."""
+        fill = price if gap else level
+        reason = (EXIT_TRAIL if trailed else EXIT_SL) if is_sl else EXIT_TP
+        return True, fill, reason
+
+    def _trail(self, price, d, entry, activation, trail_distance, previous_ema, k, state):
+        if d * (price - entry) < activation or math.isnan(previous_ema):
+            return
+        ema_now = previous_ema + (price - previous_ema) * k
+        candidate = ema_now - d * trail_distance
+        if (d > 0 and candidate > state[0]) or (d < 0 and candidate < state[0]):
+            state[0] = candidate
+            state[1] = True
+
+    def _resolve_paths(self, paths, d, entry, tp, activation, trail_distance, previous_ema, k, state):
+        for path in paths:
+            for n, price in enumerate(path):
+                gap = n == 0
+                if d * (price - state[0]) <= 0:
+                    return self._exit(price, state[0], True, state[1], gap) + (state[0], state[1])
+                if d * (price - tp) >= 0:
+                    return self._exit(price, tp, False, state[1], gap) + (state[0], state[1])
+            # Sub-bar close: the polls see roughly this price
+            self._trail(path[-1], d, entry, activation, trail_distance, previous_ema, k, state)
+        return (False, math.nan, None, state[0], state[1])
+
+    def _resolve_ticks(self, bar_time, start, stop, d, entry, tp, activation, trail_distance, previous_ema, k, state):
+        times = self.ticks['time_msc'][start:stop]
+        bids = np.asarray(self.ticks['bid'][start:stop], dtype=float)
+        poll_ms = 1000 * math.gcd(self.tp_poll_seconds, self.trail_poll_seconds)
+        bar_ms = bar_time * 1000
+        polls = np.arange(bar_ms + poll_ms, bar_ms + self.bar_seconds * 1000 + 1, poll_ms)
+        bounds = np.searchsorted(times, polls, side='right')
+
+        begin = 0
+        for poll, bound in zip(polls, bounds):
+            chunk = bids[begin:bound]
+            if len(chunk):
+                # Broker levels fire on the first tick through them
+                sl_hits = np.flatnonzero(d * (chunk - state[0]) <= 0)
+                tp_hits = np.flatnonzero(d * (chunk - tp) >= 0) if self.broker_tp else sl_hits[:0]
+                first_sl = sl_hits[0] if len(sl_hits) else len(chunk)
+                first_tp = tp_hits[0] if len(tp_hits) else len(chunk)
+                if first_sl < len(chunk) and first_sl <= first_tp:
+                    return (True, float(chunk[first_sl]), EXIT_TRAIL if state[1] else EXIT_SL, state[0], state[1])
+                if first_tp < len(chunk):
+                    return (True, float(chunk[first_tp]), EXIT_TP, state[0], state[1])
+
+            if begin + len(chunk) > 0:
+                last = float(bids[begin + len(chunk) - 1])
+                poll_seconds = int(poll // 1000)
+                if not self.broker_tp and poll_seconds % self.tp_poll_seconds == 0 and d * (last - tp) >= 0:
+                    return (True, last, EXIT_TP, state[0], state[1])
+                if poll_seconds % self.trail_poll_seconds == 0:
+                    self._trail(last, d, entry, activation, trail_distance, previous_ema, k, state)
+            begin = bound
+        return (False, math.nan, None, state[0], state[1])
@@ -0,0 +1,289 @@
+# modules/memory_guard.py
+#---------------------------------------
+# Memory instrumentation and soft limit for long-running strategies
+#---------------------------------------
+# Strategy processes run for days; each cycle builds a 20,000-row DataFrame
+# and every trade renders a chart, so pandas / matplotlib fragmentation can
+# grow the resident set slowly. Once enabled, the guard runs at the existing
+# cycle_started / cycle_finished calls (modules.metrics):
+#
+#   - per cycle: RSS after the cycle, RSS growth during it and, while
+#     tracemalloc is on, the Python heap peak of the cycle
+#     (exported on /metrics as process_resident_memory_bytes, ...)
+#   - every SNAPSHOT_EVERY cycles, only with tracemalloc on: a snapshot; the
+#     top allocation sites that grew since the previous snapshot are appended
+#     to logs/memory_strategy_<id>.log
+#   - soft limit (MT5_MEMORY_SOFT_LIMIT_MB, or the soft_limit_mb argument):
+#     above it after a gc.collect(), the process logs a final diff, runs the
+#     registered checkpoints (BarFeed snapshots), asks the supervisor for a
+#     recycle (modules.heartbeat) and exits between two cycles. Started by
+#     hand (no supervisor), it only warns.
+#
+# RSS comes from psutil when installed, otherwise /proc/self/statm (Linux)
+# or GetProcessMemoryInfo (Windows, ctypes), and is always sampled.
+#
+# tracemalloc is opt-in (MT5_MEMORY_TRACEMALLOC=<frames>, e.g. 1): it slows
+# every allocation in every thread (a 20k-bar DataFrame + EMA cycle nearly
+# doubles) and its trace tables add to the RSS the soft limit is checked
+# against. Turn it on for a diagnostic run, not in normal trading.
+
+import os
+import gc
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+#-----------------------------------
+# Utilities and Global Variables
+#-----------------------------------
+from modules.utilities import log_success, log_error, log_warning, log_info
+from modules import heartbeat
+
+SOFT_LIMIT_ENV = 'MT5_MEMORY_SOFT_LIMIT_MB'
+TRACEMALLOC_ENV = 'MT5_MEMORY_TRACEMALLOC'    # frames per allocation (1 = allocation line); unset or 0 leaves it off
+DEFAULT_SOFT_LIMIT_MB = 1536
+LOG_DIR = 'logs'
+SNAPSHOT_EVERY = 360        # cycles; one hour of a 10 s loop
+TOP_ALLOCATIONS = 15
+MIN_UPTIME_SECONDS = 900    # never recycle a process younger than this (limit set too low)
+
+MB = 1024 * 1024
+
+
+#-----------------------------------
+# Resident set size
+#-----------------------------------
+if sys.platform == 'win32':
+    import ctypes
+    from ctypes import wintypes
+
+    class _ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [
+            ('cb', wintypes.DWORD),
+            ('PageFaultCount', wintypes.DWORD),
+            ('PeakWorkingSetSize', ctypes.c_size_t),
+            ('WorkingSetSize', ctypes.c_size_t),
+            ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+            ('PagefileUsage', ctypes.c_size_t),
+            ('PeakPagefileUsage', ctypes.c_size_t),
+        ]
+
+    def _windows_counters():
+        counters = _ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return None
+        return counters
+
+
+def rss_bytes():
+    """Current resident set (working set on Windows) in bytes, None if unknown."""
+    try:
+        if PSUTIL_AVAILABLE:
+            return psutil.Process().memory_info().rss
+        if sys.platform == 'win32':
+            counters = _windows_counters()
+            return counters.WorkingSetSize if counters else None
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except Exception:
+        return None
+
+
+def peak_rss_bytes():
+    """Highest resident set of the process so far, None if unknown."""
+    try:
+        if sys.platform == 'win32':
+            if PSUTIL_AVAILABLE:
+                return psutil.Process().memory_info().peak_wset
+            counters = _windows_counters()
+            return counters.PeakWorkingSetSize if counters else None
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024  # kB on Linux
+    except Exception:
+        return None
+
+
+def format_bytes(value):
+    return '-' if value is None else f"{value / MB:,.1f} MB"
+
+
+#-----------------------------------
+# Guard
+#-----------------------------------
+class MemoryGuard:
+    def __init__(self):
+        self.tag = None
+        self.soft_limit = None
+        self.snapshot_every = SNAPSHOT_EVERY
+        self.log_path = None
+        self.checkpoints = []
+        self.started = time.time()
+        self.cycles = 0
+        self.in_cycle = False
+        self.rss_before = None
+        # Last cycle, read by the /metrics gauges
+        self.rss = None
+        self.cycle_growth = None
+        self.cycle_heap_peak = None
+        self.snapshot = None
+        self.recycling = False
+
+    @property
+    def enabled(self):
+        return self.tag is not None
+
+    def enable(self, strategy_id, soft_limit_mb=None, snapshot_every=SNAPSHOT_EVERY, frames=None):
+        self.tag = f"strategy_{strategy_id}"
+        limit_mb = soft_limit_mb if soft_limit_mb is not None else float(os.environ.get(SOFT_LIMIT_ENV, DEFAULT_SOFT_LIMIT_MB))
+        self.soft_limit = int(limit_mb * MB) if limit_mb > 0 else None
+        self.snapshot_every = snapshot_every
+        self.log_path = os.path.join(LOG_DIR, f"memory_{self.tag}.log")
+        if frames is None:
+            frames = int(os.environ.get(TRACEMALLOC_ENV, 0))
+        if frames and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        if tracemalloc.is_tracing():
+            self.snapshot = self.take_snapshot()
+        log_info(f"Memory guard for {self.tag}: soft limit {format_bytes(self.soft_limit)}, "
+                 f"tracemalloc {'on' if tracemalloc.is_tracing() else f'off ({TRACEMALLOC_ENV}=1 for allocation diffs)'}, "
+                 f"RSS {format_bytes(rss_bytes())}.")
+
+    def add_checkpoint(self, function):
+        """function() is called before a recycle (e.g. a BarFeed snapshot)."""
+        self.checkpoints.append(function)
+
+    #-----------------------------------
+    # Cycle hooks
+    #-----------------------------------
+    def cycle_started(self):
+        if not self.enabled:
+            return
+        self.in_cycle = True
+        self.rss_before = rss_bytes()
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+
+    def cycle_finished(self):
+        if not self.enabled or not self.in_cycle:
+            return
+        self.in_cycle = False
+        self.cycles += 1
+        self.rss = rss_bytes()
+        self.cycle_growth = self.rss - self.rss_before if None not in (self.rss, self.rss_before) else None
+        if tracemalloc.is_tracing():
+            self.cycle_heap_peak = tracemalloc.get_traced_memory()[1]
+            if self.cycles % self.snapshot_every == 0:
+                self.log_growth("periodic")
+
+        if self.soft_limit and self.rss is not None and self.rss > self.soft_limit:
+            gc.collect()
+            self.rss = rss_bytes()
+            if self.rss is not None and self.rss > self.soft_limit:
+                self.limit_exceeded()
+
+    #-----------------------------------
+    # Snapshots
+    #-----------------------------------
+    def take_snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+
+    def log_growth(self, reason):
+        """Appends the allocation sites that grew since the last snapshot to the memory log."""
+        try:
+            snapshot = self.take_snapshot()
+            lines = [f"---- {datetime.now():%Y-%m-%d %H:%M:%S} {self.tag} {reason}: cycle {self.cycles}, "
+                     f"RSS {format_bytes(self.rss)}, peak RSS {format_bytes(peak_rss_bytes())}, "
+                     f"heap {format_bytes(tracemalloc.get_traced_memory()[0])}, "
+                     f"last cycle heap peak {format_bytes(self.cycle_heap_peak)}"]
+            if self.snapshot is not None:
+                for stat in snapshot.compare_to(self.snapshot, 'lineno')[:TOP_ALLOCATIONS]:
+                    lines.append(f"  {stat.size_diff / 1024:+12,.1f} kB {stat.count_diff:+9,d} blocks  "
+                                 f"{stat.size / 1024:12,.1f} kB  {stat.traceback[0].filename}:{stat.traceback[0].lineno}")
+            self.snapshot = snapshot
+            os.makedirs(LOG_DIR, exist_ok=True)
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+        except Exception as e:
+            log_warning(f"Memory snapshot failed: {e}")
+
+    #-----------------------------------
+    # Soft limit
+    #-----------------------------------
+    def limit_exceeded(self):
+        if self.recycling:
+            return
+        message = f"RSS {format_bytes(self.rss)} above the soft limit of {format_bytes(self.soft_limit)}"
+        if tracemalloc.is_tracing():
+            self.log_growth("soft limit")
+        uptime = time.time() - self.started
+        if not heartbeat.supervised():
+            log_warning(f"{message}. Not supervised, so no recycle; restart {self.tag} when convenient.")
+            self.soft_limit = None  # warn once
+            return
+        if uptime < MIN_UPTIME_SECONDS:
+            log_warning(f"{message} after only {uptime:.0f} s; the limit looks too low, not recycling.")
+            self.soft_limit = None
+            return
+
+        self.recycling = True
+        log_warning(f"{message}. Checkpointing and asking the supervisor for a recycle.")
+        for function in self.checkpoints:
+            try:
+                function()
+            except Exception as e:
+                log_error(f"Checkpoint before recycle failed: {e}")
+        heartbeat.request_recycle(f"memory: {message}")
+        sys.exit(heartbeat.RECYCLE_EXIT_CODE)  # between two cycles; finally blocks shut MT5 down
+
+
+_guard = MemoryGuard()
+
+
+def enable_memory_guard(strategy_id, soft_limit_mb=None, snapshot_every=SNAPSHOT_EVERY, frames=None):
+    """
+    Tracks memory per cycle and recycles the process above the soft limit.
+
+    Args:
+        strategy_id (int): Tag of the memory log.
+        soft_limit_mb (float): RSS limit; defaults to MT5_MEMORY_SOFT_LIMIT_MB or
+            DEFAULT_SOFT_LIMIT_MB, 0 disables the limit.
+        snapshot_every (int): Cycles between tracemalloc snapshots.
+        frames (int): tracemalloc frames per allocation; defaults to MT5_MEMORY_TRACEMALLOC,
+            unset or 0 leaves tracemalloc off (RSS is still sampled every cycle).
+    """
+    _guard.enable(strategy_id, soft_limit_mb, snapshot_every, frames)
+    return _guard
+
+
+def add_checkpoint(function):
+    _guard.add_checkpoint(function)
+
+
+def cycle_started():
+    _guard.cycle_started()
+
+
+def cycle_finished():
+    _guard.cycle_finished()
+
+
+def guard():
+    return _guard
@@ -0,0 +1,443 @@
+# modules/metrics.py
+#---------------------------------------
+# Process metrics in the Prometheus text format
+#---------------------------------------
+# Counters, gauges and histograms for cycle latency, MetaTrader 5 API calls,
+# the position threads, the database writers and account equity.
+#
+# Hot path: every thread accumulates into its own shard (plain dicts reached
+# through threading.local), so inc() / observe() take no lock. The shards
+# are only merged when /metrics is rendered; dict.copy() is atomic under
+# the GIL, so a scrape never blocks a strategy thread (a histogram's sum
+# may be one observation ahead of its buckets, which Prometheus tolerates).
+#
+# Exposure: when MT5_METRICS_PORT is set (supervisor.py gives every child
+# its own port) importing this module starts a local HTTP server on that
+# port serving /metrics. The supervisor scrapes the children and serves the
+# merged text with a process="<name>" label on every sample.
+#
+# instrument_mt5() wraps the MetaTrader5 API functions in place, so every
+# mt5.copy_rates_from_pos / positions_get / order_send ... call in the
+# process is counted and timed without touching the call sites.
+#
+# The same port answers /profile?mode=sample&cycles=10 (see profiler.py).
+
+import os
+import time
+import bisect
+import threading
+import functools
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+#-----------------------------------
+# Utilities and Global Variables
+#-----------------------------------
+from modules.utilities import log_success, log_error, log_warning, log_info
+from modules import profiler
+from modules import memory_guard
+from modules import config_reload
+
+METRICS_PORT_ENV = 'MT5_METRICS_PORT'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; MT5 calls are ~0.1-50 ms, cycles up to a few seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# MetaTrader5 functions counted by instrument_mt5()
+MT5_FUNCTIONS = (
+    'copy_rates_from_pos', 'copy_rates_from', 'copy_rates_range', 'copy_ticks_range', 'copy_ticks_from',
+    'positions_get', 'positions_total', 'orders_get', 'order_send', 'order_check',
+    'symbol_info', 'symbol_info_tick', 'account_info', 'history_deals_get', 'history_orders_get',
+)
+
+_local = threading.local()
+_shards = []                    # every thread's shard, kept after the thread ends
+_shards_lock = threading.Lock() # taken once per thread, when its shard is created
+_registry = {}                  # name -> metric, in registration order
+
+
+def _shard():
+    try:
+        return _local.shard
+    except AttributeError:
+        shard = {}
+        with _shards_lock:
+            _shards.append(shard)
+        _local.shard = shard
+        return shard
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = [(name, value) for name, value in zip(labelnames, values)] + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+#-----------------------------------
+# Metric types
+#-----------------------------------
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        if name in _registry:
+            raise ValueError(f"Metric {name} is already registered")
+        _registry[name] = self
+
+    def _key(self, labels):
+        return (self.name,) + tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self, name=None):
+        name = name or self.name
+        return [f"# HELP {name} {self.documentation}", f"# TYPE {name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        shard = _shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def collect(self, shards):
+        totals = {}
+        for shard in shards:
+            for key, value in shard.items():
+                if key[0] == self.name:
+                    totals[key[1:]] = totals.get(key[1:], 0) + value
+        return totals
+
+    def render(self, shards):
+        lines = self.header(f"{self.name}_total")
+        for values, total in sorted(self.collect(shards).items()):
+            lines.append(f"{self.name}_total{_format_labels(self.labelnames, values)} {_format_value(total)}")
+        return lines
+
+
+class Gauge(Metric):
+    """
+    Last value wins. set() is a single dict store, so it needs no shard;
+    set_function() registers a callback evaluated at scrape time.
+    """
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.values = {}
+        self.functions = {}
+
+    def set(self, value, **labels):
+        self.values[self._key(labels)[1:]] = value
+
+    def set_function(self, function, **labels):
+        self.functions[self._key(labels)[1:]] = function
+
+    def render(self, shards):
+        lines = self.header()
+        values = dict(self.values)
+        for key, function in list(self.functions.items()):
+            try:
+                values[key] = function()
+            except Exception:
+                continue
+        for key, value in sorted(values.items()):
+            if value is not None:
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        shard = _shard()
+        key = self._key(labels)
+        state = shard.get(key)
+        if state is None:
+            # [count per bucket ..., +Inf bucket, sum]
+            state = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def render(self, shards):
+        merged = {}
+        for shard in shards:
+            for key, state in shard.items():
+                if key[0] != self.name:
+                    continue
+                total = merged.setdefault(key[1:], [0] * len(state[:-1]) + [0.0])
+                for n, value in enumerate(state):
+                    total[n] += value
+        lines = self.header()
+        for values, state in sorted(merged.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), state[:-1]):
+                cumulative += count
+                labels = _format_labels(self.labelnames, values, [('le', _format_value(float(bound)))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+def render():
+    """The whole registry in the Prometheus text format."""
+    with _shards_lock:
+        shards = [shard.copy() for shard in _shards]
+    lines = []
+    for metric in list(_registry.values()):
+        lines.extend(metric.render(shards))
+    return '\n'.join(lines) + '\n'
+
+
+#-----------------------------------
+# Process metrics
+#-----------------------------------
+mt5_calls = Counter('mt5_calls', 'MetaTrader5 API calls.', ['function'])
+mt5_call_failures = Counter('mt5_call_failures', 'MetaTrader5 API calls that returned None.', ['function'])
+mt5_call_seconds = Histogram('mt5_call_seconds', 'MetaTrader5 API call latency.', ['function'])
+order_retcodes = Counter('mt5_order_retcodes', 'order_send results by retcode.', ['retcode'])
+
+strategy_cycles = Counter('strategy_cycles', 'Strategy loop cycles.')
+strategy_cycle_seconds = Histogram('strategy_cycle_seconds', 'Strategy loop work per cycle (sleep excluded).')
+
+position_checks = Counter('position_manager_checks', 'Positions checked by the trailing-stop thread.')
+sl_updates = Counter('position_manager_sl_updates', 'Trailing stop modifications sent.', ['result'])
+take_profit_checks = Counter('take_profit_checks', 'Positions checked by the take-profit thread.')
+take_profit_closes = Counter('take_profit_closes', 'Take-profit closes sent.', ['result'])
+trailing_requests_saved = Counter('trailing_sl_requests_saved', 'Trailing stop modifications not sent (min_step, coalesced).', ['reason'])
+trailing_pending = Gauge('trailing_sl_pending', 'Trailing stop modifications waiting for the rate limit.')
+trailing_queue_seconds = Histogram('trailing_sl_queue_seconds', 'Time a trailing stop modification waited before it was sent.')
+virtual_exit_ticks = Counter('virtual_exit_ticks', 'Ticks evaluated by the virtual exit engine.')
+virtual_exit_closes = Counter('virtual_exit_closes', 'Closes sent by the virtual exit engine.', ['reason', 'result'])
+virtual_exit_reaction_seconds = Histogram('virtual_exit_reaction_seconds', 'From seeing the tick to the filled virtual exit.')
+
+trades = Counter('strategy_trades', 'Trade requests sent by the strategy.', ['result'])
+order_response_seconds = Histogram('order_response_seconds', 'Round trip of trade requests as measured by the strategy.')
+
+db_rows_written = Counter('db_rows_written', 'Rows written by the database writers.', ['table'])
+db_write_seconds = Histogram('db_write_seconds', 'Database write latency.', ['table'])
+
+account_balance = Gauge('account_balance', 'Account balance at the last account_info() call.')
+account_equity = Gauge('account_equity', 'Account equity at the last account_info() call.')
+account_profit = Gauge('account_profit', 'Floating P&L at the last account_info() call.')
+process_start_time = Gauge('process_start_time_seconds', 'Start time of the process (epoch).')
+process_start_time.set(time.time())
+
+process_resident_memory = Gauge('process_resident_memory_bytes', 'Resident set (working set on Windows).')
+process_resident_memory.set_function(memory_guard.rss_bytes)
+process_peak_resident_memory = Gauge('process_peak_resident_memory_bytes', 'Highest resident set so far.')
+process_peak_resident_memory.set_function(memory_guard.peak_rss_bytes)
+memory_cycle_growth = Gauge('memory_cycle_growth_bytes', 'RSS change during the last strategy cycle (memory guard).')
+memory_cycle_growth.set_function(lambda: memory_guard.guard().cycle_growth)
+memory_cycle_heap_peak = Gauge('memory_cycle_heap_peak_bytes', 'Python heap peak of the last cycle (tracemalloc).')
+memory_cycle_heap_peak.set_function(lambda: memory_guard.guard().cycle_heap_peak)
+memory_soft_limit = Gauge('memory_soft_limit_bytes', 'RSS above which the process asks for a recycle.')
+memory_soft_limit.set_function(lambda: memory_guard.guard().soft_limit)
+
+
+#-----------------------------------
+# Strategy loop
+#-----------------------------------
+def cycle_started():
+    """Call when the loop wakes up (after wait_until_next_interval)."""
+    config_reload.cycle_started()  # applies an edited config/strategy_<id>.json before the cycle's work
+    _local.cycle_started = time.perf_counter()
+    profiler.cycle_started()  # no-op unless a profile was requested
+    memory_guard.cycle_started()  # no-op unless enable_memory_guard() was called
+
+
+def cycle_finished():
+    """Call before the loop sleeps again; observes the work since cycle_started()."""
+    started = getattr(_local, 'cycle_started', None)
+    if started is None:
+        return
+    _local.cycle_started = None
+    strategy_cycles.inc()
+    strategy_cycle_seconds.observe(time.perf_counter() - started)
+    profiler.cycle_finished()
+    memory_guard.cycle_finished()  # may exit the process for a recycle, between two cycles
+
+
+#-----------------------------------
+# MetaTrader5 instrumentation
+#-----------------------------------
+def _instrumented(name, function):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return_value = function(*args, **kwargs)
+        finally:
+            mt5_call_seconds.observe(time.perf_counter() - started, function=name)
+            mt5_calls.inc(function=name)
+        if return_value is None:
+            mt5_call_failures.inc(function=name)
+        elif name == 'order_send':
+            order_retcodes.inc(retcode=getattr(return_value, 'retcode', 'unknown'))
+        elif name == 'account_info':
+            account_balance.set(return_value.balance)
+            account_equity.set(return_value.equity)
+            account_profit.set(return_value.profit)
+        return return_value
+    wrapper.metrics_instrumented = True
+    return wrapper
+
+
+def instrument_mt5(mt5):
+    """Wraps MT5_FUNCTIONS of the MetaTrader5 module in place (idempotent)."""
+    for name in MT5_FUNCTIONS:
+        function = getattr(mt5, name, None)
+        if function is None or getattr(function, 'metrics_instrumented', False):
+            continue
+        setattr(mt5, name, _instrumented(name, function))
+    return mt5
+
+
+#-----------------------------------
+# HTTP exposure
+#-----------------------------------
+class MetricsHandler(BaseHTTPRequestHandler):
+    # render_function is set on the subclass built by start_server()
+    render_function = staticmethod(render)
+
+    def do_GET(self):
+        path, _, query = self.path.partition('?')
+        if path == '/profile':
+            self._send(202, request_profile_from_query(query).encode('utf-8'), 'text/plain; charset=utf-8')
+            return
+        if path != '/metrics':
+            self.send_error(404)
+            return
+        self._send(200, self.render_function().encode('utf-8'), CONTENT_TYPE)
+
+    def _send(self, code, body, content_type):
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrapes every few seconds would flood the console
+
+
+def request_profile_from_query(query):
+    """/profile?mode=sample&cycles=10&threads=all -> profiler status message."""
+    params = urllib.parse.parse_qs(query)
+    try:
+        mode, cycles, all_threads = profiler.parse_request(' '.join(
+            params.get('mode', []) + params.get('cycles', []) + params.get('threads', [])))
+    except ValueError as e:
+        return f"invalid request: {e}"
+    return profiler.request_profile(mode, cycles, all_threads)
+
+
+def start_server(port, render_function=render, host='127.0.0.1'):
+    """Serves /metrics on a daemon thread. Returns the server, or None if the port is taken."""
+    handler = type('Handler', (MetricsHandler,), {'render_function': staticmethod(render_function)})
+    try:
+        server = ThreadingHTTPServer((host, port), handler)
+    except OSError as e:
+        log_warning(f"Metrics endpoint on {host}:{port} unavailable: {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
+
+
+def scrape(port, host='127.0.0.1', timeout=1.0):
+    """Text of another process's /metrics, None when it does not answer."""
+    try:
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics", timeout=timeout) as response:
+            return response.read().decode('utf-8')
+    except (OSError, ValueError):
+        return None
+
+
+def merge_expositions(expositions, label='process'):
+    """
+    Merges the /metrics texts of several processes into one, adding
+    label="<process>" to every sample and keeping each family's samples together.
+
+    Args:
+        expositions (list[tuple[str, str]]): (process name, exposition text);
+            a None name adds no label (samples that are already labelled).
+    """
+    families = {}   # name -> [HELP line, TYPE line, samples]
+    for process, text in expositions:
+        family = None
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            if line.startswith('# HELP ') or line.startswith('# TYPE '):
+                name = line.split()[2]
+                family = families.setdefault(name, [None, None, []])
+                slot = 0 if line.startswith('# HELP ') else 1
+                family[slot] = family[slot] or line
+                continue
+            if line.startswith('#') or family is None:
+                continue
+            if process is None:
+                family[2].append(line)
+                continue
+            escaped = str(process).replace('\\', '\\\\').replace('"', '\\"')
+            if '{' in line:
+                name, rest = line.split('{', 1)
+                separator = '' if rest.startswith('}') else ','
+                sample = f'{name}{{{label}="{escaped}"{separator}{rest}'
+            else:
+                name, value = line.split(' ', 1)
+                sample = f'{name}{{{label}="{escaped}"}} {value}'
+            family[2].append(sample)
+    lines = []
+    for help_line, type_line, samples in families.values():
+        lines.extend(line for line in (help_line, type_line) if line)
+        lines.extend(samples)
+    return '\n'.join(lines) + '\n'
+
+
+def serve_from_env():
+    port = os.environ.get(METRICS_PORT_ENV)
+    if port:
+        return start_server(int(port))
+    return None
+
+
+_server = serve_from_env()
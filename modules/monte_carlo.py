@@ -0,0 +1,203 @@
+# modules/monte_carlo.py
+#---------------------------------------
+# Monte Carlo resampling of closed-trade P&L
+#---------------------------------------
+# A max drawdown or recovery factor measured on 30-250 trades is one draw
+# from the order the trades happened to come in. Resampling each strategy's
+# trade P&L into many alternative sequences gives their distributions:
+#
+#   - 'bootstrap': trades drawn independently with replacement
+#   - 'block': circular block bootstrap, keeps streaks of `block_size` trades
+#     together (losses cluster in trending / choppy sessions)
+#
+# Paths are generated and evaluated as (paths, trades) matrices in chunks,
+# so 100,000 paths stay within a few tens of MB and take well under a second
+# per strategy. Time to recover is measured in trades: the longest stretch a
+# path spends below its previous equity peak.
+
+import sqlite3
+import time
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+#-----------------------------------
+# Utilities and Global Variables
+#-----------------------------------
+from modules.utilities import log_success, log_error, log_warning, log_info
+
+console = Console()
+
+DB_NAME = 'mt5_trades.db'
+DEALS_TABLE = 'deals_live'       # database_live.py
+DEAL_ENTRY_IN = 0
+DEAL_ENTRY_OUT = 1
+
+PATHS = 100_000
+CHUNK_PATHS = 10_000
+BLOCK_SIZE = 5
+MIN_TRADES = 20                 # fewer trades than this are not worth resampling
+PERCENTILES = (5, 50, 95)
+
+
+def load_trade_pnl(conn, table=DEALS_TABLE):
+    """
+    Net P&L (profit + commission + swap + fee) per closed position, grouped
+    by the magic number of the opening deal and ordered by close time.
+
+    Returns:
+        dict[int, np.ndarray]: magic -> P&L per trade.
+    """
+    deals = pd.read_sql_query(
+        f"SELECT time, entry, magic, position_id, profit, commission, swap, fee FROM {table}", conn)
+    if deals.empty:
+        return {}
+    deals['net'] = deals[['profit', 'commission', 'swap', 'fee']].fillna(0).sum(axis=1)
+
+    opening = deals[deals['entry'] == DEAL_ENTRY_IN].groupby('position_id')['magic'].first()
+    closed = deals[deals['entry'] == DEAL_ENTRY_OUT].groupby('position_id')['time'].max()
+    positions = deals.groupby('position_id')['net'].sum()
+    trades = pd.DataFrame({'magic': opening, 'closed': closed, 'net': positions}).dropna(subset=['magic', 'closed'])
+    trades = trades.sort_values('closed')
+    return {int(magic): group['net'].values.astype(float) for magic, group in trades.groupby('magic')}
+
+
+def resample_indices(rng, paths, trades, method='block', block_size=BLOCK_SIZE):
+    """(paths, trades) matrix of trade indices for one chunk."""
+    if method == 'bootstrap' or block_size <= 1:
+        return rng.integers(0, trades, size=(paths, trades))
+    blocks = -(-trades // block_size)
+    starts = rng.integers(0, trades, size=(paths, blocks, 1))
+    return ((starts + np.arange(block_size)) % trades).reshape(paths, -1)[:, :trades]
+
+
+def path_statistics(equity):
+    """
+    Max drawdown, recovery factor and time to recover for every row of an
+    equity matrix (cumulative P&L per trade).
+    """
+    paths, trades = equity.shape
+    peak = np.maximum.accumulate(np.maximum(equity, 0.0), axis=1)  # the curve starts at 0
+    max_drawdown = (peak - equity).max(axis=1)
+    net = equity[:, -1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        recovery_factor = np.where(max_drawdown > 0, net / max_drawdown, np.inf)
+
+    # Longest run below the previous peak: trades since the last "at a new high" index
+    at_high = equity >= peak
+    positions = np.arange(1, trades + 1)
+    last_high = np.maximum.accumulate(np.where(at_high, positions, 0), axis=1)
+    time_to_recover = (positions - last_high).max(axis=1)
+    return max_drawdown, recovery_factor, time_to_recover, net
+
+
+def simulate(pnl, paths=PATHS, method='block', block_size=BLOCK_SIZE, chunk_paths=CHUNK_PATHS, seed=None):
+    """
+    Resamples one strategy's trade sequence.
+
+    Returns:
+        dict[str, np.ndarray]: max_drawdown, recovery_factor, time_to_recover, net (one value per path).
+    """
+    pnl = np.asarray(pnl, dtype=float)
+    rng = np.random.default_rng(seed)
+    results = {key: np.empty(paths) for key in ('max_drawdown', 'recovery_factor', 'time_to_recover', 'net')}
+    for start in range(0, paths, chunk_paths):
+        size = min(chunk_paths, paths - start)
+        equity = np.cumsum(pnl[resample_indices(rng, size, len(pnl), method, block_size)], axis=1)
+        for key, values in zip(('max_drawdown', 'recovery_factor', 'time_to_recover', 'net'), path_statistics(equity)):
+            results[key][start:start + size] = values
+    return results
+
+
+def observed_statistics(pnl):
+    max_drawdown, recovery_factor, time_to_recover, net = path_statistics(np.cumsum(pnl)[None, :])
+    return {'max_drawdown': max_drawdown[0], 'recovery_factor': recovery_factor[0],
+            'time_to_recover': time_to_recover[0], 'net': net[0]}
+
+
+class MonteCarloReport:
+    """
+    Runs the resampler for every strategy in the deals table and stores a summary row per strategy.
+    """
+    def __init__(self, db_name=DB_NAME, paths=PATHS, method='block', block_size=BLOCK_SIZE, min_trades=MIN_TRADES, seed=None):
+        self.db_name = db_name
+        self.paths = paths
+        self.method = method
+        self.block_size = block_size
+        self.min_trades = min_trades
+        self.seed = seed
+        self.rows = []
+
+    def create_table(self, conn):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS monte_carlo_summary (
+                run_time TEXT NOT NULL,
+                magic INTEGER NOT NULL,
+                trades INTEGER,
+                paths INTEGER,
+                method TEXT,
+                observed_max_drawdown REAL,
+                max_drawdown_p5 REAL,
+                max_drawdown_p50 REAL,
+                max_drawdown_p95 REAL,
+                observed_recovery_factor REAL,
+                recovery_factor_p5 REAL,
+                recovery_factor_p50 REAL,
+                recovery_factor_p95 REAL,
+                time_to_recover_p50 REAL,
+                time_to_recover_p95 REAL,
+                probability_of_loss REAL,
+                PRIMARY KEY (run_time, magic)
+            );
+        """)
+
+    def run(self):
+        started = time.perf_counter()
+        conn = sqlite3.connect(self.db_name)
+        try:
+            trades = load_trade_pnl(conn)
+            run_time = datetime.now().isoformat(timespec='seconds')
+            self.rows = []
+            for magic, pnl in trades.items():
+                if len(pnl) < self.min_trades:
+                    continue
+                paths = simulate(pnl, self.paths, self.method, self.block_size, seed=self.seed)
+                observed = observed_statistics(pnl)
+                drawdown = np.percentile(paths['max_drawdown'], PERCENTILES)
+                # Paths without a drawdown have an infinite recovery factor. Interpolating next to
+                # inf gives nan, so take the nearest path at or below each rank: a real value, inf
+                # only when that many paths never drew down (stored as Infinity, shown as inf)
+                recovery = np.percentile(paths['recovery_factor'], PERCENTILES, method='lower')
+                recover_time = np.percentile(paths['time_to_recover'], (50, 95))
+                self.rows.append((
+                    run_time, magic, len(pnl), self.paths, self.method,
+                    float(observed['max_drawdown']), *map(float, drawdown),
+                    float(observed['recovery_factor']), *map(float, recovery),
+                    *map(float, recover_time), float((paths['net'] < 0).mean()),
+                ))
+            self.create_table(conn)
+            conn.executemany(f"INSERT OR REPLACE INTO monte_carlo_summary VALUES ({', '.join('?' * 16)})", self.rows)
+            conn.commit()
+        except (sqlite3.Error, pd.errors.DatabaseError) as e:
+            log_error(f"Monte Carlo run failed: {e}")
+            return []
+        finally:
+            conn.close()
+        log_success(f"Monte Carlo: {len(self.rows)} strategies x {self.paths:,} paths in {time.perf_counter() - started:.1f} s.")
+        return self.rows
+
+    def display(self):
+        table = Table(title=f"Monte Carlo ({self.method}, {self.paths:,} paths)", box=box.ROUNDED)
+        for column in ("Magic", "Trades", "Max DD (obs)", "Max DD P50 / P95", "RF (obs)", "RF P5 / P50",
+                       "Recover P50 / P95", "P(loss)"):
+            table.add_column(column, justify="right")
+        for row in self.rows:
+            (_, magic, trades, _, _, dd_obs, _, dd_p50, dd_p95, rf_obs, rf_p5, rf_p50, _, ttr_p50, ttr_p95, p_loss) = row
+            loss_color = "red" if p_loss > 0.2 else "green"
+            table.add_row(str(magic), str(trades), f"{dd_obs:.2f}", f"{dd_p50:.2f} / {dd_p95:.2f}", f"{rf_obs:.2f}",
+                          f"{rf_p5:.2f} / {rf_p50:.2f}", f"{ttr_p50:.0f} / {ttr_p95:.0f} trades",
+                          f"[{loss_color}]{p_loss:.1%}[/{loss_color}]")
+        console.print(table)
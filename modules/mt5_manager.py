@@ -4,6 +4,8 @@ import time
 from rich.table import Table
 from rich import box
 from rich.console import Console
+from modules.metrics import instrument_mt5
+from modules.trailing_engine import prioritize_order_send
 
 # You'll need a utility file for these, or define them here for simplicity
 def log_success(message):
@@ -17,12 +19,16 @@ def log_info(message):
 
 console = Console()
 
+instrument_mt5(mt5) # Every mt5.* API call in the process is counted and timed (modules/metrics.py)
+prioritize_order_send(mt5) # Entries and closes go before queued SL modifications, all requests share the account's rate limit
+
 class MT5Manager:
-    def __init__(self, login=None, password=None, server=None, max_attempts=5):
+    def __init__(self, login=None, password=None, server=None, max_attempts=5, path=None):
         self.login = login
         self.password = password
         self.server = server
         self.max_attempts = max_attempts
+        self.path = path # Terminal executable, needed when several terminals run on the same PC
         self.mt5_connected = False
         self.connection_attempts = 0
 
@@ -36,7 +42,8 @@ class MT5Manager:
 
         try:
             log_info("Attempting to initialize MetaTrader 5...")
-            if not mt5.initialize():
+            initialized = mt5.initialize(path=self.path) if self.path else mt5.initialize()
+            if not initialized:
                 self.connection_attempts += 1
                 error_code = mt5.last_error()
                 log_error(f"MT5 initialize() failed (attempt {self.connection_attempts}/{self.max_attempts}), error code = {error_code}")
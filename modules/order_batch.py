@@ -0,0 +1,176 @@
+# modules/order_batch.py
+#---------------------------------------
+# Batch order placement (order ladders and close-all)
+#---------------------------------------
+# All requests of a batch are prepared up front from a single symbol_info /
+# tick read, then submitted back to back (or with a small bounded thread
+# pool) with no UI or table work in between. The caller gets one BatchReport
+# with the aggregated outcome and the latency of every order.
+
+import MetaTrader5 as mt5
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Retcodes where the prepared price went stale and one retry with a fresh tick is worth it
+RETRY_RETCODES = {
+    10004,  # TRADE_RETCODE_REQUOTE
+    10020,  # TRADE_RETCODE_PRICE_CHANGED
+    10021,  # TRADE_RETCODE_PRICE_OFF
+}
+
+
+class BatchOrderResult:
+    """
+    Outcome of one request in a batch.
+    """
+    def __init__(self, index, request, result, latency_ms, retried=False):
+        self.index = index
+        self.request = request
+        self.result = result
+        self.latency_ms = latency_ms
+        self.retried = retried
+
+    @property
+    def ok(self):
+        return self.result is not None and self.result.retcode == mt5.TRADE_RETCODE_DONE
+
+    @property
+    def message(self):
+        if self.result is None:
+            return "No response from MT5 terminal"
+        if self.ok:
+            return f"Ticket {self.result.order} @ {self.result.price}"
+        return f"retcode={self.result.retcode} {self.result.comment}"
+
+
+class BatchReport:
+    """
+    Aggregated outcome of a submitted batch.
+    """
+    def __init__(self, results, total_ms):
+        self.results = sorted(results, key=lambda r: r.index)
+        self.total_ms = total_ms
+
+    @property
+    def succeeded(self):
+        return [r for r in self.results if r.ok]
+
+    @property
+    def failed(self):
+        return [r for r in self.results if not r.ok]
+
+    def summary(self):
+        """One-line summary suitable for a status label."""
+        if not self.results:
+            return "Nothing to send."
+        latencies = [r.latency_ms for r in self.results]
+        return (f"{len(self.succeeded)}/{len(self.results)} done in {self.total_ms:.0f} ms "
+                f"(per order avg {sum(latencies) / len(latencies):.0f} ms, max {max(latencies):.0f} ms)")
+
+    def details(self):
+        """Per-order lines, failures first."""
+        return [f"#{r.index + 1}: {'OK' if r.ok else 'FAILED'} {r.message} ({r.latency_ms:.0f} ms)"
+                for r in self.failed + self.succeeded]
+
+
+class BatchOrderEngine:
+    """
+    Prepares and submits batches of TRADE_ACTION_DEAL requests.
+    """
+    def __init__(self, max_workers=1, deviation=10):
+        """
+        Args:
+            max_workers (int): 1 sends the batch in a tight loop, >1 uses a bounded thread pool.
+            deviation (int): Allowed slippage in points for every order.
+        """
+        self.max_workers = max(1, max_workers)
+        self.deviation = deviation
+
+    def prepare_open(self, symbol, order_type, volume, count, magic, sl_points=None, tp_points=None, comment="Python script order"):
+        """
+        Builds `count` identical market orders from one tick.
+
+        Returns:
+            list[dict]: The requests, or None when the symbol/tick is unavailable.
+        """
+        symbol_info = mt5.symbol_info(symbol)
+        tick = mt5.symbol_info_tick(symbol)
+        if symbol_info is None or tick is None:
+            return None
+
+        point = symbol_info.point
+        price = tick.ask if order_type == mt5.ORDER_TYPE_BUY else tick.bid
+        direction = 1 if order_type == mt5.ORDER_TYPE_BUY else -1
+
+        request = {
+            "action": mt5.TRADE_ACTION_DEAL,
+            "symbol": symbol,
+            "volume": volume,
+            "type": order_type,
+            "price": price,
+            "deviation": self.deviation,
+            "magic": magic,
+            "comment": comment,
+            "type_time": mt5.ORDER_TIME_GTC,
+            "type_filling": mt5.ORDER_FILLING_IOC,
+        }
+        if sl_points:
+            request["sl"] = round(price - direction * sl_points * point, symbol_info.digits)
+        if tp_points:
+            request["tp"] = round(price + direction * tp_points * point, symbol_info.digits)
+
+        return [dict(request) for _ in range(count)]
+
+    def prepare_close(self, positions, magic=202306, comment="Close by Python script"):
+        """
+        Builds one closing request per position, reading each symbol's tick once.
+        """
+        ticks = {}
+        requests = []
+        for position in positions:
+            if position.symbol not in ticks:
+                ticks[position.symbol] = mt5.symbol_info_tick(position.symbol)
+            tick = ticks[position.symbol]
+            if tick is None:
+                continue
+            is_buy = position.type == mt5.ORDER_TYPE_BUY
+            requests.append({
+                "action": mt5.TRADE_ACTION_DEAL,
+                "symbol": position.symbol,
+                "volume": position.volume,
+                "type": mt5.ORDER_TYPE_SELL if is_buy else mt5.ORDER_TYPE_BUY,
+                "position": position.ticket,
+                "price": tick.bid if is_buy else tick.ask,
+                "deviation": self.deviation,
+                "magic": magic,
+                "comment": comment,
+                "type_time": mt5.ORDER_TIME_GTC,
+                "type_filling": mt5.ORDER_FILLING_IOC,
+            })
+        return requests
+
+    def _send(self, index, request):
+        started = time.perf_counter()
+        result = mt5.order_send(request)
+        retried = False
+        if result is not None and result.retcode in RETRY_RETCODES:
+            # The prepared price went stale: refresh it once and resend
+            tick = mt5.symbol_info_tick(request["symbol"])
+            if tick is not None:
+                request = dict(request)
+                request["price"] = tick.ask if request["type"] == mt5.ORDER_TYPE_BUY else tick.bid
+                result = mt5.order_send(request)
+                retried = True
+        return BatchOrderResult(index, request, result, (time.perf_counter() - started) * 1000, retried)
+
+    def submit(self, requests):
+        """
+        Sends every request and returns one BatchReport.
+        """
+        started = time.perf_counter()
+        if self.max_workers == 1 or len(requests) <= 1:
+            results = [self._send(i, request) for i, request in enumerate(requests)]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(requests))) as pool:
+                results = list(pool.map(lambda item: self._send(*item), enumerate(requests)))
+        return BatchReport(results, (time.perf_counter() - started) * 1000)
@@ -0,0 +1,248 @@
+# modules/position_book.py
+#---------------------------------------
+# In-memory position state shared by the strategy loop and its threads
+#---------------------------------------
+# The book is updated directly from our own order_send results (open, SL/TP
+# change, close) and reconciled against mt5.positions_get() every
+# RECONCILE_INTERVAL_SECONDS, or on the next query after one of our requests
+# fails with a mismatch (e.g. a modification rejected because the position is
+# already gone). Nothing else notices a broker-side SL/TP fill, so the strategy
+# loop calls reconcile() once at the top of each cycle before its entry check;
+# the threads keep reading the book. Lookups by magic number are O(1)
+# dictionary reads instead of a terminal round trip.
+
+import MetaTrader5 as mt5
+import threading
+import time
+from rich.console import Console
+
+#-----------------------------------
+# Utilities and Global Variables
+#-----------------------------------
+from modules.utilities import log_success, log_error, log_warning, log_info
+
+console = Console()
+
+RECONCILE_INTERVAL_SECONDS = 30
+
+# Retcodes that tell us the book no longer matches the terminal
+MISMATCH_RETCODES = {
+    10013,  # TRADE_RETCODE_INVALID (e.g. unknown position)
+    10036,  # TRADE_RETCODE_POSITION_CLOSED
+}
+
+
+class BookPosition:
+    """
+    Position record with the same attribute names as mt5.TradePosition,
+    used until the next reconcile replaces it with the terminal's version.
+    """
+    def __init__(self, ticket, magic, symbol, type, volume, price_open, sl, tp, time, comment="", profit=0.0):
+        self.ticket = ticket
+        self.magic = magic
+        self.symbol = symbol
+        self.type = type
+        self.volume = volume
+        self.price_open = price_open
+        self.sl = sl
+        self.tp = tp
+        self.time = time
+        self.comment = comment
+        self.profit = profit
+
+    @classmethod
+    def from_terminal(cls, position):
+        return cls(
+            ticket=position.ticket,
+            magic=position.magic,
+            symbol=position.symbol,
+            type=position.type,
+            volume=position.volume,
+            price_open=position.price_open,
+            sl=position.sl,
+            tp=position.tp,
+            time=position.time,
+            comment=position.comment,
+            profit=position.profit
+        )
+
+
+class PositionBook:
+    """
+    Thread-safe position cache indexed by ticket and by magic number.
+    """
+    def __init__(self, symbol=None, reconcile_interval=RECONCILE_INTERVAL_SECONDS):
+        """
+        Args:
+            symbol (str): Only track positions on this symbol (None = all symbols).
+            reconcile_interval (float): Seconds between reconciliations with the terminal.
+        """
+        self.symbol = symbol
+        self.reconcile_interval = reconcile_interval
+        self.lock = threading.RLock()
+        self.by_ticket = {}
+        self.by_magic = {}
+        self.open_listeners = []
+        self.close_listeners = []
+        self.last_reconcile = 0.0
+        self.dirty = True
+        self.reconcile_count = 0
+
+    #-----------------------------------
+    # Events
+    #-----------------------------------
+    def on_open(self, listener):
+        """Registers listener(position), called when a position enters the book."""
+        self.open_listeners.append(listener)
+
+    def on_close(self, listener):
+        """Registers listener(position), called when a position leaves the book."""
+        self.close_listeners.append(listener)
+
+    def _emit(self, listeners, position):
+        for listener in listeners:
+            try:
+                listener(position)
+            except Exception as e:
+                log_error(f"Position book listener failed for {position.ticket}: {e}")
+
+    #-----------------------------------
+    # Queries (O(1) by magic number)
+    #-----------------------------------
+    def has(self, magic):
+        self.maybe_reconcile()
+        with self.lock:
+            return bool(self.by_magic.get(magic))
+
+    def get(self, magic):
+        """Returns the open positions of a magic number as a list."""
+        self.maybe_reconcile()
+        with self.lock:
+            return list(self.by_magic.get(magic, {}).values())
+
+    def get_ticket(self, ticket):
+        with self.lock:
+            return self.by_ticket.get(ticket)
+
+    def all(self):
+        self.maybe_reconcile()
+        with self.lock:
+            return list(self.by_ticket.values())
+
+    #-----------------------------------
+    # Updates from our own trade results
+    #-----------------------------------
+    def _add(self, position):
+        self.by_ticket[position.ticket] = position
+        self.by_magic.setdefault(position.magic, {})[position.ticket] = position
+
+    def _remove(self, ticket):
+        position = self.by_ticket.pop(ticket, None)
+        if position is not None:
+            magic_positions = self.by_magic.get(position.magic, {})
+            magic_positions.pop(ticket, None)
+            if not magic_positions:
+                self.by_magic.pop(position.magic, None)
+        return position
+
+    def apply_open(self, request, result):
+        """
+        Records a position opened by a TRADE_ACTION_DEAL request.
+
+        Args:
+            request (dict): The request passed to mt5.order_send.
+            result: The OrderSendResult returned by mt5.order_send.
+        """
+        if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
+            self.mark_dirty()
+            return None
+
+        # In hedging accounts the position ticket equals the opening order ticket
+        position = BookPosition(
+            ticket=result.order,
+            magic=request.get("magic", 0),
+            symbol=request["symbol"],
+            type=request["type"],
+            volume=result.volume or request["volume"],
+            price_open=result.price or request.get("price", 0.0),
+            sl=request.get("sl", 0.0),
+            tp=request.get("tp", 0.0),
+            time=int(time.time()),
+            comment=request.get("comment", "")
+        )
+        with self.lock:
+            self._add(position)
+        self._emit(self.open_listeners, position)
+        return position
+
+    def apply_sl_tp(self, ticket, result, sl=None, tp=None):
+        """
+        Records the outcome of a TRADE_ACTION_SLTP request.
+        """
+        if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
+            if result is None or result.retcode in MISMATCH_RETCODES:
+                self.mark_dirty()
+            return
+        with self.lock:
+            position = self.by_ticket.get(ticket)
+            if position is None:
+                self.mark_dirty()
+                return
+            if sl is not None:
+                position.sl = sl
+            if tp is not None:
+                position.tp = tp
+
+    def apply_close(self, ticket, result):
+        """
+        Records the outcome of a closing TRADE_ACTION_DEAL request.
+        """
+        if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
+            self.mark_dirty()
+            return None
+        with self.lock:
+            position = self._remove(ticket)
+        if position is not None:
+            self._emit(self.close_listeners, position)
+        return position
+
+    #-----------------------------------
+    # Reconciliation with the terminal
+    #-----------------------------------
+    def mark_dirty(self):
+        """Forces a reconcile on the next query."""
+        self.dirty = True
+
+    def maybe_reconcile(self):
+        if self.dirty or time.time() - self.last_reconcile >= self.reconcile_interval:
+            self.reconcile()
+
+    def reconcile(self):
+        """
+        Replaces the book with the terminal's positions and emits the differences.
+        """
+        positions = mt5.positions_get(symbol=self.symbol) if self.symbol else mt5.positions_get()
+        if positions is None:
+            log_warning(f"Position book reconcile failed, error code = {mt5.last_error()}")
+            return False
+
+        opened, closed = [], []
+        with self.lock:
+            terminal = {p.ticket: p for p in positions}
+            for ticket in list(self.by_ticket):
+                if ticket not in terminal:
+                    closed.append(self._remove(ticket))
+            for ticket, p in terminal.items():
+                if ticket not in self.by_ticket:
+                    opened.append(p)
+                self._remove(ticket)
+                self._add(BookPosition.from_terminal(p))
+            self.last_reconcile = time.time()
+            self.dirty = False
+            self.reconcile_count += 1
+
+        for position in closed:
+            self._emit(self.close_listeners, position)
+        for p in opened:
+            self._emit(self.open_listeners, self.by_ticket.get(p.ticket))
+        return True
@@ -7,16 +7,20 @@ from modules.utilities import log_success, log_error, log_info, log_warning
 from modules.indicators import Indicators
 from modules.mt5_config import TradingConfig
 from modules.mt5_manager import MT5Manager
+from modules import metrics
+from modules.config_reload import snapshot
+from modules.trailing_engine import trailing_engine
 from rich.console import Console
 
 console = Console()
 
 class PositionManager(threading.Thread):
-    def __init__(self, config: TradingConfig, mt5_manager: MT5Manager, position_open_event: threading.Event):
+    def __init__(self, config: TradingConfig, mt5_manager: MT5Manager, position_open_event: threading.Event, position_book=None):
         super().__init__()
         self.config = config
         self.mt5_manager = mt5_manager
         self.position_open_event = position_open_event
+        self.position_book = position_book # Optional shared PositionBook instead of positions_get every cycle
         self.is_running = True
 
     def run(self):
@@ -25,7 +29,10 @@ class PositionManager(threading.Thread):
         """
         log_info("Position Manager thread started.")
         while self.is_running:
-            positions = mt5.positions_get(symbol=self.config.symbol)
+            if self.position_book:
+                positions = self.position_book.get(self.config.strategy_id)
+            else:
+                positions = mt5.positions_get(symbol=self.config.symbol)
             if not positions or not any(p.magic == self.config.strategy_id for p in positions):
                 # No relevant position open, wait for the signal from the main thread
                 log_info("No open positions found. Position Manager is sleeping.")
@@ -45,6 +52,8 @@ class PositionManager(threading.Thread):
         """
         Manages an individual open position by trailing the stop loss.
         """
+        metrics.position_checks.inc()
+        config = snapshot(self.config) # One consistent set of trailing parameters per check, even across a config reload
         symbol_info = mt5.symbol_info(self.config.symbol)
         if symbol_info is None:
             log_error(f"Failed to get symbol info for {self.config.symbol}")
@@ -64,11 +73,11 @@ class PositionManager(threading.Thread):
 
         log_info(f"Checking position {position.ticket}.")
         log_info(f"Current profit in currency: {current_profit_currency:.2f}")
-        log_info(f"Activation Point: {self.config.trailing_activation_points} | Current profit in points: {current_profit_points:.2f} ")
+        log_info(f"Activation Point: {config.trailing_activation_points} | Current profit in points: {current_profit_points:.2f} ")
 
         # Check if the profit in points is high enough to activate the trailing stop
-        if current_profit_points >= self.config.trailing_activation_points:
-            log_info(f"Current Profit Points: {current_profit_points:.2f} | Trailing Activation Points: {self.config.trailing_activation_points}")
+        if current_profit_points >= config.trailing_activation_points:
+            log_info(f"Current Profit Points: {current_profit_points:.2f} | Trailing Activation Points: {config.trailing_activation_points}")
             log_info("Trailing stop activation threshold reached. Activating trailing stop.")
 
             # The rest of the logic remains the same
@@ -81,39 +90,42 @@ class PositionManager(threading.Thread):
             rates_df['time'] = pd.to_datetime(rates_df['time'], unit='s')
             
             indicator_tools = Indicators(rates_df)
-            ema_value = indicator_tools.get_last_ema_value(self.config.trailing_period, 'close')
-            log_info(f"Current {self.config.trailing_period} EMA value: {ema_value}")
+            ema_value = indicator_tools.get_last_ema_value(config.trailing_period, 'close')
+            log_info(f"Current {config.trailing_period} EMA value: {ema_value}")
             
             if pd.isna(ema_value):
                 log_warning("EMA value is NaN. Skipping stop loss update.")
                 return
 
             if position.type == mt5.ORDER_TYPE_BUY:
-                new_sl = ema_value - (self.config.trailing_stop_distance * point)
+                new_sl = ema_value - (config.trailing_stop_distance * point)
                 if new_sl > position.sl:
-                    self.update_sl(position, new_sl)
+                    self.update_sl(position, new_sl, point)
             elif position.type == mt5.ORDER_TYPE_SELL:
-                new_sl = ema_value + (self.config.trailing_stop_distance * point)
+                new_sl = ema_value + (config.trailing_stop_distance * point)
                 if new_sl < position.sl:
-                    self.update_sl(position, new_sl)
+                    self.update_sl(position, new_sl, point)
 
-    def update_sl(self, position, new_sl):
+    def update_sl(self, position, new_sl, point):
         """
-        Sends an order modification request to update the stop loss.
+        Queues the stop loss modification on the trailing engine (minimum step,
+        coalescing and rate limit); the request is sent from its worker thread.
         """
-        request = {
-            "action": mt5.TRADE_ACTION_SLTP,
-            "position": position.ticket,
-            "sl": new_sl,
-            "tp": position.tp,
-            "magic": self.config.strategy_id,
-            "comment": "Trailing SL"
-        }
-        result = mt5.order_send(request)
-        if result.retcode != mt5.TRADE_RETCODE_DONE:
-            log_error(f"Failed to modify SL for position {position.ticket}, error code: {result.retcode}")
+        if not trailing_engine().submit(position, new_sl, point, self.config.strategy_id, on_result=self.sl_updated):
+            log_info(f"New SL {new_sl:.5f} for position {position.ticket} is below the minimum step, not sent.")
+
+    def sl_updated(self, modification, result):
+        """
+        Called by the trailing engine with the broker's answer.
+        """
+        if self.position_book:
+            self.position_book.apply_sl_tp(modification.ticket, result, sl=modification.sl)
+        done = result is not None and result.retcode == mt5.TRADE_RETCODE_DONE
+        metrics.sl_updates.inc(result='done' if done else 'failed')
+        if not done:
+            log_error(f"Failed to modify SL for position {modification.ticket}, error code: {result.retcode if result else mt5.last_error()}")
         else:
-            log_success(f"Stop loss updated for position {position.ticket} to {new_sl:.5f}")
+            log_success(f"Stop loss updated for position {modification.ticket} to {modification.sl:.5f}")
 
     def stop(self):
         """
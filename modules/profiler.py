@@ -0,0 +1,340 @@
+# modules/profiler.py
+#---------------------------------------
+# On-demand profiling of a running strategy
+#---------------------------------------
+# Nothing runs until a profile is requested; a strategy that is never
+# profiled pays one attribute check per cycle.
+#
+# Requests (any of them, picked up at the start of the next cycle):
+#   - file flag:  profiling/strategy_<id>.request, written by
+#                 `python profile_strategy.py <id> [sample|cprofile] [cycles] [all]`
+#                 (contents "<mode> <cycles> [all]", empty = defaults)
+#   - signal:     SIGUSR1 (POSIX only; samples DEFAULT_CYCLES cycles)
+#   - socket:     GET http://127.0.0.1:<metrics port>/profile?mode=sample&cycles=10
+#                 on the metrics endpoint of a supervised process
+#
+# Modes:
+#   sample   - a daemon thread reads the loop thread's stack every
+#              SAMPLE_INTERVAL seconds (sys._current_frames) while a cycle
+#              is running. Folded stacks are written to
+#              profiles/strategy_<id>_<time>_sample.folded, one
+#              "strategy_<id>;outer;...;inner <count>" line per stack, ready
+#              for flamegraph.pl or speedscope. With "all" every thread of
+#              the process is sampled (position / take-profit threads too).
+#   cprofile - cProfile around each cycle's work; profiles/..._cprofile.prof
+#              (pstats, for snakeviz / flameprof) plus a .txt summary.
+#
+# Safe in production: sessions are capped (MAX_CYCLES, MAX_SESSION_SECONDS),
+# the loop thread is never paused, a second session or a foreign profiler
+# (debugger) is refused, and any failure is logged and ends the session
+# instead of reaching the strategy loop.
+
+import os
+import sys
+import time
+import signal
+import pstats
+import cProfile
+import threading
+from datetime import datetime
+from collections import Counter
+
+#-----------------------------------
+# Utilities and Global Variables
+#-----------------------------------
+from modules.utilities import log_success, log_error, log_warning, log_info
+
+REQUEST_DIR = "profiling"
+PROFILE_DIR = "profiles"
+
+MODE_SAMPLE = "sample"
+MODE_CPROFILE = "cprofile"
+MODES = (MODE_SAMPLE, MODE_CPROFILE)
+
+DEFAULT_MODE = MODE_SAMPLE
+DEFAULT_CYCLES = 10
+MAX_CYCLES = 200
+MAX_SESSION_SECONDS = 1800  # a session ends even if the loop stops cycling
+SAMPLE_INTERVAL = 0.01      # 100 Hz; one stack walk costs a few microseconds
+MAX_STACK_DEPTH = 128
+TOP_FUNCTIONS = 10          # logged at the end of a session
+
+
+def request_path(strategy_id):
+    return os.path.join(REQUEST_DIR, f"strategy_{strategy_id}.request")
+
+
+def parse_request(text):
+    """'<mode> <cycles> [all]' -> (mode, cycles, all_threads). Raises ValueError."""
+    mode, cycles, all_threads = DEFAULT_MODE, DEFAULT_CYCLES, False
+    for token in text.split():
+        token = token.lower()
+        if token in MODES:
+            mode = token
+        elif token == 'all':
+            all_threads = True
+        elif token.isdigit():
+            cycles = int(token)
+        else:
+            raise ValueError(f"unknown profile option '{token}'")
+    if not 1 <= cycles <= MAX_CYCLES:
+        raise ValueError(f"cycles must be between 1 and {MAX_CYCLES}")
+    return mode, cycles, all_threads
+
+
+def frame_label(code):
+    # Function granularity (first line of the def), ';' is the folded-stack separator
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(';', ':')
+
+
+def fold_stack(frame, max_depth=MAX_STACK_DEPTH):
+    """Frame -> tuple of labels, outermost first."""
+    labels = []
+    while frame is not None and len(labels) < max_depth:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return tuple(labels)
+
+
+#-----------------------------------
+# Sampling profiler
+#-----------------------------------
+class StackSampler(threading.Thread):
+    """Samples one thread (or all of them) while `recording` is set."""
+
+    def __init__(self, thread_id, all_threads=False, interval=SAMPLE_INTERVAL):
+        super().__init__(name='profiler-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.all_threads = all_threads
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.deadline = time.monotonic() + MAX_SESSION_SECONDS
+        self.recording = threading.Event()
+        self.stopped = threading.Event()
+
+    def run(self):
+        own_id = threading.get_ident()
+        while not self.stopped.is_set():
+            if not self.recording.wait(0.5) or self.stopped.is_set():
+                continue
+            if time.monotonic() > self.deadline:
+                break  # loop stuck in one cycle: stop sampling, the stacks so far are written at the end
+            frames = sys._current_frames()
+            if self.all_threads:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for thread_id, frame in frames.items():
+                    if thread_id != own_id:
+                        self.stacks[(names.get(thread_id, str(thread_id)),) + fold_stack(frame)] += 1
+            else:
+                frame = frames.get(self.thread_id)
+                if frame is not None:
+                    self.stacks[fold_stack(frame)] += 1
+            del frames  # do not keep other threads' frames alive between samples
+            self.samples += 1
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+        self.recording.set()  # wake the wait() above
+        self.join(timeout=2)
+
+
+class ProfileSession:
+    def __init__(self, tag, mode, cycles, all_threads=False):
+        self.tag = tag
+        self.mode = mode
+        self.cycles = cycles
+        self.all_threads = all_threads
+        self.cycles_done = 0
+        self.cycle_seconds = 0.0
+        self.started = time.monotonic()
+        self.cycle_started_at = None
+        self.sampler = None
+        self.profile = None
+
+    def begin(self):
+        if self.mode == MODE_SAMPLE:
+            self.sampler = StackSampler(threading.get_ident(), self.all_threads)
+            self.sampler.start()
+        else:
+            if sys.getprofile() is not None:
+                raise RuntimeError("another profiler or debugger is active")
+            self.profile = cProfile.Profile()
+
+    def cycle_started(self):
+        self.cycle_started_at = time.perf_counter()
+        if self.sampler:
+            self.sampler.recording.set()
+        else:
+            self.profile.enable()
+
+    def cycle_finished(self):
+        if self.cycle_started_at is None:
+            return
+        if self.sampler:
+            self.sampler.recording.clear()
+        else:
+            self.profile.disable()
+        self.cycle_seconds += time.perf_counter() - self.cycle_started_at
+        self.cycle_started_at = None
+        self.cycles_done += 1
+
+    @property
+    def complete(self):
+        return self.cycles_done >= self.cycles or time.monotonic() - self.started > MAX_SESSION_SECONDS
+
+    def end(self):
+        """Stops collecting and writes the output. Returns the written path."""
+        if self.cycle_started_at is not None:
+            self.cycle_finished()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base = os.path.join(PROFILE_DIR, f"{self.tag}_{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}_{self.mode}")
+        if self.sampler:
+            self.sampler.stop()
+            return self._write_folded(base + ".folded")
+        return self._write_cprofile(base)
+
+    def _write_folded(self, path):
+        stacks = self.sampler.stacks
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(stacks.items(), key=lambda item: -item[1]):
+                f.write(f"{';'.join((self.tag,) + stack)} {count}\n")
+
+        leaves = Counter()
+        for stack, count in stacks.items():
+            leaves[stack[-1]] += count
+        total = sum(leaves.values()) or 1
+        log_success(f"Profile written: {path} ({self.sampler.samples} samples, {self.cycles_done} cycles, "
+                    f"{self.cycle_seconds:.2f}s of cycle work)")
+        for label, count in leaves.most_common(TOP_FUNCTIONS):
+            log_info(f"  {count / total:6.1%}  {label}")
+        return path
+
+    def _write_cprofile(self, base):
+        path = base + ".prof"
+        self.profile.dump_stats(path)
+        with open(base + ".txt", 'w', encoding='utf-8') as f:
+            stats = pstats.Stats(self.profile, stream=f)
+            stats.sort_stats('cumulative').print_stats(50)
+        log_success(f"Profile written: {path} ({self.cycles_done} cycles, {self.cycle_seconds:.2f}s of cycle work)")
+        stats = pstats.Stats(self.profile).sort_stats('tottime')
+        for (filename, line, name) in stats.fcn_list[:TOP_FUNCTIONS]:
+            total_time = stats.stats[(filename, line, name)][2]
+            log_info(f"  {total_time:8.3f}s  {name} ({os.path.basename(filename)}:{line})")
+        return path
+
+
+#-----------------------------------
+# Process-wide profiler
+#-----------------------------------
+class Profiler:
+    def __init__(self):
+        self.strategy_id = None
+        self.tag = None
+        self.session = None
+        self._pending = None        # (mode, cycles, all_threads), set from any thread
+        self._ignored_mtime = None  # a request file we could not delete
+
+    def enable(self, strategy_id):
+        self.strategy_id = strategy_id
+        self.tag = f"strategy_{strategy_id}"
+        if hasattr(signal, 'SIGUSR1') and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGUSR1, lambda signum, frame: self.request())
+
+    def request(self, mode=DEFAULT_MODE, cycles=DEFAULT_CYCLES, all_threads=False):
+        """Queues a session for the next cycle. Returns a status message."""
+        if self.tag is None:
+            return "profiling is not enabled in this process"
+        if mode not in MODES or not 1 <= cycles <= MAX_CYCLES:
+            return f"invalid request: mode must be one of {', '.join(MODES)}, cycles 1-{MAX_CYCLES}"
+        if self.session is not None:
+            return f"a {self.session.mode} session is already running"
+        self._pending = (mode, cycles, all_threads)
+        return f"{self.tag}: {mode} profile of {cycles} cycles starts with the next cycle"
+
+    def _poll_request_file(self):
+        path = request_path(self.strategy_id)
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return
+        if mtime == self._ignored_mtime:
+            return
+        try:
+            with open(path, encoding='utf-8') as f:
+                text = f.read()
+            os.remove(path)
+        except OSError as e:
+            log_warning(f"Profile request {path} could not be consumed: {e}")
+            self._ignored_mtime = mtime
+            return
+        try:
+            self._pending = parse_request(text)
+        except ValueError as e:
+            log_error(f"Profile request {path} ignored: {e}")
+
+    def cycle_started(self):
+        if self.tag is None:
+            return
+        try:
+            if self.session is None:
+                self._poll_request_file()
+                if self._pending is None:
+                    return
+                mode, cycles, all_threads = self._pending
+                self._pending = None
+                session = ProfileSession(self.tag, mode, cycles, all_threads)
+                session.begin()
+                self.session = session
+                log_info(f"Profiling {self.tag}: {mode}, {cycles} cycles" + (" (all threads)" if all_threads else ""))
+            self.session.cycle_started()
+        except Exception as e:
+            log_error(f"Profiler could not start: {e}")
+            self._abort()
+
+    def cycle_finished(self):
+        if self.session is None:
+            return
+        try:
+            self.session.cycle_finished()
+            if self.session.complete:
+                session, self.session = self.session, None
+                session.end()
+        except Exception as e:
+            log_error(f"Profiler failed, session dropped: {e}")
+            self._abort()
+
+    def _abort(self):
+        session, self.session = self.session, None
+        if session is None:
+            return
+        try:
+            if session.sampler:
+                session.sampler.stop()
+            elif session.profile:
+                session.profile.disable()
+        except Exception:
+            pass
+
+
+_profiler = Profiler()
+
+
+def enable_profiling(strategy_id):
+    """Lets this process be profiled on request, output tagged strategy_<id>."""
+    _profiler.enable(strategy_id)
+    return _profiler
+
+
+def request_profile(mode=DEFAULT_MODE, cycles=DEFAULT_CYCLES, all_threads=False):
+    return _profiler.request(mode, cycles, all_threads)
+
+
+def cycle_started():
+    _profiler.cycle_started()
+
+
+def cycle_finished():
+    _profiler.cycle_finished()
@@ -4,12 +4,13 @@ import threading
 from modules.utilities import log_success, log_error, log_info
 from modules.mt5_config import TradingConfig
 from modules.mt5_manager import MT5Manager
+from modules import metrics
 from rich.console import Console
 
 console = Console()
 
 class TakeProfitMonitor(threading.Thread):
-    def __init__(self, config: TradingConfig, mt5_manager: MT5Manager, position_open_event: threading.Event):
+    def __init__(self, config: TradingConfig, mt5_manager: MT5Manager, position_open_event: threading.Event, position_book=None):
         """
         Initializes the TakeProfitMonitor thread.
 
@@ -17,11 +18,13 @@ class TakeProfitMonitor(threading.Thread):
             config (TradingConfig): The trading configuration settings.
             mt5_manager (MT5Manager): The MT5 connection manager.
             position_open_event (threading.Event): An event to signal new open positions.
+            position_book (PositionBook): Optional shared position cache used instead of positions_get.
         """
         super().__init__()
         self.config = config
         self.mt5_manager = mt5_manager
         self.position_open_event = position_open_event
+        self.position_book = position_book
         self.is_running = True
 
     def run(self):
@@ -31,7 +34,10 @@ class TakeProfitMonitor(threading.Thread):
         """
         log_info("Take Profit Monitor thread started.")
         while self.is_running:
-            positions = mt5.positions_get(symbol=self.config.symbol)
+            if self.position_book:
+                positions = self.position_book.get(self.config.strategy_id)
+            else:
+                positions = mt5.positions_get(symbol=self.config.symbol)
             
             # Check for existing positions with the strategy's magic ID
             if not positions or not any(p.magic == self.config.strategy_id for p in positions):
@@ -56,6 +62,7 @@ class TakeProfitMonitor(threading.Thread):
         Args:
             position (mt5.Position): The open position object.
         """
+        metrics.take_profit_checks.inc()
         symbol_info_tick = mt5.symbol_info_tick(self.config.symbol)
         if symbol_info_tick is None:
             log_error(f"Failed to get tick data for {self.config.symbol}")
@@ -67,29 +74,31 @@ class TakeProfitMonitor(threading.Thread):
         if (position.type == mt5.ORDER_TYPE_BUY and current_price >= position.tp) or \
            (position.type == mt5.ORDER_TYPE_SELL and current_price <= position.tp):
             log_success(f"Take profit hit for position {position.ticket}! Current Price: {current_price:.5f}, Target Price: {position.tp:.5f}")
-            self.close_position(position)
+            self.close_position(position, symbol_info_tick)
         else:
             log_info(f"Position {position.ticket}: Price {current_price:.5f} is not yet at target {position.tp:.5f}. Monitoring...")
 
-    def close_position(self, position):
+    def close_position(self, position, tick=None):
         """
         Sends a request to close the specified position.
         
         Args:
             position (mt5.Position): The open position object to be closed.
+            tick: The tick the decision was made on; read again only when not given.
         """
         # Get the current tick data to determine the correct closing price.
-        tick = mt5.symbol_info_tick(self.config.symbol)
+        if tick is None:
+            tick = mt5.symbol_info_tick(self.config.symbol)
         if tick is None:
             log_error(f"Failed to get tick data for {self.config.symbol}")
             return
             
         # Determine the closing price and order type based on the position type.
         if position.type == mt5.ORDER_TYPE_BUY:
-            close_price = mt5.symbol_info_tick(self.config.symbol).bid 
+            close_price = tick.bid
             close_type = mt5.ORDER_TYPE_SELL
         elif position.type == mt5.ORDER_TYPE_SELL:
-            close_price = mt5.symbol_info_tick(self.config.symbol).ask
+            close_price = tick.ask
             close_type = mt5.ORDER_TYPE_BUY
         else:
             log_error(f"Unknown position type: {position.type}")
@@ -110,8 +119,12 @@ class TakeProfitMonitor(threading.Thread):
         }
 
         result = mt5.order_send(request)
-        if result.retcode != mt5.TRADE_RETCODE_DONE:
-            log_error(f"Failed to close position {position.ticket}, error code: {result.retcode}")
+        if self.position_book:
+            self.position_book.apply_close(position.ticket, result)
+        closed = result is not None and result.retcode == mt5.TRADE_RETCODE_DONE
+        metrics.take_profit_closes.inc(result='done' if closed else 'failed')
+        if not closed:
+            log_error(f"Failed to close position {position.ticket}, error code: {result.retcode if result else mt5.last_error()}")
         else:
             log_success(f"Position {position.ticket} successfully closed.")
 
@@ -0,0 +1,346 @@
+# modules/regime.py
+#---------------------------------------
+# Trend / consolidation regimes over bar history
+#---------------------------------------
+# classify_regimes() labels every bar with the same EMA-stack rule the live
+# strategies print as 'bullish 🟢' / 'bearish 🟡' / 'consolidation 🔵', in one
+# vectorized pass. regime_intervals() run-length encodes the labels into
+# intervals (start, end, bars, duration, high/low range), and RegimeIndex
+# stores them in SQLite with indexes so research queries such as
+# "consolidations longer than 30 minutes starting in London hours" are
+# answered from the index instead of re-scanning bars.
+#
+# RegimeTracker is the live side: it keeps the current regime and when it
+# started, so "time in current regime" is an O(1) read. IncrementalRegime
+# drives one from a BarFeed (BarFeed.regime()): seeded from the closed bars of
+# the window at load / reload / resume, then updated on every bar that closes,
+# with bar times, whether or not the strategy evaluates a signal that cycle.
+
+import sqlite3
+import time
+import numpy as np
+import talib as ta
+from datetime import datetime
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+#-----------------------------------
+# Utilities and Global Variables
+#-----------------------------------
+from modules.utilities import log_success, log_error, log_warning, log_info
+from modules.ema_kernel import ema_matrix
+from modules.incremental_indicators import IncrementalIndicator, IncrementalEMA, IncrementalSMA
+
+console = Console()
+
+DB_NAME = 'market_data.db'
+
+REGIME_BEARISH = -1
+REGIME_CONSOLIDATION = 0
+REGIME_BULLISH = 1
+
+REGIME_NAMES = {
+    REGIME_BEARISH: 'bearish',
+    REGIME_CONSOLIDATION: 'consolidation',
+    REGIME_BULLISH: 'bullish',
+}
+REGIME_CODES = {name: code for code, name in REGIME_NAMES.items()}
+
+
+def classify_regimes(high, low, close, config, use_long_term=True):
+    """
+    Labels every bar bullish (1), bearish (-1) or consolidation (0).
+
+    Bullish:  close > EMA(support, low) > EMA(consolidation) [> EMA(long term)]
+    Bearish:  close < EMA(resistance, high) < EMA(consolidation) [< EMA(long term)]
+    Bars still inside the EMA warm-up are labelled consolidation, like a live
+    loop that has not got enough data.
+
+    Args:
+        high, low, close (array-like): Bar prices.
+        config (TradingConfig): ema_support, ema_resistance, consolidation_filter, long_term_trend.
+        use_long_term (bool): Include the long-term EMA in the stack (strategy_20) or not (strategy_16).
+
+    Returns:
+        np.ndarray: int8 labels, one per bar.
+    """
+    close = np.asarray(close, dtype=float)
+    close_emas = ema_matrix(close, (config.consolidation_filter, config.long_term_trend))
+    support = ema_matrix(low, (config.ema_support,))[:, 0]
+    resistance = ema_matrix(high, (config.ema_resistance,))[:, 0]
+    return regime_labels(close, support, resistance, close_emas[:, 0], close_emas[:, 1] if use_long_term else None)
+
+
+def regime_labels(close, support, resistance, consolidation, long_term=None):
+    """
+    The EMA-stack rule of classify_regimes() on precomputed averages (arrays
+    of equal length); long_term None leaves the long-term EMA out.
+    """
+    close = np.asarray(close, dtype=float)
+    # Comparisons with NaN are False, so the warm-up falls through to consolidation
+    bullish = (close > support) & (support > consolidation)
+    bearish = (close < resistance) & (resistance < consolidation)
+    if long_term is not None:
+        bullish &= consolidation > long_term
+        bearish &= consolidation < long_term
+
+    labels = np.zeros(len(close), dtype=np.int8)
+    labels[bullish] = REGIME_BULLISH
+    labels[bearish] = REGIME_BEARISH
+    return labels
+
+
+def regime_intervals(times, labels, high, low, bar_seconds=60):
+    """
+    Run-length encodes per-bar labels into regime intervals.
+
+    Args:
+        times (array-like): Bar open times in epoch seconds.
+        labels (array-like): Output of classify_regimes.
+        high, low (array-like): Bar prices, used for the interval range.
+        bar_seconds (int): Timeframe length, the last bar of an interval counts in full.
+
+    Returns:
+        dict[str, np.ndarray]: regime, start_time, end_time, bars, duration_seconds, high, low.
+    """
+    times = np.asarray(times, dtype=np.int64)
+    labels = np.asarray(labels)
+    if len(labels) == 0:
+        return {key: np.array([]) for key in ('regime', 'start_time', 'end_time', 'bars', 'duration_seconds', 'high', 'low')}
+
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(labels)) + 1))
+    ends = np.concatenate((starts[1:], [len(labels)])) - 1
+    return {
+        'regime': labels[starts],
+        'start_time': times[starts],
+        'end_time': times[ends],
+        'bars': ends - starts + 1,
+        'duration_seconds': times[ends] - times[starts] + bar_seconds,
+        'high': np.maximum.reduceat(np.asarray(high, dtype=float), starts),
+        'low': np.minimum.reduceat(np.asarray(low, dtype=float), starts),
+    }
+
+
+class RegimeIndex:
+    """
+    SQLite interval index of regimes per symbol and timeframe.
+    """
+    def __init__(self, db_name=DB_NAME):
+        self.conn = sqlite3.connect(db_name)
+        self.create_table()
+
+    def create_table(self):
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS regime_interval (
+                symbol TEXT NOT NULL,
+                timeframe TEXT NOT NULL,
+                regime TEXT NOT NULL,
+                start_time INTEGER NOT NULL,
+                end_time INTEGER NOT NULL,
+                bars INTEGER,
+                duration_seconds INTEGER,
+                high REAL,
+                low REAL,
+                range_points REAL,
+                start_hour INTEGER,
+                start_weekday INTEGER,
+                PRIMARY KEY (symbol, timeframe, start_time)
+            );
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_regime_duration ON regime_interval (symbol, timeframe, regime, duration_seconds);")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_regime_hour ON regime_interval (symbol, timeframe, regime, start_hour);")
+        self.conn.commit()
+
+    def build(self, symbol, timeframe, times, high, low, close, config, point, bar_seconds=60, use_long_term=True,
+              resume_from=None):
+        """
+        Classifies the bars and (re)writes their intervals for symbol/timeframe.
+
+        Args:
+            resume_from (int): Incremental refresh: only intervals starting at or after
+                this time (normally last_start()) are replaced. Bars before it are used
+                to warm the EMAs up only. None rebuilds everything from times[0].
+
+        Returns:
+            int: Number of intervals written.
+        """
+        started = time.perf_counter()
+        labels = classify_regimes(high, low, close, config, use_long_term)
+        intervals = regime_intervals(times, labels, high, low, bar_seconds)
+
+        replace_from = int(times[0]) if resume_from is None else int(resume_from)
+        keep = intervals['start_time'] >= replace_from
+        intervals = {key: values[keep] for key, values in intervals.items()}
+
+        start_times = intervals['start_time']
+        hours = (start_times % 86400) // 3600
+        weekdays = ((start_times // 86400) + 3) % 7  # 1970-01-01 was a Thursday; Monday = 0
+        rows = [
+            (symbol, timeframe, REGIME_NAMES[int(regime)], int(start), int(end), int(bars), int(duration),
+             float(hi), float(lo), round((hi - lo) / point, 1), int(hour), int(weekday))
+            for regime, start, end, bars, duration, hi, lo, hour, weekday in zip(
+                intervals['regime'], start_times, intervals['end_time'], intervals['bars'],
+                intervals['duration_seconds'], intervals['high'], intervals['low'], hours, weekdays)
+        ]
+
+        cursor = self.conn.cursor()
+        cursor.execute("DELETE FROM regime_interval WHERE symbol = ? AND timeframe = ? AND start_time >= ?",
+                       (symbol, timeframe, replace_from))
+        cursor.executemany("INSERT OR REPLACE INTO regime_interval VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        self.conn.commit()
+        log_success(f"Regime index for {symbol} {timeframe}: {len(rows)} intervals from {len(times)} bars "
+                    f"in {(time.perf_counter() - started) * 1000:.0f} ms.")
+        return len(rows)
+
+    def last_start(self, symbol, timeframe):
+        """Start of the latest (possibly still open) interval, where an incremental build resumes."""
+        row = self.conn.execute("SELECT MAX(start_time) FROM regime_interval WHERE symbol = ? AND timeframe = ?",
+                                (symbol, timeframe)).fetchone()
+        return row[0]
+
+    def query(self, symbol, timeframe, regime='consolidation', min_duration_seconds=0, hours=None, weekdays=None,
+              start_time=None, end_time=None, limit=None):
+        """
+        Intervals matching the filters, newest first.
+
+        Args:
+            hours (tuple): (from_hour, to_hour) of the interval start in server time, inclusive.
+            weekdays (sequence[int]): Monday = 0 ... Sunday = 6.
+        """
+        query = ("SELECT regime, start_time, end_time, bars, duration_seconds, high, low, range_points "
+                 "FROM regime_interval WHERE symbol = ? AND timeframe = ? AND regime = ? AND duration_seconds >= ?")
+        params = [symbol, timeframe, regime, min_duration_seconds]
+        if hours is not None:
+            query += " AND start_hour BETWEEN ? AND ?"
+            params += [hours[0], hours[1]]
+        if weekdays is not None:
+            query += f" AND start_weekday IN ({', '.join('?' for _ in weekdays)})"
+            params += list(weekdays)
+        if start_time is not None:
+            query += " AND start_time >= ?"
+            params.append(int(start_time))
+        if end_time is not None:
+            query += " AND end_time <= ?"
+            params.append(int(end_time))
+        query += " ORDER BY start_time DESC"
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        columns = ['regime', 'start_time', 'end_time', 'bars', 'duration_seconds', 'high', 'low', 'range_points']
+        return [dict(zip(columns, row)) for row in self.conn.execute(query, params).fetchall()]
+
+    def display(self, intervals, title="Regime Intervals", limit=20):
+        table = Table(title=f"{title} ({len(intervals)})", box=box.ROUNDED)
+        table.add_column("Regime", style="cyan")
+        table.add_column("Start", style="green")
+        table.add_column("End", style="green")
+        table.add_column("Minutes", justify="right")
+        table.add_column("Range (pts)", justify="right")
+        for interval in intervals[:limit]:
+            table.add_row(
+                interval['regime'],
+                datetime.utcfromtimestamp(interval['start_time']).strftime("%Y-%m-%d %H:%M"),
+                datetime.utcfromtimestamp(interval['end_time']).strftime("%Y-%m-%d %H:%M"),
+                f"{interval['duration_seconds'] / 60:.0f}",
+                f"{interval['range_points']:.0f}"
+            )
+        console.print(table)
+
+    def close(self):
+        self.conn.close()
+
+
+class RegimeTracker:
+    """
+    Current regime and when it began, updated once per bar or evaluation in O(1).
+    """
+    def __init__(self):
+        self.regime = None
+        self.since = None
+        self.evaluations = 0
+
+    def seed(self, times, labels):
+        """Starts from the last interval of a classified history (epoch-second times)."""
+        labels = np.asarray(labels)
+        if len(labels) == 0:
+            return
+        changes = np.flatnonzero(np.diff(labels))
+        start = changes[-1] + 1 if len(changes) else 0
+        self.regime = int(labels[-1])
+        self.since = float(times[start])
+        self.evaluations = 0
+
+    def update(self, regime, timestamp=None):
+        """
+        Records the regime seen now (a REGIME_* code or 'bullish'/'bearish'/'consolidation').
+        """
+        if isinstance(regime, str):
+            regime = REGIME_CODES[regime.split()[0].lower()]
+        timestamp = time.time() if timestamp is None else timestamp
+        if regime != self.regime:
+            self.regime = regime
+            self.since = timestamp
+            self.evaluations = 0
+        self.evaluations += 1
+
+    def time_in_regime(self, now=None):
+        """
+        Seconds since the current regime began (0 before the first update).
+        `now` is on the clock of the timestamps: server bar time for a tracker
+        driven by IncrementalRegime, the wall clock by default.
+        """
+        if self.since is None:
+            return 0.0
+        return (time.time() if now is None else now) - self.since
+
+    @property
+    def name(self):
+        return REGIME_NAMES.get(self.regime, 'unknown')
+
+
+class IncrementalRegime(IncrementalIndicator):
+    """
+    Closed-bar regime of a BarFeed window, kept in a RegimeTracker with bar
+    times. The averages are the feed's own incremental EMA / SMA classes, so a
+    bar is labelled from the same values the strategy prints.
+    """
+    def __init__(self, config, use_long_term=True, consolidation_average='ema'):
+        """
+        Args:
+            config (TradingConfig): ema_support, ema_resistance, consolidation_filter, long_term_trend.
+            use_long_term (bool): Include the long-term EMA in the stack.
+            consolidation_average (str): 'ema', or 'sma' for the strategies with an SMA consolidation filter.
+        """
+        average = IncrementalSMA if consolidation_average == 'sma' else IncrementalEMA
+        self.support = IncrementalEMA(config.ema_support, 'low')
+        self.resistance = IncrementalEMA(config.ema_resistance, 'high')
+        self.consolidation = average(config.consolidation_filter, 'close')
+        self.long_term = IncrementalEMA(config.long_term_trend, 'close') if use_long_term else None
+        self.tracker = RegimeTracker()
+
+    def averages(self):
+        return [a for a in (self.support, self.resistance, self.consolidation, self.long_term) if a is not None]
+
+    def seed(self, bars):
+        series = []
+        for average in self.averages():
+            average.seed(bars)
+            function = ta.SMA if isinstance(average, IncrementalSMA) else ta.EMA
+            series.append(function(np.asarray(bars[average.price_type], dtype=float), timeperiod=average.period))
+        self.tracker = RegimeTracker()
+        self.tracker.seed(bars['time'], regime_labels(bars['close'], *series))
+
+    def label(self, bar):
+        """Regime of the bar with the averages including it."""
+        values = [np.array([average.peek(bar)]) for average in self.averages()]
+        return int(regime_labels([bar['close']], *values)[0])
+
+    def update(self, bar):
+        regime = self.label(bar)  # peek() includes the bar, before the state advances past it
+        for average in self.averages():
+            average.update(bar)
+        self.tracker.update(regime, float(bar['time']))
+
+    def peek(self, bar):
+        return self.label(bar)
@@ -0,0 +1,170 @@
+# modules/session_calendar.py
+#---------------------------------------
+# Trading-session calendar
+#---------------------------------------
+# A schedule is data: a list of (days, start, end) windows with inclusive
+# "HH:MM" minutes, e.g. ("Mon-Fri", "20:00", "23:59"). SessionCalendar
+# compiles it once into a bitmap over the 10,080 minutes of a week plus a
+# "minutes until the next open minute" table, so is_open() and next_open()
+# are array lookups instead of strftime("%a") and hour comparisons.
+#
+# The modules/trading_hours_* variants hold their schedule here and keep
+# exposing is_trading_hours(). Strategies call sleep_until_open() when the
+# session is closed instead of waking up every 10 seconds to find out.
+#
+# Times are the local clock the strategies already use (datetime.now()).
+
+import time
+import numpy as np
+from datetime import datetime, timedelta
+
+#-----------------------------------
+# Utilities and Global Variables
+#-----------------------------------
+from modules.utilities import log_info
+from modules import heartbeat
+
+DAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+MINUTES_PER_DAY = 1440
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+
+#-----------------------------------
+# Schedules (one per trading_hours_* module)
+#-----------------------------------
+# trading_hours_24.py: 24/7 except Saturday after 04:30
+SCHEDULE_24 = [
+    ("Mon-Fri", "00:00", "23:59"),
+    ("Sat", "00:00", "04:30"),
+    ("Sun", "00:00", "23:59"),
+]
+
+# trading_hours_24 copy.py
+SCHEDULE_ALWAYS = [
+    ("Mon-Sun", "00:00", "23:59"),
+]
+
+# trading_hours.py / trading_hours_08pm_to_12nn.py: Mon 20:00 - Tue 12:59 ... Fri 20:00 - Sat 05:30
+SCHEDULE_08PM_TO_12NN = [
+    ("Mon-Fri", "00:00", "12:59"),
+    ("Mon-Fri", "20:00", "23:59"),
+    ("Sat", "00:00", "05:30"),
+    ("Sun", "20:00", "23:59"),
+]
+
+# trading_hours_2.py: Sunday from 18:00, weekdays from 10:00 or until 12:59 (i.e. all day)
+SCHEDULE_2 = [
+    ("Mon-Fri", "00:00", "12:59"),
+    ("Mon-Fri", "10:00", "23:59"),
+    ("Sat", "00:00", "05:30"),
+    ("Sun", "18:00", "23:59"),
+]
+
+# trading_hours_01am_to_04am_10am_to_17pm.py
+SCHEDULE_01AM_TO_04AM_10AM_TO_17PM = [
+    ("Mon", "10:00", "17:59"),
+    ("Tue-Fri", "01:00", "04:59"),
+    ("Tue-Fri", "10:00", "17:59"),
+    ("Sat", "01:00", "04:30"),
+]
+
+# trading_hours_12mn_to_15pm.py
+SCHEDULE_12MN_TO_15PM = [
+    ("Mon", "06:00", "15:59"),
+    ("Tue-Fri", "00:00", "15:59"),
+    ("Sat", "00:00", "05:30"),
+    ("Sun", "20:00", "23:59"),
+]
+
+# trading_hours_test.py: weekdays 02:00 - 18:00
+SCHEDULE_TEST = [
+    ("Mon-Fri", "02:00", "18:00"),
+]
+
+
+def parse_days(days):
+    """'Tue-Fri' -> [1, 2, 3, 4], 'Sat' -> [5]."""
+    if '-' in days:
+        first, last = (DAYS.index(day) for day in days.split('-'))
+        return list(range(first, last + 1))
+    return [DAYS.index(days)]
+
+
+def parse_minute(hhmm):
+    hours, minutes = hhmm.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+def minute_of_week(t):
+    return t.weekday() * MINUTES_PER_DAY + t.hour * 60 + t.minute
+
+
+class SessionCalendar:
+    """
+    Weekly trading schedule compiled into per-minute lookup tables.
+    """
+    def __init__(self, schedule, name="Trading Hours"):
+        """
+        Args:
+            schedule (list[tuple]): (days, start, end) windows, end minute inclusive.
+            name (str): Used in log messages.
+        """
+        self.name = name
+        self.schedule = schedule
+        self.open_minutes = np.zeros(MINUTES_PER_WEEK, dtype=bool)
+        for days, start, end in schedule:
+            for day in parse_days(days):
+                base = day * MINUTES_PER_DAY
+                self.open_minutes[base + parse_minute(start):base + parse_minute(end) + 1] = True
+
+        # Minutes from each minute of the week to the next open one (0 while open), wrapping into next week
+        opens = np.flatnonzero(self.open_minutes)
+        if len(opens) == 0:
+            self.minutes_to_open = None
+        else:
+            minutes = np.arange(MINUTES_PER_WEEK)
+            following = np.concatenate((opens, opens[:1] + MINUTES_PER_WEEK))
+            self.minutes_to_open = following[np.searchsorted(opens, minutes)] - minutes
+
+    def is_open(self, t=None):
+        t = t or datetime.now()
+        return bool(self.open_minutes[minute_of_week(t)])
+
+    def next_open(self, t=None):
+        """
+        Start of the next open minute, or `t` itself while the session is open.
+        None if the schedule never opens.
+        """
+        t = t or datetime.now()
+        if self.minutes_to_open is None:
+            return None
+        minutes = int(self.minutes_to_open[minute_of_week(t)])
+        if minutes == 0:
+            return t
+        return t.replace(second=0, microsecond=0) + timedelta(minutes=minutes)
+
+    def seconds_until_open(self, t=None):
+        t = t or datetime.now()
+        next_open = self.next_open(t)
+        if next_open is None:
+            return None
+        return max(0.0, (next_open - t).total_seconds())
+
+    def sleep_until_open(self, max_seconds=None):
+        """
+        Blocks until the session opens (or for at most `max_seconds`, e.g. to
+        keep sending heartbeats).
+
+        Returns:
+            float: Seconds slept.
+        """
+        seconds = self.seconds_until_open()
+        if seconds is None:
+            seconds = max_seconds or 3600
+        if max_seconds is not None:
+            seconds = min(seconds, max_seconds)
+        if seconds > 0:
+            log_info(f"{self.name}: closed, sleeping {seconds / 60:.1f} minutes until "
+                     f"{(datetime.now() + timedelta(seconds=seconds)).strftime('%a %H:%M')}.")
+            heartbeat.sleep(seconds) # A closed session is not a hang
+        return seconds
@@ -0,0 +1,276 @@
+# modules/signal_bus.py
+#---------------------------------------
+# Demo -> Live signal relay (see z-NEXT.md)
+#---------------------------------------
+# The demo strategy publishes its BUY/SELL/HOLD decision as a small JSON
+# datagram on the loopback interface and the live runner receives it within
+# milliseconds. Every message is also appended to the `signal` table in
+# mt5_trades.db so the relay can be audited later. Polling the table is no
+# longer needed to deliver the signal.
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from rich.console import Console
+
+#-----------------------------------
+# Utilities and Global Variables
+#-----------------------------------
+from modules.utilities import log_success, log_error, log_warning, log_info
+
+console = Console()
+
+DB_NAME = 'mt5_trades.db'
+SIGNAL_BUS_HOST = os.getenv("SIGNAL_BUS_HOST", "127.0.0.1")
+SIGNAL_BUS_PORT = int(os.getenv("SIGNAL_BUS_PORT", "50626"))
+
+MAX_SIGNAL_AGE_SECONDS = 10     # z-NEXT: "Check if interval <= 10 seconds"
+STALE_AFTER_SECONDS = 75        # No message for 1 minute + margin means the demo is down
+MAX_DATAGRAM_BYTES = 4096
+
+
+class SignalJournal:
+    """
+    Durable audit trail of every message that went through the bus.
+    Writes happen after the datagram is sent so they never delay delivery.
+    """
+    def __init__(self, db_name=DB_NAME):
+        self.db_name = db_name
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_name, check_same_thread=False)
+        self.create_table()
+
+    def create_table(self):
+        """Creates the 'signal' table if it doesn't exist."""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS signal (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    direction TEXT,
+                    sequence INTEGER,
+                    strategy_id INTEGER,
+                    symbol TEXT,
+                    signal TEXT,
+                    price REAL,
+                    sent_at REAL,
+                    latency_ms REAL,
+                    note TEXT
+                )
+            ''')
+            self.conn.commit()
+        except sqlite3.Error as e:
+            log_error(f"Error creating table 'signal': {e}")
+
+    def record(self, message, direction, latency_ms=None):
+        """
+        Appends a message to the journal.
+
+        Args:
+            message (dict): The decoded bus message.
+            direction (str): 'sent' on the publisher side, 'received' on the subscriber side.
+            latency_ms (float): Delivery latency measured by the subscriber.
+        """
+        with self.lock:
+            try:
+                self.conn.execute('''
+                    INSERT INTO signal (direction, sequence, strategy_id, symbol, signal, price, sent_at, latency_ms, note)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    direction,
+                    message.get('sequence'),
+                    message.get('strategy_id'),
+                    message.get('symbol'),
+                    message.get('signal'),
+                    message.get('price'),
+                    message.get('sent_at'),
+                    latency_ms,
+                    message.get('note')
+                ))
+                self.conn.commit()
+            except sqlite3.Error as e:
+                log_error(f"Error journaling signal {message.get('sequence')}: {e}")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class SignalPublisher:
+    """
+    Publishing side of the bus, owned by the demo strategy.
+    """
+    def __init__(self, strategy_id, symbol, host=SIGNAL_BUS_HOST, port=SIGNAL_BUS_PORT, journal=True):
+        """
+        Args:
+            strategy_id (int): Magic number of the publishing (demo) strategy.
+            symbol (str): Symbol the demo strategy trades.
+            host (str): Loopback address of the live runner.
+            port (int): UDP port the live runner listens on.
+            journal (bool): Also append every message to the SQLite journal.
+        """
+        self.strategy_id = strategy_id
+        self.symbol = symbol
+        self.address = (host, port)
+        self.sequence = 0
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.journal = SignalJournal() if journal else None
+
+    def _send(self, message):
+        self.sequence += 1
+        message['sequence'] = self.sequence
+        message['strategy_id'] = self.strategy_id
+        message['symbol'] = self.symbol
+        message['sent_at'] = time.time()
+        try:
+            self.sock.sendto(json.dumps(message).encode('utf-8'), self.address)
+        except OSError as e:
+            log_error(f"Failed to publish {message['type']} #{self.sequence}: {e}")
+        return message
+
+    def publish(self, signal, price=None, note=None):
+        """
+        Publishes a trading decision ('buy', 'sell' or 'hold').
+
+        Returns:
+            dict: The message that was sent.
+        """
+        message = self._send({'type': 'signal', 'signal': signal, 'price': price, 'note': note})
+        if self.journal:
+            self.journal.record(message, 'sent')
+        return message
+
+    def heartbeat(self):
+        """
+        Tells the subscriber the strategy loop is alive. Call once per cycle,
+        including cycles that skip the entry check.
+        """
+        return self._send({'type': 'heartbeat'})
+
+    def close(self):
+        self.sock.close()
+        if self.journal:
+            self.journal.close()
+
+
+class SignalSubscriber(threading.Thread):
+    """
+    Receiving side of the bus, owned by the live runner.
+    `on_signal` is called on this thread as soon as a fresh signal that differs
+    from the previous one arrives. `on_stale` is called once when the publisher
+    goes quiet for longer than `stale_after_seconds`.
+    """
+    def __init__(self, on_signal, on_stale=None, strategy_ids=None, host=SIGNAL_BUS_HOST, port=SIGNAL_BUS_PORT,
+                 max_signal_age_seconds=MAX_SIGNAL_AGE_SECONDS, stale_after_seconds=STALE_AFTER_SECONDS,
+                 only_on_change=True, journal=True):
+        """
+        Args:
+            on_signal (callable): Called with the message dict of an accepted signal.
+            on_stale (callable): Called with the number of seconds since the last message.
+            strategy_ids (iterable): Accept only these publisher magic numbers (None = all).
+            max_signal_age_seconds (float): Drop signals older than this on arrival.
+            stale_after_seconds (float): Silence that triggers the staleness alarm.
+            only_on_change (bool): Ignore a signal equal to the previous one from the same publisher.
+        """
+        super().__init__()
+        self.on_signal = on_signal
+        self.on_stale = on_stale or self.default_on_stale
+        self.strategy_ids = set(strategy_ids) if strategy_ids else None
+        self.address = (host, port)
+        self.max_signal_age_seconds = max_signal_age_seconds
+        self.stale_after_seconds = stale_after_seconds
+        self.only_on_change = only_on_change
+        self.journal = SignalJournal() if journal else None
+
+        self.last_seen = time.time()
+        self.last_signal = {}       # strategy_id -> last accepted signal
+        self.last_sequence = {}     # strategy_id -> last sequence number
+        self.stale_alarm_raised = False
+        self.is_running = True
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(self.address)
+        self.sock.settimeout(1.0)
+
+    def default_on_stale(self, silence_seconds):
+        log_error(f"No signal or heartbeat from the demo strategy for {silence_seconds:.0f} seconds. Check the demo terminal!")
+
+    def run(self):
+        log_info(f"Signal subscriber listening on {self.address[0]}:{self.address[1]}.")
+        while self.is_running:
+            try:
+                payload, _ = self.sock.recvfrom(MAX_DATAGRAM_BYTES)
+            except socket.timeout:
+                self.check_staleness()
+                continue
+            except OSError:
+                # Socket closed by stop()
+                break
+
+            received_at = time.time()
+            try:
+                message = json.loads(payload.decode('utf-8'))
+            except ValueError:
+                log_warning("Discarding malformed signal datagram.")
+                continue
+            self.handle_message(message, received_at)
+            self.check_staleness()
+
+    def handle_message(self, message, received_at):
+        """
+        Applies the z-NEXT acceptance rules to one message.
+        """
+        strategy_id = message.get('strategy_id')
+        if self.strategy_ids is not None and strategy_id not in self.strategy_ids:
+            return
+
+        # Publisher restarts reset the sequence, so only reject exact replays.
+        sequence = message.get('sequence', 0)
+        if sequence == self.last_sequence.get(strategy_id):
+            return
+        self.last_sequence[strategy_id] = sequence
+
+        self.last_seen = received_at
+        if self.stale_alarm_raised:
+            log_success(f"Demo strategy {strategy_id} is publishing again.")
+            self.stale_alarm_raised = False
+
+        if message.get('type') != 'signal':
+            return
+
+        latency_ms = (received_at - message.get('sent_at', received_at)) * 1000
+        signal = message.get('signal')
+        if latency_ms / 1000 > self.max_signal_age_seconds:
+            log_warning(f"Signal #{sequence} from {strategy_id} is {latency_ms / 1000:.1f}s old. Ignoring.")
+        elif self.only_on_change and self.last_signal.get(strategy_id) == signal:
+            pass
+        else:
+            self.last_signal[strategy_id] = signal
+            try:
+                self.on_signal(message)
+            except Exception as e:
+                log_error(f"Signal handler failed for signal #{sequence}: {e}")
+
+        # Journal after dispatch so the audit write never delays execution
+        if self.journal:
+            self.journal.record(message, 'received', latency_ms)
+
+    def check_staleness(self):
+        silence_seconds = time.time() - self.last_seen
+        if silence_seconds > self.stale_after_seconds and not self.stale_alarm_raised:
+            self.stale_alarm_raised = True
+            self.on_stale(silence_seconds)
+
+    def stop(self):
+        """
+        Stops the subscriber thread gracefully.
+        """
+        log_info("Stopping Signal Subscriber thread.")
+        self.is_running = False
+        self.sock.close()
+        if self.journal:
+            self.journal.close()
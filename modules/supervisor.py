@@ -0,0 +1,460 @@
+# modules/supervisor.py
+#---------------------------------------
+# Process supervisor for strategies and collectors
+#---------------------------------------
+# Replaces the `start "..." cmd /k python ...` lines of the .bat runners.
+# Every script runs as a child process with:
+#
+#   - a heartbeat file (modules.heartbeat); a child that stops beating for
+#     longer than its timeout is treated as hung, killed and restarted
+#   - restart on exit with exponential backoff; the backoff resets once a
+#     run lasted stable_seconds
+#   - CPU affinity and priority by role: trade executors get their own cores
+#     and the highest priority, collectors and renderers share core 0 below them
+#   - output appended to logs/<name>.log (or its own console window on Windows)
+#   - a child exiting with RECYCLE_EXIT_CODE (memory guard past its soft
+#     limit, already checkpointed) is restarted at once, without backoff
+#   - with a metrics_port, child n serves its own /metrics (modules.metrics)
+#     on metrics_port + 1 + n and the supervisor serves all of them merged,
+#     labelled process="<name>", plus its own up / restarts / heartbeat gauges
+#
+# psutil is used for affinity and priority when installed (required for
+# Windows priority classes); otherwise os.sched_setaffinity / os.setpriority
+# cover Linux. simulated=True launches simulated_child() instead of the
+# scripts, which heartbeats, crashes and hangs at random so the restart
+# logic can be exercised on a machine without MetaTrader 5.
+
+import os
+import sys
+import time
+import random
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from rich.console import Console
+from rich.table import Table
+from rich.live import Live
+from rich import box
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+#-----------------------------------
+# Utilities and Global Variables
+#-----------------------------------
+from modules.utilities import log_success, log_error, log_warning, log_info
+from modules.heartbeat import HEARTBEAT_ENV, RECYCLE_EXIT_CODE, recycle_path, beat
+from modules.memory_guard import SOFT_LIMIT_ENV
+from modules import metrics
+
+console = Console()
+
+HEARTBEAT_DIR = 'heartbeats'
+LOG_DIR = 'logs'
+
+# Roles, highest priority first
+ROLE_EXECUTOR = 'executor'     # strategies and the order relay: latency matters
+ROLE_COLLECTOR = 'collector'   # market data and deal/order database sync
+ROLE_RENDERER = 'renderer'     # dashboards, reports, screenshots
+ROLES = (ROLE_EXECUTOR, ROLE_COLLECTOR, ROLE_RENDERER)
+
+# Role -> (Windows priority class name, POSIX nice value)
+ROLE_PRIORITY = {
+    ROLE_EXECUTOR: ('HIGH_PRIORITY_CLASS', -5),
+    ROLE_COLLECTOR: ('NORMAL_PRIORITY_CLASS', 0),
+    ROLE_RENDERER: ('BELOW_NORMAL_PRIORITY_CLASS', 10),
+}
+
+# Process states
+STATE_WAITING = 'waiting'      # backoff before the next start
+STATE_RUNNING = 'running'
+STATE_STOPPED = 'stopped'
+
+HEARTBEAT_TIMEOUT = 180        # seconds without a beat before a child counts as hung
+BACKOFF_INITIAL = 2
+BACKOFF_MAX = 300
+STABLE_SECONDS = 600
+STOP_TIMEOUT = 10
+
+supervisor_up = metrics.Gauge('supervisor_process_up', 'Child process running (1) or waiting for a restart (0).', ['process'])
+supervisor_restarts = metrics.Gauge('supervisor_process_restarts', 'Restarts of the child process.', ['process'])
+supervisor_recycles = metrics.Gauge('supervisor_process_recycles', 'Planned restarts asked for by the child (memory).', ['process'])
+supervisor_heartbeat_age = metrics.Gauge('supervisor_heartbeat_age_seconds', 'Seconds since the child last beat.', ['process'])
+
+
+class ProcessSpec:
+    """
+    One supervised script.
+    """
+    def __init__(self, name, script, role=ROLE_EXECUTOR, args=(), cores=None, heartbeat_timeout=HEARTBEAT_TIMEOUT,
+                 memory_limit_mb=None):
+        """
+        Args:
+            name (str): Label shown in the status table (the .bat window title).
+            script (str): Python script to run.
+            role (str): One of ROLES; sets priority and default cores.
+            cores (list[int]): CPU cores to pin to; None assigns them by role.
+            heartbeat_timeout (float): Seconds without a beat before a restart;
+                None for scripts that do not beat.
+            memory_limit_mb (float): Soft RSS limit passed to the child's memory
+                guard (MT5_MEMORY_SOFT_LIMIT_MB); None keeps its default.
+        """
+        if role not in ROLES:
+            raise ValueError(f"role must be one of {ROLES}")
+        self.name = name
+        self.script = script
+        self.role = role
+        self.args = list(args)
+        self.cores = cores
+        self.heartbeat_timeout = heartbeat_timeout
+        self.memory_limit_mb = memory_limit_mb
+
+
+def assign_cores(specs, cpu_count=None):
+    """
+    Pins collectors and renderers to core 0 and spreads executors round-robin
+    over the remaining cores (all cores on a single-core machine).
+    """
+    cpu_count = cpu_count or os.cpu_count() or 1
+    executor_cores = list(range(1, cpu_count)) or [0]
+    n = 0
+    for spec in specs:
+        if spec.cores is not None:
+            continue
+        if spec.role == ROLE_EXECUTOR:
+            spec.cores = [executor_cores[n % len(executor_cores)]]
+            n += 1
+        else:
+            spec.cores = [0]
+    return specs
+
+
+#-----------------------------------
+# Affinity and priority
+#-----------------------------------
+def apply_affinity(pid, cores):
+    """Returns True when the cores were applied."""
+    try:
+        if PSUTIL_AVAILABLE:
+            psutil.Process(pid).cpu_affinity(cores)
+            return True
+        if hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(pid, cores)
+            return True
+    except Exception as e:  # OSError, ValueError or psutil.Error
+        log_warning(f"Could not pin process {pid} to cores {cores}: {e}")
+    return False
+
+
+def apply_priority(pid, role):
+    """Returns the priority actually applied (class name or nice value), None if unchanged."""
+    priority_class, nice = ROLE_PRIORITY[role]
+    try:
+        if PSUTIL_AVAILABLE:
+            process = psutil.Process(pid)
+            if sys.platform == 'win32':
+                process.nice(getattr(psutil, priority_class))
+                return priority_class.replace('_PRIORITY_CLASS', '').lower()
+            process.nice(nice)
+            return nice
+        if hasattr(os, 'setpriority'):
+            os.setpriority(os.PRIO_PROCESS, pid, nice)
+            return nice
+    except PermissionError:
+        # Raising priority needs privileges on Linux: keep the default rather than fail
+        log_warning(f"No permission to set priority {nice} for process {pid}; keeping the default.")
+    except Exception as e:
+        log_warning(f"Could not set priority of process {pid}: {e}")
+    return None
+
+
+#-----------------------------------
+# Supervised process
+#-----------------------------------
+class SupervisedProcess:
+    def __init__(self, spec, heartbeat_dir=HEARTBEAT_DIR, metrics_port=None):
+        self.spec = spec
+        self.metrics_port = metrics_port
+        self.heartbeat_path = os.path.abspath(os.path.join(heartbeat_dir, f"{safe_name(spec.name)}.hb"))
+        self.process = None
+        self.state = STATE_WAITING
+        self.started_at = None
+        self.next_start = 0.0
+        self.restarts = 0
+        self.recycles = 0          # planned restarts asked for by the child
+        self.failures = 0          # consecutive short runs, drives the backoff
+        self.last_exit = None
+        self.priority = None
+
+    @property
+    def pid(self):
+        return self.process.pid if self.process else None
+
+    def uptime(self):
+        return time.time() - self.started_at if self.state == STATE_RUNNING else 0.0
+
+    def heartbeat_age(self):
+        try:
+            return time.time() - os.path.getmtime(self.heartbeat_path)
+        except OSError:
+            return None
+
+
+def safe_name(name):
+    return "".join(c if c.isalnum() or c in '-_' else '_' for c in name)
+
+
+class Supervisor:
+    """
+    Starts, watches and restarts a list of ProcessSpec children.
+    """
+    def __init__(self, specs, simulated=False, heartbeat_dir=HEARTBEAT_DIR, log_dir=LOG_DIR, console_windows=False,
+                 backoff_initial=BACKOFF_INITIAL, backoff_max=BACKOFF_MAX, stable_seconds=STABLE_SECONDS, metrics_port=None):
+        """
+        Args:
+            specs (list[ProcessSpec]): Processes to supervise.
+            simulated (bool): Run simulated_child() instead of the scripts.
+            console_windows (bool): Windows only, one console window per child
+                like the .bat runners instead of logs/<name>.log.
+            metrics_port (int): Port of the merged /metrics endpoint; None disables metrics.
+        """
+        self.simulated = simulated
+        self.heartbeat_dir = heartbeat_dir
+        self.log_dir = log_dir
+        self.console_windows = console_windows and sys.platform == 'win32'
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.stable_seconds = stable_seconds
+        os.makedirs(heartbeat_dir, exist_ok=True)
+        os.makedirs(log_dir, exist_ok=True)
+        self.metrics_port = metrics_port
+        self.children = [SupervisedProcess(spec, heartbeat_dir, metrics_port + 1 + n if metrics_port else None)
+                         for n, spec in enumerate(assign_cores(specs))]
+        self.started_at = time.time()
+
+    #-----------------------------------
+    # Lifecycle
+    #-----------------------------------
+    def command(self, spec):
+        if self.simulated:
+            return [sys.executable, '-c', 'from modules.supervisor import simulated_child; simulated_child()', spec.name]
+        return [sys.executable, spec.script] + spec.args
+
+    def start(self, child):
+        spec = child.spec
+        with open(child.heartbeat_path, 'w'):
+            pass  # the timeout counts from the start
+        env = dict(os.environ, PYTHONUNBUFFERED='1', PYTHONIOENCODING='utf-8')
+        env[HEARTBEAT_ENV] = child.heartbeat_path
+        if child.metrics_port:
+            env[metrics.METRICS_PORT_ENV] = str(child.metrics_port)
+        if spec.memory_limit_mb:
+            env[SOFT_LIMIT_ENV] = str(spec.memory_limit_mb)
+        kwargs = {'env': env, 'cwd': os.getcwd()}
+        if self.console_windows:
+            kwargs['creationflags'] = subprocess.CREATE_NEW_CONSOLE
+        else:
+            log = open(os.path.join(self.log_dir, f"{safe_name(spec.name)}.log"), 'a', encoding='utf-8')
+            log.write(f"\n---- {datetime.now():%Y-%m-%d %H:%M:%S} start #{child.restarts + 1}: {' '.join(self.command(spec))}\n")
+            log.flush()
+            kwargs.update(stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL)
+        try:
+            child.process = subprocess.Popen(self.command(spec), **kwargs)
+        except OSError as e:
+            log_error(f"[{spec.name}] Failed to start {spec.script}: {e}")
+            self.schedule_restart(child, f"start failed: {e}")
+            return
+        finally:
+            if not self.console_windows:
+                log.close()  # the child holds its own handle
+        child.state = STATE_RUNNING
+        child.started_at = time.time()
+        apply_affinity(child.pid, spec.cores)
+        child.priority = apply_priority(child.pid, spec.role)
+        log_info(f"[{spec.name}] Started {spec.script} (pid {child.pid}, cores {spec.cores}).")
+
+    def schedule_restart(self, child, reason):
+        ran = time.time() - child.started_at if child.started_at else 0.0
+        child.failures = 1 if ran >= self.stable_seconds else child.failures + 1
+        delay = min(self.backoff_max, self.backoff_initial * 2 ** (child.failures - 1))
+        child.state = STATE_WAITING
+        child.next_start = time.time() + delay
+        child.last_exit = reason
+        child.restarts += 1
+        child.process = None
+        log_warning(f"[{child.spec.name}] {reason} after {ran:.0f} s. Restarting in {delay:.0f} s.")
+
+    def recycle(self, child):
+        """The child exited on purpose and asked for a fresh process: restart now, no backoff."""
+        path = recycle_path(child.heartbeat_path)
+        try:
+            with open(path, encoding='utf-8') as f:
+                reason = f.read().strip() or "recycle requested"
+            os.remove(path)
+        except OSError:
+            reason = "recycle requested"
+        ran = time.time() - child.started_at if child.started_at else 0.0
+        if ran < self.stable_seconds:
+            self.schedule_restart(child, f"asked for a recycle too soon ({reason})")  # no restart loop
+            return
+        child.state = STATE_WAITING
+        child.next_start = time.time()
+        child.last_exit = f"recycled ({reason})"
+        child.restarts += 1
+        child.recycles += 1
+        child.process = None
+        log_info(f"[{child.spec.name}] Recycled after {ran / 3600:.1f} h: {reason}")
+
+    def kill(self, child):
+        process = child.process
+        if process is None or process.poll() is not None:
+            return
+        process.terminate()
+        try:
+            process.wait(STOP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    def check(self, child):
+        """One supervision step for one child."""
+        now = time.time()
+        if child.state == STATE_WAITING:
+            if now >= child.next_start:
+                self.start(child)
+            return
+        if child.state != STATE_RUNNING:
+            return
+
+        code = child.process.poll()
+        if code == RECYCLE_EXIT_CODE:
+            self.recycle(child)
+            return
+        if code is not None:
+            self.schedule_restart(child, f"exited with code {code}")
+            return
+        timeout = child.spec.heartbeat_timeout
+        age = child.heartbeat_age()
+        if timeout is not None and age is not None and age > timeout:
+            self.kill(child)
+            self.schedule_restart(child, f"no heartbeat for {age:.0f} s")
+
+    def run(self, poll_seconds=1.0, duration=None):
+        """
+        Supervises until Ctrl+C (or for `duration` seconds), then stops every child.
+        """
+        log_info(f"Supervising {len(self.children)} processes"
+                 f"{' (simulated)' if self.simulated else ''}, psutil {'on' if PSUTIL_AVAILABLE else 'off'}.")
+        if self.metrics_port and metrics.start_server(self.metrics_port, self.render_metrics):
+            log_info(f"Merged metrics on http://127.0.0.1:{self.metrics_port}/metrics")
+        try:
+            with Live(self.status_table(), console=console, refresh_per_second=1) as live:
+                while duration is None or time.time() - self.started_at < duration:
+                    for child in self.children:
+                        self.check(child)
+                    live.update(self.status_table())
+                    time.sleep(poll_seconds)
+        except KeyboardInterrupt:
+            log_warning("Supervisor interrupted. Stopping all processes.")
+        finally:
+            self.stop()
+
+    def stop(self):
+        for child in self.children:
+            self.kill(child)
+            child.state = STATE_STOPPED
+        log_success("All supervised processes stopped.")
+
+    #-----------------------------------
+    # Metrics
+    #-----------------------------------
+    def render_metrics(self):
+        """Every running child's /metrics, labelled with its name, plus the supervisor gauges."""
+        for child in self.children:
+            supervisor_up.set(1 if child.state == STATE_RUNNING else 0, process=child.spec.name)
+            supervisor_restarts.set(child.restarts, process=child.spec.name)
+            supervisor_recycles.set(child.recycles, process=child.spec.name)
+            supervisor_heartbeat_age.set(child.heartbeat_age() if child.state == STATE_RUNNING else None,
+                                         process=child.spec.name)
+        running = [child for child in self.children if child.state == STATE_RUNNING and child.metrics_port]
+        with ThreadPoolExecutor(max_workers=max(1, min(16, len(running)))) as pool:
+            texts = list(pool.map(lambda child: metrics.scrape(child.metrics_port), running))
+        expositions = [(None, metrics.render())]
+        expositions += [(child.spec.name, text) for child, text in zip(running, texts) if text]
+        return metrics.merge_expositions(expositions)
+
+    #-----------------------------------
+    # Status
+    #-----------------------------------
+    def status_rows(self):
+        rows = []
+        for child in self.children:
+            rows.append({
+                'name': child.spec.name,
+                'script': child.spec.script,
+                'role': child.spec.role,
+                'pid': child.pid,
+                'state': child.state,
+                'uptime': child.uptime(),
+                'restarts': child.restarts,
+                'last_exit': child.last_exit,
+                'heartbeat_age': child.heartbeat_age() if child.state == STATE_RUNNING else None,
+                'cores': child.spec.cores,
+                'priority': child.priority,
+            })
+        return rows
+
+    def status_table(self):
+        table = Table(title=f"Supervisor ({datetime.now():%H:%M:%S})", box=box.ROUNDED)
+        for column in ("Name", "Script", "Role", "PID", "State", "Uptime", "Restarts", "Heartbeat", "Cores",
+                       "Priority", "Last Exit"):
+            table.add_column(column)
+        for row in self.status_rows():
+            color = {'running': 'green', 'waiting': 'yellow'}.get(row['state'], 'red')
+            age = row['heartbeat_age']
+            table.add_row(
+                row['name'], row['script'], row['role'], str(row['pid'] or '-'),
+                f"[{color}]{row['state']}[/{color}]",
+                f"{row['uptime'] / 60:.1f} m",
+                str(row['restarts']),
+                '-' if age is None else f"{age:.0f} s",
+                ",".join(map(str, row['cores'] or [])),
+                '-' if row['priority'] is None else str(row['priority']),
+                row['last_exit'] or '',
+            )
+        return table
+
+
+#-----------------------------------
+# Simulated backend
+#-----------------------------------
+def simulated_child(cycle_seconds=1.0, crash_rate=0.01, hang_rate=0.005):
+    """
+    Stand-in for a strategy loop: beats every cycle and, at random, exits
+    with an error or stops beating (hangs). Rates come from the environment
+    (SIMULATED_CRASH_RATE / SIMULATED_HANG_RATE) when set.
+    """
+    name = sys.argv[1] if len(sys.argv) > 1 else 'simulated'
+    crash_rate = float(os.environ.get('SIMULATED_CRASH_RATE', crash_rate))
+    hang_rate = float(os.environ.get('SIMULATED_HANG_RATE', hang_rate))
+    rng = random.Random(f"{name}-{os.getpid()}")
+    print(f"{name}: simulated loop started (pid {os.getpid()}).")
+    cycle = 0
+    while True:
+        beat()
+        metrics.cycle_started()
+        metrics.mt5_calls.inc(function='copy_rates_from_pos')
+        cycle += 1
+        draw = rng.random()
+        if draw < crash_rate:
+            print(f"{name}: simulated crash at cycle {cycle}.")
+            sys.exit(1)
+        if draw < crash_rate + hang_rate:
+            print(f"{name}: simulated hang at cycle {cycle}.")
+            while True:
+                time.sleep(3600)
+        metrics.cycle_finished()
+        time.sleep(cycle_seconds)
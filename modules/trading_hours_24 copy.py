@@ -4,12 +4,19 @@ from datetime import timedelta, datetime
 from rich.console import Console
 from rich.panel import Panel
 from rich import box
+from modules.session_calendar import SessionCalendar, SCHEDULE_ALWAYS
 
 console = Console()
 
+session = SessionCalendar(SCHEDULE_ALWAYS, "Trading Hours")
+
 def is_trading_hours():
-    # This runs 24/7
-    return True  
+    """True inside the SCHEDULE_ALWAYS sessions (modules/session_calendar.py)."""
+    return session.is_open()
+
+def sleep_until_trading_hours(max_seconds=None):
+    """Sleeps until the next session opens (at most max_seconds)."""
+    return session.sleep_until_open(max_seconds)
 
 
 if is_trading_hours():
@@ -4,24 +4,19 @@ from datetime import timedelta, datetime
 from rich.console import Console
 from rich.panel import Panel
 from rich import box
+from modules.session_calendar import SessionCalendar, SCHEDULE_24
 
 console = Console()
 
+session = SessionCalendar(SCHEDULE_24, "Trading Hours")
+
 def is_trading_hours():
-    now = datetime.now()
-    current_day = now.strftime("%a")
-    current_hour = now.hour
-    current_minute = now.minute
+    """True inside the SCHEDULE_24 sessions (modules/session_calendar.py)."""
+    return session.is_open()
 
-    if current_day == "Sat":
-    # Saturday exception: runs only until 5:30 AM
-        if current_hour < 4 or (current_hour == 4 and current_minute <= 30):
-            return True
-        else:
-            return False
-    # This runs 24/7
-    else:
-        return True  
+def sleep_until_trading_hours(max_seconds=None):
+    """Sleeps until the next session opens (at most max_seconds)."""
+    return session.sleep_until_open(max_seconds)
 
 
 if is_trading_hours():
@@ -1,36 +1,19 @@
 import time
 from datetime import timedelta, datetime
 from rich.console import Console
+from modules.session_calendar import SessionCalendar, SCHEDULE_TEST
 
 console = Console()
 
+session = SessionCalendar(SCHEDULE_TEST, "Trading Hours")
+
 def is_trading_hours():
-    now = datetime.now()
-    current_day = now.strftime("%a")
-    current_hour = now.hour
-    current_minute = now.minute
+    """True inside the SCHEDULE_TEST sessions (modules/session_calendar.py)."""
+    return session.is_open()
 
-    # Trading Hours:
-    # Mon: 02:00 - 18:00
-    # Tue: 02:00 - 18:00
-    # Wed: 02:00 - 18:00
-    # Thu: 02:00 - 18:00
-    # Fri: 02:00 - 18:00
-    
-    # Check for weekdays (Mon-Fri)
-    if current_day in ["Mon", "Tue", "Wed", "Thu", "Fri"]:
-        # The market is open from 2:00 AM to 6:00 PM
-        if (current_hour > 2 or (current_hour == 2 and current_minute >= 0)) and \
-           (current_hour < 18 or (current_hour == 18 and current_minute <= 0)):
-            return True
-        else:
-            return False
-    # Check for weekends (Sat, Sun)
-    elif current_day in ["Sat", "Sun"]:
-        return False
-    else:
-        # For any other case (shouldn't happen with standard day names)
-        return False
+def sleep_until_trading_hours(max_seconds=None):
+    """Sleeps until the next session opens (at most max_seconds)."""
+    return session.sleep_until_open(max_seconds)
 
 # console.log(datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
 # console.log(datetime.now().strftime("%a"))
@@ -0,0 +1,264 @@
+# modules/trailing_engine.py
+#---------------------------------------
+# Throttled, coalesced trailing-stop modifications
+#---------------------------------------
+# The trailing threads re-evaluate the EMA-based stop every 10 s and used to
+# send a TRADE_ACTION_SLTP whenever it was better by any amount. They now
+# submit() the new stop here instead:
+#
+#   - minimum step: a stop that is less than min_step_points better than the
+#     last one sent (or the broker's, for a fresh position) is not sent
+#   - coalescing: one pending modification per ticket; a newer stop replaces
+#     the queued one only when it is tighter by the minimum step, so the queued
+#     stop only ever moves in the position's favour
+#   - rate limit: a token bucket for the account's trade requests; every
+#     order_send of the process takes a token, SL tweaks wait for one
+#   - priority: prioritize_order_send(mt5) puts a gate in front of
+#     mt5.order_send; entries and closes waiting at the gate always go before
+#     SL / TP modifications
+#
+# The requests are sent from one worker thread, so the trailing threads never
+# block on the broker. Saved requests are counted on /metrics as
+# trailing_sl_requests_saved{reason="min_step"|"coalesced"}.
+#
+# The MetaTrader5 package drives one terminal (one account) per process, so
+# the gate and the bucket are process-wide.
+
+import MetaTrader5 as mt5
+import os
+import time
+import heapq
+import itertools
+import threading
+
+#-----------------------------------
+# Utilities and Global Variables
+#-----------------------------------
+from modules.utilities import log_success, log_error, log_warning, log_info
+from modules import metrics
+
+MIN_STEP_ENV = 'MT5_TRAILING_MIN_STEP_POINTS'
+RATE_LIMIT_ENV = 'MT5_TRADE_REQUESTS_PER_MINUTE'
+DEFAULT_MIN_STEP_POINTS = 20        # 0.20 on GOLD#; trailing distances are 50-300 points
+DEFAULT_REQUESTS_PER_MINUTE = 20
+DEFAULT_BURST = 5
+MAX_REMEMBERED_TICKETS = 512
+
+PRIORITY_TRADE = 0  # entries, closes and anything else that is not an SL/TP tweak
+PRIORITY_SLTP = 1
+
+
+#-----------------------------------
+# order_send gate
+#-----------------------------------
+class OrderGate:
+    """
+    One order_send at a time; when it is released, the waiting request with
+    the lowest priority value goes next (FIFO within a priority).
+    """
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.busy = False
+        self.waiting = []
+        self.sequence = itertools.count()
+
+    def acquire(self, priority):
+        entry = (priority, next(self.sequence))
+        with self.condition:
+            heapq.heappush(self.waiting, entry)
+            while self.busy or self.waiting[0] != entry:
+                self.condition.wait()
+            heapq.heappop(self.waiting)
+            self.busy = True
+
+    def release(self):
+        with self.condition:
+            self.busy = False
+            self.condition.notify_all()
+
+
+class RateLimiter:
+    """
+    Token bucket for the account's trade requests. consume() always succeeds
+    (entries and closes are never held back) but can drive the bucket below
+    zero, so SL tweaks wait longer after a burst of trades.
+    """
+    def __init__(self, per_minute=DEFAULT_REQUESTS_PER_MINUTE, burst=DEFAULT_BURST):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def consume(self):
+        with self.lock:
+            self._refill()
+            self.tokens -= 1
+
+    def wait_time(self):
+        """Seconds until a token is available, 0 if one is available now."""
+        with self.lock:
+            self._refill()
+            return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+_gate = OrderGate()
+_limiter = RateLimiter(float(os.environ.get(RATE_LIMIT_ENV, DEFAULT_REQUESTS_PER_MINUTE)))
+
+
+def prioritize_order_send(mt5_module):
+    """Puts the priority gate and the rate limiter in front of mt5.order_send (idempotent)."""
+    function = mt5_module.order_send
+    if getattr(function, 'priority_gated', False):
+        return mt5_module
+
+    def order_send(*args, **kwargs):
+        request = args[0] if args else kwargs.get('request', {})
+        priority = PRIORITY_SLTP if request.get('action') == mt5_module.TRADE_ACTION_SLTP else PRIORITY_TRADE
+        _gate.acquire(priority)
+        try:
+            _limiter.consume()
+            return function(*args, **kwargs)
+        finally:
+            _gate.release()
+
+    order_send.priority_gated = True
+    mt5_module.order_send = order_send
+    return mt5_module
+
+
+#-----------------------------------
+# Trailing engine
+#-----------------------------------
+class SlModification:
+    __slots__ = ('ticket', 'symbol', 'is_buy', 'sl', 'tp', 'magic', 'comment', 'queued_at', 'on_result')
+
+    def __init__(self, position, sl, magic, comment, on_result):
+        self.ticket = position.ticket
+        self.symbol = position.symbol
+        self.is_buy = position.type == mt5.ORDER_TYPE_BUY
+        self.sl = sl
+        self.tp = position.tp
+        self.magic = magic
+        self.comment = comment
+        self.queued_at = time.monotonic()
+        self.on_result = on_result
+
+    def request(self):
+        return {
+            "action": mt5.TRADE_ACTION_SLTP,
+            "position": self.ticket,
+            "sl": self.sl,
+            "tp": self.tp,
+            "magic": self.magic,
+            "comment": self.comment
+        }
+
+
+class TrailingEngine(threading.Thread):
+    """
+    Queues trailing-stop modifications and sends them from one worker thread.
+    """
+    def __init__(self, min_step_points=None, limiter=None):
+        super().__init__(name="TrailingEngine", daemon=True)
+        self.min_step_points = min_step_points if min_step_points is not None else float(
+            os.environ.get(MIN_STEP_ENV, DEFAULT_MIN_STEP_POINTS))
+        self.limiter = limiter or _limiter
+        self.condition = threading.Condition()
+        self.pending = {}   # ticket -> SlModification, in submission order
+        self.last_sent = {} # ticket -> last stop the broker accepted
+
+    def submit(self, position, new_sl, point, magic, comment="Trailing SL", on_result=None):
+        """
+        Queues new_sl for the position unless it is within the minimum step.
+
+        Args:
+            position: The MT5 position (ticket, symbol, type, sl, tp).
+            new_sl (float): The improved stop loss.
+            point (float): Symbol point, for the minimum step.
+            magic (int): Strategy id sent with the request.
+            on_result (callable): on_result(modification, result), called in the worker thread.
+
+        Returns:
+            bool: True if queued (or merged into a queued modification), False if skipped.
+        """
+        is_buy = position.type == mt5.ORDER_TYPE_BUY
+        with self.condition:
+            queued = self.pending.get(position.ticket)
+            # The tightest stop already on its way (queued) or at the broker is the reference
+            reference = queued.sl if queued is not None else self.last_sent.get(position.ticket, position.sl)
+            if reference:
+                step = (new_sl - reference) if is_buy else (reference - new_sl)
+                if step <= 0 or step < self.min_step_points * point:
+                    metrics.trailing_requests_saved.inc(reason='min_step')
+                    return queued is not None  # a tighter stop is still queued
+
+            if queued is not None:
+                queued.sl = new_sl  # tighter than the queued stop (checked above); keeps its place in the queue
+                queued.on_result = on_result
+                metrics.trailing_requests_saved.inc(reason='coalesced')
+                return True
+
+            self.pending[position.ticket] = SlModification(position, new_sl, magic, comment, on_result)
+            metrics.trailing_pending.set(len(self.pending))
+            self.condition.notify()
+        if not self.is_alive():
+            self._start_once()
+        return True
+
+    def _start_once(self):
+        with self.condition:
+            if not self.is_alive() and self.ident is None:
+                self.start()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+            delay = self.limiter.wait_time()
+            if delay > 0:
+                time.sleep(delay)  # newer stops for the same tickets coalesce meanwhile
+                continue
+            with self.condition:
+                ticket = next(iter(self.pending))
+                modification = self.pending.pop(ticket)
+                metrics.trailing_pending.set(len(self.pending))
+            self.send(modification)
+
+    def send(self, modification):
+        metrics.trailing_queue_seconds.observe(time.monotonic() - modification.queued_at)
+        try:
+            result = mt5.order_send(modification.request())
+        except Exception as e:
+            log_error(f"Trailing SL request for position {modification.ticket} failed: {e}")
+            result = None
+
+        if result is not None and result.retcode == mt5.TRADE_RETCODE_DONE:
+            with self.condition:
+                self.last_sent[modification.ticket] = modification.sl
+                if len(self.last_sent) > MAX_REMEMBERED_TICKETS:
+                    self.last_sent.pop(next(iter(self.last_sent)))
+        if modification.on_result:
+            try:
+                modification.on_result(modification, result)
+            except Exception as e:
+                log_error(f"Trailing SL result handler failed for position {modification.ticket}: {e}")
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def trailing_engine():
+    """The process-wide engine; its worker starts with the first submission."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = TrailingEngine()
+        return _engine
@@ -0,0 +1,279 @@
+# modules/virtual_exits.py
+#---------------------------------------
+# Client-side virtual SL / TP / trailing exits
+#---------------------------------------
+# The "infinite TP" strategies (*_tinf, *TinfTS21) exit on the trailing stop
+# alone, and that stop only reaches the broker every 10 s through
+# PositionManager (and, since the trailing engine, only in minimum steps).
+# The VirtualExitEngine keeps the exit levels of every open position in
+# memory and checks them on each new tick:
+#
+#   - sl: the broker stop at open, then trailed on every tick with the
+#     PositionManager rule: once the profit reaches trailing_activation_points
+#     the stop follows EMA(trailing_period) -/+ trailing_stop_distance, the EMA
+#     taking the tick's bid as the forming close (like IntrabarFillModel). The
+#     closed-bar EMA state comes from a small BarFeed on the strategy's
+#     timeframe, refreshed only when a tick falls past the forming bar
+#   - tp: optional hidden take profit (entry +/- tp_points), never sent
+#
+# The PositionManager keeps pushing its (10 s, minimum-step) trailing stop to
+# the broker; that is only the backstop now, the virtual stop leads it.
+#
+# When a level is crossed the close request, built when the position was
+# first seen, gets the tick's price and is sent at once; no extra
+# symbol_info / symbol_info_tick calls on the way. The broker-side SL stays
+# on the position as the catastrophic backstop (terminal or process down).
+#
+# The MetaTrader5 package has no tick callback: the engine polls
+# symbol_info_tick every TICK_POLL_SECONDS and evaluates a tick once, when
+# its time_msc changes. Checking the levels is a few float comparisons.
+#
+# A close the broker rejects because the position is already gone (its SL
+# fired first, or a manual close) drops the levels instead of retrying.
+
+import MetaTrader5 as mt5
+import math
+import time
+import threading
+
+#-----------------------------------
+# Utilities and Global Variables
+#-----------------------------------
+from modules.utilities import log_success, log_error, log_warning, log_info
+from modules import metrics
+from modules.bar_feed import BarFeed
+from modules.incremental_indicators import IncrementalEMA
+
+TICK_POLL_SECONDS = 0.05        # terminal round trip is ~0.1-1 ms; ticks on GOLD# come every 100+ ms
+POSITION_REFRESH_SECONDS = 1    # new / closed positions are picked up this often
+IDLE_WAIT_SECONDS = 5           # no position: wait for the position_open_event this long at most
+MAX_CLOSE_ATTEMPTS = 3          # then leave it to the broker-side SL
+TRAIL_BARS = 1000               # bars behind the trailing EMA, as PositionManager fetches
+RETCODE_POSITION_CLOSED = 10036 # mt5.TRADE_RETCODE_POSITION_CLOSED
+
+TIMEFRAME_SECONDS = {
+    mt5.TIMEFRAME_M1: 60,
+    mt5.TIMEFRAME_M2: 120,
+    mt5.TIMEFRAME_M5: 300,
+    mt5.TIMEFRAME_M15: 900,
+}
+
+EXIT_SL = 'sl'
+EXIT_TRAIL = 'trail'
+EXIT_TP = 'tp'
+
+
+class VirtualLevels:
+    """
+    Hidden exit levels of one position and its prepared close request.
+    """
+    __slots__ = ('ticket', 'is_buy', 'price_open', 'sl', 'tp', 'trailed', 'request', 'attempts')
+
+    def __init__(self, position, sl, tp, deviation, magic):
+        self.ticket = position.ticket
+        self.is_buy = position.type == mt5.ORDER_TYPE_BUY
+        self.price_open = position.price_open
+        self.sl = sl
+        self.tp = tp
+        self.trailed = False
+        self.attempts = 0
+        self.request = {
+            "action": mt5.TRADE_ACTION_DEAL,
+            "position": position.ticket,
+            "symbol": position.symbol,
+            "volume": position.volume,
+            "type": mt5.ORDER_TYPE_SELL if self.is_buy else mt5.ORDER_TYPE_BUY,
+            "price": 0.0,
+            "deviation": deviation,
+            "magic": magic,
+            "comment": "Virtual exit",
+            "type_time": mt5.ORDER_TIME_GTC,
+            "type_filling": mt5.ORDER_FILLING_IOC,
+        }
+
+    def trail(self, bid, ask, ema_now, activation, distance):
+        """
+        Tightens the stop to this tick's trailing level once the profit reaches
+        the activation (measured like PositionManager: ask for a buy, bid for a sell).
+        """
+        profit = (ask - self.price_open) if self.is_buy else (self.price_open - bid)
+        if profit < activation or math.isnan(ema_now):
+            return
+        candidate = ema_now - distance if self.is_buy else ema_now + distance
+        if self.sl is None or (candidate > self.sl if self.is_buy else candidate < self.sl):
+            self.sl = candidate
+            self.trailed = True
+
+    def hit(self, bid, ask):
+        """Returns (reason, close price) if a level is crossed on this tick, else None."""
+        if self.is_buy:
+            if self.sl and bid <= self.sl:
+                return EXIT_TRAIL if self.trailed else EXIT_SL, bid
+            if self.tp and bid >= self.tp:
+                return EXIT_TP, bid
+        else:
+            if self.sl and ask >= self.sl:
+                return EXIT_TRAIL if self.trailed else EXIT_SL, ask
+            if self.tp and ask <= self.tp:
+                return EXIT_TP, ask
+        return None
+
+
+class VirtualExitEngine(threading.Thread):
+    """
+    Tick-level exits for the strategy's positions, run as a daemon thread.
+    """
+    def __init__(self, config, position_open_event, position_book=None, take_profit=False, timeframe=mt5.TIMEFRAME_M1):
+        """
+        Args:
+            config (TradingConfig): Symbol, magic number, deviation, tp_points and the trailing parameters.
+            position_open_event (threading.Event): Set by the strategy when it opens a position.
+            position_book (PositionBook): Optional shared position cache used instead of positions_get.
+            take_profit (bool): Hold a hidden TP at tp_points; False for the infinite-TP variants.
+            timeframe (int): Bars of the trailing EMA, the strategy's PositionManager timeframe.
+        """
+        super().__init__(name="VirtualExitEngine", daemon=True)
+        self.config = config
+        self.position_open_event = position_open_event
+        self.position_book = position_book
+        self.take_profit = take_profit
+        self.levels = {}    # ticket -> VirtualLevels
+        self.bar_feed = BarFeed(config.symbol, timeframe, TRAIL_BARS)
+        self.bar_seconds = TIMEFRAME_SECONDS[timeframe]
+        self.forming_end = None  # server time at which the feed's forming bar closes
+        self.lock = threading.Lock()
+        self.point = None
+        self.last_tick_msc = None
+        self.refreshed = 0.0
+        self.is_running = True
+
+    #-----------------------------------
+    # Levels
+    #-----------------------------------
+    def refresh(self):
+        """Tracks new positions of the strategy and forgets closed ones."""
+        if self.position_book:
+            positions = self.position_book.get(self.config.strategy_id)
+        else:
+            positions = mt5.positions_get(symbol=self.config.symbol)
+        if positions is None:
+            return  # terminal hiccup: keep the levels we have
+        positions = {p.ticket: p for p in positions if p.magic == self.config.strategy_id}
+        self.refreshed = time.monotonic()
+
+        with self.lock:
+            for ticket in [t for t in self.levels if t not in positions]:
+                del self.levels[ticket]
+            for ticket, position in positions.items():
+                if ticket not in self.levels:
+                    self.levels[ticket] = self.track(position)
+
+    def track(self, position):
+        tp = None
+        if self.take_profit:
+            direction = 1 if position.type == mt5.ORDER_TYPE_BUY else -1
+            tp = position.price_open + direction * self.config.tp_points * self.point
+        log_info(f"Virtual exits for position {position.ticket}: SL {position.sl} | TP {tp if tp else 'none'}")
+        return VirtualLevels(position, position.sl or None, tp, self.config.deviation, self.config.strategy_id)
+
+    def trailing_ema(self, tick):
+        """
+        EMA(trailing_period) of closes with the tick's bid as the forming close;
+        NaN while the bars are unavailable. The bars are only fetched again once
+        the tick is past the forming bar.
+        """
+        if self.forming_end is None or tick.time >= self.forming_end:
+            if self.bar_feed.update() is None:
+                return math.nan
+            self.forming_end = int(self.bar_feed.bars['time'][-1]) + self.bar_seconds
+        period = self.config.trailing_period  # a reloaded period gets its own EMA, seeded from the window
+        ema = self.bar_feed.register(('ema', period, 'close'), IncrementalEMA(period, 'close'))
+        return ema.peek({'close': tick.bid})
+
+    #-----------------------------------
+    # Tick loop
+    #-----------------------------------
+    def run(self):
+        log_info("Virtual Exit Engine thread started.")
+        while self.is_running:
+            try:
+                if self.point is None:
+                    symbol_info = mt5.symbol_info(self.config.symbol)
+                    if symbol_info is None:
+                        time.sleep(IDLE_WAIT_SECONDS)
+                        continue
+                    self.point = symbol_info.point
+
+                if time.monotonic() - self.refreshed >= POSITION_REFRESH_SECONDS:
+                    self.refresh()
+                if not self.levels:
+                    self.position_open_event.wait(IDLE_WAIT_SECONDS)  # may already be set; the sleep below still paces the loop
+                else:
+                    tick = mt5.symbol_info_tick(self.config.symbol)
+                    if tick is not None and tick.time_msc != self.last_tick_msc:
+                        self.last_tick_msc = tick.time_msc
+                        self.on_tick(tick)
+            except Exception as e:
+                log_error(f"Virtual exit check failed: {e}")
+            time.sleep(TICK_POLL_SECONDS)
+
+    def on_tick(self, tick):
+        seen = time.perf_counter()
+        metrics.virtual_exit_ticks.inc()
+        ema_now = self.trailing_ema(tick)
+        activation = self.config.trailing_activation_points * self.point
+        distance = self.config.trailing_stop_distance * self.point
+        with self.lock:
+            triggered = []
+            for levels in self.levels.values():
+                levels.trail(tick.bid, tick.ask, ema_now, activation, distance)
+                hit = levels.hit(tick.bid, tick.ask)
+                if hit:
+                    triggered.append((levels, hit))
+        for levels, (reason, price) in triggered:
+            self.close(levels, reason, price, seen)
+
+    def close(self, levels, reason, price, seen):
+        request = levels.request
+        request["price"] = price
+        request["comment"] = f"Virtual {reason.upper()}"
+        levels.attempts += 1
+        result = mt5.order_send(request)
+        done = result is not None and result.retcode == mt5.TRADE_RETCODE_DONE
+        gone = not done and self.already_closed(levels.ticket, result)
+        metrics.virtual_exit_closes.inc(reason=reason, result='done' if done else 'already_closed' if gone else 'failed')
+        if self.position_book:
+            self.position_book.apply_close(levels.ticket, result)
+
+        if gone:
+            log_info(f"Position {levels.ticket} is already closed at the broker; dropping its virtual exits.")
+            with self.lock:
+                self.levels.pop(levels.ticket, None)
+        elif done:
+            metrics.virtual_exit_reaction_seconds.observe(time.perf_counter() - seen)
+            log_success(f"Virtual {reason.upper()} closed position {levels.ticket} at {result.price} "
+                        f"(level {levels.tp if reason == EXIT_TP else levels.sl}).")
+            with self.lock:
+                self.levels.pop(levels.ticket, None)
+        elif levels.attempts >= MAX_CLOSE_ATTEMPTS:
+            log_warning(f"Virtual {reason.upper()} for position {levels.ticket} failed {levels.attempts} times "
+                        f"(retcode {result.retcode if result else mt5.last_error()}); leaving it to the broker SL.")
+            with self.lock:
+                levels.sl, levels.tp = None, None
+        else:
+            log_error(f"Virtual {reason.upper()} close for position {levels.ticket} failed, "
+                      f"retcode {result.retcode if result else mt5.last_error()}; retrying on the next tick.")
+
+    def already_closed(self, ticket, result):
+        """True when the broker no longer has the position (None from positions_get is a terminal error, not 'gone')."""
+        if result is not None and result.retcode == RETCODE_POSITION_CLOSED:
+            return True
+        return mt5.positions_get(ticket=ticket) == ()
+
+    def stop(self):
+        """
+        Stops the virtual exit thread gracefully.
+        """
+        log_info("Stopping Virtual Exit Engine thread.")
+        self.is_running = False
+        self.position_open_event.set() # Wake up the thread if it's waiting
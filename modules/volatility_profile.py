@@ -0,0 +1,301 @@
+# modules/volatility_profile.py
+#---------------------------------------
+# Candle-range profile per timeframe, weekday and hour
+#---------------------------------------
+# Thresholds such as max_candle_range_1h_allowed or "TP=1800 which is the
+# average volatility of 4H candles" are derived from average candle ranges.
+# This module measures them from stored M1 history instead:
+#
+#   - M1 bars are aggregated to M1, M5, M15, M30, H1 and H4 candles and their
+#     ranges (high - low, in points) are binned into histograms per
+#     (timeframe, weekday, hour) in one vectorized pass
+#   - the histograms are additive, so the daily refresh only folds in the
+#     complete days added since the last build
+#   - every build publishes a new version of the lookup table (count, mean,
+#     p50/p75/p90/p95, max) also aggregated per hour, per weekday and overall
+#   - VolatilityProfile loads the latest version into a dict for O(1) reads
+#
+# weekday / hour are broker server time (bar times); -1 means "all".
+
+import os
+import sqlite3
+import time
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from urllib.request import pathname2url
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+#-----------------------------------
+# Utilities and Global Variables
+#-----------------------------------
+from modules.utilities import log_success, log_error, log_warning, log_info
+
+console = Console()
+
+DB_NAME = 'market_data.db'
+
+# Timeframe -> (seconds, histogram bin width in points)
+TIMEFRAMES = {
+    'M1': (60, 5),
+    'M5': (300, 10),
+    'M15': (900, 20),
+    'M30': (1800, 25),
+    'H1': (3600, 50),
+    'H4': (14400, 100),
+}
+HISTOGRAM_BINS = 400      # the last bin also holds everything above it
+PERCENTILES = (50, 75, 90, 95)
+ALL = -1
+DAY_SECONDS = 86400
+
+
+def candle_ranges(times, high, low, timeframe_seconds):
+    """
+    Aggregates M1 bars into candles of `timeframe_seconds` and returns their
+    open times and high - low ranges. Buckets are aligned on epoch time like
+    MT5 candles (H4 divides a day, so every candle sits inside one day).
+    """
+    buckets = np.asarray(times, dtype=np.int64) // timeframe_seconds * timeframe_seconds
+    frame = pd.DataFrame({'bucket': buckets, 'high': high, 'low': low})
+    grouped = frame.groupby('bucket', sort=True).agg(high=('high', 'max'), low=('low', 'min'))
+    return grouped.index.values, (grouped['high'] - grouped['low']).values
+
+
+class VolatilityProfileBuilder:
+    """
+    Maintains the range histograms and publishes versioned profile tables.
+    """
+    def __init__(self, symbol, point, db_name=DB_NAME):
+        self.symbol = symbol
+        self.point = point
+        self.conn = sqlite3.connect(db_name)
+        self.create_tables()
+
+    def create_tables(self):
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS volatility_histogram (
+                symbol TEXT NOT NULL,
+                timeframe TEXT NOT NULL,
+                weekday INTEGER NOT NULL,
+                hour INTEGER NOT NULL,
+                bin INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                total_points REAL NOT NULL,
+                max_points REAL NOT NULL,
+                PRIMARY KEY (symbol, timeframe, weekday, hour, bin)
+            );
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS volatility_version (
+                version INTEGER PRIMARY KEY AUTOINCREMENT,
+                symbol TEXT NOT NULL,
+                built_at TEXT,
+                first_day INTEGER,
+                last_day INTEGER,
+                candles INTEGER
+            );
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS volatility_profile (
+                version INTEGER NOT NULL,
+                symbol TEXT NOT NULL,
+                timeframe TEXT NOT NULL,
+                weekday INTEGER NOT NULL,
+                hour INTEGER NOT NULL,
+                count INTEGER,
+                mean REAL,
+                p50 REAL,
+                p75 REAL,
+                p90 REAL,
+                p95 REAL,
+                max REAL,
+                PRIMARY KEY (version, symbol, timeframe, weekday, hour)
+            );
+        """)
+        self.conn.commit()
+
+    def last_day(self):
+        """Start (epoch seconds) of the last day already folded into the histograms."""
+        row = self.conn.execute("SELECT MAX(last_day) FROM volatility_version WHERE symbol = ?", (self.symbol,)).fetchone()
+        return row[0]
+
+    def _fold(self, times, high, low):
+        """Adds the candles of complete days to the stored histograms."""
+        candles = 0
+        cursor = self.conn.cursor()
+        for timeframe, (seconds, bin_width) in TIMEFRAMES.items():
+            opens, ranges = candle_ranges(times, high, low, seconds)
+            points = ranges / self.point
+            bins = np.minimum((points // bin_width).astype(np.int64), HISTOGRAM_BINS - 1)
+            weekdays = ((opens // DAY_SECONDS) + 3) % 7  # 1970-01-01 was a Thursday; Monday = 0
+            hours = (opens % DAY_SECONDS) // 3600
+            candles += len(opens)
+
+            frame = pd.DataFrame({'weekday': weekdays, 'hour': hours, 'bin': bins, 'points': points})
+            grouped = frame.groupby(['weekday', 'hour', 'bin']).agg(count=('points', 'size'), total=('points', 'sum'), max=('points', 'max')).reset_index()
+            cursor.executemany("""
+                INSERT INTO volatility_histogram (symbol, timeframe, weekday, hour, bin, count, total_points, max_points)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (symbol, timeframe, weekday, hour, bin) DO UPDATE SET
+                    count = count + excluded.count,
+                    total_points = total_points + excluded.total_points,
+                    max_points = MAX(max_points, excluded.max_points)
+            """, [(self.symbol, timeframe, int(w), int(h), int(b), int(n), float(total), float(peak))
+                  for w, h, b, n, total, peak in zip(grouped['weekday'], grouped['hour'], grouped['bin'],
+                                                     grouped['count'], grouped['total'], grouped['max'])])
+        return candles
+
+    def _publish(self, first_day, last_day, candles):
+        """Writes a new profile version computed from the histograms."""
+        cursor = self.conn.cursor()
+        cursor.execute("INSERT INTO volatility_version (symbol, built_at, first_day, last_day, candles) VALUES (?, ?, ?, ?, ?)",
+                       (self.symbol, datetime.now().isoformat(), first_day, last_day, candles))
+        version = cursor.lastrowid
+
+        histogram = pd.read_sql_query(
+            "SELECT timeframe, weekday, hour, bin, count, total_points, max_points FROM volatility_histogram WHERE symbol = ?",
+            self.conn, params=(self.symbol,))
+        rows = []
+        for timeframe, tf_rows in histogram.groupby('timeframe'):
+            # Dense (weekday, hour, bin) arrays; -1 rows/columns below are the "all" aggregates
+            weekday, hour, bins = (tf_rows[column].values for column in ('weekday', 'hour', 'bin'))
+            counts = np.zeros((7, 24, HISTOGRAM_BINS), dtype=np.int64)
+            totals = np.zeros((7, 24))
+            peaks = np.zeros((7, 24))
+            np.add.at(counts, (weekday, hour, bins), tf_rows['count'].values)
+            np.add.at(totals, (weekday, hour), tf_rows['total_points'].values)
+            np.maximum.at(peaks, (weekday, hour), tf_rows['max_points'].values)
+
+            groups = [
+                (ALL, ALL, counts.sum(axis=(0, 1)), totals.sum(), peaks.max()),
+            ]
+            groups += [(ALL, h, counts[:, h].sum(axis=0), totals[:, h].sum(), peaks[:, h].max()) for h in range(24)]
+            groups += [(w, ALL, counts[w].sum(axis=0), totals[w].sum(), peaks[w].max()) for w in range(7)]
+            groups += [(w, h, counts[w, h], totals[w, h], peaks[w, h]) for w in range(7) for h in range(24)]
+
+            bin_width = TIMEFRAMES[timeframe][1]
+            for w, h, group_counts, total, peak in groups:
+                count = int(group_counts.sum())
+                if count == 0:
+                    continue
+                cumulative = np.cumsum(group_counts)
+                # Percentiles at the upper edge of the bin they fall in (bin-width resolution)
+                percentiles = tuple(float((np.searchsorted(cumulative, count * p / 100) + 1) * bin_width) for p in PERCENTILES)
+                rows.append((version, self.symbol, timeframe, w, h, count, round(float(total) / count, 1)) + percentiles + (float(peak),))
+
+        cursor.executemany("INSERT INTO volatility_profile VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        self.conn.commit()
+        return version
+
+    def refresh(self, times, high, low, now=None):
+        """
+        Folds in the complete days after the last build and publishes a new version.
+
+        Args:
+            times, high, low (array-like): M1 bars (epoch-second times), may include already folded days.
+            now (float): Current epoch time in server time; the current day is left out until complete.
+
+        Returns:
+            int: The new version, or None if there was no new complete day.
+        """
+        started = time.perf_counter()
+        times = np.asarray(times, dtype=np.int64)
+        high = np.asarray(high, dtype=float)
+        low = np.asarray(low, dtype=float)
+
+        today = int(times[-1] if now is None else now) // DAY_SECONDS * DAY_SECONDS
+        last_day = self.last_day()
+        start = 0 if last_day is None else last_day + DAY_SECONDS
+        mask = (times >= start) & (times < today)
+        if not mask.any():
+            log_info(f"Volatility profile for {self.symbol} is up to date.")
+            return None
+
+        first_day = int(times[mask][0]) // DAY_SECONDS * DAY_SECONDS
+        new_last_day = int(times[mask][-1]) // DAY_SECONDS * DAY_SECONDS
+        candles = self._fold(times[mask], high[mask], low[mask])
+        version = self._publish(first_day, new_last_day, candles)
+        log_success(f"Volatility profile v{version} for {self.symbol}: {candles} candles from {mask.sum()} M1 bars "
+                    f"in {(time.perf_counter() - started) * 1000:.0f} ms.")
+        return version
+
+    def close(self):
+        self.conn.close()
+
+
+class VolatilityProfile:
+    """
+    Read side: the latest published profile of a symbol held in memory.
+    """
+    def __init__(self, symbol, db_name=DB_NAME, version=None):
+        self.symbol = symbol
+        self.version = None
+        self.table = {}
+        self.load(db_name, version)
+
+    def load(self, db_name=DB_NAME, version=None):
+        if not os.path.exists(db_name):  # connect() would leave an empty database behind
+            log_warning(f"No volatility profile for {self.symbol}: {db_name} not found. Run build_volatility_profile.py first.")
+            return False
+        conn = sqlite3.connect(f"file:{pathname2url(os.path.abspath(db_name))}?mode=ro", uri=True)
+        try:
+            if version is None:
+                row = conn.execute("SELECT MAX(version) FROM volatility_profile WHERE symbol = ?", (self.symbol,)).fetchone()
+                version = row[0]
+            if version is None:
+                log_warning(f"No volatility profile for {self.symbol}. Run build_volatility_profile.py first.")
+                return False
+            rows = conn.execute(
+                "SELECT timeframe, weekday, hour, count, mean, p50, p75, p90, p95, max FROM volatility_profile "
+                "WHERE version = ? AND symbol = ?", (version, self.symbol)).fetchall()
+        except sqlite3.Error as e:
+            log_warning(f"No volatility profile for {self.symbol} ({e}). Run build_volatility_profile.py first.")
+            return False
+        finally:
+            conn.close()
+
+        columns = ['count', 'mean', 'p50', 'p75', 'p90', 'p95', 'max']
+        self.table = {(tf, weekday, hour): dict(zip(columns, values)) for tf, weekday, hour, *values in rows}
+        self.version = version
+        return True
+
+    def get(self, timeframe, stat='mean', weekday=ALL, hour=ALL, default=None):
+        """
+        O(1) lookup, falling back to the hour-only, weekday-only and overall rows.
+        """
+        for key in ((timeframe, weekday, hour), (timeframe, ALL, hour), (timeframe, weekday, ALL), (timeframe, ALL, ALL)):
+            row = self.table.get(key)
+            if row is not None:
+                return row[stat]
+        return default
+
+    def get_at(self, timeframe, stat='mean', timestamp=None, default=None):
+        """Lookup for the weekday/hour of a server-time epoch timestamp (e.g. the forming bar's time)."""
+        if timestamp is None:
+            return self.get(timeframe, stat, default=default)
+        timestamp = int(timestamp)
+        weekday = ((timestamp // DAY_SECONDS) + 3) % 7
+        hour = (timestamp % DAY_SECONDS) // 3600
+        return self.get(timeframe, stat, weekday=weekday, hour=hour, default=default)
+
+    def thresholds_at(self, timeframe, stat, timestamps, default=None):
+        """get_at() for an array of server-time epoch timestamps (one lookup per weekday / hour)."""
+        grid = np.array([[self.get(timeframe, stat, weekday, hour, default) for hour in range(24)] for weekday in range(7)],
+                        dtype=float)
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        return grid[((timestamps // DAY_SECONDS) + 3) % 7, (timestamps % DAY_SECONDS) // 3600]
+
+    def display(self):
+        table = Table(title=f"Volatility Profile {self.symbol} v{self.version} (points)", box=box.ROUNDED)
+        for column in ("Timeframe", "Candles", "Mean", "P50", "P75", "P90", "P95", "Max"):
+            table.add_column(column, justify="right" if column != "Timeframe" else "left")
+        for timeframe in TIMEFRAMES:
+            row = self.table.get((timeframe, ALL, ALL))
+            if row:
+                table.add_row(timeframe, str(row['count']), f"{row['mean']:.0f}", f"{row['p50']:.0f}", f"{row['p75']:.0f}",
+                              f"{row['p90']:.0f}", f"{row['p95']:.0f}", f"{row['max']:.0f}")
+        console.print(table)
@@ -0,0 +1,299 @@
+# modules/walk_forward.py
+#---------------------------------------
+# Walk-forward optimization over TradingConfig families
+#---------------------------------------
+# The history is cut into rolling windows: each fold optimizes a parameter
+# grid on its in-sample days and trades the winner, untouched, on the
+# following out-of-sample days. Stitching the out-of-sample trades of every
+# fold gives an equity curve made only of decisions that were taken before
+# the data they were tested on.
+#
+# Every EMA column any config of any family needs is computed once
+# (IndicatorCache), written to .npy files and memory-mapped read-only by the
+# worker processes, so the folds share one copy through the OS page cache
+# instead of recomputing or pickling it. Folds run in a spawn process pool
+# (MetaTrader5 and numba are not fork-friendly on Windows).
+#
+# With a cache_dir every (config, range) backtest goes through the
+# content-addressed BacktestCache, so re-running a grid that overlaps an
+# earlier sweep, or the same folds after new bars were appended, only
+# simulates the cells that were never computed.
+
+import os
+import json
+import shutil
+import tempfile
+import itertools
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+#-----------------------------------
+# Utilities and Global Variables
+#-----------------------------------
+from modules.utilities import log_success, log_error, log_warning, log_info
+from modules.backtest import IndicatorCache, run_backtest, average_zone_signals, config_variant
+from modules.backtest_cache import BacktestCache
+
+console = Console()
+
+DAY_SECONDS = 86400
+BAR_COLUMNS = ('time', 'open', 'high', 'low', 'close')
+OBJECTIVES = ('recovery_factor', 'net_points', 'profit_factor')
+
+
+#-----------------------------------
+# Folds and grids
+#-----------------------------------
+def walk_forward_windows(times, in_sample_days, out_sample_days, step_days=None):
+    """
+    Rolling (in-sample, out-of-sample) bar index ranges.
+
+    Args:
+        times (np.ndarray): Bar times in epoch seconds, ascending.
+        step_days (int): Shift between folds, out_sample_days by default so
+            the out-of-sample windows tile the history without overlap.
+
+    Returns:
+        list[dict]: fold, is_start, is_end, oos_start, oos_end (end exclusive).
+    """
+    step_days = step_days or out_sample_days
+    first_day = int(times[0]) // DAY_SECONDS * DAY_SECONDS
+    windows = []
+    fold_start = first_day
+    while True:
+        split = fold_start + in_sample_days * DAY_SECONDS
+        stop = split + out_sample_days * DAY_SECONDS
+        if split >= times[-1]:
+            break
+        is_start, is_end, oos_end = np.searchsorted(times, [fold_start, split, stop])
+        if is_end > is_start and oos_end > is_end:
+            windows.append({'fold': len(windows), 'is_start': int(is_start), 'is_end': int(is_end),
+                            'oos_start': int(is_end), 'oos_end': int(oos_end)})
+        if stop >= times[-1]:
+            break
+        fold_start += step_days * DAY_SECONDS
+    return windows
+
+
+def parameter_grid(grid):
+    """{'field': [values]} -> list of override dicts (cartesian product)."""
+    fields = list(grid)
+    return [dict(zip(fields, values)) for values in itertools.product(*(grid[field] for field in fields))]
+
+
+#-----------------------------------
+# Shared indicator cache
+#-----------------------------------
+def save_cache(cache, directory):
+    """Writes bars and EMA columns as .npy files plus an index."""
+    index = {'bars': list(BAR_COLUMNS), 'columns': []}
+    for column in BAR_COLUMNS:
+        np.save(os.path.join(directory, f"bar_{column}.npy"), np.ascontiguousarray(cache.bars[column]))
+    for n, ((period, price_type), values) in enumerate(cache.columns.items()):
+        np.save(os.path.join(directory, f"ema_{n}.npy"), values)
+        index['columns'].append([period, price_type, f"ema_{n}.npy"])
+    with open(os.path.join(directory, "index.json"), "w") as f:
+        json.dump(index, f)
+
+
+def load_cache(directory):
+    """Memory-maps a cache written by save_cache (read-only, shared between processes)."""
+    with open(os.path.join(directory, "index.json")) as f:
+        index = json.load(f)
+    bars = {column: np.load(os.path.join(directory, f"bar_{column}.npy"), mmap_mode='r') for column in index['bars']}
+    columns = {(period, price_type): np.load(os.path.join(directory, filename), mmap_mode='r')
+               for period, price_type, filename in index['columns']}
+    return IndicatorCache(bars, columns)
+
+
+_worker_cache = None
+_worker_backtests = None
+
+
+def _init_worker(directory, cache_dir=None):
+    global _worker_cache, _worker_backtests
+    _worker_cache = load_cache(directory)
+    if cache_dir:
+        _worker_backtests = BacktestCache(cache_dir)
+
+
+def score(result, objective, min_trades):
+    if result.trades < min_trades:
+        return -np.inf
+    return float(getattr(result, objective))
+
+
+def optimize_fold(cache, window, base_config, candidates, point, spread_points, objective, min_trades, use_tp=True, backtests=None):
+    """
+    Picks the best candidate on the in-sample range and runs it on the out-of-sample range.
+
+    Args:
+        use_tp (bool): Whether the family's live strategy has a TP (see run_backtest).
+        backtests (BacktestCache): Optional result cache; signals are then only
+            computed for the cells it misses.
+
+    Returns:
+        dict: fold window, chosen overrides, in-sample and out-of-sample summaries and OOS trades.
+    """
+    best = None
+    for overrides in candidates:
+        config = config_variant(base_config, **overrides)
+        if backtests is not None:
+            signals = None
+            result = backtests.run(cache, config, point, window['is_start'], window['is_end'], spread_points, use_tp=use_tp)
+        else:
+            signals = average_zone_signals(cache, config, point)
+            result = run_backtest(cache, config, point, window['is_start'], window['is_end'], spread_points, signals, use_tp=use_tp)
+        value = score(result, objective, min_trades)
+        if best is None or value > best[0]:
+            best = (value, overrides, config, signals, result)
+
+    _, overrides, config, signals, in_sample = best
+    if backtests is not None:
+        out_sample = backtests.run(cache, config, point, window['oos_start'], window['oos_end'], spread_points, use_tp=use_tp)
+    else:
+        out_sample = run_backtest(cache, config, point, window['oos_start'], window['oos_end'], spread_points, signals, use_tp=use_tp)
+    return {
+        'window': window,
+        'overrides': overrides,
+        'in_sample': in_sample.summary(),
+        'out_sample': out_sample.summary(),
+        'entry_time': out_sample.entry_time,
+        'exit_time': out_sample.exit_time,
+        'points': out_sample.points,
+    }
+
+
+def _optimize_fold_task(args):
+    return optimize_fold(_worker_cache, *args, backtests=_worker_backtests)
+
+
+class WalkForwardReport:
+    """
+    Per-fold results and the stitched out-of-sample equity curve of one family.
+    """
+    def __init__(self, family, folds):
+        self.family = family
+        self.folds = sorted(folds, key=lambda fold: fold['window']['fold'])
+        self.exit_time = np.concatenate([fold['exit_time'] for fold in self.folds]) if self.folds else np.array([])
+        self.points = np.concatenate([fold['points'] for fold in self.folds]) if self.folds else np.array([])
+        self.equity = np.cumsum(self.points)
+
+    @property
+    def max_drawdown(self):
+        if len(self.equity) == 0:
+            return 0.0
+        equity = np.concatenate(([0.0], self.equity))
+        return float((np.maximum.accumulate(equity) - equity).max())
+
+    def display(self, times):
+        fields = list(self.folds[0]['overrides']) if self.folds else []
+        table = Table(title=f"Walk-Forward: {self.family}", box=box.ROUNDED,
+                      caption=f"Chosen = {' / '.join(fields)}")
+        table.add_column("Fold", justify="right")
+        table.add_column("OOS From", style="green")
+        table.add_column("Chosen", style="cyan")
+        table.add_column("IS Net", justify="right")
+        table.add_column("OOS Trades", justify="right")
+        table.add_column("OOS Net", justify="right")
+        table.add_column("OOS Max DD", justify="right")
+        for fold in self.folds:
+            window = fold['window']
+            out_sample = fold['out_sample']
+            oos_color = "green" if out_sample['net_points'] >= 0 else "red"
+            table.add_row(
+                str(window['fold']),
+                np.datetime_as_string(np.datetime64(int(times[window['oos_start']]), 's'), unit='D'),
+                " / ".join(str(value) for value in fold['overrides'].values()),
+                f"{fold['in_sample']['net_points']:.0f}",
+                str(out_sample['trades']),
+                f"[{oos_color}]{out_sample['net_points']:.0f}[/{oos_color}]",
+                f"{out_sample['max_drawdown']:.0f}",
+            )
+        console.print(table)
+        net = float(self.equity[-1]) if len(self.equity) else 0.0
+        log_info(f"{self.family}: stitched out-of-sample net {net:.0f} pts over {len(self.points)} trades, "
+                 f"max drawdown {self.max_drawdown:.0f} pts.")
+
+    def equity_rows(self):
+        """(exit_time, points, equity) rows of the stitched curve."""
+        return list(zip(self.exit_time.tolist(), self.points.tolist(), self.equity.tolist()))
+
+
+class WalkForward:
+    """
+    Runs the folds of several config families in a process pool over one history.
+    """
+    def __init__(self, bars, point, in_sample_days=20, out_sample_days=5, step_days=None, spread_points=0.0,
+                 objective='recovery_factor', min_trades=10, workers=None, cache_dir=None):
+        """
+        Args:
+            bars (dict[str, np.ndarray]): 'time', 'open', 'high', 'low', 'close'.
+            point (float): Symbol point size.
+            objective (str): BacktestResult metric maximized in-sample (see OBJECTIVES).
+            min_trades (int): In-sample trades a candidate needs to be eligible.
+            workers (int): Pool size, os.cpu_count() by default; 1 runs in-process.
+            cache_dir (str): BacktestCache directory; None simulates every cell.
+        """
+        if objective not in OBJECTIVES:
+            raise ValueError(f"objective must be one of {OBJECTIVES}")
+        self.bars = {column: np.ascontiguousarray(bars[column]) for column in BAR_COLUMNS}
+        self.point = point
+        self.windows = walk_forward_windows(self.bars['time'], in_sample_days, out_sample_days, step_days)
+        self.spread_points = spread_points
+        self.objective = objective
+        self.min_trades = min_trades
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_dir = cache_dir
+
+    def run(self, families):
+        """
+        Args:
+            families (dict[str, tuple]): name -> (base TradingConfig, {'field': [values]}, use_tp).
+
+        Returns:
+            dict[str, WalkForwardReport]
+        """
+        if not self.windows:
+            log_warning("History too short for a single walk-forward fold.")
+            return {}
+
+        # Every EMA column of every candidate, computed once
+        cache = IndicatorCache(self.bars)
+        tasks = []
+        for family, (base_config, grid, use_tp) in families.items():
+            candidates = parameter_grid(grid)
+            for overrides in candidates:
+                cache.require(IndicatorCache.keys_for(config_variant(base_config, **overrides)))
+            for window in self.windows:
+                tasks.append((family, (window, base_config, candidates, self.point, self.spread_points,
+                                       self.objective, self.min_trades, use_tp)))
+        log_info(f"Walk-forward: {len(self.windows)} folds x {len(families)} families, "
+                 f"{len(cache.columns)} EMA columns shared, {self.workers} workers.")
+
+        results = {family: [] for family in families}
+        if self.workers == 1:
+            backtests = BacktestCache(self.cache_dir) if self.cache_dir else None
+            for family, args in tasks:
+                results[family].append(optimize_fold(cache, *args, backtests=backtests))
+            if backtests is not None:
+                log_info(f"Backtest cache: {backtests.hits} hits, {backtests.misses} simulated.")
+                backtests.close()
+        else:
+            directory = tempfile.mkdtemp(prefix="walk_forward_")
+            try:
+                save_cache(cache, directory)
+                context = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                         initializer=_init_worker, initargs=(directory, self.cache_dir)) as pool:
+                    for (family, _), fold in zip(tasks, pool.map(_optimize_fold_task, [args for _, args in tasks])):
+                        results[family].append(fold)
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+
+        log_success(f"Walk-forward finished: {len(tasks)} folds optimized.")
+        return {family: WalkForwardReport(family, folds) for family, folds in results.items()}
@@ -0,0 +1,26 @@
+#-----------------------------------------
+# filename: monte_carlo_report.py
+# description: Drawdown / recovery-factor / time-to-recover distributions per
+#              strategy from the deals synced by database_live.py.
+#              python monte_carlo_report.py [block|bootstrap]
+#-----------------------------------------
+import sys
+
+# Rich imports for beautiful logging
+from rich.console import Console
+
+#-----------------------------------
+# Utilities and Global Variables
+#-----------------------------------
+from modules.monte_carlo import MonteCarloReport
+
+console = Console()
+
+DB_NAME = 'mt5_trades.db'
+
+
+if __name__ == "__main__":
+    method = sys.argv[1] if len(sys.argv) > 1 else 'block'
+    report = MonteCarloReport(DB_NAME, method=method)
+    if report.run():
+        report.display()
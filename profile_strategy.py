@@ -0,0 +1,40 @@
+#-----------------------------------------
+# filename: profile_strategy.py
+# description: Asks a running strategy to profile its next cycles, without
+#              stopping it. The strategy picks the request up at the start of
+#              its next cycle and writes profiles/strategy_<id>_<time>_<mode>.*
+#              (.folded for flamegraph.pl / speedscope, .prof for snakeviz).
+#
+#   python profile_strategy.py 26                 -> sample 10 cycles
+#   python profile_strategy.py 26 sample 30 all   -> 30 cycles, every thread
+#   python profile_strategy.py 26 cprofile 5      -> cProfile, 5 cycles
+#-----------------------------------------
+import os
+import sys
+
+#-----------------------------------
+# Utilities and Global Variables
+#-----------------------------------
+from modules.utilities import log_success, log_error, log_info
+from modules.profiler import REQUEST_DIR, request_path, parse_request
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        log_error("Usage: python profile_strategy.py <strategy_id> [sample|cprofile] [cycles] [all]")
+        sys.exit(1)
+
+    strategy_id = sys.argv[1]
+    options = ' '.join(sys.argv[2:])
+    try:
+        mode, cycles, all_threads = parse_request(options)
+    except ValueError as e:
+        log_error(f"Invalid profile request: {e}")
+        sys.exit(1)
+
+    os.makedirs(REQUEST_DIR, exist_ok=True)
+    path = request_path(strategy_id)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"{mode} {cycles}" + (" all" if all_threads else ""))
+    log_success(f"Profile requested: {path} ({mode}, {cycles} cycles{', all threads' if all_threads else ''})")
+    log_info("Output appears in profiles/ once the cycles have run; strategies outside trading hours pick it up at the open.")
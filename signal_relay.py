@@ -0,0 +1,140 @@
+#-----------------------------------------
+# filename: signal_relay.py
+# description: Live runner for the Demo -> Live signal relay (z-NEXT.md).
+#              No analysis here. The demo strategy decides and publishes on the
+#              signal bus, this process mirrors it to every live account.
+#-----------------------------------------
+import MetaTrader5 as mt5
+from dotenv import load_dotenv
+import os
+import time
+
+# Rich imports for beautiful logging
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+#-----------------------------------
+# Utilities and Global Variables
+#-----------------------------------
+from modules.utilities import log_success, log_error, log_warning, log_info
+from modules.mt5_config import TradingConfig
+from modules.signal_bus import SignalSubscriber
+from modules.execution_fanout import AccountSession, FanOutExecutor
+
+#-------------------------------------
+# Library Initialization
+#-------------------------------------
+console = Console()
+load_dotenv()
+
+
+class LiveSignalExecutor:
+    """
+    Mirrors the relayed demo decisions to every live account.
+    """
+    def __init__(self, fanout, base_volume):
+        self.fanout = fanout
+        self.base_volume = base_volume
+
+    def on_signal(self, message):
+        """
+        Called by the SignalSubscriber thread for every fresh, changed signal.
+        """
+        signal = message.get('signal')
+        log_info(f"Relayed signal #{message.get('sequence')} from strategy {message.get('strategy_id')}: {signal}")
+        if signal == 'buy':
+            order_type = mt5.ORDER_TYPE_BUY
+        elif signal == 'sell':
+            order_type = mt5.ORDER_TYPE_SELL
+        else:
+            return
+
+        report = self.fanout.dispatch('open', order_type=order_type, volume=self.base_volume,
+                                      reference_price=message.get('price'), use_tp=False)
+        report.display()
+
+    def on_stale(self, silence_seconds):
+        log_error(f"🚨 Demo strategy silent for {silence_seconds:.0f} seconds. The demo from the other account is not working!")
+        try:
+            import winsound
+            winsound.Beep(1000, 1000)
+        except (ImportError, RuntimeError):
+            print("\a")
+
+
+def start_relay():
+    """Main function to start the relay."""
+
+    filename = os.path.basename(__file__)
+    demo_strategy_ids = [58]  # strategy_20_demo.py (DEMO)
+    base_volume = 0.1         # Volume of the LIVE account, others are scaled from it
+
+    # Same trade management as the live strategy_20_demo.py settings
+    config_settings = TradingConfig(
+        symbol="GOLDm#",
+        filename=filename,
+        strategy_id=20,
+        volume=base_volume,
+        deviation=20,
+        sl_points=300,
+        tp_points=350,
+        trailing_activation_points=150,
+        trailing_stop_distance=40,
+        trailing_period=3,
+        ema_resistance=3,
+        ema_support=3,
+        support_resistance_distance_threshold=20,
+        consolidation_filter=12,
+        long_term_trend=50,
+        max_candle_range_1h_allowed=1100,
+        max_candle_range_4h_allowed=1800
+    )
+    config_settings.display()
+
+    # One session per account. Add an account by adding its MT5_*_<NAME> variables
+    # to .env and a line here; the strategy itself still runs only once on DEMO.
+    sessions = [
+        AccountSession.from_env("LIVE", config_settings, volume_multiplier=1.0),
+        AccountSession.from_env("LIVE_2", config_settings, volume_multiplier=0.5),
+    ]
+    sessions = [session for session in sessions if session is not None]
+    if not sessions:
+        log_error("No live account configured in .env. Exiting.")
+        return
+
+    fanout = FanOutExecutor(sessions)
+    if not fanout.start():
+        log_error("No live account could connect. Exiting.")
+        fanout.stop()
+        return
+
+    executor = LiveSignalExecutor(fanout=fanout, base_volume=base_volume)
+    subscriber = SignalSubscriber(on_signal=executor.on_signal, on_stale=executor.on_stale, strategy_ids=demo_strategy_ids)
+    subscriber.daemon = True
+    subscriber.start()
+
+    relay_table = Table(title="📡 Signal Relay", box=box.ROUNDED)
+    relay_table.add_column("Setting", style="cyan")
+    relay_table.add_column("Value", style="green")
+    relay_table.add_row("Listening", f"{subscriber.address[0]}:{subscriber.address[1]}")
+    relay_table.add_row("Demo Strategies", ", ".join(str(i) for i in demo_strategy_ids))
+    relay_table.add_row("Accounts", ", ".join(f"{s.name} (x{s.volume_multiplier})" for s in sessions))
+    relay_table.add_row("Max Signal Age", f"{subscriber.max_signal_age_seconds} s")
+    relay_table.add_row("Stale Alarm", f"{subscriber.stale_after_seconds} s")
+    console.print(relay_table)
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        log_warning("Relay interrupted by user. Shutting down.")
+    finally:
+        subscriber.stop()
+        fanout.display_latency_summary()
+        fanout.stop()
+        log_success("Relay stopped.")
+
+
+if __name__ == "__main__":
+    start_relay()
@@ -26,7 +26,12 @@ from functools import wraps
 from collections import deque
 import statistics
 from entries import insert_entry, create_entries_table
-from modules.trading_hours_01am_to_04am_10am_to_17pm import is_trading_hours
+from modules.trading_hours_01am_to_04am_10am_to_17pm import is_trading_hours, sleep_until_trading_hours
+from modules.heartbeat import beat # Liveness for supervisor.py
+from modules import metrics # /metrics endpoint (cycle latency, MT5 calls, trades)
+from modules.profiler import enable_profiling # On-demand profiling, see profile_strategy.py
+from modules.memory_guard import enable_memory_guard # RSS per cycle, soft limit -> recycle
+from modules.trailing_engine import trailing_engine, prioritize_order_send # Throttled, coalesced SL modifications
 # from modules.trading_hours_24 import is_trading_hours
 
 # Load environment variables
@@ -127,6 +132,7 @@ class PerformanceMonitor:
         self.response_times = deque(maxlen=100)
         
     def record_trade(self, success):
+        metrics.trades.inc(result='done' if success else 'failed')
         self.trade_count += 1
         if success:
             self.successful_trades += 1
@@ -134,6 +140,7 @@ class PerformanceMonitor:
             self.failed_trades += 1
             
     def record_response_time(self, time_ms):
+        metrics.order_response_seconds.observe(time_ms / 1000.0)
         self.response_times.append(time_ms)
         
     def get_stats(self):
@@ -149,6 +156,8 @@ class PerformanceMonitor:
         }
 
 perf_monitor = PerformanceMonitor()
+metrics.instrument_mt5(mt5) # Count and time every mt5.* call
+prioritize_order_send(mt5) # Entries and closes go before queued SL modifications
 
 # --- MT5 Connection Functions ---
 def connect_to_mt5():
@@ -559,8 +568,8 @@ def manage_trailing_stops():
                         # Only move SL up
                         if profit_points >= TRAILING_TRIGGER_POINTS and new_sl > pos.sl:
                             new_sl = round(new_sl, symbol_info.digits)
-                            modify_position_sl(pos.ticket, new_sl, pos.tp)
-                            logging.info(f"Trailed BUY SL to {new_sl:.2f} (21EMA: {ema_trailing_stop:.2f})")
+                            if modify_position_sl(pos, new_sl, point):
+                                logging.info(f"Queued BUY SL to {new_sl:.2f} (21EMA: {ema_trailing_stop:.2f})")
                     
                     else:  # SELL
                         profit_points = round((pos.price_open - current_price) / point)
@@ -568,8 +577,8 @@ def manage_trailing_stops():
                         # Only move SL down
                         if profit_points >= TRAILING_TRIGGER_POINTS and new_sl < pos.sl:
                             new_sl = round(new_sl, symbol_info.digits)
-                            modify_position_sl(pos.ticket, new_sl, pos.tp)
-                            logging.info(f"Trailed SELL SL to {new_sl:.2f} (21EMA: {ema_trailing_stop:.2f})")
+                            if modify_position_sl(pos, new_sl, point):
+                                logging.info(f"Queued SELL SL to {new_sl:.2f} (21EMA: {ema_trailing_stop:.2f})")
                 
                 except Exception as e:
                     logging.error(f"Error managing trailing stop for position {pos.ticket}: {e}")
@@ -581,22 +590,16 @@ def manage_trailing_stops():
             logging.error(f"Error in trailing stop thread: {e}")
             time.sleep(30)
 
-def modify_position_sl(ticket, new_sl, tp):
-    """Modify position stop loss"""
-    request = {
-        "action": mt5.TRADE_ACTION_SLTP,
-        "position": ticket,
-        "sl": new_sl,
-        "tp": tp,
-        "magic": MAGIC_NUMBER,
-        "comment": "Trailing SL"
-    }
-    
-    result = mt5.order_send(request)
-    if result.retcode != mt5.TRADE_RETCODE_DONE:
-        logging.error(f"Failed to modify SL for position {ticket}: {result.comment}")
-        return False
-    return True
+def modify_position_sl(position, new_sl, point):
+    """Queue a position stop loss modification (minimum step, coalescing, rate limit)"""
+    return trailing_engine().submit(position, new_sl, point, MAGIC_NUMBER, on_result=position_sl_modified)
+
+def position_sl_modified(modification, result):
+    """Trailing engine callback with the broker's answer"""
+    if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
+        logging.error(f"Failed to modify SL for position {modification.ticket}: {result.comment if result else mt5.last_error()}")
+    else:
+        logging.info(f"SL for position {modification.ticket} modified to {modification.sl:.2f}")
 
 def start_trailing_thread():
     """Start the trailing stop thread"""
@@ -615,6 +618,50 @@ def stop_trailing_thread():
         trailing_thread.join(timeout=5)
     logging.info("Trailing stop thread stopped")
 
+# --- Trading Cycle ---
+def run_cycle():
+    """One pass over the M2 signal; returns the retry delay in seconds, or None when the cycle completed"""
+    # Get M2 data and calculate EMAs
+    data = get_ohlc_data(symbol, timeframe_m2)
+    if data is None:
+        logging.warning("Failed to get M2 data")
+        return 60
+
+    indicators = calculate_emas(data)
+    if not indicators:
+        logging.warning("Failed to calculate EMAs")
+        return 60
+
+    # Calculate distances
+    distance_20, distance_200 = calculate_distances(indicators)
+    if distance_20 is None or distance_200 is None:
+        logging.warning("Failed to calculate distances")
+        return 60
+
+    # Determine signal
+    signal, reason = determine_signal(indicators, distance_20, distance_200)
+    logging.info(f"Signal: {signal.upper()}, Reason: {reason}")
+
+    # Check H1 and H4 candle ranges
+    if not check_1h_open_candle_range():
+        logging.info("H1 candle range not tradeable. Holding.")
+        return 60
+
+    if not check_4h_open_candle_range():
+        logging.info("H4 candle range not tradeable. Holding.")
+        return 60
+
+    # Execute trades
+    if signal == "buy":
+        execute_trade(mt5.ORDER_TYPE_BUY, indicators, distance_20, signal)
+    elif signal == "sell":
+        execute_trade(mt5.ORDER_TYPE_SELL, indicators, distance_20, signal)
+
+    # Performance stats
+    stats = perf_monitor.get_stats()
+    logging.info(f"Performance: {stats['uptime']} uptime, {stats['total_trades']} trades, {stats['success_rate']} success")
+    return None
+
 # --- Main Trading Loop ---
 def main_loop():
     """Main trading loop"""
@@ -632,58 +679,22 @@ def main_loop():
     
     try:
         while True:
+            beat() # Supervisor liveness
             try:
                 # Check trading hours
                 if not is_trading_hours(): 
                     logging.info(f"Outside trading hours ({TRADING_HOURS_START}:00-{TRADING_HOURS_END}:00)")
-                    time.sleep(60)
+                    sleep_until_trading_hours()
                     continue
-                
-                # Get M2 data and calculate EMAs
-                data = get_ohlc_data(symbol, timeframe_m2)
-                if data is None:
-                    logging.warning("Failed to get M2 data")
-                    time.sleep(60)
-                    continue
-                
-                indicators = calculate_emas(data)
-                if not indicators:
-                    logging.warning("Failed to calculate EMAs")
-                    time.sleep(60)
-                    continue
-                
-                # Calculate distances
-                distance_20, distance_200 = calculate_distances(indicators)
-                if distance_20 is None or distance_200 is None:
-                    logging.warning("Failed to calculate distances")
-                    time.sleep(60)
-                    continue
-                
-                # Determine signal
-                signal, reason = determine_signal(indicators, distance_20, distance_200)
-                logging.info(f"Signal: {signal.upper()}, Reason: {reason}")
-                
-                # Check H1 and H4 candle ranges
-                if not check_1h_open_candle_range():
-                    logging.info("H1 candle range not tradeable. Holding.")
-                    time.sleep(60)
-                    continue
-                
-                if not check_4h_open_candle_range():
-                    logging.info("H4 candle range not tradeable. Holding.")
-                    time.sleep(60)
+                metrics.cycle_started() # Loop latency, closed-session cycles are not counted
+                try:
+                    retry_in = run_cycle()
+                finally:
+                    metrics.cycle_finished() # Early exits and errors close the cycle too
+                if retry_in is not None:
+                    time.sleep(retry_in)
                     continue
 
-                # Execute trades
-                if signal == "buy":
-                    execute_trade(mt5.ORDER_TYPE_BUY, indicators, distance_20, signal)
-                elif signal == "sell":
-                    execute_trade(mt5.ORDER_TYPE_SELL, indicators, distance_20, signal)
-                
-                # Performance stats
-                stats = perf_monitor.get_stats()
-                logging.info(f"Performance: {stats['uptime']} uptime, {stats['total_trades']} trades, {stats['success_rate']} success")
-                
                 # Wait for next 2-minute candle
                 now = datetime.now()
                 minutes_to_next = 2 - (now.minute % 2)
@@ -711,6 +722,8 @@ if __name__ == "__main__":
     try:
         # Create database table
         create_entries_table()
+        enable_profiling(strategy_id) # profile_strategy.py <strategy_id> starts a profile
+        enable_memory_guard(strategy_id) # logs/memory_strategy_<id>.log
         
         logging.info("=" * 50)
         logging.info(f"Starting M2 EMA Trading Bot (Magic: {MAGIC_NUMBER})")
@@ -15,7 +15,12 @@ from rich.table import Table
 from rich import box
 import modules.mt5_config as mt5_config
 from account_list import account_type
-from modules.trading_hours_24 import is_trading_hours
+from modules.trading_hours_24 import is_trading_hours, sleep_until_trading_hours
+from modules.heartbeat import beat # Liveness for supervisor.py
+from modules.metrics import cycle_started, cycle_finished # Loop latency on the /metrics endpoint
+from modules.profiler import enable_profiling # On-demand profiling, see profile_strategy.py
+from modules.memory_guard import enable_memory_guard # RSS per cycle, soft limit -> recycle
+from modules.config_reload import watch_config # Live tuning through config/strategy_<id>.json
 
 #-----------------------------------
 # Utilities and Global Variables
@@ -25,8 +30,10 @@ from modules.utilities import log_success, log_error, log_warning, log_info
 from modules.mt5_config import TradingConfig
 from modules.mt5_manager import MT5Manager
 from modules.indicators import Indicators
+from modules.bar_feed import BarFeed # Rolling bar window, only the newest bars are fetched after the first load
 from modules.position_manager import PositionManager # Import the new class
 from modules.profit_manager import TakeProfitMonitor # Import the new TakeProfitMonitor class
+from modules.position_book import PositionBook # Shared position state for the loop and its threads
 
 
 #-------------------------------------
@@ -34,6 +41,7 @@ from modules.profit_manager import TakeProfitMonitor # Import the new TakeProfit
 #-------------------------------------
 console = Console()
 load_dotenv()
+SNAPSHOT_DIR = "snapshots" # Warm-restart snapshots of the bar window and indicators
 
 
 
@@ -45,6 +53,7 @@ def wait_until_next_interval(interval_seconds: int = 10):
     Args:
         interval_seconds (int): The desired interval in seconds (e.g., 60 for 1 minute).
     """
+    cycle_finished() # The work since the loop woke up, for /metrics
     now = datetime.now()
     
     # Get total seconds from the start of the current day
@@ -74,23 +83,24 @@ class M1AverageZone:
     """
     Encapsulates the full logic for the M1 Average Zone Strategy.
     """
-    def __init__(self, config, mt5_manager, position_open_event):
+    def __init__(self, config, mt5_manager, position_open_event, position_book):
         self.config = config
         self.mt5_manager = mt5_manager
         self.position_open_event = position_open_event # Add the event here
+        self.regime_tracker = None # Closed-bar regime timer, kept by the bar feed
+        self.bar_feed = BarFeed(config.symbol, mt5.TIMEFRAME_M1, 20000, # Closed-bar indicator state is kept between cycles
+                                snapshot_path=f"{SNAPSHOT_DIR}/strategy_{config.strategy_id}_M1") # and across restarts
+        self.position_book = position_book # Updated from order_send results, reconciled periodically
         
     def get_data(self):
         """
-        Fetches the latest price data from MT5.
+        Refreshes the bar window from MT5. After the first call only the newest
+        bars are fetched and the incremental indicators advance by closed bars.
+
+        Returns:
+            str: The BarFeed update status, or None if the rates could not be fetched.
         """
-        rates = mt5.copy_rates_from_pos(self.config.symbol, mt5.TIMEFRAME_M1, 0, 20000)
-        if rates is None:
-            log_error(f"Failed to get rates for {self.config.symbol}")
-            return None
-        
-        rates_df = pd.DataFrame(rates)
-        rates_df['time'] = pd.to_datetime(rates_df['time'], unit='s')
-        return rates_df
+        return self.bar_feed.update()
 
     def execute_trade(self, order_type):
         """
@@ -129,6 +139,7 @@ class M1AverageZone:
         }
 
         result = mt5.order_send(request)
+        self.position_book.apply_open(request, result)
         if result.retcode != mt5.TRADE_RETCODE_DONE:
             log_error(f"Failed to send order, error code: {result.retcode}")
             return False
@@ -165,66 +176,78 @@ class M1AverageZone:
         while True:
             # Use the new precise timing function
             wait_until_next_interval()
+            beat() # Supervisor liveness
+
+            # Check Trading Hours before touching the terminal; sleep through the closed session
+            if not is_trading_hours():
+                log_warning(f"Outside Trading Hours. Sleeping until the next session...")
+                sleep_until_trading_hours()
+                continue # conutine means ignore succeeding codes and will go back to the main loop.
+            cycle_started() # Loop latency metric, closed-session cycles are not counted
 
-            # Check for existing positions
-            positions = mt5.positions_get(symbol=self.config.symbol)
+            # Get new data, also while a position is open so every closed bar reaches the regime timer
+            feed_status = self.get_data()
+            if feed_status is not None:
+                self.regime_tracker = self.bar_feed.regime(self.config, use_long_term=False) # Seeded from the window, advanced per closed bar
+
+            # Check for existing positions (served from the position book)
+            self.position_book.reconcile() # Once per cycle: broker-side SL/TP fills show up before the entry check
+            positions = self.position_book.get(self.config.strategy_id)
             symbol_info = mt5.symbol_info(self.config.symbol)
             # Retrieve the point size dynamically
             point = symbol_info.point
             # print(f"Point Multiplier:  {point}")
             print("\n\n")
 
-            if positions and any(p.magic == self.config.strategy_id for p in positions):
+            if positions:
                 log_info(f"Position already exists. Skipping entry signal check.")
                 continue
 
-            # Get new data
-            rates_df = self.get_data()
-            if rates_df is None or len(rates_df) < self.config.long_term_trend + 10:
+            if feed_status is None or len(self.bar_feed) < self.config.long_term_trend + 10:
                 log_warning("Not enough data to run indicators. Waiting...")
                 continue
 
 
-            # Check Trading Hours
 
-            if not is_trading_hours():
-                log_warning(f"Outside Trading Hours. Waiting...")
-                continue # conutine means ignore succeeding codes and will go back to the main loop.
+            # Same closed bars and same forming bar as the last 'hold': the decision cannot change
+            if not self.bar_feed.changed_since_evaluation():
+                log_info(f"No new bar and no price change since the last evaluation. Skipping.")
+                continue
 
 
 
 
             # Use the Indicators class
-            indicator_tools = Indicators(rates_df)
+            indicator_tools = Indicators() # Candle ranges only; EMAs come from the bar feed
             
             #-------------------------------------------------------
             # CORE STRATEGY LOGIC
             #-------------------------------------------------------
             
             # Check Indicators' Values
-            current_price = indicator_tools.get_current_price()
+            current_price = self.bar_feed.current_price()
 
-            ema_resistance_high = indicator_tools.get_last_ema_value(
+            ema_resistance_high = self.bar_feed.ema(
                 period=self.config.ema_resistance,
                 price_type='high'
             )        
 
-            ema_resistance_low = indicator_tools.get_last_ema_value(
+            ema_resistance_low = self.bar_feed.ema(
                 period=self.config.ema_support,
                 price_type='low'
             )     
 
-            ema_trailing_period = indicator_tools.get_last_ema_value(
+            ema_trailing_period = self.bar_feed.ema(
                 period=self.config.trailing_period,
                 price_type='close'
             )                                  
             
-            ema_consolidation_filter = indicator_tools.get_last_ema_value(
+            ema_consolidation_filter = self.bar_feed.ema(
                 period=self.config.consolidation_filter,
                 price_type='close'
             )   
 
-            ema_long_term_trend = indicator_tools.get_last_ema_value(
+            ema_long_term_trend = self.bar_feed.ema(
                 period=self.config.long_term_trend,
                 price_type='close'
             )               
@@ -312,6 +335,7 @@ class M1AverageZone:
             config_metrics_table.add_column("Value", style="green")
  
             config_metrics_table.add_row(f"Trend", str("Bullish" if trend == 'bullish 🟢' else "Bearish" if trend == 'bearish 🟡' else "Consolidation") ) 
+            config_metrics_table.add_row(f"Time in Regime", f"{self.regime_tracker.time_in_regime(now=self.bar_feed.bars['time'][-1]) / 60:.1f} Minutes ({self.regime_tracker.name})")
             config_metrics_table.add_row(f"Distance vs Trailing Guide ", f"{points_distance_vs_trailing_guide:.2f} Points")
             config_metrics_table.add_row(f"Distance vs Support ", f"{points_distance_vs_ema_support:.2f} Points")
             config_metrics_table.add_row(f"Distance vs Resistance ", f"{points_distance_vs_ema_resistance:.2f} Points" )
@@ -390,6 +414,7 @@ class M1AverageZone:
             else:
                 # print("Hold!")
                 signal = 'hold'
+                self.bar_feed.mark_evaluated() # Re-evaluate only once the bars change
                 if trend == 'bullish 🟢':
                     log_info(f"Signal: {signal}")
                     log_info(f"No valid trading signal detected.")
@@ -455,6 +480,10 @@ def start_strategy():
         max_candle_range_4h_allowed=1800         
     )
 
+    enable_profiling(config_settings.strategy_id) # profile_strategy.py <strategy_id> starts a profile
+    enable_memory_guard(config_settings.strategy_id) # logs/memory_strategy_<id>.log
+    watch_config(config_settings) # Applied between cycles; edit the JSON instead of this file to retune
+
     # 2. Instantiate and connect the MT5 manager
 
      # Change to "LIVE" for live trading
@@ -495,17 +524,18 @@ def start_strategy():
 
     # 3. Instantiate and start the position manager and take profit monitor threads
     position_open_event = threading.Event()
+    position_book = PositionBook(symbol=config_settings.symbol)
     
-    position_manager = PositionManager(config=config_settings, mt5_manager=mt5_manager, position_open_event=position_open_event)
+    position_manager = PositionManager(config=config_settings, mt5_manager=mt5_manager, position_open_event=position_open_event, position_book=position_book)
     position_manager.daemon = True # Allows the thread to exit when the main program exits
     position_manager.start()
 
-    take_profit_monitor = TakeProfitMonitor(config=config_settings, mt5_manager=mt5_manager, position_open_event=position_open_event)
+    take_profit_monitor = TakeProfitMonitor(config=config_settings, mt5_manager=mt5_manager, position_open_event=position_open_event, position_book=position_book)
     take_profit_monitor.daemon = True
     take_profit_monitor.start()
 
     # 4. Instantiate the strategy and run it
-    my_strategy = M1AverageZone(config=config_settings, mt5_manager=mt5_manager, position_open_event=position_open_event)
+    my_strategy = M1AverageZone(config=config_settings, mt5_manager=mt5_manager, position_open_event=position_open_event, position_book=position_book)
     try:
         my_strategy.run()
     except KeyboardInterrupt:
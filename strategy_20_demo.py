@@ -15,7 +15,12 @@ from rich.table import Table
 from rich import box
 import modules.mt5_config as mt5_config
 from account_list import account_type
-from modules.trading_hours_24 import is_trading_hours
+from modules.trading_hours_24 import is_trading_hours, sleep_until_trading_hours
+from modules.heartbeat import beat # Liveness for supervisor.py
+from modules.metrics import cycle_started, cycle_finished # Loop latency on the /metrics endpoint
+from modules.profiler import enable_profiling # On-demand profiling, see profile_strategy.py
+from modules.memory_guard import enable_memory_guard # RSS per cycle, soft limit -> recycle
+from modules.config_reload import watch_config # Live tuning through config/strategy_<id>.json
 
 #-----------------------------------
 # Utilities and Global Variables
@@ -25,8 +30,11 @@ from modules.utilities import log_success, log_error, log_warning, log_info
 from modules.mt5_config import TradingConfig
 from modules.mt5_manager import MT5Manager
 from modules.indicators import Indicators
+from modules.bar_feed import BarFeed # Rolling bar window, only the newest bars are fetched after the first load
+from modules.volatility_profile import VolatilityProfile # Measured candle-range thresholds (build_volatility_profile.py)
 from modules.position_manager import PositionManager # Import the new class
 from modules.profit_manager import TakeProfitMonitor # Import the new TakeProfitMonitor class
+from modules.signal_bus import SignalPublisher # Relay decisions to the live runner (z-NEXT.md)
 
 
 #-------------------------------------
@@ -35,6 +43,10 @@ from modules.profit_manager import TakeProfitMonitor # Import the new TakeProfit
 console = Console()
 load_dotenv()
 
+VOLATILITY_PROFILE_SYMBOL = 'GOLDm#' # Bars stored by market_data.py
+VOLATILITY_THRESHOLD_STAT = 'p90'
+SNAPSHOT_DIR = "snapshots" # Warm-restart snapshots of the bar window and indicators
+
 
 
 def wait_until_next_interval(interval_seconds: int = 10):
@@ -45,6 +57,7 @@ def wait_until_next_interval(interval_seconds: int = 10):
     Args:
         interval_seconds (int): The desired interval in seconds (e.g., 60 for 1 minute).
     """
+    cycle_finished() # The work since the loop woke up, for /metrics
     now = datetime.now()
     
     # Get total seconds from the start of the current day
@@ -74,23 +87,25 @@ class M1AverageZone:
     """
     Encapsulates the full logic for the M1 Average Zone Strategy.
     """
-    def __init__(self, config, mt5_manager, position_open_event):
+    def __init__(self, config, mt5_manager, position_open_event, signal_publisher=None):
         self.config = config
         self.mt5_manager = mt5_manager
         self.position_open_event = position_open_event # Add the event here
+        self.regime_tracker = None # Closed-bar regime timer, kept by the bar feed
+        self.bar_feed = BarFeed(config.symbol, mt5.TIMEFRAME_M1, 20000, # Closed-bar indicator state is kept between cycles
+                                snapshot_path=f"{SNAPSHOT_DIR}/strategy_{config.strategy_id}_M1") # and across restarts
+        self.signal_publisher = signal_publisher # Optional demo -> live signal relay
+        self.volatility_profile = VolatilityProfile(VOLATILITY_PROFILE_SYMBOL) # Falls back to the config thresholds when empty
         
     def get_data(self):
         """
-        Fetches the latest price data from MT5.
+        Refreshes the bar window from MT5. After the first call only the newest
+        bars are fetched and the incremental indicators advance by closed bars.
+
+        Returns:
+            str: The BarFeed update status, or None if the rates could not be fetched.
         """
-        rates = mt5.copy_rates_from_pos(self.config.symbol, mt5.TIMEFRAME_M1, 0, 20000)
-        if rates is None:
-            log_error(f"Failed to get rates for {self.config.symbol}")
-            return None
-        
-        rates_df = pd.DataFrame(rates)
-        rates_df['time'] = pd.to_datetime(rates_df['time'], unit='s')
-        return rates_df
+        return self.bar_feed.update()
 
     def execute_trade(self, order_type):
         """
@@ -164,6 +179,23 @@ class M1AverageZone:
         while True:
             # Use the new precise timing function
             wait_until_next_interval()
+            beat() # Supervisor liveness
+
+            # Let the live runner know this loop is alive
+            if self.signal_publisher:
+                self.signal_publisher.heartbeat()
+
+            # Check Trading Hours before touching the terminal; sleep through the closed session
+            if not is_trading_hours():
+                log_warning(f"Outside Trading Hours. Sleeping until the next session...")
+                sleep_until_trading_hours(max_seconds=60 if self.signal_publisher else None) # Keep the relay heartbeat alive
+                continue # conutine means ignore succeeding codes and will go back to the main loop.
+            cycle_started() # Loop latency metric, closed-session cycles are not counted
+
+            # Get new data, also while a position is open so every closed bar reaches the regime timer
+            feed_status = self.get_data()
+            if feed_status is not None:
+                self.regime_tracker = self.bar_feed.regime(self.config) # Seeded from the window, advanced per closed bar
 
             # Check for existing positions
             positions = mt5.positions_get(symbol=self.config.symbol)
@@ -177,53 +209,51 @@ class M1AverageZone:
                 log_info(f"Position already exists. Skipping entry signal check.")
                 continue
 
-            # Get new data
-            rates_df = self.get_data()
-            if rates_df is None or len(rates_df) < self.config.long_term_trend + 10:
+            if feed_status is None or len(self.bar_feed) < self.config.long_term_trend + 10:
                 log_warning("Not enough data to run indicators. Waiting...")
                 continue
 
 
-            # Check Trading Hours
 
-            if not is_trading_hours():
-                log_warning(f"Outside Trading Hours. Waiting...")
-                continue # conutine means ignore succeeding codes and will go back to the main loop.
+            # Same closed bars and same forming bar as the last 'hold': the decision cannot change
+            if not self.bar_feed.changed_since_evaluation():
+                log_info(f"No new bar and no price change since the last evaluation. Skipping.")
+                continue
 
 
 
 
             # Use the Indicators class
-            indicator_tools = Indicators(rates_df)
+            indicator_tools = Indicators() # Candle ranges only; EMAs come from the bar feed
             
             #-------------------------------------------------------
             # CORE STRATEGY LOGIC
             #-------------------------------------------------------
             
             # Check Indicators' Values
-            current_price = indicator_tools.get_current_price()
+            current_price = self.bar_feed.current_price()
 
-            ema_resistance_high = indicator_tools.get_last_ema_value(
+            ema_resistance_high = self.bar_feed.ema(
                 period=self.config.ema_resistance,
                 price_type='high'
             )        
 
-            ema_support_low = indicator_tools.get_last_ema_value(
+            ema_support_low = self.bar_feed.ema(
                 period=self.config.ema_support,
                 price_type='low'
             )     
 
-            ema_trailing_period = indicator_tools.get_last_ema_value(
+            ema_trailing_period = self.bar_feed.ema(
                 period=self.config.trailing_period,
                 price_type='close'
             )                                  
             
-            ema_consolidation_filter = indicator_tools.get_last_ema_value(
+            ema_consolidation_filter = self.bar_feed.ema(
                 period=self.config.consolidation_filter,
                 price_type='close'
             )   
 
-            ema_long_term_trend = indicator_tools.get_last_ema_value(
+            ema_long_term_trend = self.bar_feed.ema(
                 period=self.config.long_term_trend,
                 price_type='close'
             )               
@@ -284,8 +314,11 @@ class M1AverageZone:
 
 
 
-            # Candle Range Volatility
-            if candle_1h_range <= self.config.max_candle_range_1h_allowed:
+            # Candle Range Volatility (P90 range for this weekday/hour when a profile is built)
+            bar_time = self.bar_feed.bars['time'][-1]
+            max_candle_range_1h = self.volatility_profile.get_at('H1', VOLATILITY_THRESHOLD_STAT, bar_time, self.config.max_candle_range_1h_allowed)
+            max_candle_range_4h = self.volatility_profile.get_at('H4', VOLATILITY_THRESHOLD_STAT, bar_time, self.config.max_candle_range_4h_allowed)
+            if candle_1h_range <= max_candle_range_1h:
                 h1_within_range = True
                 candle_1h_range_status = 'Within Threshold 🟢'
             else:
@@ -293,7 +326,7 @@ class M1AverageZone:
                 candle_1h_range_status = 'Outside Threshold 🔴'
 
 
-            if candle_4h_range <= self.config.max_candle_range_4h_allowed:
+            if candle_4h_range <= max_candle_range_4h:
                 h4_within_range = True
                 candle_4h_range_status = 'Within Threshold 🟢'
             else:
@@ -311,13 +344,15 @@ class M1AverageZone:
             config_metrics_table.add_column("Value", style="green")
  
             config_metrics_table.add_row(f"Trend", str("Bullish" if trend == 'bullish 🟢' else "Bearish" if trend == 'bearish 🟡' else "Consolidation") ) 
+            config_metrics_table.add_row(f"Time in Regime", f"{self.regime_tracker.time_in_regime(now=self.bar_feed.bars['time'][-1]) / 60:.1f} Minutes ({self.regime_tracker.name})")
             config_metrics_table.add_row(f"Distance vs Trailing Guide ", f"{points_distance_vs_trailing_guide:.2f} Points")
             config_metrics_table.add_row(f"Distance vs Support ", f"{points_distance_vs_ema_support:.2f} Points")
             config_metrics_table.add_row(f"Distance vs Resistance ", f"{points_distance_vs_ema_resistance:.2f} Points" )
             config_metrics_table.add_row(f"Distance vs Consolidation Filter ", f"{points_distance_vs_consolidation_guide:.2f} Points" )
             config_metrics_table.add_row(f"Distance vs Long Term Trend ", f"{points_distance_vs_long_term_trend_guide:.2f} Points" )
             config_metrics_table.add_row(f"H1 Candle Range", f"{candle_1h_range:.2f} Points" )
-            config_metrics_table.add_row(f"H4 Candle Range", f"{candle_4h_range:.2f} Points" )             
+            config_metrics_table.add_row(f"H4 Candle Range", f"{candle_4h_range:.2f} Points" )
+            config_metrics_table.add_row(f"H1 / H4 Range Threshold", f"{max_candle_range_1h:.0f} / {max_candle_range_4h:.0f} Points" )             
 
             console.print(config_metrics_table)
    
@@ -380,6 +415,8 @@ class M1AverageZone:
                 print("Buying!")
                 signal = 'buy'
                 log_info("Bullish signal and price is in Support Zone. Placing BUY order.")
+                if self.signal_publisher:
+                    self.signal_publisher.publish(signal, current_price)
                 self.execute_trade(mt5.ORDER_TYPE_BUY)
             # Disabling Candle Range threshold for now as trades would be limited on a trending market.
             #elif trend == 'bearish 🟡' and points_distance_vs_trailing_guide <= distance_threshold_in_points and h1_within_range and h4_within_range:     
@@ -387,26 +424,31 @@ class M1AverageZone:
                 print(f"Selling! {self.config.volume}")
                 signal = 'sell'
                 log_info("Bearish signal and price is in Resistance Zone. Placing SELL order.")
+                if self.signal_publisher:
+                    self.signal_publisher.publish(signal, current_price)
                 self.execute_trade(mt5.ORDER_TYPE_SELL)                
             else:
                 # print("Hold!")
                 signal = 'hold'
+                self.bar_feed.mark_evaluated() # Re-evaluate only once the bars change
+                if self.signal_publisher:
+                    self.signal_publisher.publish(signal, current_price)
                 if trend == 'bullish 🟢':
                     log_info(f"Signal: {signal}")
                     log_info(f"No valid trading signal detected.")
                     log_info(f"Bullish trend but price's distance is too far from Support Zone/Trailing Guide ({points_distance_vs_trailing_guide:.2f} points)")
                     if not h1_within_range:
-                        log_info(f"Note: 1H candle range {candle_1h_range} outide the treshold {self.config.max_candle_range_1h_allowed}.")
+                        log_info(f"Note: 1H candle range {candle_1h_range} outide the treshold {max_candle_range_1h}.")
                     if not h4_within_range:
-                        log_info(f"Note: 4H candle range {candle_4h_range} outide the treshold {self.config.max_candle_range_4h_allowed}.")                        
+                        log_info(f"Note: 4H candle range {candle_4h_range} outide the treshold {max_candle_range_4h}.")                        
                 elif trend == 'bearish 🟡':
                     log_info(f"Signal: {signal}")
                     log_info(f"No valid trading signal detected.")
                     log_info(f"Bearish trend but price's distance is too far from Resistance Zone/Trailing Guide ({points_distance_vs_ema_resistance:.2f} points).")
                     if not h1_within_range:
-                        log_info(f"Note: 1H candle range {candle_1h_range} outide the treshold {self.config.max_candle_range_1h_allowed}.")
+                        log_info(f"Note: 1H candle range {candle_1h_range} outide the treshold {max_candle_range_1h}.")
                     if not h4_within_range:
-                        log_info(f"Note: 4H candle range {candle_4h_range} outide the treshold {self.config.max_candle_range_4h_allowed}.")                         
+                        log_info(f"Note: 4H candle range {candle_4h_range} outide the treshold {max_candle_range_4h}.")                         
                 else:
                     log_info(f"Signal: {signal}")
                     log_info("No clear trend. Potential consolidation or reversal.")
@@ -456,6 +498,10 @@ def start_strategy():
         max_candle_range_4h_allowed=1800         
     )
 
+    enable_profiling(config_settings.strategy_id) # profile_strategy.py <strategy_id> starts a profile
+    enable_memory_guard(config_settings.strategy_id) # logs/memory_strategy_<id>.log
+    watch_config(config_settings) # Applied between cycles; edit the JSON instead of this file to retune
+
     # 2. Instantiate and connect the MT5 manager
 
      # Change to "LIVE" for live trading
@@ -506,16 +552,21 @@ def start_strategy():
     # take_profit_monitor.daemon = True
     # take_profit_monitor.start()
 
-    # 4. Instantiate the strategy and run it
-    my_strategy = M1AverageZone(config=config_settings, mt5_manager=mt5_manager, position_open_event=position_open_event)
+    # 4. Publish every decision to the live runner (signal_relay.py) when running on DEMO
+    signal_publisher = SignalPublisher(strategy_id=config_settings.strategy_id, symbol=config_settings.symbol) if production_status == "DEMO" else None
+
+    # 5. Instantiate the strategy and run it
+    my_strategy = M1AverageZone(config=config_settings, mt5_manager=mt5_manager, position_open_event=position_open_event, signal_publisher=signal_publisher)
     try:
         my_strategy.run()
     except KeyboardInterrupt:
         log_warning("Strategy interrupted by user. Shutting down.")
     finally:
-        # 5. Shutdown MT5 connection and stop the threads
+        # 6. Shutdown MT5 connection and stop the threads
         position_manager.stop()
         #take_profit_monitor.stop()
+        if signal_publisher:
+            signal_publisher.close()
         mt5.shutdown()
         log_success("MetaTrader5 shutdown.")
 
@@ -15,7 +15,12 @@ from rich.table import Table
 from rich import box
 import modules.mt5_config as mt5_config
 from account_list import account_type
-from modules.trading_hours_24 import is_trading_hours
+from modules.trading_hours_24 import is_trading_hours, sleep_until_trading_hours
+from modules.heartbeat import beat # Liveness for supervisor.py
+from modules.metrics import cycle_started, cycle_finished # Loop latency on the /metrics endpoint
+from modules.profiler import enable_profiling # On-demand profiling, see profile_strategy.py
+from modules.memory_guard import enable_memory_guard # RSS per cycle, soft limit -> recycle
+from modules.config_reload import watch_config # Live tuning through config/strategy_<id>.json
 from modules.chart_screenshot import screenshot # Import the screenshot class
 
 #-----------------------------------
@@ -26,6 +31,7 @@ from modules.utilities import log_success, log_error, log_warning, log_info
 from modules.mt5_config import TradingConfig
 from modules.mt5_manager import MT5Manager
 from modules.indicators import Indicators
+from modules.bar_feed import BarFeed # Rolling bar window, only the newest bars are fetched after the first load
 from modules.position_manager import PositionManager # Import the new class
 from modules.profit_manager import TakeProfitMonitor # Import the new TakeProfitMonitor class
 import mplfinance as mpf
@@ -36,6 +42,7 @@ import mplfinance as mpf
 console = Console()
 load_dotenv()
 SCREENSHOTS_DIR = "screenshots/GOLD/"
+SNAPSHOT_DIR = "snapshots" # Warm-restart snapshots of the bar window and indicators
 
 
 
@@ -47,6 +54,7 @@ def wait_until_next_interval(interval_seconds: int = 10):
     Args:
         interval_seconds (int): The desired interval in seconds (e.g., 60 for 1 minute).
     """
+    cycle_finished() # The work since the loop woke up, for /metrics
     now = datetime.now()
     
     # Get total seconds from the start of the current day
@@ -80,19 +88,42 @@ class M1AverageZone:
         self.config = config
         self.mt5_manager = mt5_manager
         self.position_open_event = position_open_event # Add the event here
+        self.regime_tracker = None # Closed-bar regime timer, kept by the bar feed
+        self.bar_feed = BarFeed(config.symbol, mt5.TIMEFRAME_M1, 20000, # Closed-bar indicator state is kept between cycles
+                                snapshot_path=f"{SNAPSHOT_DIR}/strategy_{config.strategy_id}_M1") # and across restarts
         self.screenshot_tool = screenshot_tool # Add the screenshot tool
         
     def get_data(self):
         """
-        Fetches the latest price data from MT5.
+        Refreshes the bar window from MT5. After the first call only the newest
+        bars are fetched and the incremental indicators advance by closed bars.
+
+        Returns:
+            str: The BarFeed update status, or None if the rates could not be fetched.
         """
-        rates = mt5.copy_rates_from_pos(self.config.symbol, mt5.TIMEFRAME_M1, 0, 20000)
-        if rates is None:
-            log_error(f"Failed to get rates for {self.config.symbol}")
-            return None
-        
-        rates_df = pd.DataFrame(rates)
-        rates_df['time'] = pd.to_datetime(rates_df['time'], unit='s')
+        return self.bar_feed.update()
+
+    def chart_data(self):
+        """
+        Builds the DataFrame for chart_screenshot.py, only when a trade is placed.
+        """
+        rates_df = self.bar_feed.to_dataframe().copy()
+
+        # ------------------------------------------------------------------
+        # FIX: Calculate and add EMA columns required by chart_screenshot.py
+        # ------------------------------------------------------------------
+        # Using your configuration periods to calculate the full EMA series:
+
+        # 'ema_fast' (e.g., using trailing_period=7)
+        rates_df['entry'] = rates_df['close'].ewm(span=self.config.trailing_period, adjust=False).mean()
+        rates_df['resistance'] = rates_df['high'].ewm(span=self.config.ema_resistance, adjust=False).mean()
+        rates_df['support'] = rates_df['low'].ewm(span=self.config.ema_support, adjust=False).mean()
+
+        # 'ema_slow' (e.g., using consolidation_filter=20)
+        rates_df['consolidation_filter'] = rates_df['close'].ewm(span=self.config.consolidation_filter, adjust=False).mean()
+
+        # 'ema_long' (e.g., using long_term_trend=21)
+        rates_df['long_term_trend'] = rates_df['close'].ewm(span=self.config.long_term_trend, adjust=False).mean()
         return rates_df
 
     def execute_trade(self, order_type, rates_df):
@@ -202,6 +233,19 @@ class M1AverageZone:
         while True:
             # Use the new precise timing function
             wait_until_next_interval()
+            beat() # Supervisor liveness
+
+            # Check Trading Hours before touching the terminal; sleep through the closed session
+            if not is_trading_hours():
+                log_warning(f"Outside Trading Hours. Sleeping until the next session...")
+                sleep_until_trading_hours()
+                continue # conutine means ignore succeeding codes and will go back to the main loop.
+            cycle_started() # Loop latency metric, closed-session cycles are not counted
+
+            # Get new data, also while a position is open so every closed bar reaches the regime timer
+            feed_status = self.get_data()
+            if feed_status is not None:
+                self.regime_tracker = self.bar_feed.regime(self.config) # Seeded from the window, advanced per closed bar
 
             # Check for existing positions
             positions = mt5.positions_get(symbol=self.config.symbol)
@@ -215,72 +259,51 @@ class M1AverageZone:
                 log_info(f"Position already exists. Skipping entry signal check.")
                 continue
 
-            # Get new data
-            rates_df = self.get_data()
-            if rates_df is None or len(rates_df) < self.config.long_term_trend + 10:
+            if feed_status is None or len(self.bar_feed) < self.config.long_term_trend + 10:
                 log_warning("Not enough data to run indicators. Waiting...")
                 continue
 
 
-            # ------------------------------------------------------------------
-            # FIX: Calculate and add EMA columns required by chart_screenshot.py
-            # ------------------------------------------------------------------
-            # Using your configuration periods to calculate the full EMA series:
-            
-            # 'ema_fast' (e.g., using trailing_period=7)
-            rates_df['entry'] = rates_df['close'].ewm(span=self.config.trailing_period, adjust=False).mean()
-            rates_df['resistance'] = rates_df['high'].ewm(span=self.config.ema_resistance, adjust=False).mean()
-            rates_df['support'] = rates_df['low'].ewm(span=self.config.ema_support, adjust=False).mean()
-            
-            # 'ema_slow' (e.g., using consolidation_filter=20)
-            rates_df['consolidation_filter'] = rates_df['close'].ewm(span=self.config.consolidation_filter, adjust=False).mean()
-            
-            # 'ema_long' (e.g., using long_term_trend=21)
-            rates_df['long_term_trend'] = rates_df['close'].ewm(span=self.config.long_term_trend, adjust=False).mean()
-            
-            # ------------------------------------------------------------------            
-
 
-            # Check Trading Hours
-
-            if not is_trading_hours():
-                log_warning(f"Outside Trading Hours. Waiting...")
-                continue # conutine means ignore succeeding codes and will go back to the main loop.
+            # Same closed bars and same forming bar as the last 'hold': the decision cannot change
+            if not self.bar_feed.changed_since_evaluation():
+                log_info(f"No new bar and no price change since the last evaluation. Skipping.")
+                continue
 
 
 
 
             # Use the Indicators class
-            indicator_tools = Indicators(rates_df)
+            indicator_tools = Indicators() # Candle ranges only; EMAs come from the bar feed
             
             #-------------------------------------------------------
             # CORE STRATEGY LOGIC
             #-------------------------------------------------------
             
             # Check Indicators' Values
-            current_price = indicator_tools.get_current_price()
+            current_price = self.bar_feed.current_price()
 
-            ema_resistance_high = indicator_tools.get_last_ema_value(
+            ema_resistance_high = self.bar_feed.ema(
                 period=self.config.ema_resistance,
                 price_type='high'
             )        
 
-            ema_resistance_low = indicator_tools.get_last_ema_value(
+            ema_resistance_low = self.bar_feed.ema(
                 period=self.config.ema_support,
                 price_type='low'
             )     
 
-            ema_trailing_period = indicator_tools.get_last_ema_value(
+            ema_trailing_period = self.bar_feed.ema(
                 period=self.config.trailing_period,
                 price_type='close'
             )                                  
             
-            ema_consolidation_filter = indicator_tools.get_last_ema_value(
+            ema_consolidation_filter = self.bar_feed.ema(
                 period=self.config.consolidation_filter,
                 price_type='close'
             )   
 
-            ema_long_term_trend = indicator_tools.get_last_ema_value(
+            ema_long_term_trend = self.bar_feed.ema(
                 period=self.config.long_term_trend,
                 price_type='close'
             )               
@@ -365,6 +388,7 @@ class M1AverageZone:
             config_metrics_table.add_column("Value", style="green")
  
             config_metrics_table.add_row(f"Trend", str("Bullish" if trend == 'bullish 🟢' else "Bearish" if trend == 'bearish 🟡' else "Consolidation") ) 
+            config_metrics_table.add_row(f"Time in Regime", f"{self.regime_tracker.time_in_regime(now=self.bar_feed.bars['time'][-1]) / 60:.1f} Minutes ({self.regime_tracker.name})")
             config_metrics_table.add_row(f"Distance vs Trailing Guide ", f"{points_distance_vs_trailing_guide:.2f} Points")
             config_metrics_table.add_row(f"Distance vs Support ", f"{points_distance_vs_ema_support:.2f} Points")
             config_metrics_table.add_row(f"Distance vs Resistance ", f"{points_distance_vs_ema_resistance:.2f} Points" )
@@ -418,17 +442,18 @@ class M1AverageZone:
                 print("Buying!")
                 signal = 'buy'
                 log_info("Bullish signal and price is in Support Zone. Placing BUY order.")
-                self.execute_trade(mt5.ORDER_TYPE_BUY,rates_df)
+                self.execute_trade(mt5.ORDER_TYPE_BUY,self.chart_data())
             # Disabling Candle Range threshold for now as trades would be limited on a trending market.
             #elif trend == 'bearish 🟡' and points_distance_vs_trailing_guide <= distance_threshold_in_points and h1_within_range and h4_within_range:     
             elif trend == 'bearish 🟡' and points_distance_vs_trailing_guide <= distance_threshold_in_points:                    
                 print(f"Selling! {self.config.volume}")
                 signal = 'sell'
                 log_info("Bearish signal and price is in Resistance Zone. Placing SELL order.")
-                self.execute_trade(mt5.ORDER_TYPE_SELL,rates_df)                
+                self.execute_trade(mt5.ORDER_TYPE_SELL,self.chart_data())                
             else:
                 # print("Hold!")
                 signal = 'hold'
+                self.bar_feed.mark_evaluated() # Re-evaluate only once the bars change
                 if trend == 'bullish 🟢':
                     log_info(f"Signal: {signal}")
                     log_info(f"No valid trading signal detected.")
@@ -515,6 +540,10 @@ def start_strategy():
     screenshot_tool = screenshot(SCREENSHOT_DIR=screenshot_dir)
     # ----------------------------------------------------    
 
+    enable_profiling(config_settings.strategy_id) # profile_strategy.py <strategy_id> starts a profile
+    enable_memory_guard(config_settings.strategy_id) # logs/memory_strategy_<id>.log
+    watch_config(config_settings) # Applied between cycles; edit the JSON instead of this file to retune
+
     # 2. Instantiate and connect the MT5 manager
 
      # Change to "LIVE" for live trading
@@ -0,0 +1,84 @@
+#-----------------------------------------
+# filename: supervisor.py
+# description: Runs the strategies, market_data.py and the database sync as
+#              supervised child processes (heartbeats, restart with backoff,
+#              CPU affinity and priority by role) with a live status table.
+#              Replaces the .bat runners. Merged Prometheus metrics of all
+#              children: http://127.0.0.1:9100/metrics
+#
+#   python supervisor.py demo          -> 🧪Demo_strategy_runner_1.bat
+#   python supervisor.py live          -> 🔒Live_strategy_runner.bat
+#   python supervisor.py demo simulate -> simulated children, no MT5 needed (Linux)
+#-----------------------------------------
+import os
+import sys
+import glob
+
+# Rich imports for beautiful logging
+from rich.console import Console
+
+#-----------------------------------
+# Utilities and Global Variables
+#-----------------------------------
+from modules.utilities import log_success, log_error, log_warning, log_info
+from modules.supervisor import Supervisor, ProcessSpec, ROLE_EXECUTOR, ROLE_COLLECTOR
+
+console = Console()
+
+COLLECTOR_HEARTBEAT_TIMEOUT = 900   # initial history loads and deal syncs take a while
+METRICS_PORT = 9100                 # merged /metrics; children use the next ports
+
+PROFILES = {
+    'demo': [
+        ProcessSpec("db", "database_baseline.py", ROLE_COLLECTOR, heartbeat_timeout=COLLECTOR_HEARTBEAT_TIMEOUT),
+        ProcessSpec("mk", "market_data.py", ROLE_COLLECTOR, heartbeat_timeout=COLLECTOR_HEARTBEAT_TIMEOUT),
+        ProcessSpec("13", "strategy_13_demo.py"),
+        ProcessSpec("10", "strategy_10_demo.py"),
+        ProcessSpec("16", "strategy_16_demo.py"),
+        ProcessSpec("20", "strategy_20_demo.py"),
+        ProcessSpec("23", "strategy_23_demo.py"),
+        ProcessSpec("26", "strategy_26.py"),
+        ProcessSpec("28", "strategy_28.py"),
+        ProcessSpec("30", "strategy_30.py"),
+        ProcessSpec("32", "strategy_32.py"),
+        ProcessSpec("42", "m2_3LH_1021_t300.py"),
+        ProcessSpec("43", "m2_3LH_1021_t350.py"),
+        ProcessSpec("44", "m2_3LH_1021_tinf.py"),
+        ProcessSpec("46", "m2_3LH_1021_t150.py"),
+        ProcessSpec("48", "m2_3LH1021_ST150.py"),
+        ProcessSpec("50", "m2_3LH_r150r200.py"),
+        ProcessSpec("52", "m2_3LH_S150_tinf.py"),
+        ProcessSpec("54", "m2_3S150TinfTS21.py"),
+        ProcessSpec("55/90", "m1_3S300TinfTS21.py"),
+        ProcessSpec("56/91", "m2_3S300TinfTS21.py"),
+        ProcessSpec("61", "m1_3S300T450TS21.py"),
+        ProcessSpec("62", "strategy_01_1am_4am_10am_5pm.py"),
+    ],
+    'live': [
+        ProcessSpec("Mk", "market_data.py", ROLE_COLLECTOR, heartbeat_timeout=COLLECTOR_HEARTBEAT_TIMEOUT),
+        ProcessSpec("Database", "database_live.py", ROLE_COLLECTOR, heartbeat_timeout=COLLECTOR_HEARTBEAT_TIMEOUT),
+        ProcessSpec("LIVE - 20", "strategy_20_demo.py"),
+    ],
+}
+
+
+def cleanup():
+    """Same as the .bat runners: stale .lock and .log files go before the first start."""
+    for path in glob.glob("*.lock") + glob.glob("*.log"):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+if __name__ == "__main__":
+    profile = sys.argv[1] if len(sys.argv) > 1 else 'demo'
+    simulated = 'simulate' in sys.argv[2:]
+    if profile not in PROFILES:
+        log_error(f"Unknown profile '{profile}'. Choose one of: {', '.join(PROFILES)}")
+        sys.exit(1)
+
+    cleanup()
+    supervisor = Supervisor(PROFILES[profile], simulated=simulated, console_windows=sys.platform == 'win32',
+                            metrics_port=METRICS_PORT)
+    supervisor.run()
@@ -0,0 +1,50 @@
+# tests/test_bar_feed.py
+#---------------------------------------
+# BarFeed warm restart against benchmarks.fake_mt5
+#---------------------------------------
+# Run with: python -m pytest tests
+
+import time
+import numpy as np
+import pytest
+
+from benchmarks import fake_mt5
+
+mt5 = fake_mt5.install() # Must precede every import of MetaTrader5
+
+from modules.bar_feed import BarFeed, FEED_RESUMED, FEED_RELOADED
+
+
+@pytest.fixture
+def terminal():
+    start = mt5.terminal.end
+    yield mt5.terminal
+    mt5.terminal.end = start # Rewind the clock for the next test
+
+
+def restart_after(terminal, tmp_path, monkeypatch, gap_bars, utc_offset_hours):
+    path = str(tmp_path / "feed_M1")
+    feed = BarFeed("GOLD#", mt5.TIMEFRAME_M1, 2000, snapshot_path=path)
+    assert feed.update() == FEED_RELOADED
+    feed.checkpoint(force=True)
+
+    terminal.advance(gap_bars)
+    # Bar times are broker server time; the local UTC clock lags it by the offset
+    server_now = terminal.now() + 60
+    monkeypatch.setattr(time, "time", lambda: server_now - utc_offset_hours * 3600)
+    restarted = BarFeed("GOLD#", mt5.TIMEFRAME_M1, 2000, snapshot_path=path)
+    return restarted, restarted.update()
+
+
+@pytest.mark.parametrize("utc_offset_hours", [0, 2, 3])
+def test_resume_after_gap_with_server_time_offset(terminal, tmp_path, monkeypatch, utc_offset_hours):
+    restarted, status = restart_after(terminal, tmp_path, monkeypatch, 10, utc_offset_hours)
+    assert status == FEED_RESUMED
+    expected = terminal.rates(mt5.TIMEFRAME_M1)[-2000:]
+    np.testing.assert_array_equal(restarted.bars['time'], expected['time'])
+    np.testing.assert_array_equal(restarted.bars['close'], expected['close'])
+
+
+def test_resume_reloads_when_the_gap_exceeds_the_window(terminal, tmp_path, monkeypatch):
+    _, status = restart_after(terminal, tmp_path, monkeypatch, 2500, 2)
+    assert status == FEED_RELOADED
@@ -0,0 +1,116 @@
+#-----------------------------------------
+# filename: walk_forward_optimizer.py
+# description: Walk-forward optimization of the M1 Average Zone config
+#              families over the GOLD M1 history collected by market_data.py.
+#              Prints the per-fold choices and writes the stitched
+#              out-of-sample equity curve of each family to Reports/.
+#-----------------------------------------
+import os
+import csv
+import sqlite3
+import numpy as np
+
+# Rich imports for beautiful logging
+from rich.console import Console
+
+#-----------------------------------
+# Utilities and Global Variables
+#-----------------------------------
+from modules.utilities import log_success, log_error, log_warning, log_info
+from modules.mt5_config import TradingConfig
+from modules.walk_forward import WalkForward
+
+console = Console()
+
+DB_NAME = 'market_data.db'
+TABLE_NAME = 'gold'        # market_data.py
+POINT = 0.01
+SPREAD_POINTS = 20         # round-trip cost per trade
+REPORT_DIR = 'Reports'
+
+IN_SAMPLE_DAYS = 20
+OUT_SAMPLE_DAYS = 5
+OBJECTIVE = 'recovery_factor'
+MIN_TRADES = 10
+CACHE_DIR = '.backtest_cache'  # content-addressed backtest results, None to disable
+
+# Parameters that were picked from a few weeks of demo results
+GRID = {
+    'support_resistance_distance_threshold': [10, 20, 30, 50],
+    'trailing_activation_points': [100, 150, 250, 320],
+    'consolidation_filter': [12, 15, 20],
+}
+
+
+def base_config(name, sl_points, tp_points, trailing_activation_points, ema_period, consolidation_filter, long_term_trend):
+    return TradingConfig(
+        symbol='GOLDm#',
+        filename=name,
+        strategy_id=0,
+        volume=0.01,
+        deviation=20,
+        sl_points=sl_points,
+        tp_points=tp_points,
+        trailing_activation_points=trailing_activation_points,
+        trailing_stop_distance=40,
+        trailing_period=ema_period,
+        ema_resistance=ema_period,
+        ema_support=ema_period,
+        support_resistance_distance_threshold=20,
+        consolidation_filter=consolidation_filter,
+        long_term_trend=long_term_trend,
+        max_candle_range_1h_allowed=1100,
+        max_candle_range_4h_allowed=1800
+    )
+
+
+# name -> (base config, grid, use_tp); use_tp mirrors how the live strategy exits
+FAMILIES = {
+    # strategy_20_demo.py: 3-EMA zone, 50 EMA long-term trend; no "tp" in the order, TakeProfitMonitor off
+    'EMA 3 / LT 50': (base_config('strategy_20_demo.py', 300, 350, 150, 3, 12, 50), GRID, False),
+    # strategy_10_demo.py: 7-EMA zone, 21 EMA long-term trend; broker TP on the order
+    'EMA 7 / LT 21': (base_config('strategy_10_demo.py', 250, 300, 150, 7, 20, 21), GRID, True),
+}
+
+
+def load_bars():
+    conn = sqlite3.connect(DB_NAME)
+    rows = np.array(conn.execute(f"SELECT time, open, high, low, close FROM {TABLE_NAME} ORDER BY time").fetchall(), dtype=float)
+    conn.close()
+    if len(rows) == 0:
+        rows = np.empty((0, 5))  # fetchall() of nothing is a 1-d array; main() reports the empty table
+    return {
+        'time': rows[:, 0].astype(np.int64),
+        'open': rows[:, 1],
+        'high': rows[:, 2],
+        'low': rows[:, 3],
+        'close': rows[:, 4],
+    }
+
+
+def write_equity(report):
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    filename = os.path.join(REPORT_DIR, f"walk_forward_{report.family.replace(' ', '').replace('/', '_')}.csv")
+    with open(filename, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['exit_time', 'points', 'equity'])
+        writer.writerows(report.equity_rows())
+    log_success(f"Stitched equity curve written to {filename}")
+
+
+def main():
+    bars = load_bars()
+    if len(bars['time']) == 0:
+        log_warning(f"No bars in {DB_NAME}/{TABLE_NAME}. Run market_data.py first.")
+        return
+
+    walk_forward = WalkForward(bars, POINT, IN_SAMPLE_DAYS, OUT_SAMPLE_DAYS, spread_points=SPREAD_POINTS,
+                               objective=OBJECTIVE, min_trades=MIN_TRADES, cache_dir=CACHE_DIR)
+    reports = walk_forward.run(FAMILIES)
+    for report in reports.values():
+        report.display(bars['time'])
+        write_equity(report)
+
+
+if __name__ == "__main__":
+    main()